@@ -9,7 +9,7 @@ from alembic import context
 from shared.database import Base  # Import Base from database.py where it's defined
 from shared.config import settings  # or wherever your config comes from
 # Import all models to ensure they're available for autogeneration
-from shared.models import User, Restaurant, MenuItem, Order, OrderItem, Rating, DeliveryAgent
+from shared.models import User, Restaurant, MenuItem, Order, OrderItem, Rating, DeliveryAgent, IdempotencyKey, RestaurantOpeningHours, OutboxMessage
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
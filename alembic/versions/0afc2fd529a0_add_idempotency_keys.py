@@ -0,0 +1,29 @@
+"""add_idempotency_keys
+
+Revision ID: 0afc2fd529a0
+Revises: 1048e229caf9
+Create Date: 2026-10-17 11:02:51.730518
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+# revision identifiers, used by Alembic.
+revision: str = '0afc2fd529a0'
+down_revision: Union[str, None] = '1048e229caf9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+def upgrade() -> None:
+    op.create_table('idempotency_keys',
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('key', sa.String(length=255), nullable=False),
+    sa.Column('request_hash', sa.String(length=64), nullable=False),
+    sa.Column('order_id', sa.UUID(), nullable=True),
+    sa.Column('response', sa.JSON(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('user_id', 'key'),
+    schema='orders'
+    )
+def downgrade() -> None:
+    op.drop_table('idempotency_keys', schema='orders')
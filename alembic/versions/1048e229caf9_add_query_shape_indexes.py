@@ -0,0 +1,65 @@
+"""add_query_shape_indexes
+
+Revision ID: 1048e229caf9
+Revises: e15d48c720ea
+Create Date: 2026-10-17 10:12:37.412903
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+# revision identifiers, used by Alembic.
+revision: str = '1048e229caf9'
+down_revision: Union[str, None] = 'e15d48c720ea'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+KITCHEN_ACTIVE = sa.text("status IN ('accepted', 'preparing', 'ready_for_pickup')")
+DELIVERY_ACTIVE = sa.text("status IN ('assigned', 'picked_up', 'on_the_way')")
+
+# (name, table, schema, columns, options) matching the hot query shapes;
+# check them against a live database with verify_indexes.py
+INDEXES = [
+    ('ix_orders_user_created', 'orders', 'orders', ['user_id', 'created_at', 'id'], {}),
+    ('ix_orders_restaurant_created', 'orders', 'orders', ['restaurant_id', 'created_at', 'id'], {}),
+    ('ix_orders_restaurant_status_created', 'orders', 'orders', ['restaurant_id', 'status', 'created_at', 'id'], {}),
+    ('ix_orders_agent_created', 'orders', 'orders', ['delivery_agent_id', 'created_at', 'id'], {}),
+    ('ix_orders_restaurant_active', 'orders', 'orders', ['restaurant_id', 'created_at', 'id'],
+     {'postgresql_include': ['status'], 'postgresql_where': KITCHEN_ACTIVE}),
+    ('ix_orders_agent_active', 'orders', 'orders', ['delivery_agent_id', 'created_at', 'id'],
+     {'postgresql_include': ['status'], 'postgresql_where': DELIVERY_ACTIVE}),
+    ('ix_orders_order_items_order_id', 'order_items', 'orders', ['order_id'], {}),
+    ('ix_menu_items_restaurant_available_category', 'menu_items', 'restaurants',
+     ['restaurant_id', 'is_available', 'category'], {}),
+    ('ix_restaurants_online', 'restaurants', 'restaurants', ['created_at', 'id'],
+     {'postgresql_where': sa.text('is_online')}),
+    ('ix_delivery_agents_available', 'delivery_agents', 'delivery', ['created_at', 'id'],
+     {'postgresql_where': sa.text('is_available')}),
+]
+
+# Single-column indexes made redundant by the composites above
+REPLACED_INDEXES = [
+    ('ix_orders_orders_user_id', 'orders', 'orders', ['user_id']),
+    ('ix_orders_orders_restaurant_id', 'orders', 'orders', ['restaurant_id']),
+    ('ix_orders_orders_delivery_agent_id', 'orders', 'orders', ['delivery_agent_id']),
+    ('ix_delivery_delivery_agents_is_available', 'delivery_agents', 'delivery', ['is_available']),
+]
+def upgrade() -> None:
+    # Build concurrently so live tables keep taking writes; that can't run
+    # inside the migration transaction
+    with op.get_context().autocommit_block():
+        for name, table, schema, columns, options in INDEXES:
+            op.create_index(name, table, columns, unique=False, schema=schema,
+                            postgresql_concurrently=True, if_not_exists=True, **options)
+        for name, table, schema, columns in REPLACED_INDEXES:
+            op.drop_index(name, table_name=table, schema=schema,
+                          postgresql_concurrently=True, if_exists=True)
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, schema, columns in REPLACED_INDEXES:
+            op.create_index(name, table, columns, unique=False, schema=schema,
+                            postgresql_concurrently=True, if_not_exists=True)
+        for name, table, schema, columns, options in reversed(INDEXES):
+            op.drop_index(name, table_name=table, schema=schema,
+                          postgresql_concurrently=True, if_exists=True)
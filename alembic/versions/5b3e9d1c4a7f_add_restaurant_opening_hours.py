@@ -0,0 +1,58 @@
+"""add_restaurant_opening_hours
+
+Revision ID: 5b3e9d1c4a7f
+Revises: 0afc2fd529a0
+Create Date: 2026-10-17 12:18:04.905112
+
+"""
+from typing import Sequence, Union
+import logging
+
+from alembic import context, op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from shared.opening_hours import ALWAYS_OPEN, InvalidOperatingHoursError, to_ranges, weekly_intervals
+# revision identifiers, used by Alembic.
+revision: str = '5b3e9d1c4a7f'
+down_revision: Union[str, None] = '0afc2fd529a0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+logger = logging.getLogger('alembic.runtime.migration')
+def upgrade() -> None:
+    opening_hours = op.create_table('restaurant_opening_hours',
+    sa.Column('restaurant_id', sa.UUID(), nullable=False),
+    sa.Column('minutes', postgresql.INT4RANGE(), nullable=False),
+    sa.ForeignKeyConstraint(['restaurant_id'], ['restaurants.restaurants.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('restaurant_id', 'minutes'),
+    schema='restaurants'
+    )
+    op.create_index('ix_restaurant_opening_hours_minutes', 'restaurant_opening_hours', ['minutes'],
+                    unique=False, schema='restaurants', postgresql_using='gist')
+
+    if context.is_offline_mode():
+        # Existing rows can't be read when only emitting SQL. The catalog falls
+        # back to operation_hours until then, but "opening soon" needs the rows
+        logger.warning("Skipping the restaurant_opening_hours backfill in offline mode; existing restaurants have no rows until backfilled")
+        return
+
+    # Backfill from the JSON column; rows the parser rejects keep their old
+    # behaviour (open around the clock) until the restaurant fixes its hours
+    restaurants = op.get_bind().execute(
+        sa.text('SELECT id, operation_hours FROM restaurants.restaurants')
+    ).all()
+    rows = []
+    for restaurant_id, operation_hours in restaurants:
+        try:
+            intervals = weekly_intervals(operation_hours)
+        except InvalidOperatingHoursError as e:
+            logger.warning(f"Restaurant {restaurant_id} has invalid operation_hours ({e}); treating it as always open")
+            intervals = list(ALWAYS_OPEN)
+        rows.extend({'restaurant_id': restaurant_id, 'minutes': minutes} for minutes in to_ranges(intervals))
+    if rows:
+        op.bulk_insert(opening_hours, rows)
+def downgrade() -> None:
+    op.drop_index('ix_restaurant_opening_hours_minutes', table_name='restaurant_opening_hours',
+                  schema='restaurants', postgresql_using='gist')
+    op.drop_table('restaurant_opening_hours', schema='restaurants')
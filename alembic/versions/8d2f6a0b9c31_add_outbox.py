@@ -0,0 +1,39 @@
+"""add_outbox
+
+Revision ID: 8d2f6a0b9c31
+Revises: 5b3e9d1c4a7f
+Create Date: 2026-10-17 13:05:26.118240
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+# revision identifiers, used by Alembic.
+revision: str = '8d2f6a0b9c31'
+down_revision: Union[str, None] = '5b3e9d1c4a7f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+def upgrade() -> None:
+    op.create_table('outbox',
+    sa.Column('id', sa.BigInteger(), sa.Identity(always=False), nullable=False),
+    sa.Column('aggregate_id', sa.UUID(), nullable=False),
+    sa.Column('destination', sa.String(length=50), nullable=False),
+    sa.Column('path', sa.String(length=255), nullable=False),
+    sa.Column('payload', sa.JSON(), nullable=False),
+    sa.Column('attempts', sa.Integer(), server_default=sa.text('0'), nullable=False),
+    sa.Column('last_error', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('available_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('dead_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    schema='orders'
+    )
+    op.create_index('ix_outbox_pending', 'outbox', ['id'], unique=False, schema='orders',
+                    postgresql_where=sa.text('dead_at IS NULL'))
+    op.create_index('ix_outbox_aggregate_pending', 'outbox', ['aggregate_id', 'id'], unique=False, schema='orders',
+                    postgresql_where=sa.text('dead_at IS NULL'))
+def downgrade() -> None:
+    op.drop_index('ix_outbox_aggregate_pending', table_name='outbox', schema='orders')
+    op.drop_index('ix_outbox_pending', table_name='outbox', schema='orders')
+    op.drop_table('outbox', schema='orders')
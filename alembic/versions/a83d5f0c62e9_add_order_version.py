@@ -0,0 +1,22 @@
+"""add_order_version
+
+Revision ID: a83d5f0c62e9
+Revises: f2b7c8e91d04
+Create Date: 2026-10-17 17:41:09.208513
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+# revision identifiers, used by Alembic.
+revision: str = 'a83d5f0c62e9'
+down_revision: Union[str, None] = 'f2b7c8e91d04'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+def upgrade() -> None:
+    # A constant default is stored in the catalog, so existing rows are not rewritten
+    op.add_column('orders', sa.Column('version', sa.Integer(), server_default=sa.text('1'), nullable=False),
+                  schema='orders')
+def downgrade() -> None:
+    op.drop_column('orders', 'version', schema='orders')
@@ -0,0 +1,43 @@
+"""add_order_events
+
+Revision ID: b6e3d94a1f27
+Revises: a83d5f0c62e9
+Create Date: 2026-10-17 19:12:44.630218
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+# revision identifiers, used by Alembic.
+revision: str = 'b6e3d94a1f27'
+down_revision: Union[str, None] = 'a83d5f0c62e9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+def upgrade() -> None:
+    op.create_table('order_events',
+    sa.Column('order_id', sa.UUID(), nullable=False),
+    sa.Column('occurred_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('status', sa.SmallInteger(), autoincrement=False, nullable=False),
+    sa.Column('restaurant_id', sa.UUID(), nullable=False),
+    sa.Column('delivery_agent_id', sa.UUID(), nullable=True),
+    sa.Column('estimated_prep_time', sa.SmallInteger(), nullable=True),
+    sa.PrimaryKeyConstraint('order_id', 'occurred_at', 'status'),
+    schema='orders'
+    )
+    op.create_index('ix_order_events_occurred_at', 'order_events', ['occurred_at'], unique=False,
+                    schema='orders', postgresql_using='brin')
+    # Seed the timeline from the timestamps existing orders already have
+    # (codes from shared.order_state.STATUS_CODES: pending, accepted, delivered)
+    op.execute("""
+        INSERT INTO orders.order_events (order_id, occurred_at, status, restaurant_id, delivery_agent_id)
+        SELECT id, seen.occurred_at, code, restaurant_id, delivery_agent_id
+        FROM orders.orders,
+             LATERAL (VALUES (placed_at, 1), (accepted_at, 2), (delivered_at, 9)) AS seen(occurred_at, code)
+        WHERE seen.occurred_at IS NOT NULL
+        ORDER BY seen.occurred_at
+    """)
+def downgrade() -> None:
+    op.drop_index('ix_order_events_occurred_at', table_name='order_events', schema='orders',
+                  postgresql_using='brin')
+    op.drop_table('order_events', schema='orders')
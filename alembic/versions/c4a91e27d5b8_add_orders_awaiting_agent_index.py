@@ -0,0 +1,25 @@
+"""add_orders_awaiting_agent_index
+
+Revision ID: c4a91e27d5b8
+Revises: 8d2f6a0b9c31
+Create Date: 2026-10-17 14:21:48.660371
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+# revision identifiers, used by Alembic.
+revision: str = 'c4a91e27d5b8'
+down_revision: Union[str, None] = '8d2f6a0b9c31'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index('ix_orders_awaiting_agent', 'orders', ['accepted_at', 'id'], unique=False, schema='orders',
+                        postgresql_where=sa.text("status = 'accepted' AND delivery_agent_id IS NULL"),
+                        postgresql_concurrently=True, if_not_exists=True)
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_orders_awaiting_agent', table_name='orders', schema='orders',
+                      postgresql_concurrently=True, if_exists=True)
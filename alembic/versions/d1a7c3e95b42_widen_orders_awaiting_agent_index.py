@@ -0,0 +1,36 @@
+"""widen_orders_awaiting_agent_index
+
+Revision ID: d1a7c3e95b42
+Revises: b6e3d94a1f27
+Create Date: 2026-10-17 20:05:31.418227
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+# revision identifiers, used by Alembic.
+revision: str = 'd1a7c3e95b42'
+down_revision: Union[str, None] = 'b6e3d94a1f27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+def upgrade() -> None:
+    # Orders wait for batch dispatch in any kitchen status, not only 'accepted'.
+    # Build the new index before dropping the old one so dispatch is never unindexed.
+    with op.get_context().autocommit_block():
+        op.create_index('ix_orders_awaiting_agent_new', 'orders', ['accepted_at', 'id'], unique=False, schema='orders',
+                        postgresql_where=sa.text(
+                            "status IN ('accepted', 'preparing', 'ready_for_pickup') AND delivery_agent_id IS NULL"
+                        ),
+                        postgresql_concurrently=True, if_not_exists=True)
+        op.drop_index('ix_orders_awaiting_agent', table_name='orders', schema='orders',
+                      postgresql_concurrently=True, if_exists=True)
+        op.execute('ALTER INDEX orders.ix_orders_awaiting_agent_new RENAME TO ix_orders_awaiting_agent')
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index('ix_orders_awaiting_agent_old', 'orders', ['accepted_at', 'id'], unique=False, schema='orders',
+                        postgresql_where=sa.text("status = 'accepted' AND delivery_agent_id IS NULL"),
+                        postgresql_concurrently=True, if_not_exists=True)
+        op.drop_index('ix_orders_awaiting_agent', table_name='orders', schema='orders',
+                      postgresql_concurrently=True, if_exists=True)
+        op.execute('ALTER INDEX orders.ix_orders_awaiting_agent_old RENAME TO ix_orders_awaiting_agent')
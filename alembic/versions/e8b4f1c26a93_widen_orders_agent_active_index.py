@@ -0,0 +1,38 @@
+"""widen_orders_agent_active_index
+
+Revision ID: e8b4f1c26a93
+Revises: d1a7c3e95b42
+Create Date: 2026-10-17 20:31:12.904516
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+# revision identifiers, used by Alembic.
+revision: str = 'e8b4f1c26a93'
+down_revision: Union[str, None] = 'd1a7c3e95b42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+DELIVERY_ACTIVE = sa.text(
+    "status IN ('accepted', 'preparing', 'ready_for_pickup', 'assigned', 'picked_up', 'on_the_way') "
+    "AND delivery_agent_id IS NOT NULL"
+)
+PREVIOUS_DELIVERY_ACTIVE = sa.text("status IN ('assigned', 'picked_up', 'on_the_way')")
+
+
+def _replace(where) -> None:
+    # Build the new index before dropping the old one so agent lists are never unindexed
+    with op.get_context().autocommit_block():
+        op.create_index('ix_orders_agent_active_new', 'orders', ['delivery_agent_id', 'created_at', 'id'],
+                        unique=False, schema='orders', postgresql_include=['status'], postgresql_where=where,
+                        postgresql_concurrently=True, if_not_exists=True)
+        op.drop_index('ix_orders_agent_active', table_name='orders', schema='orders',
+                      postgresql_concurrently=True, if_exists=True)
+        op.execute('ALTER INDEX orders.ix_orders_agent_active_new RENAME TO ix_orders_agent_active')
+def upgrade() -> None:
+    # Orders the kitchen moves on after assignment stay the agent's
+    _replace(DELIVERY_ACTIVE)
+def downgrade() -> None:
+    _replace(PREVIOUS_DELIVERY_ACTIVE)
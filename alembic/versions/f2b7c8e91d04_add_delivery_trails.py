@@ -0,0 +1,32 @@
+"""add_delivery_trails
+
+Revision ID: f2b7c8e91d04
+Revises: c4a91e27d5b8
+Create Date: 2026-10-17 15:02:37.514906
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+# revision identifiers, used by Alembic.
+revision: str = 'f2b7c8e91d04'
+down_revision: Union[str, None] = 'c4a91e27d5b8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+def upgrade() -> None:
+    op.create_table('delivery_trails',
+    sa.Column('order_id', sa.UUID(), nullable=False),
+    sa.Column('delivery_agent_id', sa.UUID(), nullable=False),
+    sa.Column('points', sa.LargeBinary(), server_default=sa.text("''::bytea"), nullable=False),
+    sa.Column('point_count', sa.Integer(), server_default=sa.text('0'), nullable=False),
+    sa.Column('started_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('completed_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('order_id'),
+    schema='delivery'
+    )
+    op.create_index('ix_delivery_trails_agent_open', 'delivery_trails', ['delivery_agent_id'], unique=False,
+                    schema='delivery', postgresql_where=sa.text('completed_at IS NULL'))
+def downgrade() -> None:
+    op.drop_index('ix_delivery_trails_agent_open', table_name='delivery_trails', schema='delivery')
+    op.drop_table('delivery_trails', schema='delivery')
@@ -0,0 +1,42 @@
+"""add_assigned_to_kitchen_active_indexes
+
+Revision ID: f3c9a2d7e184
+Revises: e8b4f1c26a93
+Create Date: 2026-10-17 21:48:05.127730
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+# revision identifiers, used by Alembic.
+revision: str = 'f3c9a2d7e184'
+down_revision: Union[str, None] = 'e8b4f1c26a93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+KITCHEN_ACTIVE = "status IN ('accepted', 'preparing', 'ready_for_pickup', 'assigned')"
+PREVIOUS_KITCHEN_ACTIVE = "status IN ('accepted', 'preparing', 'ready_for_pickup')"
+
+# (name, columns, options, extra predicate)
+INDEXES = [
+    ('ix_orders_restaurant_active', ['restaurant_id', 'created_at', 'id'], {'postgresql_include': ['status']}, None),
+    ('ix_orders_awaiting_agent', ['accepted_at', 'id'], {}, 'delivery_agent_id IS NULL'),
+]
+
+
+def _replace(kitchen_active: str) -> None:
+    # Build each new index before dropping the old one so the views are never unindexed
+    with op.get_context().autocommit_block():
+        for name, columns, options, extra in INDEXES:
+            where = kitchen_active if extra is None else f"{kitchen_active} AND {extra}"
+            op.create_index(f'{name}_new', 'orders', columns, unique=False, schema='orders',
+                            postgresql_where=sa.text(where), postgresql_concurrently=True, if_not_exists=True,
+                            **options)
+            op.drop_index(name, table_name='orders', schema='orders', postgresql_concurrently=True, if_exists=True)
+            op.execute(f'ALTER INDEX orders.{name}_new RENAME TO {name}')
+def upgrade() -> None:
+    # Orders still cooking with an agent on the way are active for the restaurant too
+    _replace(KITCHEN_ACTIVE)
+def downgrade() -> None:
+    _replace(PREVIOUS_KITCHEN_ACTIVE)
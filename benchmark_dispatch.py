@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Compare greedy and batch delivery agent assignment on simulated rushes.
+
+Greedy is what DISPATCH_MODE=greedy does: as each order is accepted it gets
+the best-ranked agent still free. Batch is DISPATCH_MODE=batch: the orders
+of a window are matched to the free agents all at once, minimizing total
+minutes to pickup. Restaurants cluster around a few hotspots, as they do
+downtown, and agents are spread over the whole city. No database needed.
+
+Usage: python benchmark_dispatch.py [--seeds N]
+"""
+import argparse
+import random
+import time
+
+import numpy as np
+
+from restaurant_service.services.batch_dispatcher import FORBIDDEN, cost_matrix, solve_assignment
+from restaurant_service.services.dispatch_engine import Candidate, rank_candidates
+from shared.geo import coordinates
+
+CITY_CENTER = (40.7484, -73.9857)
+CITY_RADIUS_DEG = 0.06
+HOTSPOTS = 5
+RESTAURANTS = 60
+VEHICLES = ("bicycle", "motorcycle", "car", None)
+
+# (orders waiting in the window, free agents)
+SCENARIOS = [(10, 15), (25, 25), (50, 60), (100, 80), (200, 250)]
+
+
+def _point(rng: random.Random, center, spread):
+    return {"latitude": center[0] + rng.uniform(-spread, spread), "longitude": center[1] + rng.uniform(-spread, spread)}
+
+
+def simulate_rush(rng: random.Random, orders: int, agents: int):
+    hotspots = [
+        (p["latitude"], p["longitude"]) for p in (_point(rng, CITY_CENTER, CITY_RADIUS_DEG / 2) for _ in range(HOTSPOTS))
+    ]
+    restaurants = [_point(rng, rng.choice(hotspots), 0.01) for _ in range(RESTAURANTS)]
+    pickups = [rng.choice(restaurants) for _ in range(orders)]
+    candidates = [
+        Candidate(
+            agent_id=f"agent-{i:04d}",
+            location=_point(rng, CITY_CENTER, CITY_RADIUS_DEG),
+            vehicle_type=rng.choice(VEHICLES),
+            active_orders=rng.choice((0, 0, 0, 1, 2))
+        )
+        for i in range(agents)
+    ]
+    return pickups, candidates
+
+
+def greedy(pickups, candidates):
+    """Minutes to pickup of each assigned order, taking the best free agent per order"""
+    free = list(candidates)
+    minutes = []
+    for pickup in pickups:
+        ranked = rank_candidates(free, coordinates(pickup))
+        if not ranked:
+            continue
+        minutes.append(ranked[0].minutes)
+        free = [c for c in free if c.agent_id != ranked[0].agent_id]
+    return minutes
+
+
+def batch(pickups, candidates):
+    """Minutes to pickup of each assigned order, matching the whole window at once"""
+    cost = cost_matrix(pickups, candidates)
+    return [cost[i, j] for i, j in solve_assignment(cost) if cost[i, j] < FORBIDDEN]
+
+
+def _timed(strategy, pickups, candidates):
+    started = time.perf_counter()
+    minutes = strategy(pickups, candidates)
+    return minutes, (time.perf_counter() - started) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--seeds", type=int, default=20, help="rushes simulated per scenario")
+    args = parser.parse_args()
+
+    print(f"{'orders':>6} {'agents':>6} | {'greedy min/order':>16} {'batch min/order':>15} {'saved':>6} "
+          f"| {'assigned g/b':>12} | {'greedy ms':>9} {'batch ms':>8}")
+    for orders, agents in SCENARIOS:
+        results = {"greedy": [], "batch": []}
+        for seed in range(args.seeds):
+            pickups, candidates = simulate_rush(random.Random(seed), orders, agents)
+            for name, strategy in (("greedy", greedy), ("batch", batch)):
+                results[name].append(_timed(strategy, pickups, candidates))
+
+        def mean(name, f):
+            return float(np.mean([f(minutes, ms) for minutes, ms in results[name]]))
+
+        greedy_mean = mean("greedy", lambda m, _: np.mean(m) if m else 0)
+        batch_mean = mean("batch", lambda m, _: np.mean(m) if m else 0)
+        saved = (1 - batch_mean / greedy_mean) * 100 if greedy_mean else 0
+        assigned = f"{mean('greedy', lambda m, _: len(m)):.0f}/{mean('batch', lambda m, _: len(m)):.0f}"
+        print(f"{orders:>6} {agents:>6} | {greedy_mean:>16.1f} {batch_mean:>15.1f} {saved:>5.1f}% "
+              f"| {assigned:>12} | {mean('greedy', lambda _, ms: ms):>9.1f} {mean('batch', lambda _, ms: ms):>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
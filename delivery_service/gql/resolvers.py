@@ -4,7 +4,8 @@ from uuid import UUID
 from fastapi import HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from shared.database import AsyncSessionLocal
+from shared.gql import selects
+from shared.gql.relay import build_connection, page_arguments
 from delivery_service.services import DeliveryAgentService, OrderService
 from delivery_service.schemas import (
     DeliveryAgentCreate, DeliveryAgentUpdate,
@@ -12,7 +13,7 @@ from delivery_service.schemas import (
 )
 from .types import (
     DeliveryAgent, Order, DeliveryAssignment,
-    DeliveryAgentConnection, OrderConnection,
+    DeliveryAgentConnection, OrderConnection, OrderEdge,
     DeliveryAgentInput, DeliveryAgentUpdateInput,
     AssignmentInput, DeliveryStatusUpdateInput,
     PaginationInput, LocationInput, Location
@@ -66,7 +67,7 @@ class Query:
         pagination: Optional[PaginationInput] = None
     ) -> DeliveryAgentConnection:
         """Get delivery agents with optional filtering"""
-        async with AsyncSessionLocal() as db:
+        async with info.context.session() as db:
             try:
                 service = DeliveryAgentService(db)
                 
@@ -74,18 +75,19 @@ class Query:
                 offset = pagination.offset if pagination else 0
                 limit = min(limit, 100)
                 
-                agents = await service.get_delivery_agents(available_only)
-                
-                # Apply pagination manually since the service doesn't support it
-                total_count = len(agents)
-                start = offset
-                end = offset + limit
+                # One extra row tells us whether there is a next page
+                agents = await service.get_delivery_agents(
+                    available_only, limit=limit + 1, offset=offset
+                )
+                has_next_page = len(agents) > limit
+                agents = agents[:limit]
                 
-                paginated_agents = agents[start:end]
-                has_next_page = end < total_count
+                total_count = 0
+                if selects(info, "totalCount"):
+                    total_count = await service.count_delivery_agents(available_only)
                 
                 return DeliveryAgentConnection(
-                    items=[convert_delivery_agent_to_graphql(agent) for agent in paginated_agents],
+                    items=[convert_delivery_agent_to_graphql(agent) for agent in agents],
                     total_count=total_count,
                     has_next_page=has_next_page
                 )
@@ -96,7 +98,7 @@ class Query:
     @strawberry.field
     async def delivery_agent(self, info, agent_id: UUID) -> Optional[DeliveryAgent]:
         """Get delivery agent by ID"""
-        async with AsyncSessionLocal() as db:
+        async with info.context.session() as db:
             try:
                 service = DeliveryAgentService(db)
                 agent = await service.get_delivery_agent_by_id(str(agent_id))
@@ -111,31 +113,25 @@ class Query:
         info, 
         agent_id: UUID,
         active_only: bool = False,
+        first: Optional[int] = None,
+        after: Optional[str] = None,
         pagination: Optional[PaginationInput] = None
     ) -> OrderConnection:
-        """Get orders assigned to a delivery agent"""
-        async with AsyncSessionLocal() as db:
+        """Get orders assigned to a delivery agent, newest first, with cursor pagination"""
+        async with info.context.session() as db:
             try:
                 service = OrderService(db)
                 
-                limit = pagination.limit if pagination else 50
-                offset = pagination.offset if pagination else 0
-                limit = min(limit, 100)
+                limit = page_arguments(first, pagination)
+                page = await service.get_agent_orders(str(agent_id), active_only, limit, after)
                 
-                orders = await service.get_agent_orders(str(agent_id))
+                total_count = 0
+                if selects(info, "totalCount"):
+                    total_count = await service.count_agent_orders(str(agent_id), active_only)
                 
-                # Apply pagination manually
-                total_count = len(orders)
-                start = offset
-                end = offset + limit
-                
-                paginated_orders = orders[start:end]
-                has_next_page = end < total_count
-                
-                return OrderConnection(
-                    items=[convert_order_to_graphql(order) for order in paginated_orders],
-                    total_count=total_count,
-                    has_next_page=has_next_page
+                return build_connection(
+                    OrderConnection, OrderEdge,
+                    page.map(convert_order_to_graphql), total_count
                 )
             except Exception as e:
                 await db.rollback()
@@ -149,7 +145,7 @@ class Mutation:
         agent_input: DeliveryAgentInput
     ) -> DeliveryAgent:
         """Create a new delivery agent"""
-        async with AsyncSessionLocal() as db:
+        async with info.context.session() as db:
             try:
                 service = DeliveryAgentService(db)
                 
@@ -183,7 +179,7 @@ class Mutation:
         agent_input: DeliveryAgentUpdateInput
     ) -> Optional[DeliveryAgent]:
         """Update a delivery agent"""
-        async with AsyncSessionLocal() as db:
+        async with info.context.session() as db:
             try:
                 service = DeliveryAgentService(db)
                 
@@ -214,7 +210,7 @@ class Mutation:
         location: LocationInput
     ) -> Optional[DeliveryAgent]:
         """Update delivery agent location"""
-        async with AsyncSessionLocal() as db:
+        async with info.context.session() as db:
             try:
                 service = DeliveryAgentService(db)
                 
@@ -237,7 +233,7 @@ class Mutation:
         assignment_input: AssignmentInput
     ) -> bool:
         """Assign an order to a delivery agent"""
-        async with AsyncSessionLocal() as db:
+        async with info.context.session() as db:
             try:
                 service = OrderService(db)
                 
@@ -261,7 +257,7 @@ class Mutation:
         agent_id: UUID
     ) -> Optional[Order]:
         """Mark order as picked up"""
-        async with AsyncSessionLocal() as db:
+        async with info.context.session() as db:
             try:
                 service = OrderService(db)
                 order = await service.mark_order_picked_up(order_id, agent_id)
@@ -278,7 +274,7 @@ class Mutation:
         agent_id: UUID
     ) -> Optional[Order]:
         """Mark order as delivered"""
-        async with AsyncSessionLocal() as db:
+        async with info.context.session() as db:
             try:
                 service = OrderService(db)
                 order = await service.mark_order_delivered(order_id, agent_id)
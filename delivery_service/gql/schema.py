@@ -1,4 +1,7 @@
 import strawberry
+from shared.config import settings
+from shared.gql import QueryCostLimiter
+from shared.gql.context import UnitOfWork
 from .resolvers import Query, Mutation
 
 schema = strawberry.Schema(
@@ -6,6 +9,9 @@ schema = strawberry.Schema(
     mutation=Mutation,
     extensions=[
         strawberry.extensions.QueryDepthLimiter(max_depth=10),
-        strawberry.extensions.ValidationCache(maxsize=100),
+        QueryCostLimiter,
+        UnitOfWork,
+        strawberry.extensions.ParserCache(maxsize=settings.graphql_document_cache_size),
+        strawberry.extensions.ValidationCache(maxsize=settings.graphql_document_cache_size),
     ]
 ) 
\ No newline at end of file
@@ -4,21 +4,15 @@ from datetime import datetime
 from decimal import Decimal
 from uuid import UUID
 from enum import Enum
+
+from shared import order_state
+from shared.gql.relay import PageInfo
 @strawberry.enum
 class VehicleType(Enum):
     BIKE = "bike"
     MOTORCYCLE = "motorcycle"
     CAR = "car"
-@strawberry.enum
-class OrderStatus(Enum):
-    PENDING = "pending"
-    ACCEPTED = "accepted"
-    REJECTED = "rejected"
-    PREPARING = "preparing"
-    READY = "ready"
-    PICKED_UP = "picked_up"
-    DELIVERED = "delivered"
-    CANCELLED = "cancelled"
+OrderStatus = strawberry.enum(order_state.OrderStatus)
 @strawberry.type
 class Location:
     latitude: float
@@ -95,7 +89,13 @@ class DeliveryAgentConnection:
     total_count: int
     has_next_page: bool
 @strawberry.type
+class OrderEdge:
+    cursor: str
+    node: Order
+@strawberry.type
 class OrderConnection:
+    edges: List[OrderEdge]
+    page_info: PageInfo
     items: List[Order]
     total_count: int
     has_next_page: bool
@@ -1,5 +1,6 @@
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from contextlib import asynccontextmanager
 import logging
 import sys
@@ -10,9 +11,12 @@ sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
 from shared.database import engine, Base
 from shared.config import settings
+from shared.metrics import metrics
 from delivery_service.routers import delivery_agent_router, assignments_router, orders_router
+from delivery_service.services.location_buffer import location_buffer
 
-from strawberry.fastapi import GraphQLRouter
+from shared.gql import PersistedQueryRouter
+from shared.gql.context import get_context
 from delivery_service.gql import schema
 
 # Configure logging
@@ -30,11 +34,14 @@ async def lifespan(app: FastAPI):
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
     
+    await location_buffer.start()
+    
     logger.info("Delivery Service startup complete")
     
     yield
     
     logger.info("Delivery Service shutting down...")
+    await location_buffer.stop()
     await engine.dispose()
     logger.info("Delivery Service shutdown complete")
 
@@ -58,7 +65,7 @@ app.include_router(delivery_agent_router)
 app.include_router(assignments_router)
 app.include_router(orders_router)
 
-graphql_app = GraphQLRouter(schema)
+graphql_app = PersistedQueryRouter(schema, context_getter=get_context)
 app.include_router(graphql_app, prefix="/graphql")
 
 @app.get("/health")
@@ -70,6 +77,11 @@ async def health_check():
         "version": "1.0.0"
     }
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics_endpoint():
+    """Prometheus metrics endpoint"""
+    return metrics.render()
+
 @app.get("/")
 async def root():
     """Root endpoint"""
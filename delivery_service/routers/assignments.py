@@ -4,7 +4,7 @@ import logging
 
 from shared.database import get_db
 from delivery_service.services import OrderService
-from delivery_service.schemas import AssignmentRequest
+from delivery_service.schemas import AssignmentRequest, AssignmentEnded
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/assignments", tags=["assignments"])
@@ -37,4 +37,26 @@ async def receive_order_assignment(
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to process assignment"
-        )
\ No newline at end of file
+        )
+
+@router.post("/ended", status_code=status.HTTP_200_OK)
+async def receive_assignment_ended(
+    ended: AssignmentEnded,
+    db: AsyncSession = Depends(get_db)
+) -> dict:
+    """Receive notice from the restaurant service that an assigned order was ended"""
+    try:
+        service = OrderService(db)
+        await service.end_assignment(ended)
+        
+        return {
+            "message": "Assignment end received successfully",
+            "order_id": str(ended.order_id),
+            "agent_id": str(ended.delivery_agent_id)
+        }
+    except Exception as e:
+        logger.error(f"Error processing assignment end: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to process assignment end"
+        )
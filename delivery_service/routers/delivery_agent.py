@@ -1,12 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
+from typing import List, Union
 import logging
 
+from shared.config import settings
 from shared.database import get_db
 from delivery_service.services import DeliveryAgentService
 from delivery_service.schemas import (
-    DeliveryAgentCreate, DeliveryAgentUpdate, DeliveryAgentResponse, LocationUpdate
+    DeliveryAgentCreate, DeliveryAgentUpdate, DeliveryAgentResponse, LocationUpdate, LocationAccepted
 )
 
 logger = logging.getLogger(__name__)
@@ -131,11 +132,19 @@ async def update_agent_location(
     agent_id: str,
     location: LocationUpdate,
     db: AsyncSession = Depends(get_db)
-) -> DeliveryAgentResponse:
-    """Update delivery agent location"""
+) -> Union[LocationAccepted, DeliveryAgentResponse]:
+    """Update delivery agent location.
+
+    By default the location is written before responding and the agent is
+    returned. With LOCATION_WRITE_BEHIND the ping is acknowledged from memory
+    with a LocationAccepted and written in the background.
+    """
     try:
         service = DeliveryAgentService(db)
-        agent = await service.update_location(agent_id, location)
+        if settings.location_write_behind:
+            agent = await service.record_location(agent_id, location)
+        else:
+            agent = await service.update_location(agent_id, location)
         
         if not agent:
             raise HTTPException(
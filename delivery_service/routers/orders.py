@@ -1,11 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
+from typing import List, Optional
+from datetime import datetime
 import logging
 
 from shared.database import get_db
-from delivery_service.services import OrderService
-from delivery_service.schemas import DeliveryOrderResponse, DeliveryStatusUpdate
+from shared.order_timeline import stage_window
+from shared.order_transitions import InvalidTransitionError
+from shared.pagination import InvalidCursorError, page_size
+from delivery_service.services import OrderService, TrailStore
+from delivery_service.schemas import (
+    DeliveryOrderResponse, DeliveryStatusUpdate, DeliveryTrailResponse, StageTimingResponse
+)
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/orders", tags=["orders"])
@@ -13,13 +19,22 @@ router = APIRouter(prefix="/orders", tags=["orders"])
 @router.get("/agent/{agent_id}", response_model=List[DeliveryOrderResponse])
 async def get_agent_orders(
     agent_id: str,
+    response: Response,
+    active_only: bool = True,
+    limit: int = 50,
+    cursor: Optional[str] = None,
     db: AsyncSession = Depends(get_db)
 ) -> List[DeliveryOrderResponse]:
-    """Get all orders assigned to a delivery agent"""
+    """Get orders assigned to a delivery agent, newest first"""
     try:
         service = OrderService(db)
-        orders = await service.get_agent_orders(agent_id)
-        return orders
+        page = await service.get_agent_orders(agent_id, active_only, page_size(limit), cursor)
+        
+        if page.has_next_page:
+            response.headers["X-Next-Cursor"] = page.end_cursor
+        return page.items
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
         logger.error(f"Error fetching orders for agent {agent_id}: {e}")
         raise HTTPException(
@@ -27,6 +42,36 @@ async def get_agent_orders(
             detail="Failed to fetch agent orders"
         )
 
+@router.get("/agent/{agent_id}/timings", response_model=List[StageTimingResponse])
+async def get_agent_stage_timings(
+    agent_id: str,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    db: AsyncSession = Depends(get_db)
+) -> List[StageTimingResponse]:
+    """
+    How long the agent's orders take from ready to picked up and from picked up
+    to delivered: count, average, median, 90th percentile and maximum seconds
+    per stage.
+    
+    Covers the orders that finished each stage in [since, until); by
+    default the last 7 days.
+    """
+    try:
+        since, until = stage_window(since, until)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    
+    try:
+        service = OrderService(db)
+        return await service.get_stage_timings(agent_id, since, until)
+    except Exception as e:
+        logger.error(f"Error fetching stage timings for agent {agent_id}: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to fetch stage timings"
+        )
+
 @router.get("/{order_id}", response_model=DeliveryOrderResponse)
 async def get_order(
     order_id: str,
@@ -53,6 +98,32 @@ async def get_order(
             detail="Failed to fetch order"
         )
 
+@router.get("/{order_id}/trail", response_model=DeliveryTrailResponse)
+async def get_order_trail(
+    order_id: str,
+    tolerance_m: Optional[float] = Query(None, gt=0, description="Simplify the path to this many metres"),
+    db: AsyncSession = Depends(get_db)
+) -> DeliveryTrailResponse:
+    """Get the route the delivery agent took for an order"""
+    try:
+        trail = await TrailStore(db).get_trail(order_id, tolerance_m)
+        
+        if not trail:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="No trail recorded for this order"
+            )
+        
+        return trail
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error fetching trail for order {order_id}: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to fetch order trail"
+        )
+
 @router.patch("/{order_id}/agent/{agent_id}/status", response_model=DeliveryOrderResponse)
 async def update_delivery_status(
     order_id: str,
@@ -74,6 +145,8 @@ async def update_delivery_status(
         return order
     except HTTPException:
         raise
+    except InvalidTransitionError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
     except Exception as e:
         logger.error(f"Error updating delivery status for order {order_id}: {e}")
         raise HTTPException(
@@ -101,6 +174,8 @@ async def mark_order_picked_up(
         return order
     except HTTPException:
         raise
+    except InvalidTransitionError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
     except Exception as e:
         logger.error(f"Error marking order {order_id} as picked up: {e}")
         raise HTTPException(
@@ -128,6 +203,8 @@ async def mark_order_on_the_way(
         return order
     except HTTPException:
         raise
+    except InvalidTransitionError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
     except Exception as e:
         logger.error(f"Error marking order {order_id} as on the way: {e}")
         raise HTTPException(
@@ -155,6 +232,8 @@ async def mark_order_delivered(
         return order
     except HTTPException:
         raise
+    except InvalidTransitionError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
     except Exception as e:
         logger.error(f"Error marking order {order_id} as delivered: {e}")
         raise HTTPException(
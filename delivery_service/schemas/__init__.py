@@ -1,13 +1,15 @@
 from .delivery_agent import (
     DeliveryAgentCreate, DeliveryAgentUpdate, DeliveryAgentResponse,
-    LocationUpdate
+    LocationUpdate, LocationAccepted
 )
 from .order import (
-    DeliveryOrderResponse, DeliveryStatusUpdate, AssignmentRequest
+    DeliveryOrderResponse, DeliveryStatusUpdate, AssignmentRequest, AssignmentEnded,
+    TrailPointResponse, DeliveryTrailResponse, StageTimingResponse
 )
 
 __all__ = [
     "DeliveryAgentCreate", "DeliveryAgentUpdate", "DeliveryAgentResponse",
-    "LocationUpdate", "DeliveryOrderResponse", "DeliveryStatusUpdate",
-    "AssignmentRequest"
+    "LocationUpdate", "LocationAccepted", "DeliveryOrderResponse", "DeliveryStatusUpdate",
+    "AssignmentRequest", "AssignmentEnded", "TrailPointResponse", "DeliveryTrailResponse",
+    "StageTimingResponse"
 ] 
\ No newline at end of file
@@ -21,6 +21,12 @@ class LocationUpdate(BaseModel):
             raise ValueError('Longitude must be between -180 and 180')
         return v
 
+class LocationAccepted(BaseModel):
+    """Schema for a buffered location ping, acknowledged before it is written"""
+    agent_id: uuid.UUID
+    current_location: Dict
+    received_at: datetime
+
 class DeliveryAgentCreate(BaseModel):
     """Schema for creating a new delivery agent"""
     name: str
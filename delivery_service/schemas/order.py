@@ -1,13 +1,22 @@
-from pydantic import BaseModel
-from typing import Optional, Dict
+from pydantic import BaseModel, validator
+from typing import Optional, Dict, List
 from datetime import datetime
 import uuid
 
+from shared.order_state import DELIVERY_AGENT_STATUSES
+
 class DeliveryStatusUpdate(BaseModel):
     """Schema for updating delivery status"""
-    status: str  # 'assigned', 'picked_up', 'on_the_way', 'delivered'
+    status: str  # 'picked_up', 'on_the_way', 'delivered', 'cancelled'
     location: Optional[Dict] = None
     notes: Optional[str] = None
+    expected_version: Optional[int] = None  # fail instead of overwriting a newer change
+
+    @validator('status')
+    def validate_status(cls, v):
+        if v not in DELIVERY_AGENT_STATUSES:
+            raise ValueError(f"Delivery agents can only set status to {', '.join(sorted(DELIVERY_AGENT_STATUSES))}")
+        return v
 
 class AssignmentRequest(BaseModel):
     """Schema for order assignment to delivery agent"""
@@ -15,6 +24,12 @@ class AssignmentRequest(BaseModel):
     delivery_agent_id: uuid.UUID
     assigned_at: datetime
 
+class AssignmentEnded(BaseModel):
+    """Schema for an assigned order the restaurant ended before delivery"""
+    order_id: uuid.UUID
+    delivery_agent_id: uuid.UUID
+    status: str  # the final status, e.g. 'cancelled'
+
 class DeliveryOrderResponse(BaseModel):
     """Schema for order response in delivery context"""
     id: uuid.UUID
@@ -22,6 +37,7 @@ class DeliveryOrderResponse(BaseModel):
     restaurant_id: uuid.UUID
     delivery_agent_id: Optional[uuid.UUID]
     status: str
+    version: int
     total_amount: float
     delivery_address: Dict
     special_instructions: Optional[str]
@@ -50,4 +66,29 @@ class LocationTrackingUpdate(BaseModel):
     latitude: float
     longitude: float
     timestamp: datetime
-    estimated_arrival: Optional[datetime] = None 
\ No newline at end of file
+    estimated_arrival: Optional[datetime] = None
+
+class TrailPointResponse(BaseModel):
+    """Schema for one point of a delivery route"""
+    latitude: float
+    longitude: float
+    recorded_at: datetime
+
+class DeliveryTrailResponse(BaseModel):
+    """Schema for the recorded route of a delivery"""
+    order_id: uuid.UUID
+    delivery_agent_id: uuid.UUID
+    started_at: datetime
+    completed_at: Optional[datetime]
+    point_count: int  # pings received, before simplification
+    points: List[TrailPointResponse]
+
+class StageTimingResponse(BaseModel):
+    """Schema for how long orders spent in one stage, in seconds"""
+    stage: str
+    orders: int
+    avg_seconds: float
+    p50_seconds: float
+    p90_seconds: float
+    max_seconds: float
+    avg_estimated_seconds: Optional[float] = None  # from estimated_prep_time, where given
@@ -1,4 +1,5 @@
 from .delivery_agent_service import DeliveryAgentService
 from .order_service import OrderService
+from .trail_store import TrailStore
 
-__all__ = ["DeliveryAgentService", "OrderService"]
\ No newline at end of file
+__all__ = ["DeliveryAgentService", "OrderService", "TrailStore"]
\ No newline at end of file
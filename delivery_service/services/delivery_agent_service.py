@@ -1,16 +1,29 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update
+from sqlalchemy import select, update, func
 from typing import List, Optional
+from datetime import datetime, timezone
 import logging
 import uuid
 
 from shared.models import DeliveryAgent
+from shared.events import AgentAvailabilityChanged, AgentLocation, AgentLocationsChanged, publish
 from delivery_service.schemas import (
-    DeliveryAgentCreate, DeliveryAgentUpdate, DeliveryAgentResponse, LocationUpdate
+    DeliveryAgentCreate, DeliveryAgentUpdate, DeliveryAgentResponse, LocationUpdate, LocationAccepted
 )
+from shared.trails import TrailPoint
+from .location_buffer import location_buffer
+from .trail_store import TrailStore
 
 logger = logging.getLogger(__name__)
 
+def _with_buffered_location(agent: DeliveryAgent) -> DeliveryAgentResponse:
+    """Response for `agent`, showing a location ping that is not written yet"""
+    response = DeliveryAgentResponse.model_validate(agent)
+    location = location_buffer.latest(agent.id)
+    if location is not None:
+        response = response.model_copy(update={'current_location': location})
+    return response
+
 class DeliveryAgentService:
     def __init__(self, db: AsyncSession):
         self.db = db
@@ -33,6 +46,8 @@ class DeliveryAgentService:
             )
             
             self.db.add(delivery_agent)
+            await self.db.flush()
+            await publish(self.db, AgentAvailabilityChanged(agent_id=delivery_agent.id, is_available=True))
             await self.db.commit()
             await self.db.refresh(delivery_agent)
             
@@ -54,7 +69,7 @@ class DeliveryAgentService:
             agent = result.scalar_one_or_none()
             
             if agent:
-                return DeliveryAgentResponse.model_validate(agent)
+                return _with_buffered_location(agent)
             return None
             
         except ValueError as e:
@@ -64,23 +79,48 @@ class DeliveryAgentService:
             logger.error(f"Error fetching delivery agent {agent_id}: {e}")
             raise
 
-    async def get_delivery_agents(self, available_only: bool = False) -> List[DeliveryAgentResponse]:
-        """Get all delivery agents, optionally filtered by availability"""
+    async def get_delivery_agents(
+        self,
+        available_only: bool = False,
+        limit: Optional[int] = None,
+        offset: int = 0
+    ) -> List[DeliveryAgentResponse]:
+        """Get delivery agents, optionally filtered by availability and paginated in SQL"""
         try:
             stmt = select(DeliveryAgent)
             
             if available_only:
                 stmt = stmt.where(DeliveryAgent.is_available == True)
             
+            # Stable order so LIMIT/OFFSET pages don't overlap
+            stmt = stmt.order_by(DeliveryAgent.created_at, DeliveryAgent.id).offset(offset)
+            if limit is not None:
+                stmt = stmt.limit(limit)
+            
             result = await self.db.execute(stmt)
             agents = result.scalars().all()
             
-            return [DeliveryAgentResponse.model_validate(agent) for agent in agents]
+            return [_with_buffered_location(agent) for agent in agents]
             
         except Exception as e:
             logger.error(f"Error fetching delivery agents: {e}")
             raise
 
+    async def count_delivery_agents(self, available_only: bool = False) -> int:
+        """Count delivery agents without loading them"""
+        try:
+            stmt = select(func.count()).select_from(DeliveryAgent)
+            
+            if available_only:
+                stmt = stmt.where(DeliveryAgent.is_available == True)
+            
+            result = await self.db.execute(stmt)
+            return result.scalar_one()
+            
+        except Exception as e:
+            logger.error(f"Error counting delivery agents: {e}")
+            raise
+
     async def update_delivery_agent(self, agent_id: str, update_data: DeliveryAgentUpdate) -> Optional[DeliveryAgentResponse]:
         """Update delivery agent information"""
         try:
@@ -106,6 +146,13 @@ class DeliveryAgentService:
             if result.rowcount == 0:
                 return None
             
+            if 'current_location' in update_dict:
+                # An older buffered ping must not overwrite this location
+                location_buffer.discard(agent_uuid)
+            if update_dict.get('is_available') is not None:
+                await publish(self.db, AgentAvailabilityChanged(
+                    agent_id=agent_uuid, is_available=update_dict['is_available']
+                ))
             await self.db.commit()
             
             logger.info(f"Updated delivery agent {agent_id} with fields: {list(update_dict.keys())}")
@@ -133,6 +180,7 @@ class DeliveryAgentService:
             if result.rowcount == 0:
                 return None
             
+            await publish(self.db, AgentAvailabilityChanged(agent_id=agent_uuid, is_available=is_available))
             await self.db.commit()
             
             status = "available" if is_available else "unavailable"
@@ -164,6 +212,17 @@ class DeliveryAgentService:
             if result.rowcount == 0:
                 return None
             
+            location_buffer.discard(agent_uuid)
+            recorded_at = datetime.now(timezone.utc)
+            await TrailStore(self.db).append_points(agent_uuid, [
+                TrailPoint(location.latitude, location.longitude, recorded_at)
+            ])
+            await publish(self.db, AgentLocationsChanged(locations=[AgentLocation(
+                agent_id=agent_uuid,
+                latitude=location.latitude,
+                longitude=location.longitude,
+                recorded_at=recorded_at
+            )]))
             await self.db.commit()
             
             logger.info(f"Updated location for delivery agent {agent_id}")
@@ -177,6 +236,30 @@ class DeliveryAgentService:
             logger.error(f"Error updating agent location {agent_id}: {e}")
             raise
 
+    async def record_location(self, agent_id: str, location: LocationUpdate) -> Optional[LocationAccepted]:
+        """Buffer a location ping; it is written to the database by the next flush"""
+        try:
+            agent_uuid = uuid.UUID(agent_id)
+            
+            # Only an agent's first ping costs a query
+            if not location_buffer.is_known(agent_uuid):
+                stmt = select(DeliveryAgent.id).where(DeliveryAgent.id == agent_uuid)
+                if (await self.db.execute(stmt)).scalar_one_or_none() is None:
+                    return None
+                location_buffer.mark_known(agent_uuid)
+            
+            ping = location_buffer.record(agent_uuid, location.dict())
+            return LocationAccepted(
+                agent_id=agent_uuid, current_location=ping.location, received_at=ping.recorded_at
+            )
+            
+        except ValueError as e:
+            logger.error(f"Invalid agent ID format: {agent_id}")
+            return None
+        except Exception as e:
+            logger.error(f"Error recording agent location {agent_id}: {e}")
+            raise
+
     async def get_available_agents(self) -> List[DeliveryAgentResponse]:
         """Get all available delivery agents"""
         return await self.get_delivery_agents(available_only=True) 
\ No newline at end of file
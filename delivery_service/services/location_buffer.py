@@ -0,0 +1,241 @@
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from uuid import UUID
+import asyncio
+import logging
+import time
+
+from sqlalchemy import JSON, DateTime, cast, column, func, or_, update, values
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+
+from shared.config import settings
+from shared.database import AsyncSessionLocal
+from shared.events import AgentLocation, AgentLocationsChanged, publish_many
+from shared.metrics import metrics
+from shared.models import DeliveryAgent
+from shared.trails import TrailPoint, encode
+from .trail_store import TrailStore
+
+logger = logging.getLogger(__name__)
+
+pings = metrics.counter(
+    "agent_location_pings_total", "Agent location pings by outcome (buffered, coalesced)"
+)
+pending_agents = metrics.gauge(
+    "agent_location_pending", "Agents with a location ping waiting to be written"
+)
+oldest_pending_seconds = metrics.gauge(
+    "agent_location_staleness_seconds", "Age of the oldest location ping not yet written"
+)
+flush_seconds = metrics.histogram(
+    "agent_location_flush_seconds", "Time to write one batch of buffered agent locations"
+)
+flush_rows = metrics.histogram(
+    "agent_location_flush_rows", "Agent locations written per flush",
+    buckets=(1, 10, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+)
+flush_lag_seconds = metrics.histogram(
+    "agent_location_flush_lag_seconds", "Time from receiving a location ping to writing it",
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.0, 3.0, 5.0, 10.0, 30.0, 60.0)
+)
+flush_failures = metrics.counter(
+    "agent_location_flush_failures_total", "Flushes of buffered agent locations that failed"
+)
+
+
+class Ping(NamedTuple):
+    location: dict
+    recorded_at: datetime
+    received: float  # monotonic, for lag and staleness
+
+
+def _location_events(batch: List[Tuple[UUID, Ping]]) -> List[AgentLocationsChanged]:
+    locations = [
+        AgentLocation(
+            agent_id=agent_id,
+            latitude=ping.location["latitude"],
+            longitude=ping.location["longitude"],
+            recorded_at=ping.recorded_at
+        )
+        for agent_id, ping in batch
+    ]
+    size = AgentLocationsChanged.MAX_LOCATIONS
+    return [AgentLocationsChanged(locations=locations[i:i + size]) for i in range(0, len(locations), size)]
+
+
+class LocationBuffer:
+    """Write-behind buffer for delivery agent location pings.
+
+    `record()` keeps only the latest ping per agent in memory and returns at
+    once; a background task writes all pending positions every
+    `flush_interval` seconds (sooner once `max_pending` agents are waiting)
+    with one `UPDATE ... FROM (VALUES ...)` per `batch_size` agents. Each
+    stored location carries its `recorded_at` and a write never replaces a
+    newer one, so pings for the same agent landing on different instances
+    cannot go back in time. A failed flush puts its pings back unless a
+    newer one arrived meanwhile. Pings still in memory when the process
+    dies are lost; the next ping replaces them anyway.
+
+    Every ping, coalesced or not, is also kept for the agent's delivery
+    trail and appended by the same flush (see TrailStore). The flushed
+    positions are announced as AgentLocationsChanged events.
+
+    Agents already seen to exist are remembered, up to `max_known` of the
+    most recently active, so their pings skip the existence check.
+    """
+
+    def __init__(
+        self,
+        flush_interval: float = settings.location_flush_interval,
+        max_pending: int = settings.location_flush_max_pending,
+        batch_size: int = settings.location_flush_batch_size,
+        max_known: int = settings.location_known_agents
+    ):
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.batch_size = batch_size
+        self.max_known = max_known
+        self._pending: Dict[UUID, Ping] = {}
+        self._trail_points: Dict[UUID, List[TrailPoint]] = {}
+        self._known_agents: "OrderedDict[UUID, None]" = OrderedDict()
+        self._flush_lock = asyncio.Lock()
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def is_known(self, agent_id: UUID) -> bool:
+        """Whether the agent was already seen to exist, so a ping needs no lookup"""
+        if agent_id not in self._known_agents:
+            return False
+        self._known_agents.move_to_end(agent_id)
+        return True
+
+    def mark_known(self, agent_id: UUID) -> None:
+        self._known_agents[agent_id] = None
+        self._known_agents.move_to_end(agent_id)
+        while len(self._known_agents) > self.max_known:
+            self._known_agents.popitem(last=False)
+
+    def record(self, agent_id: UUID, location: dict) -> Ping:
+        """Keep `location` as the agent's latest position; written at the next flush"""
+        recorded_at = datetime.now(timezone.utc)
+        ping = Ping({**location, "recorded_at": recorded_at.isoformat()}, recorded_at, time.monotonic())
+
+        pings.inc(outcome="coalesced" if agent_id in self._pending else "buffered")
+        self._pending[agent_id] = ping
+        self._trail_points.setdefault(agent_id, []).append(
+            TrailPoint(location["latitude"], location["longitude"], recorded_at)
+        )
+        pending_agents.set(len(self._pending))
+        if len(self._pending) >= self.max_pending:
+            self._wakeup.set()
+        return ping
+
+    def latest(self, agent_id: UUID) -> Optional[dict]:
+        """The agent's buffered location, if one is waiting to be written"""
+        ping = self._pending.get(agent_id)
+        return ping.location if ping is not None else None
+
+    def discard(self, agent_id: UUID) -> None:
+        """Drop a pending ping, e.g. when the location is being set directly"""
+        self._pending.pop(agent_id, None)
+        pending_agents.set(len(self._pending))
+
+    def _update_statement(self, batch: List[Tuple[UUID, Ping]]):
+        rows = values(
+            column("agent_id", PG_UUID(as_uuid=True)),
+            column("location", JSON),
+            column("recorded_at", DateTime(timezone=True)),
+            name="pings"
+        ).data([(agent_id, ping.location, ping.recorded_at) for agent_id, ping in batch])
+
+        stored_at = cast(DeliveryAgent.current_location["recorded_at"].as_string(), DateTime(timezone=True))
+        return (
+            update(DeliveryAgent)
+            .where(
+                DeliveryAgent.id == rows.c.agent_id,
+                or_(stored_at.is_(None), stored_at < rows.c.recorded_at)
+            )
+            .values(current_location=rows.c.location, updated_at=func.now())
+        )
+
+    async def flush(self) -> int:
+        """Write every pending ping; returns how many agents were written"""
+        async with self._flush_lock:
+            if not self._pending and not self._trail_points:
+                oldest_pending_seconds.set(0)
+                return 0
+            batch, self._pending = list(self._pending.items()), {}
+            trail_points, self._trail_points = self._trail_points, {}
+            pending_agents.set(0)
+
+            started = time.perf_counter()
+            try:
+                async with AsyncSessionLocal() as db:
+                    for start in range(0, len(batch), self.batch_size):
+                        await db.execute(self._update_statement(batch[start:start + self.batch_size]))
+
+                    await publish_many(db, _location_events(batch))
+
+                    trails = TrailStore(db)
+                    chunks = [(agent_id, encode(points), len(points)) for agent_id, points in trail_points.items()]
+                    for start in range(0, len(chunks), self.batch_size):
+                        await trails.append(chunks[start:start + self.batch_size])
+                    await db.commit()
+            except Exception as e:
+                flush_failures.inc()
+                logger.error(f"Error writing {len(batch)} buffered agent locations: {e}")
+                for agent_id, ping in batch:
+                    self._pending.setdefault(agent_id, ping)
+                for agent_id, points in trail_points.items():
+                    self._trail_points[agent_id] = points + self._trail_points.get(agent_id, [])
+                pending_agents.set(len(self._pending))
+                raise
+
+            written = time.monotonic()
+            for _, ping in batch:
+                flush_lag_seconds.observe(written - ping.received)
+            flush_seconds.observe(time.perf_counter() - started)
+            flush_rows.observe(len(batch))
+            self._observe_staleness()
+            return len(batch)
+
+    def _observe_staleness(self) -> None:
+        oldest = min((ping.received for ping in self._pending.values()), default=None)
+        oldest_pending_seconds.set(0 if oldest is None else time.monotonic() - oldest)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+            self._observe_staleness()
+            try:
+                await self.flush()
+            except Exception:
+                # Pings stay pending and are retried on the next tick
+                pass
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the flusher and write what is still pending"""
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        try:
+            await self.flush()
+        except Exception:
+            logger.warning(f"Lost {len(self._pending)} buffered agent locations on shutdown")
+
+
+location_buffer = LocationBuffer()
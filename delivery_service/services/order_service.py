@@ -1,5 +1,5 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update, func
+from sqlalchemy import select, update
 from sqlalchemy.orm import selectinload
 from typing import List, Optional
 import logging
@@ -7,44 +7,51 @@ import uuid
 from datetime import datetime
 
 from shared.models import Order, DeliveryAgent
+from shared.models.order import DELIVERY_ACTIVE_STATUSES, status_in
+from shared.events import AgentAvailabilityChanged, OrderStatusChanged, publish
+from shared.order_state import FINAL_STATUSES
+from shared.order_timeline import DELIVERY_AGENT_STAGES, stage_stats
+from shared.order_transitions import InvalidTransitionError, transition
+from shared.pagination import Page, InvalidCursorError, keyset_paginate, count_rows
 from delivery_service.schemas import (
-    DeliveryOrderResponse, DeliveryStatusUpdate, AssignmentRequest
+    DeliveryOrderResponse, DeliveryStatusUpdate, AssignmentRequest, AssignmentEnded, StageTimingResponse
 )
+from .location_buffer import location_buffer
+from .trail_store import TrailStore
 
 logger = logging.getLogger(__name__)
 
+ACTIVE_STATUSES = DELIVERY_ACTIVE_STATUSES
+
 class OrderService:
     def __init__(self, db: AsyncSession):
         self.db = db
 
     async def receive_assignment(self, assignment: AssignmentRequest) -> bool:
-        """Receive order assignment from restaurant service"""
+        """Receive order assignment from restaurant service.
+
+        The restaurant service has already set the order's agent; this only
+        starts the trail. The order's status is left alone, so an assignment
+        never undoes kitchen progress, and delivering it again is a no-op.
+        """
         try:
-            # Verify order exists
-            order_stmt = select(Order).where(Order.id == assignment.order_id)
-            order_result = await self.db.execute(order_stmt)
-            order = order_result.scalar_one_or_none()
-            
-            if not order:
-                logger.error(f"Order {assignment.order_id} not found")
+            # The order only matches if the restaurant service gave it to this agent
+            stmt = select(Order.status).where(
+                Order.id == assignment.order_id,
+                Order.delivery_agent_id == assignment.delivery_agent_id
+            ).with_for_update()
+            order_status = (await self.db.execute(stmt)).scalar_one_or_none()
+            
+            if order_status is None:
+                logger.error(f"Order {assignment.order_id} not found for agent {assignment.delivery_agent_id}")
                 return False
             
-            # Verify delivery agent exists and is available
-            agent_stmt = select(DeliveryAgent).where(
-                DeliveryAgent.id == assignment.delivery_agent_id,
-                DeliveryAgent.is_available == False  # Should be marked unavailable by restaurant service
-            )
-            agent_result = await self.db.execute(agent_stmt)
-            agent = agent_result.scalar_one_or_none()
+            if order_status in FINAL_STATUSES:
+                # Ended before this (possibly repeated) notification arrived
+                logger.info(f"Order {assignment.order_id} already {order_status}, no trail to start")
+                return True
             
-            if not agent:
-                logger.error(f"Delivery agent {assignment.delivery_agent_id} not found or available")
-                return False
-            order_update = update(Order).where(Order.id == assignment.order_id).values(
-                status='assigned',
-                updated_at=func.now()
-            )
-            await self.db.execute(order_update)
+            await TrailStore(self.db).open(assignment.order_id, assignment.delivery_agent_id)
             await self.db.commit()
             
             logger.info(f"Successfully assigned order {assignment.order_id} to agent {assignment.delivery_agent_id}")
@@ -55,26 +62,58 @@ class OrderService:
             logger.error(f"Error receiving assignment: {e}")
             return False
 
-    async def get_agent_orders(self, agent_id: str) -> List[DeliveryOrderResponse]:
-        """Get all orders assigned to a delivery agent"""
+    def _agent_orders_query(self, agent_id: str, active_only: bool = True):
+        stmt = select(Order).where(Order.delivery_agent_id == uuid.UUID(agent_id))
+        
+        if active_only:
+            stmt = stmt.where(status_in(ACTIVE_STATUSES))
+        
+        return stmt
+
+    async def get_agent_orders(
+        self,
+        agent_id: str,
+        active_only: bool = True,
+        limit: int = 50,
+        after: Optional[str] = None
+    ) -> Page[DeliveryOrderResponse]:
+        """Get one page of orders assigned to a delivery agent, newest first"""
         try:
-            agent_uuid = uuid.UUID(agent_id)
-            
-            stmt = select(Order).where(
-                Order.delivery_agent_id == agent_uuid,
-                Order.status.in_(['assigned', 'picked_up', 'on_the_way'])
-            ).order_by(Order.accepted_at.desc())
-            
-            result = await self.db.execute(stmt)
-            orders = result.scalars().all()
+            stmt = self._agent_orders_query(agent_id, active_only)
+            page = await keyset_paginate(self.db, stmt, Order, limit, after)
+            return page.map(DeliveryOrderResponse.model_validate)
             
-            return [DeliveryOrderResponse.model_validate(order) for order in orders]
+        except InvalidCursorError:
+            raise
+        except ValueError as e:
+            logger.error(f"Invalid agent ID format: {agent_id}")
+            return Page()
+        except Exception as e:
+            logger.error(f"Error fetching orders for agent {agent_id}: {e}")
+            raise
+
+    async def count_agent_orders(self, agent_id: str, active_only: bool = True) -> int:
+        """Count an agent's orders matching the same filter as get_agent_orders"""
+        try:
+            return await count_rows(self.db, self._agent_orders_query(agent_id, active_only))
+        except ValueError:
+            return 0
+
+    async def get_stage_timings(self, agent_id: str, since: datetime, until: datetime) -> List[StageTimingResponse]:
+        """How long the agent's orders spent in each stage, over the orders finishing it in [since, until)"""
+        try:
+            agent_uuid = uuid.UUID(agent_id)
+            timings = []
+            for stage in DELIVERY_AGENT_STAGES:
+                stats = await stage_stats(self.db, stage, 'agent', since, until, agent_uuid)
+                timings.extend(StageTimingResponse(**row._asdict()) for row in stats)
+            return timings
             
         except ValueError as e:
             logger.error(f"Invalid agent ID format: {agent_id}")
             return []
         except Exception as e:
-            logger.error(f"Error fetching orders for agent {agent_id}: {e}")
+            logger.error(f"Error fetching stage timings for agent {agent_id}: {e}")
             raise
 
     async def update_delivery_status(
@@ -88,44 +127,49 @@ class OrderService:
             order_uuid = uuid.UUID(order_id)
             agent_uuid = uuid.UUID(agent_id)
             
-            # Verify order belongs to this agent
-            order_stmt = select(Order).where(
-                Order.id == order_uuid,
-                Order.delivery_agent_id == agent_uuid
+            if status_update.status in FINAL_STATUSES:
+                # Get the agent's buffered pings into the trail before it closes
+                try:
+                    await location_buffer.flush()
+                except Exception:
+                    pass
+            
+            # Checks the assignment and the current status in the same statement
+            order = await transition(
+                self.db, order_uuid, status_update.status,
+                delivery_agent_id=agent_uuid, expected_version=status_update.expected_version
             )
-            order_result = await self.db.execute(order_stmt)
-            order = order_result.scalar_one_or_none()
             
             if not order:
                 logger.error(f"Order {order_id} not found for agent {agent_id}")
                 return None
             
-            update_data = {
-                'status': status_update.status,
-                'updated_at': func.now()
-            }
-            
-            if status_update.status == 'delivered':
-                update_data['delivered_at'] = func.now()
-                
-                # Mark delivery agent as available again
+            if status_update.status in FINAL_STATUSES:
+                # Delivered or cancelled, the agent is free again
                 agent_update = update(DeliveryAgent).where(
                     DeliveryAgent.id == agent_uuid
                 ).values(is_available=True)
                 await self.db.execute(agent_update)
-            
-            stmt = update(Order).where(Order.id == order_uuid).values(**update_data)
-            await self.db.execute(stmt)
+                await publish(self.db, AgentAvailabilityChanged(agent_id=agent_uuid, is_available=True))
+            
+            if status_update.status in FINAL_STATUSES:
+                await TrailStore(self.db).complete(order_uuid)
+            await publish(self.db, OrderStatusChanged(
+                order_id=order_uuid,
+                status=status_update.status,
+                restaurant_id=order.restaurant_id,
+                delivery_agent_id=agent_uuid
+            ))
+            response = DeliveryOrderResponse.model_validate(order)
             await self.db.commit()
             
             logger.info(f"Updated order {order_id} status to {status_update.status}")
             
-            updated_order_stmt = select(Order).where(Order.id == order_uuid)
-            updated_result = await self.db.execute(updated_order_stmt)
-            updated_order = updated_result.scalar_one()
-            
-            return DeliveryOrderResponse.model_validate(updated_order)
+            return response
             
+        except InvalidTransitionError:
+            await self.db.rollback()
+            raise
         except ValueError as e:
             logger.error(f"Invalid ID format: {e}")
             return None
@@ -0,0 +1,140 @@
+from typing import List, Optional, Sequence, Tuple
+from uuid import UUID
+import logging
+
+from sqlalchemy import Integer, LargeBinary, column, func, select, update, values
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from shared.config import settings
+from shared.metrics import metrics
+from shared.models import DeliveryTrail, Order
+from shared.models.order import DELIVERY_ACTIVE_STATUSES, status_in
+from shared.trails import TrailPoint, decode, encode, simplify
+from delivery_service.schemas import DeliveryTrailResponse, TrailPointResponse
+
+logger = logging.getLogger(__name__)
+
+trail_points_appended = metrics.counter(
+    "delivery_trail_points_appended_total", "Agent location pings offered to open delivery trails"
+)
+trail_points_kept = metrics.histogram(
+    "delivery_trail_points_kept_ratio", "Fraction of a completed trail's points kept by simplification",
+    buckets=(0.01, 0.02, 0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0)
+)
+trail_bytes = metrics.histogram(
+    "delivery_trail_bytes", "Stored size of completed delivery trails",
+    buckets=(64, 256, 1024, 4096, 16384, 65536, 262144)
+)
+
+# (agent, encoded chunk, number of points in it)
+TrailChunk = Tuple[UUID, bytes, int]
+
+
+def append_statement(chunks: Sequence[TrailChunk]):
+    """Append each chunk to the open trails of its agent's active deliveries"""
+    rows = values(
+        column("agent_id", PG_UUID(as_uuid=True)),
+        column("chunk", LargeBinary),
+        column("count", Integer),
+        name="chunks"
+    ).data(list(chunks))
+    return (
+        update(DeliveryTrail)
+        .where(
+            DeliveryTrail.delivery_agent_id == rows.c.agent_id,
+            DeliveryTrail.completed_at.is_(None),
+            Order.id == DeliveryTrail.order_id,
+            status_in(DELIVERY_ACTIVE_STATUSES)
+        )
+        .values(
+            points=DeliveryTrail.points.op("||")(rows.c.chunk),
+            point_count=DeliveryTrail.point_count + rows.c.count
+        )
+    )
+
+
+def _response(trail: DeliveryTrail, points: List[TrailPoint]) -> DeliveryTrailResponse:
+    return DeliveryTrailResponse(
+        order_id=trail.order_id,
+        delivery_agent_id=trail.delivery_agent_id,
+        started_at=trail.started_at,
+        completed_at=trail.completed_at,
+        point_count=trail.point_count,
+        points=[
+            TrailPointResponse(latitude=p.latitude, longitude=p.longitude, recorded_at=p.recorded_at)
+            for p in points
+        ]
+    )
+
+
+class TrailStore:
+    """Route history of deliveries, one compact row per order.
+
+    A trail opens when an order is assigned. Location pings of the agent
+    are appended while the order is out for delivery, and on completion
+    the trail is reduced with Douglas-Peucker (TRAIL_SIMPLIFY_TOLERANCE_M).
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def open(self, order_id: UUID, agent_id: UUID) -> None:
+        """Start recording the route of `order_id`, or hand it to a new agent"""
+        stmt = insert(DeliveryTrail).values(order_id=order_id, delivery_agent_id=agent_id)
+        await self.db.execute(stmt.on_conflict_do_update(
+            index_elements=[DeliveryTrail.order_id],
+            set_={'delivery_agent_id': stmt.excluded.delivery_agent_id, 'completed_at': None}
+        ))
+
+    async def append(self, chunks: Sequence[TrailChunk]) -> None:
+        if not chunks:
+            return
+        await self.db.execute(append_statement(chunks))
+        trail_points_appended.inc(sum(count for _, _, count in chunks))
+
+    async def append_points(self, agent_id: UUID, points: Sequence[TrailPoint]) -> None:
+        if points:
+            await self.append([(agent_id, encode(points), len(points))])
+
+    async def complete(self, order_id: UUID, tolerance_m: float = settings.trail_simplify_tolerance_m) -> None:
+        """Close the trail and keep only the points that shape the route"""
+        stmt = select(DeliveryTrail).where(
+            DeliveryTrail.order_id == order_id, DeliveryTrail.completed_at.is_(None)
+        ).with_for_update()
+        trail = (await self.db.execute(stmt)).scalar_one_or_none()
+        if trail is None:
+            return
+
+        points = decode(trail.points)
+        kept = simplify(points, tolerance_m)
+        trail.points = encode(kept)
+        trail.completed_at = func.now()
+
+        if points:
+            trail_points_kept.observe(len(kept) / len(points))
+        trail_bytes.observe(len(trail.points))
+        logger.info(f"Completed trail of order {order_id}: kept {len(kept)} of {len(points)} points")
+
+    async def get_trail(self, order_id: str, tolerance_m: Optional[float] = None) -> Optional[DeliveryTrailResponse]:
+        """The route of an order, optionally simplified further for display"""
+        try:
+            order_uuid = UUID(order_id)
+        except ValueError:
+            logger.error(f"Invalid order ID format: {order_id}")
+            return None
+
+        try:
+            stmt = select(DeliveryTrail).where(DeliveryTrail.order_id == order_uuid)
+            trail = (await self.db.execute(stmt)).scalar_one_or_none()
+            if trail is None:
+                return None
+
+            points = decode(trail.points)
+            if tolerance_m:
+                points = simplify(points, tolerance_m)
+            return _response(trail, points)
+
+        except Exception as e:
+            logger.error(f"Error fetching trail for order {order_id}: {e}")
+            raise
@@ -0,0 +1,235 @@
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, FrozenSet, Optional, Set, Tuple
+import asyncio
+import json
+import logging
+import time
+
+from graphql import (
+    DocumentNode, ExecutionResult, FieldNode, GraphQLSchema,
+    OperationDefinitionNode, TypeInfo, TypeInfoVisitor, Visitor,
+    get_named_type, is_object_type, print_ast, visit
+)
+from strawberry.extensions import SchemaExtension
+from strawberry.types.graphql import OperationType
+
+from shared.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Cache hints in seconds, keyed either by "Type.field" or by a type name that
+# applies wherever the type is returned. The effective max age of a response
+# is the smallest hint among the fields it selects; a root field without a
+# hint is never cached. Order types carry live status and are never cached.
+CACHE_HINTS: Dict[str, float] = {
+    "Query.restaurants": settings.gateway_catalog_cache_ttl,
+    "Query.restaurant": settings.gateway_catalog_cache_ttl,
+    "Query.deliveryAgents": settings.gateway_agent_cache_ttl,
+    "UserOrder": 0,
+    "RestaurantOrder": 0,
+    "DeliveryOrder": 0,
+}
+
+
+@dataclass
+class CachePolicy:
+    max_age: float
+    tags: FrozenSet[str]
+
+
+@dataclass
+class CacheEntry:
+    result: ExecutionResult
+    expires_at: float
+    tags: FrozenSet[str] = field(default_factory=frozenset)
+
+
+class _PolicyVisitor(Visitor):
+    def __init__(self, type_info: TypeInfo, hints: Dict[str, float]):
+        super().__init__()
+        self.type_info = type_info
+        self.hints = hints
+        self.max_age: Optional[float] = None
+        self.tags: Set[str] = set()
+
+    def _limit(self, value: float) -> None:
+        self.max_age = value if self.max_age is None else min(self.max_age, value)
+
+    def enter_field(self, node: FieldNode, *_args):
+        parent = self.type_info.get_parent_type()
+        field_def = self.type_info.get_field_def()
+        if parent is None or field_def is None or node.name.value.startswith("__"):
+            return
+
+        hint = self.hints.get(f"{parent.name}.{node.name.value}")
+        if hint is None and parent.name in ("Query", "Mutation", "Subscription"):
+            # Root fields must opt in to caching explicitly
+            hint = 0
+        if hint is not None:
+            self._limit(hint)
+
+        return_type = get_named_type(field_def.type)
+        if is_object_type(return_type):
+            self.tags.add(return_type.name)
+            type_hint = self.hints.get(return_type.name)
+            if type_hint is not None:
+                self._limit(type_hint)
+
+
+def cache_policy(
+    schema: GraphQLSchema,
+    document: DocumentNode,
+    operation_name: Optional[str],
+    hints: Dict[str, float] = CACHE_HINTS
+) -> CachePolicy:
+    """Work out how long the result of an operation may be cached and its tags"""
+    type_info = TypeInfo(schema)
+    visitor = _PolicyVisitor(type_info, hints)
+    for definition in document.definitions:
+        if (
+            isinstance(definition, OperationDefinitionNode)
+            and operation_name
+            and definition.name
+            and definition.name.value != operation_name
+        ):
+            continue
+        visit(definition, TypeInfoVisitor(type_info, visitor))
+    return CachePolicy(max_age=visitor.max_age or 0, tags=frozenset(visitor.tags))
+
+
+def cache_key(document: DocumentNode, variables: Optional[dict], operation_name: Optional[str]) -> str:
+    """Key on the normalized document so whitespace and comments don't matter"""
+    return "\n".join((
+        operation_name or "",
+        print_ast(document),
+        json.dumps(variables or {}, sort_keys=True, default=str),
+    ))
+
+
+class ResponseCache:
+    """Bounded LRU of execution results with TTLs, tag invalidation and single-flight"""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        # Bumped on every invalidation so a fill that raced a mutation is dropped
+        self._generation = 0
+
+    def get(self, key: str) -> Optional[ExecutionResult]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry.result
+
+    def set(self, key: str, result: ExecutionResult, max_age: float, tags: FrozenSet[str]) -> None:
+        self._entries[key] = CacheEntry(result, time.monotonic() + max_age, tags)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, *tags: str) -> int:
+        """Drop every entry that touched one of the given types"""
+        self._generation += 1
+        stale = [key for key, entry in self._entries.items() if entry.tags & set(tags)]
+        for key in stale:
+            del self._entries[key]
+        if stale:
+            logger.info(f"Invalidated {len(stale)} cached responses for {', '.join(tags)}")
+        return len(stale)
+
+    def clear(self) -> None:
+        self._generation += 1
+        self._entries.clear()
+
+    async def lookup(self, key: str) -> Tuple[Optional[ExecutionResult], bool]:
+        """Return (cached result, is_leader).
+
+        On a miss the first caller becomes the leader and must call `fill`;
+        concurrent callers wait for the leader instead of stampeding downstream.
+        """
+        result = self.get(key)
+        if result is not None:
+            return result, False
+
+        pending = self._inflight.get(key)
+        if pending is not None:
+            # A failed leader hands back None and the waiter executes uncached
+            return await asyncio.shield(pending), False
+
+        self._inflight[key] = asyncio.get_running_loop().create_future()
+        return None, True
+
+    def fill(
+        self,
+        key: str,
+        result: Optional[ExecutionResult],
+        policy: CachePolicy,
+        generation: int
+    ) -> None:
+        cacheable = result is not None and not result.errors
+        if cacheable and generation == self._generation:
+            self.set(key, result, policy.max_age, policy.tags)
+
+        pending = self._inflight.pop(key, None)
+        if pending is not None and not pending.done():
+            pending.set_result(result if cacheable else None)
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+
+response_cache = ResponseCache(max_entries=settings.gateway_cache_max_entries)
+
+
+class ResponseCacheExtension(SchemaExtension):
+    """Serve cacheable queries from `response_cache` according to CACHE_HINTS"""
+
+    cache = response_cache
+
+    def __init__(self, *, execution_context=None):
+        super().__init__(execution_context=execution_context)
+        self.policy: Optional[CachePolicy] = None
+        self.hit = False
+
+    async def on_execute(self):
+        execution_context = self.execution_context
+        if execution_context.operation_type != OperationType.QUERY or execution_context.result:
+            yield
+            return
+
+        document = execution_context.graphql_document
+        self.policy = cache_policy(
+            execution_context.schema._schema, document, execution_context.operation_name
+        )
+        if self.policy.max_age <= 0:
+            yield
+            return
+
+        key = cache_key(document, execution_context.variables, execution_context.operation_name)
+        cached, leader = await self.cache.lookup(key)
+        if cached is not None:
+            self.hit = True
+            execution_context.result = cached
+            yield
+            return
+
+        generation = self.cache.generation
+        result = None
+        try:
+            yield
+            result = execution_context.result
+        finally:
+            if leader:
+                self.cache.fill(key, result, self.policy, generation)
+
+    def get_results(self):
+        if self.policy is None:
+            return {}
+        return {"cacheControl": {"maxAge": self.policy.max_age, "hit": self.hit}}
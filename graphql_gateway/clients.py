@@ -0,0 +1,107 @@
+from typing import Any, Dict, Optional
+import logging
+
+import httpx
+
+from shared.config import settings
+from shared.gql import PERSISTED_QUERY_NOT_FOUND, query_hash
+
+logger = logging.getLogger(__name__)
+
+
+class ServiceClients:
+    """Registry of pooled, long-lived HTTP clients, one per downstream service"""
+
+    def __init__(self):
+        self._base_urls = {
+            "user": settings.user_service_url,
+            "restaurant": settings.restaurant_service_url,
+            "delivery": settings.delivery_service_url,
+        }
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+
+    @property
+    def base_urls(self) -> Dict[str, str]:
+        return dict(self._base_urls)
+
+    async def start(self) -> None:
+        """Create one pooled client per downstream service"""
+        if self._clients:
+            return
+
+        http2 = settings.gateway_http2
+        if http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                logger.warning("GATEWAY_HTTP2 is enabled but the 'h2' package is not installed, using HTTP/1.1")
+                http2 = False
+
+        limits = httpx.Limits(
+            max_connections=settings.gateway_max_connections,
+            max_keepalive_connections=settings.gateway_max_keepalive_connections,
+            keepalive_expiry=settings.gateway_keepalive_expiry,
+        )
+
+        for service, base_url in self._base_urls.items():
+            self._clients[service] = httpx.AsyncClient(
+                base_url=base_url,
+                limits=limits,
+                timeout=settings.gateway_request_timeout,
+                http2=http2,
+            )
+            logger.info(f"Opened {service} service client for {base_url} (http2={http2})")
+
+    async def close(self) -> None:
+        """Close all clients and release their pooled connections"""
+        clients, self._clients = self._clients, {}
+        for service, client in clients.items():
+            await client.aclose()
+            logger.info(f"Closed {service} service client")
+
+    def get(self, service: str) -> httpx.AsyncClient:
+        client = self._clients.get(service)
+        if client is None:
+            raise RuntimeError(f"No client for service '{service}', was the gateway started?")
+        return client
+
+    async def execute(
+        self,
+        service: str,
+        query: str,
+        variables: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None
+    ) -> Dict[str, Any]:
+        """POST a GraphQL operation to a downstream service and return its `data`.
+
+        The operation is sent as an automatic persisted query: only its hash
+        goes over the wire, and the full document is sent once if the service
+        doesn't know it yet (first call or after a restart).
+        """
+        client = self.get(service)
+        body = {
+            "variables": variables or {},
+            "extensions": {
+                "persistedQuery": {"version": 1, "sha256Hash": query_hash(query)}
+            },
+        }
+
+        payload = (await client.post("/graphql", json=body, headers=headers)).json()
+        if _is_persisted_query_miss(payload):
+            logger.debug(f"Registering persisted query with {service} service")
+            payload = (await client.post("/graphql", json={**body, "query": query}, headers=headers)).json()
+
+        if payload.get("errors"):
+            logger.warning(f"{service} service returned errors: {payload['errors']}")
+
+        return payload.get("data") or {}
+
+
+def _is_persisted_query_miss(payload: Dict[str, Any]) -> bool:
+    return any(
+        error.get("message") == PERSISTED_QUERY_NOT_FOUND
+        for error in payload.get("errors") or []
+    )
+
+
+service_clients = ServiceClients()
@@ -0,0 +1,17 @@
+from strawberry.fastapi import BaseContext
+
+from .clients import service_clients
+from .loaders import GatewayLoaders
+
+
+class GatewayContext(BaseContext):
+    """Per-request GraphQL context carrying fresh DataLoaders"""
+
+    def __init__(self, loaders: GatewayLoaders):
+        super().__init__()
+        self.loaders = loaders
+
+
+async def get_context() -> GatewayContext:
+    """Strawberry context_getter: new loaders per request so caches never leak"""
+    return GatewayContext(loaders=GatewayLoaders(service_clients))
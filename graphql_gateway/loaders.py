@@ -0,0 +1,78 @@
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from uuid import UUID
+import logging
+
+from strawberry.dataloader import DataLoader
+
+from .clients import ServiceClients
+from .types import (
+    Restaurant, DeliveryAgent,
+    convert_restaurant, convert_delivery_agent
+)
+
+logger = logging.getLogger(__name__)
+
+# Loader keys pair the looked-up ID with the downstream selection set, so
+# callers asking for different fields of the same entity still share a batch.
+LookupKey = Tuple[UUID, str]
+
+
+def build_batch_query(
+    operation: str,
+    field: str,
+    argument: str,
+    argument_type: str,
+    keys: List[LookupKey]
+) -> tuple:
+    """Build one downstream query fetching every key through an aliased field.
+
+    Keys are sent as variables `$k0..$kN` and each lookup is aliased
+    `k0..kN` with its own selection set, so N lookups cost a single round trip.
+    """
+    variable_defs = ", ".join(f"$k{i}: {argument_type}" for i in range(len(keys)))
+    aliases = "\n".join(
+        f"k{i}: {field}({argument}: $k{i}) {{ {selection} }}"
+        for i, (_, selection) in enumerate(keys)
+    )
+    query = f"query {operation}({variable_defs}) {{\n{aliases}\n}}"
+    variables = {f"k{i}": str(key) for i, (key, _) in enumerate(keys)}
+    return query, variables
+
+
+class GatewayLoaders:
+    """Per-request DataLoaders batching and de-duplicating lookups by ID"""
+
+    def __init__(self, clients: ServiceClients):
+        self.clients = clients
+        self.restaurant_by_id: DataLoader[LookupKey, Optional[Restaurant]] = DataLoader(
+            load_fn=self._load_restaurants
+        )
+        self.agent_by_id: DataLoader[LookupKey, Optional[DeliveryAgent]] = DataLoader(
+            load_fn=self._load_agents
+        )
+
+    async def _load_batch(
+        self,
+        service: str,
+        operation: str,
+        field: str,
+        argument: str,
+        keys: List[LookupKey],
+        convert: Callable[[Optional[Dict[str, Any]]], Any]
+    ) -> List[Any]:
+        query, variables = build_batch_query(operation, field, argument, "UUID!", keys)
+        data = await self.clients.execute(service, query, variables)
+        logger.debug(f"Batched {len(keys)} {field} lookups into one {service} service call")
+        return [convert(data.get(f"k{i}")) for i in range(len(keys))]
+
+    async def _load_restaurants(self, keys: List[LookupKey]) -> List[Optional[Restaurant]]:
+        return await self._load_batch(
+            "user", "BatchRestaurants", "restaurant", "restaurantId",
+            keys, convert_restaurant
+        )
+
+    async def _load_agents(self, keys: List[LookupKey]) -> List[Optional[DeliveryAgent]]:
+        return await self._load_batch(
+            "delivery", "BatchDeliveryAgents", "deliveryAgent", "agentId",
+            keys, convert_delivery_agent
+        )
@@ -1,6 +1,9 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from strawberry.fastapi import GraphQLRouter
+from contextlib import asynccontextmanager
+from shared.gql import PersistedQueryRouter
+from .clients import service_clients
+from .context import get_context
 from .schema import schema
 import logging
 
@@ -11,10 +14,26 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Application lifespan events"""
+    logger.info("GraphQL Gateway starting up...")
+    
+    await service_clients.start()
+    
+    logger.info("GraphQL Gateway startup complete")
+    
+    yield
+    
+    logger.info("GraphQL Gateway shutting down...")
+    await service_clients.close()
+    logger.info("GraphQL Gateway shutdown complete")
+
 app = FastAPI(
     title="Food Delivery - GraphQL API Gateway",
     description="Unified GraphQL API for food delivery microservices",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 app.add_middleware(
@@ -25,7 +44,7 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-graphql_app = GraphQLRouter(schema)
+graphql_app = PersistedQueryRouter(schema, context_getter=get_context)
 app.include_router(graphql_app, prefix="/graphql")
 
 @app.get("/health")
@@ -51,9 +70,8 @@ async def root():
             "docs": "/docs - API documentation"
         },
         "services": {
-            "user_service": "http://localhost:8001",
-            "restaurant_service": "http://localhost:8002", 
-            "delivery_service": "http://localhost:8003"
+            f"{service}_service": url
+            for service, url in service_clients.base_urls.items()
         }
     }
 
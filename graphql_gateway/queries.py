@@ -0,0 +1,167 @@
+from typing import Any, Dict, Iterable, List
+
+from strawberry.types import Info
+from strawberry.types.nodes import FragmentSpread, InlineFragment, SelectedField
+
+# Downstream field specs for the gateway types in `types.py`.
+#
+# Each spec maps a field name, as the client selects it, to how it is
+# fetched downstream: `None` for a leaf, a nested spec for an object field,
+# or `Requires(...)` for a gateway-only field that is resolved locally (for
+# example through a DataLoader) but needs some downstream keys.
+
+
+class Requires:
+    """Gateway-only field that needs the listed downstream fields"""
+
+    def __init__(self, *fields: str):
+        self.fields = fields
+
+
+MENU_ITEM_SPEC = {
+    "id": None,
+    "name": None,
+    "description": None,
+    "price": None,
+    "category": None,
+    "isAvailable": None,
+    "imageUrl": None,
+}
+
+RESTAURANT_SPEC = {
+    "id": None,
+    "name": None,
+    "cuisineType": None,
+    "address": None,
+    "isOnline": None,
+    "operationHours": None,
+    "menuItems": MENU_ITEM_SPEC,
+}
+
+LOCATION_SPEC = {
+    "latitude": None,
+    "longitude": None,
+    "address": None,
+}
+
+DELIVERY_AGENT_SPEC = {
+    "id": None,
+    "name": None,
+    "email": None,
+    "phone": None,
+    "vehicleType": None,
+    "isAvailable": None,
+    "currentLocation": LOCATION_SPEC,
+    "deliveriesCompleted": None,
+    "averageRating": None,
+    "createdAt": None,
+}
+
+ORDER_SPEC = {
+    "id": None,
+    "userId": None,
+    "restaurantId": None,
+    "deliveryAgentId": None,
+    "status": None,
+    "totalAmount": None,
+    "deliveryAddress": None,
+    "specialInstructions": None,
+    "placedAt": None,
+    "acceptedAt": None,
+    "deliveredAt": None,
+}
+
+USER_ORDER_SPEC = {
+    **ORDER_SPEC,
+    "orderItems": {
+        "id": None,
+        "menuItemId": None,
+        "quantity": None,
+        "unitPrice": None,
+        "totalPrice": None,
+    },
+    "restaurant": Requires("restaurantId"),
+    "agent": Requires("deliveryAgentId"),
+}
+
+RESTAURANT_ORDER_SPEC = {
+    **ORDER_SPEC,
+    "estimatedPrepTime": None,
+    "agent": Requires("deliveryAgentId"),
+}
+
+DELIVERY_ORDER_SPEC = {
+    **ORDER_SPEC,
+    "pickupTime": None,
+    "restaurant": Requires("restaurantId"),
+    "agent": Requires("deliveryAgentId"),
+}
+
+
+def _is_skipped(directives: Dict[str, Dict[str, Any]]) -> bool:
+    if directives.get("skip", {}).get("if") is True:
+        return True
+    if "include" in directives and directives["include"].get("if") is False:
+        return True
+    return False
+
+
+def _collect(selections: Iterable[Any], spec: Dict[str, Any], into: Dict[str, Any]) -> None:
+    for selection in selections:
+        if _is_skipped(selection.directives):
+            continue
+
+        if isinstance(selection, (FragmentSpread, InlineFragment)):
+            # Gateway types are plain object types, so fragments just
+            # contribute their fields to the enclosing selection
+            _collect(selection.selections, spec, into)
+            continue
+
+        if not isinstance(selection, SelectedField) or selection.name not in spec:
+            # __typename and unknown fields are resolved by the gateway itself
+            continue
+
+        field_spec = spec[selection.name]
+        if field_spec is None:
+            into[selection.name] = None
+        elif isinstance(field_spec, Requires):
+            for name in field_spec.fields:
+                into.setdefault(name, None)
+        else:
+            nested = into.get(selection.name) or {}
+            _collect(selection.selections, field_spec, nested)
+            into[selection.name] = nested
+
+
+def _render(fields: Dict[str, Any], spec: Dict[str, Any]) -> str:
+    if not fields:
+        # Never send an empty selection set downstream
+        fields = {"id": None} if "id" in spec else {next(iter(spec)): None}
+
+    parts = []
+    for name, nested in fields.items():
+        if nested is None:
+            parts.append(name)
+        else:
+            parts.append(f"{name} {{ {_render(nested, spec[name])} }}")
+    return " ".join(parts)
+
+
+def build_selection(selections: Iterable[Any], spec: Dict[str, Any]) -> str:
+    """Build the downstream selection set for the fields a client selected.
+
+    Fragments are flattened, @skip/@include are honoured (their variables are
+    already resolved by strawberry) and duplicated fields are merged, so only
+    what the client asked for is forwarded.
+    """
+    fields: Dict[str, Any] = {}
+    _collect(selections, spec, fields)
+    return _render(fields, spec)
+
+
+def selection_for(info: Info, spec: Dict[str, Any]) -> str:
+    """Downstream selection for the fields selected below the current field"""
+    selections: List[Any] = []
+    for field in info.selected_fields:
+        selections.extend(field.selections)
+    return build_selection(selections, spec)
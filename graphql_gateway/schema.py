@@ -1,357 +1,221 @@
 import strawberry
 from typing import List, Optional
 from uuid import UUID
-import httpx
-import asyncio
 from strawberry.types import Info
 
-# Import types from individual services
-from user_service.gql.types import (
-    Order as UserOrder, 
-    Restaurant as UserRestaurant, 
-    Rating,
-    OrderInput, 
-    RatingInput,
-    PaginationInput as UserPagination
+from shared.config import settings
+from shared.gql import QueryCostLimiter
+from .cache import ResponseCacheExtension, response_cache
+from .clients import service_clients
+from .queries import (
+    RESTAURANT_SPEC, USER_ORDER_SPEC, RESTAURANT_ORDER_SPEC,
+    DELIVERY_ORDER_SPEC, DELIVERY_AGENT_SPEC, selection_for
 )
-from restaurant_service.gql.types import (
-    Restaurant as RestaurantType, 
-    MenuItem, 
-    Order as RestaurantOrder,
-    RestaurantInput,
-    MenuItemInput,
-    OrderUpdateInput
-)
-from delivery_service.gql.types import (
-    DeliveryAgent, 
-    Order as DeliveryOrder,
-    DeliveryAgentInput,
-    LocationInput,
-    AssignmentInput
+from .types import (
+    Restaurant, UserOrder, RestaurantOrder, DeliveryOrder, DeliveryAgent,
+    convert_restaurant, convert_user_order, convert_restaurant_order,
+    convert_delivery_order, convert_delivery_agent
 )
+
+# Input types are forwarded as-is to the owning service
+from user_service.gql.types import OrderInput
+from delivery_service.gql.types import AssignmentInput
+
+
+def _forwarded_headers(info: Info, *names: str) -> dict:
+    """Copy the named client request headers, when present, onto a downstream call"""
+    request = info.context.request
+    return {name: request.headers[name] for name in names if name in request.headers}
 @strawberry.type
 class Query:
     @strawberry.field
-    async def restaurants(self, info) -> List[UserRestaurant]:
-        """Get all available restaurants from user service"""
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                "http://localhost:8001/graphql",
-                json={
-                    "query": """
-                    query {
-                        restaurants {
-                            id
-                            name
-                            cuisineType
-                            address
-                            isOnline
-                            operationHours
-                            menuItems {
-                                id
-                                name
-                                description
-                                price
-                                category
-                                isAvailable
-                                imageUrl
-                            }
-                        }
-                    }
-                    """
-                }
-            )
-            data = response.json()
-            return data.get("data", {}).get("restaurants", [])
+    async def restaurants(self, info: Info) -> List[Restaurant]:
+        """Get all available restaurants from user service, forwarding only the selected fields"""
+        data = await service_clients.execute(
+            "user",
+            f"""
+            query {{
+                restaurants {{ {selection_for(info, RESTAURANT_SPEC)} }}
+            }}
+            """
+        )
+        return [convert_restaurant(r) for r in data.get("restaurants", [])]
 
     @strawberry.field
-    async def restaurant(self, restaurant_id: UUID) -> Optional[UserRestaurant]:
+    async def restaurant(self, info: Info, restaurant_id: UUID) -> Optional[Restaurant]:
         """Get restaurant with menu from user service"""
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                "http://localhost:8001/graphql",
-                json={
-                    "query": """
-                    query GetRestaurant($restaurantId: UUID!) {
-                        restaurant(restaurantId: $restaurantId) {
-                            id
-                            name
-                            cuisineType
-                            address
-                            isOnline
-                            operationHours
-                            menuItems {
-                                id
-                                name
-                                description
-                                price
-                                category
-                                isAvailable
-                                imageUrl
-                            }
-                        }
-                    }
-                    """,
-                    "variables": {"restaurantId": str(restaurant_id)}
-                }
-            )
-            data = response.json()
-            return data.get("data", {}).get("restaurant")
+        return await info.context.loaders.restaurant_by_id.load(
+            (restaurant_id, selection_for(info, RESTAURANT_SPEC))
+        )
 
     @strawberry.field
-    async def user_orders(self, user_id: UUID) -> List[UserOrder]:
+    async def user_orders(self, info: Info, user_id: UUID) -> List[UserOrder]:
         """Get user orders from user service"""
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                "http://localhost:8001/graphql",
-                json={
-                    "query": """
-                    query GetUserOrders($userId: UUID!) {
-                        userOrders(userId: $userId) {
-                            items {
-                                id
-                                userId
-                                restaurantId
-                                deliveryAgentId
-                                status
-                                totalAmount
-                                deliveryAddress
-                                specialInstructions
-                                placedAt
-                                acceptedAt
-                                deliveredAt
-                                orderItems {
-                                    id
-                                    menuItemId
-                                    quantity
-                                    unitPrice
-                                    totalPrice
-                                }
-                            }
-                        }
-                    }
-                    """,
-                    "variables": {"userId": str(user_id)}
-                }
-            )
-            data = response.json()
-            return data.get("data", {}).get("userOrders", {}).get("items", [])
+        data = await service_clients.execute(
+            "user",
+            f"""
+            query GetUserOrders($userId: UUID!) {{
+                userOrders(userId: $userId) {{
+                    items {{ {selection_for(info, USER_ORDER_SPEC)} }}
+                }}
+            }}
+            """,
+            {"userId": str(user_id)}
+        )
+        items = data.get("userOrders", {}).get("items", [])
+        return [convert_user_order(order) for order in items]
 
     @strawberry.field
-    async def restaurant_orders(self, restaurant_id: UUID) -> List[RestaurantOrder]:
+    async def restaurant_orders(self, info: Info, restaurant_id: UUID) -> List[RestaurantOrder]:
         """Get restaurant orders from restaurant service"""
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                "http://localhost:8002/graphql",
-                json={
-                    "query": """
-                    query GetRestaurantOrders($restaurantId: UUID!) {
-                        restaurantOrders(restaurantId: $restaurantId) {
-                            items {
-                                id
-                                userId
-                                restaurantId
-                                deliveryAgentId
-                                status
-                                totalAmount
-                                deliveryAddress
-                                specialInstructions
-                                placedAt
-                                acceptedAt
-                                deliveredAt
-                                estimatedPrepTime
-                            }
-                        }
-                    }
-                    """,
-                    "variables": {"restaurantId": str(restaurant_id)}
-                }
-            )
-            data = response.json()
-            return data.get("data", {}).get("restaurantOrders", {}).get("items", [])
+        data = await service_clients.execute(
+            "restaurant",
+            f"""
+            query GetRestaurantOrders($restaurantId: UUID!) {{
+                restaurantOrders(restaurantId: $restaurantId) {{
+                    items {{ {selection_for(info, RESTAURANT_ORDER_SPEC)} }}
+                }}
+            }}
+            """,
+            {"restaurantId": str(restaurant_id)}
+        )
+        items = data.get("restaurantOrders", {}).get("items", [])
+        return [convert_restaurant_order(order) for order in items]
 
     @strawberry.field
-    async def delivery_agents(self, available_only: bool = False) -> List[DeliveryAgent]:
+    async def delivery_agents(self, info: Info, available_only: bool = False) -> List[DeliveryAgent]:
         """Get delivery agents from delivery service"""
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                "http://localhost:8003/graphql",
-                json={
-                    "query": """
-                    query GetDeliveryAgents($availableOnly: Boolean!) {
-                        deliveryAgents(availableOnly: $availableOnly) {
-                            items {
-                                id
-                                name
-                                email
-                                phone
-                                vehicleType
-                                isAvailable
-                                currentLocation {
-                                    latitude
-                                    longitude
-                                    address
-                                }
-                                deliveriesCompleted
-                                averageRating
-                                createdAt
-                            }
-                        }
-                    }
-                    """,
-                    "variables": {"availableOnly": available_only}
-                }
-            )
-            data = response.json()
-            return data.get("data", {}).get("deliveryAgents", {}).get("items", [])
+        data = await service_clients.execute(
+            "delivery",
+            f"""
+            query GetDeliveryAgents($availableOnly: Boolean!) {{
+                deliveryAgents(availableOnly: $availableOnly) {{
+                    items {{ {selection_for(info, DELIVERY_AGENT_SPEC)} }}
+                }}
+            }}
+            """,
+            {"availableOnly": available_only}
+        )
+        items = data.get("deliveryAgents", {}).get("items", [])
+        return [convert_delivery_agent(agent) for agent in items]
 @strawberry.type
 class Mutation:
     @strawberry.mutation
     async def create_order(
-        self, 
-        user_id: UUID, 
+        self,
+        info: Info,
+        user_id: UUID,
         order_input: OrderInput
-    ) -> UserOrder:
+    ) -> Optional[UserOrder]:
         """Create order through user service"""
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                "http://localhost:8001/graphql",
-                json={
-                    "query": """
-                    mutation CreateOrder($userId: UUID!, $orderInput: OrderInput!) {
-                        createOrder(userId: $userId, orderInput: $orderInput) {
-                            id
-                            userId
-                            restaurantId
-                            deliveryAgentId
-                            status
-                            totalAmount
-                            deliveryAddress
-                            specialInstructions
-                            placedAt
-                            acceptedAt
-                            deliveredAt
-                            orderItems {
-                                id
-                                menuItemId
-                                quantity
-                                unitPrice
-                                totalPrice
-                            }
+        data = await service_clients.execute(
+            "user",
+            f"""
+            mutation CreateOrder($userId: UUID!, $orderInput: OrderInput!) {{
+                createOrder(userId: $userId, orderInput: $orderInput) {{ {selection_for(info, USER_ORDER_SPEC)} }}
+            }}
+            """,
+            {
+                "userId": str(user_id),
+                "orderInput": {
+                    "restaurantId": str(order_input.restaurant_id),
+                    "deliveryAddress": order_input.delivery_address,
+                    "items": [
+                        {
+                            "menuItemId": str(item.menu_item_id),
+                            "quantity": item.quantity
                         }
-                    }
-                    """,
-                    "variables": {
-                        "userId": str(user_id),
-                        "orderInput": {
-                            "restaurantId": str(order_input.restaurant_id),
-                            "deliveryAddress": order_input.delivery_address,
-                            "items": [
-                                {
-                                    "menuItemId": str(item.menu_item_id),
-                                    "quantity": item.quantity
-                                }
-                                for item in order_input.items
-                            ],
-                            "specialInstructions": order_input.special_instructions
-                        }
-                    }
+                        for item in order_input.items
+                    ],
+                    "specialInstructions": order_input.special_instructions
                 }
-            )
-            data = response.json()
-            return data.get("data", {}).get("createOrder")
+            },
+            headers=_forwarded_headers(info, "Idempotency-Key")
+        )
+        response_cache.invalidate("UserOrder", "RestaurantOrder")
+        return convert_user_order(data.get("createOrder"))
 
     @strawberry.mutation
     async def accept_order(
-        self, 
-        order_id: UUID, 
+        self,
+        info: Info,
+        order_id: UUID,
         restaurant_id: UUID,
         estimated_prep_time: Optional[int] = None
     ) -> Optional[RestaurantOrder]:
         """Accept order through restaurant service"""
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                "http://localhost:8002/graphql",
-                json={
-                    "query": """
-                    mutation AcceptOrder($orderId: UUID!, $restaurantId: UUID!, $estimatedPrepTime: Int) {
-                        acceptOrder(orderId: $orderId, restaurantId: $restaurantId, estimatedPrepTime: $estimatedPrepTime) {
-                            id
-                            status
-                            estimatedPrepTime
-                        }
-                    }
-                    """,
-                    "variables": {
-                        "orderId": str(order_id),
-                        "restaurantId": str(restaurant_id),
-                        "estimatedPrepTime": estimated_prep_time
-                    }
-                }
-            )
-            data = response.json()
-            return data.get("data", {}).get("acceptOrder")
+        data = await service_clients.execute(
+            "restaurant",
+            f"""
+            mutation AcceptOrder($orderId: UUID!, $restaurantId: UUID!, $estimatedPrepTime: Int) {{
+                acceptOrder(orderId: $orderId, restaurantId: $restaurantId, estimatedPrepTime: $estimatedPrepTime) {{ {selection_for(info, RESTAURANT_ORDER_SPEC)} }}
+            }}
+            """,
+            {
+                "orderId": str(order_id),
+                "restaurantId": str(restaurant_id),
+                "estimatedPrepTime": estimated_prep_time
+            }
+        )
+        # Accepting an order can assign an agent straight away
+        response_cache.invalidate("DeliveryAgent", "UserOrder", "RestaurantOrder", "DeliveryOrder")
+        return convert_restaurant_order(data.get("acceptOrder"))
 
     @strawberry.mutation
     async def assign_order_to_agent(
-        self, 
+        self,
+        info: Info,
         assignment_input: AssignmentInput
     ) -> bool:
         """Assign order to delivery agent through delivery service"""
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                "http://localhost:8003/graphql",
-                json={
-                    "query": """
-                    mutation AssignOrder($assignmentInput: AssignmentInput!) {
-                        assignOrder(assignmentInput: $assignmentInput)
-                    }
-                    """,
-                    "variables": {
-                        "assignmentInput": {
-                            "orderId": str(assignment_input.order_id),
-                            "deliveryAgentId": str(assignment_input.delivery_agent_id),
-                            "restaurantId": str(assignment_input.restaurant_id)
-                        }
-                    }
+        data = await service_clients.execute(
+            "delivery",
+            """
+            mutation AssignOrder($assignmentInput: AssignmentInput!) {
+                assignOrder(assignmentInput: $assignmentInput)
+            }
+            """,
+            {
+                "assignmentInput": {
+                    "orderId": str(assignment_input.order_id),
+                    "deliveryAgentId": str(assignment_input.delivery_agent_id),
+                    "restaurantId": str(assignment_input.restaurant_id)
                 }
-            )
-            data = response.json()
-            return data.get("data", {}).get("assignOrder", False)
+            }
+        )
+        response_cache.invalidate("DeliveryAgent", "UserOrder", "RestaurantOrder", "DeliveryOrder")
+        return data.get("assignOrder", False)
 
     @strawberry.mutation
     async def mark_order_delivered(
-        self, 
-        order_id: UUID, 
+        self,
+        info: Info,
+        order_id: UUID,
         agent_id: UUID
     ) -> Optional[DeliveryOrder]:
         """Mark order as delivered through delivery service"""
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                "http://localhost:8003/graphql",
-                json={
-                    "query": """
-                    mutation MarkOrderDelivered($orderId: UUID!, $agentId: UUID!) {
-                        markOrderDelivered(orderId: $orderId, agentId: $agentId) {
-                            id
-                            status
-                            deliveredAt
-                        }
-                    }
-                    """,
-                    "variables": {
-                        "orderId": str(order_id),
-                        "agentId": str(agent_id)
-                    }
-                }
-            )
-            data = response.json()
-            return data.get("data", {}).get("markOrderDelivered")
+        data = await service_clients.execute(
+            "delivery",
+            f"""
+            mutation MarkOrderDelivered($orderId: UUID!, $agentId: UUID!) {{
+                markOrderDelivered(orderId: $orderId, agentId: $agentId) {{ {selection_for(info, DELIVERY_ORDER_SPEC)} }}
+            }}
+            """,
+            {
+                "orderId": str(order_id),
+                "agentId": str(agent_id)
+            }
+        )
+        response_cache.invalidate("DeliveryAgent", "UserOrder", "RestaurantOrder", "DeliveryOrder")
+        return convert_delivery_order(data.get("markOrderDelivered"))
 schema = strawberry.Schema(
     query=Query,
     mutation=Mutation,
     extensions=[
         strawberry.extensions.QueryDepthLimiter(max_depth=15),
-        strawberry.extensions.ValidationCache(maxsize=100),
+        QueryCostLimiter,
+        strawberry.extensions.ParserCache(maxsize=settings.graphql_document_cache_size),
+        strawberry.extensions.ValidationCache(maxsize=settings.graphql_document_cache_size),
+        ResponseCacheExtension,
     ]
-) 
\ No newline at end of file
+)
@@ -0,0 +1,283 @@
+import strawberry
+from typing import Any, Dict, List, Optional
+from datetime import datetime
+from decimal import Decimal
+from uuid import UUID
+from strawberry.types import Info
+
+from .queries import RESTAURANT_SPEC, DELIVERY_AGENT_SPEC, selection_for
+
+# Gateway-owned output types. The per-service types share names such as
+# `Order` and `OrderStatus`, so the gateway defines its own, uniquely named
+# types and converts the downstream (camelCase) payloads into them.
+
+
+def _uuid(value: Any) -> Optional[UUID]:
+    if value is None or isinstance(value, UUID):
+        return value
+    return UUID(str(value))
+
+
+def _decimal(value: Any) -> Optional[Decimal]:
+    if value is None:
+        return None
+    return Decimal(str(value))
+
+
+def _datetime(value: Any) -> Optional[datetime]:
+    if value is None or isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(value)
+
+
+@strawberry.type
+class MenuItem:
+    id: UUID
+    name: str
+    description: Optional[str]
+    price: Decimal
+    category: Optional[str]
+    is_available: bool
+    image_url: Optional[str]
+
+
+@strawberry.type
+class Restaurant:
+    id: UUID
+    name: str
+    cuisine_type: Optional[str]
+    address: strawberry.scalars.JSON
+    is_online: bool
+    operation_hours: Optional[strawberry.scalars.JSON]
+    menu_items: List[MenuItem]
+
+
+@strawberry.type
+class Location:
+    latitude: float
+    longitude: float
+    address: Optional[str] = None
+
+
+@strawberry.type
+class DeliveryAgent:
+    id: UUID
+    name: str
+    email: str
+    phone: str
+    vehicle_type: Optional[str]
+    is_available: bool
+    current_location: Optional[Location]
+    deliveries_completed: int
+    average_rating: Optional[float]
+    created_at: datetime
+
+
+@strawberry.type
+class OrderItem:
+    id: UUID
+    menu_item_id: UUID
+    quantity: int
+    unit_price: Decimal
+    total_price: Decimal
+
+
+@strawberry.type
+class UserOrder:
+    id: UUID
+    user_id: UUID
+    restaurant_id: UUID
+    delivery_agent_id: Optional[UUID]
+    status: str
+    total_amount: Decimal
+    delivery_address: strawberry.scalars.JSON
+    special_instructions: Optional[str]
+    placed_at: datetime
+    accepted_at: Optional[datetime]
+    delivered_at: Optional[datetime]
+    order_items: List[OrderItem]
+
+    @strawberry.field
+    async def restaurant(self, info: Info) -> Optional[Restaurant]:
+        """Restaurant the order was placed with (batched per request)"""
+        return await info.context.loaders.restaurant_by_id.load(
+            (self.restaurant_id, selection_for(info, RESTAURANT_SPEC))
+        )
+
+    @strawberry.field
+    async def agent(self, info: Info) -> Optional[DeliveryAgent]:
+        """Delivery agent assigned to the order (batched per request)"""
+        if not self.delivery_agent_id:
+            return None
+        return await info.context.loaders.agent_by_id.load(
+            (self.delivery_agent_id, selection_for(info, DELIVERY_AGENT_SPEC))
+        )
+
+
+@strawberry.type
+class RestaurantOrder:
+    id: UUID
+    user_id: UUID
+    restaurant_id: UUID
+    delivery_agent_id: Optional[UUID]
+    status: str
+    total_amount: Decimal
+    delivery_address: strawberry.scalars.JSON
+    special_instructions: Optional[str]
+    placed_at: datetime
+    accepted_at: Optional[datetime]
+    delivered_at: Optional[datetime]
+    estimated_prep_time: Optional[int]
+
+    @strawberry.field
+    async def agent(self, info: Info) -> Optional[DeliveryAgent]:
+        """Delivery agent assigned to the order (batched per request)"""
+        if not self.delivery_agent_id:
+            return None
+        return await info.context.loaders.agent_by_id.load(
+            (self.delivery_agent_id, selection_for(info, DELIVERY_AGENT_SPEC))
+        )
+
+
+@strawberry.type
+class DeliveryOrder:
+    id: UUID
+    user_id: UUID
+    restaurant_id: UUID
+    delivery_agent_id: Optional[UUID]
+    status: str
+    total_amount: Decimal
+    delivery_address: strawberry.scalars.JSON
+    special_instructions: Optional[str]
+    placed_at: datetime
+    accepted_at: Optional[datetime]
+    delivered_at: Optional[datetime]
+    pickup_time: Optional[datetime]
+
+    @strawberry.field
+    async def restaurant(self, info: Info) -> Optional[Restaurant]:
+        """Restaurant to pick the order up from (batched per request)"""
+        return await info.context.loaders.restaurant_by_id.load(
+            (self.restaurant_id, selection_for(info, RESTAURANT_SPEC))
+        )
+
+    @strawberry.field
+    async def agent(self, info: Info) -> Optional[DeliveryAgent]:
+        """Delivery agent carrying the order (batched per request)"""
+        if not self.delivery_agent_id:
+            return None
+        return await info.context.loaders.agent_by_id.load(
+            (self.delivery_agent_id, selection_for(info, DELIVERY_AGENT_SPEC))
+        )
+
+
+def convert_menu_item(data: Dict[str, Any]) -> MenuItem:
+    """Convert a downstream menu item payload to the gateway MenuItem type"""
+    return MenuItem(
+        id=_uuid(data.get("id")),
+        name=data.get("name"),
+        description=data.get("description"),
+        price=_decimal(data.get("price")),
+        category=data.get("category"),
+        is_available=data.get("isAvailable"),
+        image_url=data.get("imageUrl")
+    )
+
+
+def convert_restaurant(data: Optional[Dict[str, Any]]) -> Optional[Restaurant]:
+    """Convert a downstream restaurant payload to the gateway Restaurant type"""
+    if not data:
+        return None
+    return Restaurant(
+        id=_uuid(data.get("id")),
+        name=data.get("name"),
+        cuisine_type=data.get("cuisineType"),
+        address=data.get("address"),
+        is_online=data.get("isOnline"),
+        operation_hours=data.get("operationHours"),
+        menu_items=[convert_menu_item(item) for item in data.get("menuItems") or []]
+    )
+
+
+def convert_location(data: Optional[Dict[str, Any]]) -> Optional[Location]:
+    """Convert a downstream location payload to the gateway Location type"""
+    if not data:
+        return None
+    return Location(
+        latitude=data.get("latitude"),
+        longitude=data.get("longitude"),
+        address=data.get("address")
+    )
+
+
+def convert_delivery_agent(data: Optional[Dict[str, Any]]) -> Optional[DeliveryAgent]:
+    """Convert a downstream delivery agent payload to the gateway DeliveryAgent type"""
+    if not data:
+        return None
+    return DeliveryAgent(
+        id=_uuid(data.get("id")),
+        name=data.get("name"),
+        email=data.get("email"),
+        phone=data.get("phone"),
+        vehicle_type=data.get("vehicleType"),
+        is_available=data.get("isAvailable"),
+        current_location=convert_location(data.get("currentLocation")),
+        deliveries_completed=data.get("deliveriesCompleted") or 0,
+        average_rating=data.get("averageRating"),
+        created_at=_datetime(data.get("createdAt"))
+    )
+
+
+def _order_fields(data: Dict[str, Any]) -> Dict[str, Any]:
+    return dict(
+        id=_uuid(data.get("id")),
+        user_id=_uuid(data.get("userId")),
+        restaurant_id=_uuid(data.get("restaurantId")),
+        delivery_agent_id=_uuid(data.get("deliveryAgentId")),
+        status=data.get("status"),
+        total_amount=_decimal(data.get("totalAmount")),
+        delivery_address=data.get("deliveryAddress"),
+        special_instructions=data.get("specialInstructions"),
+        placed_at=_datetime(data.get("placedAt")),
+        accepted_at=_datetime(data.get("acceptedAt")),
+        delivered_at=_datetime(data.get("deliveredAt"))
+    )
+
+
+def convert_user_order(data: Optional[Dict[str, Any]]) -> Optional[UserOrder]:
+    """Convert a user service order payload to the gateway UserOrder type"""
+    if not data:
+        return None
+    return UserOrder(
+        **_order_fields(data),
+        order_items=[
+            OrderItem(
+                id=_uuid(item.get("id")),
+                menu_item_id=_uuid(item.get("menuItemId")),
+                quantity=item.get("quantity"),
+                unit_price=_decimal(item.get("unitPrice")),
+                total_price=_decimal(item.get("totalPrice"))
+            )
+            for item in data.get("orderItems") or []
+        ]
+    )
+
+
+def convert_restaurant_order(data: Optional[Dict[str, Any]]) -> Optional[RestaurantOrder]:
+    """Convert a restaurant service order payload to the gateway RestaurantOrder type"""
+    if not data:
+        return None
+    return RestaurantOrder(
+        **_order_fields(data),
+        estimated_prep_time=data.get("estimatedPrepTime")
+    )
+
+
+def convert_delivery_order(data: Optional[Dict[str, Any]]) -> Optional[DeliveryOrder]:
+    """Convert a delivery service order payload to the gateway DeliveryOrder type"""
+    if not data:
+        return None
+    return DeliveryOrder(
+        **_order_fields(data),
+        pickup_time=_datetime(data.get("pickupTime"))
+    )
@@ -4,7 +4,8 @@ from uuid import UUID
 from fastapi import HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from shared.database import AsyncSessionLocal
+from shared.gql import selects
+from shared.gql.relay import build_connection, page_arguments
 from restaurant_service.services import RestaurantService, MenuService, OrderService
 from restaurant_service.schemas import (
     RestaurantCreate, RestaurantUpdate,
@@ -13,7 +14,7 @@ from restaurant_service.schemas import (
 )
 from .types import (
     Restaurant, MenuItem, Order,
-    RestaurantConnection, MenuItemConnection, OrderConnection,
+    RestaurantConnection, MenuItemConnection, OrderConnection, OrderEdge,
     RestaurantInput, RestaurantUpdateInput,
     MenuItemInput, MenuItemUpdateInput,
     OrderUpdateInput, PaginationInput, MenuFilterInput
@@ -70,7 +71,7 @@ class Query:
         pagination: Optional[PaginationInput] = None
     ) -> RestaurantConnection:
         """Get all restaurants with optional filtering"""
-        async with AsyncSessionLocal() as db:
+        async with info.context.session() as db:
             try:
                 service = RestaurantService(db)
                 
@@ -78,18 +79,20 @@ class Query:
                 offset = pagination.offset if pagination else 0
                 limit = min(limit, 100)
                 
-                restaurants = await service.get_restaurants(online_only)
-                
-                # Apply pagination manually since the service doesn't support it
-                total_count = len(restaurants)
-                start = offset
-                end = offset + limit
+                # The GraphQL Restaurant type has no menu, so never load it;
+                # one extra row tells us whether there is a next page
+                restaurants = await service.get_restaurants(
+                    online_only, limit=limit + 1, offset=offset, include_menu=False
+                )
+                has_next_page = len(restaurants) > limit
+                restaurants = restaurants[:limit]
                 
-                paginated_restaurants = restaurants[start:end]
-                has_next_page = end < total_count
+                total_count = 0
+                if selects(info, "totalCount"):
+                    total_count = await service.count_restaurants(online_only)
                 
                 return RestaurantConnection(
-                    items=[convert_restaurant_to_graphql(r) for r in paginated_restaurants],
+                    items=[convert_restaurant_to_graphql(r) for r in restaurants],
                     total_count=total_count,
                     has_next_page=has_next_page
                 )
@@ -100,7 +103,7 @@ class Query:
     @strawberry.field
     async def restaurant(self, info, restaurant_id: UUID) -> Optional[Restaurant]:
         """Get restaurant by ID"""
-        async with AsyncSessionLocal() as db:
+        async with info.context.session() as db:
             try:
                 service = RestaurantService(db)
                 restaurant = await service.get_restaurant_by_id(restaurant_id)
@@ -118,7 +121,7 @@ class Query:
         pagination: Optional[PaginationInput] = None
     ) -> MenuItemConnection:
         """Get menu items for a restaurant"""
-        async with AsyncSessionLocal() as db:
+        async with info.context.session() as db:
             try:
                 service = MenuService(db)
                 
@@ -149,7 +152,7 @@ class Query:
     @strawberry.field
     async def menu_item(self, info, menu_item_id: UUID) -> Optional[MenuItem]:
         """Get menu item by ID"""
-        async with AsyncSessionLocal() as db:
+        async with info.context.session() as db:
             try:
                 service = MenuService(db)
                 menu_item = await service.get_menu_item_by_id(menu_item_id)
@@ -164,32 +167,27 @@ class Query:
         info, 
         restaurant_id: UUID,
         status_filter: Optional[str] = None,
+        first: Optional[int] = None,
+        after: Optional[str] = None,
         pagination: Optional[PaginationInput] = None
     ) -> OrderConnection:
-        """Get orders for a restaurant"""
-        async with AsyncSessionLocal() as db:
+        """Get orders for a restaurant, newest first, with cursor pagination"""
+        async with info.context.session() as db:
             try:
                 service = OrderService(db)
                 
-                limit = pagination.limit if pagination else 50
-                offset = pagination.offset if pagination else 0
-                limit = min(limit, 100)
-                
-                if status_filter == "pending":
-                    orders = await service.get_pending_orders(restaurant_id, limit + 1, offset)
-                elif status_filter == "active":
-                    orders = await service.get_active_orders(restaurant_id, limit + 1, offset)
-                else:
-                    orders = await service.get_restaurant_orders(restaurant_id, limit + 1, offset)
+                limit = page_arguments(first, pagination)
+                page = await service.get_restaurant_orders(
+                    str(restaurant_id), status_filter, limit, after
+                )
                 
-                has_next_page = len(orders) > limit
-                if has_next_page:
-                    orders = orders[:limit]
+                total_count = 0
+                if selects(info, "totalCount"):
+                    total_count = await service.count_restaurant_orders(str(restaurant_id), status_filter)
                 
-                return OrderConnection(
-                    items=[convert_order_to_graphql(order) for order in orders],
-                    total_count=len(orders),
-                    has_next_page=has_next_page
+                return build_connection(
+                    OrderConnection, OrderEdge,
+                    page.map(convert_order_to_graphql), total_count
                 )
             except Exception as e:
                 await db.rollback()
@@ -198,7 +196,7 @@ class Query:
     @strawberry.field
     async def order(self, info, order_id: UUID) -> Optional[Order]:
         """Get order by ID"""
-        async with AsyncSessionLocal() as db:
+        async with info.context.session() as db:
             try:
                 service = OrderService(db)
                 order = await service.get_order_by_id(order_id)
@@ -215,7 +213,7 @@ class Mutation:
         restaurant_input: RestaurantInput
     ) -> Restaurant:
         """Create a new restaurant"""
-        async with AsyncSessionLocal() as db:
+        async with info.context.session() as db:
             try:
                 service = RestaurantService(db)
                 
@@ -242,7 +240,7 @@ class Mutation:
         restaurant_input: RestaurantUpdateInput
     ) -> Optional[Restaurant]:
         """Update a restaurant"""
-        async with AsyncSessionLocal() as db:
+        async with info.context.session() as db:
             try:
                 service = RestaurantService(db)
                 
@@ -275,7 +273,7 @@ class Mutation:
         is_online: bool
     ) -> Optional[Restaurant]:
         """Update restaurant online status"""
-        async with AsyncSessionLocal() as db:
+        async with info.context.session() as db:
             try:
                 service = RestaurantService(db)
                 restaurant = await service.update_restaurant_status(restaurant_id, is_online)
@@ -292,7 +290,7 @@ class Mutation:
         menu_item_input: MenuItemInput
     ) -> MenuItem:
         """Create a new menu item"""
-        async with AsyncSessionLocal() as db:
+        async with info.context.session() as db:
             try:
                 service = MenuService(db)
                 
@@ -319,7 +317,7 @@ class Mutation:
         menu_item_input: MenuItemUpdateInput
     ) -> Optional[MenuItem]:
         """Update a menu item"""
-        async with AsyncSessionLocal() as db:
+        async with info.context.session() as db:
             try:
                 service = MenuService(db)
                 
@@ -352,7 +350,7 @@ class Mutation:
         is_available: bool
     ) -> Optional[MenuItem]:
         """Update menu item availability"""
-        async with AsyncSessionLocal() as db:
+        async with info.context.session() as db:
             try:
                 service = MenuService(db)
                 menu_item = await service.update_menu_item_availability(menu_item_id, is_available)
@@ -370,7 +368,7 @@ class Mutation:
         estimated_prep_time: Optional[int] = None
     ) -> Optional[Order]:
         """Accept an order"""
-        async with AsyncSessionLocal() as db:
+        async with info.context.session() as db:
             try:
                 service = OrderService(db)
                 order = await service.accept_order(order_id, restaurant_id, estimated_prep_time)
@@ -388,7 +386,7 @@ class Mutation:
         reason: Optional[str] = None
     ) -> Optional[Order]:
         """Reject an order"""
-        async with AsyncSessionLocal() as db:
+        async with info.context.session() as db:
             try:
                 service = OrderService(db)
                 order = await service.reject_order(order_id, restaurant_id, reason)
@@ -406,7 +404,7 @@ class Mutation:
         order_input: OrderUpdateInput
     ) -> Optional[Order]:
         """Update order status"""
-        async with AsyncSessionLocal() as db:
+        async with info.context.session() as db:
             try:
                 service = OrderService(db)
                 
@@ -429,7 +427,7 @@ class Mutation:
         restaurant_id: UUID
     ) -> Optional[Order]:
         """Mark order as ready for pickup"""
-        async with AsyncSessionLocal() as db:
+        async with info.context.session() as db:
             try:
                 service = OrderService(db)
                 order = await service.mark_order_ready(order_id, restaurant_id)
@@ -1,5 +1,6 @@
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from contextlib import asynccontextmanager
 import logging
 import sys
@@ -10,9 +11,14 @@ sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
 from shared.database import engine, Base
 from shared.config import settings
+from shared.metrics import metrics
+from shared.outbox import outbox_dispatcher
 from restaurant_service.routers import restaurant_router, menu_router, orders_router
+from restaurant_service.services.batch_dispatcher import batch_dispatcher
+from restaurant_service.services.kitchen_feed import kitchen_feed
 
-from strawberry.fastapi import GraphQLRouter
+from shared.gql import PersistedQueryRouter
+from shared.gql.context import get_context
 from restaurant_service.gql import schema
 
 # Configure logging
@@ -30,11 +36,19 @@ async def lifespan(app: FastAPI):
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
     
+    await outbox_dispatcher.start()
+    if settings.dispatch_mode == "batch":
+        await batch_dispatcher.start()
+    await kitchen_feed.start()
+    
     logger.info("Restaurant Service startup complete")
     
     yield
     
     logger.info("Restaurant Service shutting down...")
+    await kitchen_feed.stop()
+    await batch_dispatcher.stop()
+    await outbox_dispatcher.stop()
     await engine.dispose()
     logger.info("Restaurant Service shutdown complete")
 
@@ -58,7 +72,7 @@ app.include_router(restaurant_router)
 app.include_router(menu_router)
 app.include_router(orders_router)
 
-graphql_app = GraphQLRouter(schema)
+graphql_app = PersistedQueryRouter(schema, context_getter=get_context)
 app.include_router(graphql_app, prefix="/graphql")
 
 @app.get("/health")
@@ -70,6 +84,11 @@ async def health_check():
         "version": "1.0.0"
     }
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics_endpoint():
+    """Prometheus metrics endpoint"""
+    return metrics.render()
+
 @app.get("/")
 async def root():
     """Root endpoint"""
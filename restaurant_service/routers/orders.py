@@ -1,12 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Header, Response, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
+from datetime import datetime
+from uuid import UUID
 import logging
 
 from shared.database import get_db
-from restaurant_service.services import OrderService
+from shared.order_timeline import stage_window
+from shared.order_transitions import InvalidTransitionError
+from shared.pagination import InvalidCursorError, page_size
+from restaurant_service.services import OrderService, kitchen_feed
 from restaurant_service.schemas import (
-    OrderUpdateRequest, OrderStatusUpdate, RestaurantOrderResponse
+    OrderUpdateRequest, OrderStatusUpdate, NewOrderNotification, RestaurantOrderResponse,
+    StageTimingResponse
 )
 
 logger = logging.getLogger(__name__)
@@ -15,14 +22,22 @@ router = APIRouter(prefix="/orders", tags=["orders"])
 @router.get("/{restaurant_id}", response_model=List[RestaurantOrderResponse])
 async def get_restaurant_orders(
     restaurant_id: str,
+    response: Response,
     status_filter: Optional[str] = None,
+    limit: int = 50,
+    cursor: Optional[str] = None,
     db: AsyncSession = Depends(get_db)
 ) -> List[RestaurantOrderResponse]:
-    """Get all orders for a restaurant, optionally filtered by status"""
+    """Get a restaurant's orders, newest first, optionally filtered by status"""
     try:
         service = OrderService(db)
-        orders = await service.get_restaurant_orders(restaurant_id, status_filter)
-        return orders
+        page = await service.get_restaurant_orders(restaurant_id, status_filter, page_size(limit), cursor)
+        
+        if page.has_next_page:
+            response.headers["X-Next-Cursor"] = page.end_cursor
+        return page.items
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
         logger.error(f"Error fetching orders for restaurant {restaurant_id}: {e}")
         raise HTTPException(
@@ -33,13 +48,21 @@ async def get_restaurant_orders(
 @router.get("/{restaurant_id}/pending", response_model=List[RestaurantOrderResponse])
 async def get_pending_orders(
     restaurant_id: str,
+    response: Response,
+    limit: int = 50,
+    cursor: Optional[str] = None,
     db: AsyncSession = Depends(get_db)
 ) -> List[RestaurantOrderResponse]:
-    """Get all pending orders for a restaurant"""
+    """Get pending orders for a restaurant, newest first"""
     try:
         service = OrderService(db)
-        orders = await service.get_pending_orders(restaurant_id)
-        return orders
+        page = await service.get_pending_orders(restaurant_id, page_size(limit), cursor)
+        
+        if page.has_next_page:
+            response.headers["X-Next-Cursor"] = page.end_cursor
+        return page.items
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
         logger.error(f"Error fetching pending orders for restaurant {restaurant_id}: {e}")
         raise HTTPException(
@@ -50,13 +73,21 @@ async def get_pending_orders(
 @router.get("/{restaurant_id}/active", response_model=List[RestaurantOrderResponse])
 async def get_active_orders(
     restaurant_id: str,
+    response: Response,
+    limit: int = 50,
+    cursor: Optional[str] = None,
     db: AsyncSession = Depends(get_db)
 ) -> List[RestaurantOrderResponse]:
-    """Get all active orders for a restaurant"""
+    """Get active orders for a restaurant, newest first"""
     try:
         service = OrderService(db)
-        orders = await service.get_active_orders(restaurant_id)
-        return orders
+        page = await service.get_active_orders(restaurant_id, page_size(limit), cursor)
+        
+        if page.has_next_page:
+            response.headers["X-Next-Cursor"] = page.end_cursor
+        return page.items
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
         logger.error(f"Error fetching active orders for restaurant {restaurant_id}: {e}")
         raise HTTPException(
@@ -64,6 +95,71 @@ async def get_active_orders(
             detail="Failed to fetch active orders"
         )
 
+@router.get("/{restaurant_id}/feed")
+async def kitchen_order_feed(
+    restaurant_id: UUID,
+    last_event_id: Optional[str] = None,
+    last_event_id_header: Optional[str] = Header(None, alias="Last-Event-ID"),
+    db: AsyncSession = Depends(get_db)
+) -> StreamingResponse:
+    """
+    Follow a restaurant's pending and active orders live as server-sent events.
+    
+    Sends a `snapshot` event with every order on the kitchen board, then
+    `add`, `update` and `remove` events as orders are placed, accepted,
+    prepared and picked up. Every event has an id; reconnecting with it
+    (the `Last-Event-ID` header, or `last_event_id` for clients that
+    cannot set headers) replays only what was missed, or sends a new
+    snapshot when that is no longer possible.
+    """
+    try:
+        opened = await kitchen_feed.open(db, restaurant_id, last_event_id_header or last_event_id)
+    except Exception as e:
+        logger.error(f"Error opening kitchen feed for restaurant {restaurant_id}: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to open kitchen feed"
+        )
+    
+    if opened is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Restaurant not found")
+    
+    return StreamingResponse(
+        kitchen_feed.stream(*opened),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.get("/{restaurant_id}/timings", response_model=List[StageTimingResponse])
+async def get_stage_timings(
+    restaurant_id: UUID,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    db: AsyncSession = Depends(get_db)
+) -> List[StageTimingResponse]:
+    """
+    How long the restaurant's orders take to be accepted, prepared, picked up and
+    delivered: count, average, median, 90th percentile and maximum seconds
+    per stage, with the average of the restaurant's own prep time estimates.
+    
+    Covers the orders that finished each stage in [since, until); by
+    default the last 7 days.
+    """
+    try:
+        since, until = stage_window(since, until)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    
+    try:
+        service = OrderService(db)
+        return await service.get_stage_timings(str(restaurant_id), since, until)
+    except Exception as e:
+        logger.error(f"Error fetching stage timings for restaurant {restaurant_id}: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to fetch stage timings"
+        )
+
 @router.get("/order/{order_id}", response_model=RestaurantOrderResponse)
 async def get_order(
     order_id: str,
@@ -90,6 +186,31 @@ async def get_order(
             detail="Failed to fetch order"
         )
 
+@router.post("/{order_id}/notify", status_code=status.HTTP_200_OK)
+async def receive_new_order(
+    order_id: str,
+    notification: NewOrderNotification,
+    db: AsyncSession = Depends(get_db)
+) -> dict:
+    """Receive a new-order notification from the user service"""
+    try:
+        service = OrderService(db)
+        if not await service.receive_new_order(order_id, notification.restaurant_id):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Order not found for this restaurant"
+            )
+        
+        return {"message": "Order notification received", "order_id": order_id}
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error receiving notification for order {order_id}: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to process order notification"
+        )
+
 @router.patch("/order/{order_id}/restaurant/{restaurant_id}", response_model=OrderStatusUpdate)
 async def update_order_status(
     order_id: str,
@@ -111,6 +232,8 @@ async def update_order_status(
         return result
     except HTTPException:
         raise
+    except InvalidTransitionError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
     except Exception as e:
         logger.error(f"Error updating order status {order_id}: {e}")
         raise HTTPException(
@@ -144,6 +267,8 @@ async def accept_order(
         return result
     except HTTPException:
         raise
+    except InvalidTransitionError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
     except Exception as e:
         logger.error(f"Error accepting order {order_id}: {e}")
         raise HTTPException(
@@ -172,6 +297,8 @@ async def reject_order(
         return result
     except HTTPException:
         raise
+    except InvalidTransitionError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
     except Exception as e:
         logger.error(f"Error rejecting order {order_id}: {e}")
         raise HTTPException(
@@ -199,6 +326,8 @@ async def mark_order_ready(
         return result
     except HTTPException:
         raise
+    except InvalidTransitionError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
     except Exception as e:
         logger.error(f"Error marking order ready {order_id}: {e}")
         raise HTTPException(
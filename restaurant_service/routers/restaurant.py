@@ -4,6 +4,7 @@ from typing import List
 import logging
 
 from shared.database import get_db
+from shared.opening_hours import InvalidOperatingHoursError
 from restaurant_service.services import RestaurantService
 from restaurant_service.schemas import (
     RestaurantCreate, RestaurantUpdate, RestaurantResponse
@@ -22,6 +23,8 @@ async def create_restaurant(
         service = RestaurantService(db)
         restaurant = await service.create_restaurant(restaurant_data)
         return restaurant
+    except InvalidOperatingHoursError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
         logger.error(f"Error creating restaurant: {e}")
         raise HTTPException(
@@ -90,6 +93,8 @@ async def update_restaurant(
             )
         
         return restaurant
+    except InvalidOperatingHoursError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except HTTPException:
         raise
     except Exception as e:
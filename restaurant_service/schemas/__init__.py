@@ -3,11 +3,15 @@ from .restaurant import (
     MenuItemCreate, MenuItemUpdate, MenuItemResponse,
     OperationHours
 )
-from .order import OrderUpdateRequest, OrderStatusUpdate, DeliveryAssignment, RestaurantOrderResponse
+from .order import (
+    OrderUpdateRequest, OrderStatusUpdate, NewOrderNotification, DeliveryAssignment,
+    RestaurantOrderResponse, StageTimingResponse
+)
 
 __all__ = [
     "RestaurantCreate", "RestaurantUpdate", "RestaurantResponse",
     "MenuItemCreate", "MenuItemUpdate", "MenuItemResponse",
     "OperationHours", "OrderUpdateRequest", "OrderStatusUpdate",
-    "DeliveryAssignment", "RestaurantOrderResponse"
+    "NewOrderNotification", "DeliveryAssignment", "RestaurantOrderResponse",
+    "StageTimingResponse"
 ] 
\ No newline at end of file
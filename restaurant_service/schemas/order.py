@@ -1,20 +1,40 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, validator
 from typing import Optional
 from datetime import datetime
 import uuid
 
+from shared.order_state import RESTAURANT_STATUSES
+
 class OrderUpdateRequest(BaseModel):
     """Schema for updating order status from restaurant"""
-    status: str  # 'accepted', 'rejected', 'preparing', 'ready_for_pickup'
+    status: str  # 'accepted', 'rejected', 'preparing', 'ready_for_pickup', 'cancelled'
     estimated_prep_time: Optional[int] = None  # in minutes
+    expected_version: Optional[int] = None  # fail instead of overwriting a newer change
+
+    @validator('status')
+    def validate_status(cls, v):
+        if v not in RESTAURANT_STATUSES:
+            raise ValueError(f"Restaurants can only set status to {', '.join(sorted(RESTAURANT_STATUSES))}")
+        return v
+
+    @validator('estimated_prep_time')
+    def validate_estimated_prep_time(cls, v):
+        if v is not None and not 0 < v <= 24 * 60:
+            raise ValueError('Estimated prep time must be between 1 minute and 24 hours')
+        return v
 
 class OrderStatusUpdate(BaseModel):
     """Schema for order status update response"""
     order_id: uuid.UUID
     status: str
+    version: int
     updated_at: datetime
     estimated_prep_time: Optional[int] = None
 
+class NewOrderNotification(BaseModel):
+    """Schema for the user service's new-order notification"""
+    restaurant_id: uuid.UUID
+
 class DeliveryAssignment(BaseModel):
     """Schema for delivery agent assignment"""
     order_id: uuid.UUID
@@ -39,6 +59,7 @@ class RestaurantOrderResponse(BaseModel):
     restaurant_id: uuid.UUID
     delivery_agent_id: Optional[uuid.UUID]
     status: str
+    version: int
     total_amount: float
     delivery_address: dict
     special_instructions: Optional[str]
@@ -48,4 +69,14 @@ class RestaurantOrderResponse(BaseModel):
     order_items: list[OrderItemResponse] = []
 
     class Config:
-        from_attributes = True 
\ No newline at end of file
+        from_attributes = True
+
+class StageTimingResponse(BaseModel):
+    """Schema for how long orders spent in one stage, in seconds"""
+    stage: str
+    orders: int
+    avg_seconds: float
+    p50_seconds: float
+    p90_seconds: float
+    max_seconds: float
+    avg_estimated_seconds: Optional[float] = None  # from estimated_prep_time, where given
@@ -1,5 +1,6 @@
 from .restaurant_service import RestaurantService
 from .menu_service import MenuService
 from .order_service import OrderService
+from .kitchen_feed import KitchenFeed, kitchen_feed
 
-__all__ = ["RestaurantService", "MenuService", "OrderService"] 
\ No newline at end of file
+__all__ = ["RestaurantService", "MenuService", "OrderService", "KitchenFeed", "kitchen_feed"] 
\ No newline at end of file
@@ -0,0 +1,260 @@
+from datetime import datetime
+from typing import List, Optional, Sequence, Tuple
+from uuid import UUID
+import asyncio
+import logging
+import time
+
+import numpy as np
+from sqlalchemy import any_, bindparam, func, select, update
+from sqlalchemy.dialects.postgresql import ARRAY, UUID as PG_UUID
+
+from shared.config import settings
+from shared.database import AsyncSessionLocal
+from shared.events import AgentAvailabilityChanged, OrderAssigned, publish_many
+from shared.geo import EARTH_RADIUS_KM, coordinates
+from shared.metrics import metrics
+from shared.models import DeliveryAgent, Order, Restaurant
+from shared.models.order import KITCHEN_ACTIVE_STATUSES, status_in
+from shared.outbox import enqueue_many, outbox_dispatcher
+from .dispatch_engine import DEFAULT_SPEED_KMH, VEHICLE_SPEED_KMH, Candidate, DispatchEngine
+
+logger = logging.getLogger(__name__)
+
+# Cost of a pair that must not be matched (agent out of range). Finite so
+# the solver's potentials stay well defined; such pairs are dropped after.
+FORBIDDEN = 1e9
+
+batch_seconds = metrics.histogram(
+    "dispatch_batch_seconds", "Time to match and commit one dispatch batch"
+)
+batch_orders = metrics.histogram(
+    "dispatch_batch_orders", "Orders waiting for an agent per dispatch batch",
+    buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500)
+)
+batch_assignments = metrics.counter(
+    "dispatch_batch_assignments_total", "Orders matched to an agent by batch dispatch"
+)
+
+
+def _points(locations: Sequence[Optional[dict]]) -> np.ndarray:
+    """(n, 2) latitude/longitude array, NaN where a location has no coordinates"""
+    points = np.full((len(locations), 2), np.nan)
+    for index, location in enumerate(locations):
+        point = coordinates(location)
+        if point is not None:
+            points[index] = point
+    return points
+
+
+def cost_matrix(pickups: Sequence[Optional[dict]], candidates: Sequence[Candidate]) -> np.ndarray:
+    """Minutes until each agent (column) could reach each order's restaurant (row).
+
+    The same estimate as dispatch_engine.score_candidate, computed for every
+    pair at once; out-of-range pairs cost FORBIDDEN.
+    """
+    orders = np.radians(_points(pickups))
+    agents = np.radians(_points([candidate.location for candidate in candidates]))
+    speeds = np.array([
+        VEHICLE_SPEED_KMH.get((candidate.vehicle_type or '').lower(), DEFAULT_SPEED_KMH)
+        for candidate in candidates
+    ])
+    loads = np.array([candidate.active_orders for candidate in candidates], dtype=float)
+
+    lat1, lon1 = orders[:, 0:1], orders[:, 1:2]
+    lat2, lon2 = agents[:, 0], agents[:, 1]
+    h = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    distance = 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(h))
+
+    known = ~np.isnan(distance)
+    travel = np.where(known, distance / speeds * 60, settings.dispatch_unknown_distance_minutes)
+    cost = travel + loads * settings.dispatch_minutes_per_active_order
+    return np.where(known & (distance > settings.dispatch_max_pickup_km), FORBIDDEN, cost)
+
+
+def solve_assignment(cost: np.ndarray) -> List[Tuple[int, int]]:
+    """Minimum-cost matching of rows to columns (Hungarian method), as (row, column) pairs.
+
+    Every row is matched when there are at least as many columns, and vice
+    versa. Shortest augmenting paths with row/column potentials, O(n^2 m),
+    with the inner scan over columns vectorized.
+    """
+    if cost.size == 0:
+        return []
+    if cost.shape[0] > cost.shape[1]:
+        return [(row, column) for column, row in solve_assignment(cost.T)]
+
+    n, m = cost.shape
+    u = np.zeros(n + 1)
+    v = np.zeros(m + 1)
+    # row_of[j]: 1-based row matched to column j (column 0 is the virtual start)
+    row_of = np.zeros(m + 1, dtype=np.int64)
+    way = np.zeros(m + 1, dtype=np.int64)
+
+    for row in range(1, n + 1):
+        row_of[0] = row
+        column = 0
+        min_slack = np.full(m + 1, np.inf)
+        used = np.zeros(m + 1, dtype=bool)
+
+        while True:
+            used[column] = True
+            current_row = row_of[column]
+            free = ~used[1:]
+
+            slack = cost[current_row - 1] - u[current_row] - v[1:]
+            better = free & (slack < min_slack[1:])
+            min_slack[1:][better] = slack[better]
+            way[1:][better] = column
+
+            candidates = np.where(free, min_slack[1:], np.inf)
+            next_column = int(np.argmin(candidates)) + 1
+            delta = candidates[next_column - 1]
+
+            used_columns = np.flatnonzero(used)
+            u[row_of[used_columns]] += delta
+            v[used_columns] -= delta
+            min_slack[1:][free] -= delta
+
+            column = next_column
+            if row_of[column] == 0:
+                break
+
+        # Flip the augmenting path
+        while column:
+            previous = way[column]
+            row_of[column] = row_of[previous]
+            column = previous
+
+    return sorted((int(row_of[column]) - 1, column - 1) for column in range(1, m + 1) if row_of[column])
+
+
+def _uuid_array(name: str, values: List[UUID]):
+    return bindparam(name, values, type_=ARRAY(PG_UUID(as_uuid=True)))
+
+
+class BatchDispatcher:
+    """Matches accepted orders to free agents in batches (DISPATCH_MODE=batch).
+
+    Orders accepted in batch mode wait without an agent, also while the
+    kitchen prepares them, until a round matches them. Every `window`
+    seconds the dispatcher locks the waiting orders and the free agents
+    (SKIP LOCKED, so instances can share the work), finds the matching with
+    the least total pickup time, and commits every assignment of the batch
+    in one transaction. Compared with giving each order the best agent at
+    the moment it is accepted, this avoids handing an early order the only
+    agent close to a later one.
+    """
+
+    def __init__(
+        self,
+        window: float = settings.dispatch_batch_window,
+        max_orders: int = settings.dispatch_batch_max_orders
+    ):
+        self.window = window
+        self.max_orders = max_orders
+        self._task: Optional[asyncio.Task] = None
+
+    def _waiting_orders_query(self):
+        # Oldest first, from the partial ix_orders_awaiting_agent
+        return (
+            select(Order.id, Order.restaurant_id, Restaurant.address)
+            .join(Restaurant, Restaurant.id == Order.restaurant_id)
+            .where(status_in(KITCHEN_ACTIVE_STATUSES), Order.delivery_agent_id.is_(None))
+            .order_by(Order.accepted_at, Order.id)
+            .limit(self.max_orders)
+            .with_for_update(of=Order, skip_locked=True)
+        )
+
+    async def dispatch_once(self) -> int:
+        """Match one batch; returns how many orders were assigned"""
+        started = time.perf_counter()
+        async with AsyncSessionLocal() as db:
+            orders = (await db.execute(self._waiting_orders_query())).all()
+            if not orders:
+                return 0
+            batch_orders.observe(len(orders))
+
+            candidates = await DispatchEngine(db).candidates(lock=True)
+            if not candidates:
+                logger.warning(f"{len(orders)} orders waiting, no delivery agents available")
+                return 0
+
+            cost = cost_matrix([order.address for order in orders], candidates)
+            pairs = [(orders[i], candidates[j]) for i, j in solve_assignment(cost) if cost[i, j] < FORBIDDEN]
+            if not pairs:
+                return 0
+
+            await self._apply(db, pairs)
+            await db.commit()
+
+        outbox_dispatcher.wake()
+        batch_assignments.inc(len(pairs))
+        batch_seconds.observe(time.perf_counter() - started)
+        logger.info(f"Batch dispatch assigned {len(pairs)} of {len(orders)} waiting orders")
+        return len(pairs)
+
+    async def _apply(self, db, pairs) -> None:
+        order_ids = [order.id for order, _ in pairs]
+        agent_ids = [candidate.agent_id for _, candidate in pairs]
+
+        matches = select(
+            func.unnest(_uuid_array('order_ids', order_ids)).label('order_id'),
+            func.unnest(_uuid_array('agent_ids', agent_ids)).label('agent_id')
+        ).subquery()
+        await db.execute(
+            update(Order)
+            .where(Order.id == matches.c.order_id)
+            .values(delivery_agent_id=matches.c.agent_id, version=Order.version + 1, updated_at=func.now())
+        )
+        await db.execute(
+            update(DeliveryAgent)
+            .where(DeliveryAgent.id == any_(_uuid_array('claimed_ids', agent_ids)))
+            .values(is_available=False)
+        )
+
+        assigned_at = datetime.now().isoformat()
+        await enqueue_many(db, "delivery", [
+            (
+                "/assignments/",
+                {
+                    "order_id": str(order_id),
+                    "delivery_agent_id": str(agent_id),
+                    "assigned_at": assigned_at
+                },
+                order_id
+            )
+            for order_id, agent_id in zip(order_ids, agent_ids)
+        ])
+        await publish_many(db, [
+            event
+            for order_id, agent_id in zip(order_ids, agent_ids)
+            for event in (
+                OrderAssigned(order_id=order_id, delivery_agent_id=agent_id),
+                AgentAvailabilityChanged(agent_id=agent_id, is_available=False)
+            )
+        ])
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.window)
+            try:
+                await self.dispatch_once()
+            except Exception as e:
+                logger.error(f"Error in batch dispatch: {e}")
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+
+batch_dispatcher = BatchDispatcher()
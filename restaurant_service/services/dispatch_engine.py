@@ -0,0 +1,170 @@
+from dataclasses import dataclass
+from typing import List, Optional
+from uuid import UUID
+import logging
+import time
+
+from sqlalchemy import any_, bindparam, func, select, update
+from sqlalchemy.dialects.postgresql import ARRAY, UUID as PG_UUID
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from shared.config import settings
+from shared.geo import Coordinates, coordinates, haversine_km
+from shared.metrics import metrics
+from shared.models import DeliveryAgent, Order, Restaurant
+from shared.models.order import DELIVERY_ACTIVE_STATUSES, status_in
+
+logger = logging.getLogger(__name__)
+
+# Typical urban speeds, used to turn pickup distance into minutes
+VEHICLE_SPEED_KMH = {
+    'bicycle': 12.0,
+    'bike': 12.0,
+    'motorcycle': 25.0,
+    'car': 20.0,
+}
+DEFAULT_SPEED_KMH = 15.0
+
+assignment_seconds = metrics.histogram(
+    "dispatch_assignment_seconds", "Time to pick and claim a delivery agent for an order"
+)
+assignments = metrics.counter(
+    "dispatch_assignments_total", "Delivery agent assignments by outcome"
+)
+pickup_distance_km = metrics.histogram(
+    "dispatch_pickup_distance_km", "Distance from the assigned agent to the restaurant",
+    buckets=(0.25, 0.5, 1.0, 2.0, 3.0, 5.0, 7.5, 10.0, 15.0, 25.0)
+)
+
+
+@dataclass(frozen=True)
+class Candidate:
+    agent_id: UUID
+    location: Optional[dict]
+    vehicle_type: Optional[str]
+    active_orders: int
+
+
+@dataclass(frozen=True)
+class ScoredCandidate:
+    agent_id: UUID
+    minutes: float
+    distance_km: Optional[float]
+
+
+def score_candidate(candidate: Candidate, pickup: Optional[Coordinates]) -> Optional[ScoredCandidate]:
+    """Estimated minutes until the agent can be at the restaurant; None if out of range.
+
+    Travel time is the haversine distance at the vehicle's speed. Without
+    coordinates on either side it is a flat penalty, so an agent known to be
+    close beats one whose position is unknown. Each order the agent is still
+    delivering adds to the wait.
+    """
+    location = coordinates(candidate.location)
+    distance = None
+    if pickup is not None and location is not None:
+        distance = haversine_km(location, pickup)
+        if distance > settings.dispatch_max_pickup_km:
+            return None
+        speed = VEHICLE_SPEED_KMH.get((candidate.vehicle_type or '').lower(), DEFAULT_SPEED_KMH)
+        travel_minutes = distance / speed * 60
+    else:
+        travel_minutes = settings.dispatch_unknown_distance_minutes
+
+    minutes = travel_minutes + candidate.active_orders * settings.dispatch_minutes_per_active_order
+    return ScoredCandidate(agent_id=candidate.agent_id, minutes=minutes, distance_km=distance)
+
+
+def rank_candidates(candidates: List[Candidate], pickup: Optional[Coordinates]) -> List[ScoredCandidate]:
+    """In-range candidates, best first"""
+    scored = [score_candidate(candidate, pickup) for candidate in candidates]
+    return sorted((s for s in scored if s is not None), key=lambda s: (s.minutes, str(s.agent_id)))
+
+
+class DispatchEngine:
+    """Picks the delivery agent who can reach a restaurant soonest and claims it.
+
+    Scoring reads available agents without locking them. The claim then
+    takes the best-ranked agent that is still available and not locked by a
+    concurrent assignment (FOR UPDATE SKIP LOCKED) and marks it unavailable
+    in the same statement, so two orders accepted at once never share an
+    agent and neither waits on the other.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def _pickup_location(self, restaurant_id: UUID) -> Optional[Coordinates]:
+        address = (await self.db.execute(
+            select(Restaurant.address).where(Restaurant.id == restaurant_id)
+        )).scalar_one_or_none()
+        return coordinates(address)
+
+    async def candidates(self, lock: bool = False) -> List[Candidate]:
+        """Available agents with their current load; `lock` skips and locks them (FOR UPDATE SKIP LOCKED)"""
+        # Per-agent count of undelivered orders, from ix_orders_agent_active
+        active_orders = (
+            select(func.count())
+            .select_from(Order)
+            .where(Order.delivery_agent_id == DeliveryAgent.id, status_in(DELIVERY_ACTIVE_STATUSES))
+            .correlate(DeliveryAgent)
+            .scalar_subquery()
+        )
+        stmt = select(
+            DeliveryAgent.id, DeliveryAgent.current_location, DeliveryAgent.vehicle_type, active_orders
+        ).where(DeliveryAgent.is_available == True)
+        if lock:
+            stmt = stmt.with_for_update(of=DeliveryAgent, skip_locked=True)
+
+        result = await self.db.execute(stmt)
+        return [Candidate(*row) for row in result]
+
+    async def _claim(self, ranked_ids: List[UUID]) -> Optional[UUID]:
+        """Mark the first still-claimable agent of `ranked_ids` unavailable and return it"""
+        ids = bindparam('ranked_ids', ranked_ids, type_=ARRAY(PG_UUID(as_uuid=True)))
+        agent = aliased(DeliveryAgent)
+        chosen = (
+            select(agent.id)
+            .where(agent.id == any_(ids), agent.is_available == True)
+            .order_by(func.array_position(ids, agent.id))
+            .limit(1)
+            .with_for_update(skip_locked=True)
+            .scalar_subquery()
+        )
+        stmt = (
+            update(DeliveryAgent)
+            .where(DeliveryAgent.id == chosen)
+            .values(is_available=False)
+            .returning(DeliveryAgent.id)
+        )
+        return (await self.db.execute(stmt)).scalar_one_or_none()
+
+    async def assign(self, order_id: UUID, restaurant_id: UUID) -> Optional[ScoredCandidate]:
+        """Claim the best agent for an order in the caller's transaction; None if nobody is free"""
+        started = time.perf_counter()
+        try:
+            ranked = rank_candidates(await self.candidates(), await self._pickup_location(restaurant_id))
+
+            # Usually the first claim succeeds; further rounds only run when
+            # every agent of a round was taken concurrently
+            claim_size = max(1, settings.dispatch_claim_candidates)
+            for start in range(0, len(ranked), claim_size):
+                round_ = ranked[start:start + claim_size]
+                agent_id = await self._claim([candidate.agent_id for candidate in round_])
+                if agent_id is not None:
+                    chosen = next(candidate for candidate in round_ if candidate.agent_id == agent_id)
+                    assignments.inc(outcome="assigned")
+                    if chosen.distance_km is not None:
+                        pickup_distance_km.observe(chosen.distance_km)
+                    logger.info(
+                        f"Dispatching agent {agent_id} to order {order_id} "
+                        f"(~{chosen.minutes:.1f} min to pickup)"
+                    )
+                    return chosen
+
+            assignments.inc(outcome="no_agent")
+            logger.warning(f"No available delivery agent in range for order {order_id}")
+            return None
+        finally:
+            assignment_seconds.observe(time.perf_counter() - started)
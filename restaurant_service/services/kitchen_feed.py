@@ -0,0 +1,281 @@
+from collections import deque
+from typing import AsyncIterator, Deque, Dict, Iterable, List, NamedTuple, Optional, Set
+from uuid import UUID, uuid4
+import asyncio
+import json
+import logging
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from shared.config import settings
+from shared.database import AsyncSessionLocal
+from shared.events import OrderAssigned, OrderPlaced, OrderStatusChanged, event_bus
+from shared.metrics import metrics
+from shared.models import Order, Restaurant
+from shared.models.order import KITCHEN_ACTIVE_STATUSES, status_in
+from shared.pubsub import Hub, Subscriber
+from restaurant_service.schemas import RestaurantOrderResponse
+
+logger = logging.getLogger(__name__)
+
+# What the kitchen display shows: the /pending and /active lists together,
+# every order from placement until the agent picks it up
+BOARD_STATUSES = ('pending',) + KITCHEN_ACTIVE_STATUSES
+
+board_loads = metrics.counter(
+    "kitchen_board_loads_total", "Kitchen board reads from the database by reason"
+)
+boards_open = metrics.gauge("kitchen_boards", "Restaurants with a kitchen board in memory")
+
+
+class Change(NamedTuple):
+    seq: int
+    kind: str  # add, update or remove
+    data: dict
+
+
+def _order_json(order: RestaurantOrderResponse) -> dict:
+    return order.model_dump(mode='json')
+
+
+class KitchenBoard:
+    """The orders one restaurant's kitchen is working on, with a numbered change log.
+
+    Every change gets the next sequence number and is kept in a bounded
+    log, so a tablet that reconnects with the last number it saw gets only
+    what it missed. `epoch` identifies this copy of the board: numbers
+    from another process or an earlier board mean nothing here.
+    """
+
+    def __init__(self, restaurant_id: UUID, replay_size: int = settings.kitchen_feed_replay_size):
+        self.restaurant_id = restaurant_id
+        self.epoch = uuid4().hex[:12]
+        self.seq = 0
+        self.orders: Dict[UUID, RestaurantOrderResponse] = {}
+        self._log: Deque[Change] = deque(maxlen=replay_size)
+
+    def event_id(self, seq: int) -> str:
+        return f"{self.epoch}-{seq}"
+
+    def _record(self, kind: str, data: dict) -> Change:
+        self.seq += 1
+        change = Change(self.seq, kind, data)
+        self._log.append(change)
+        return change
+
+    def apply(self, order_id: UUID, order: Optional[RestaurantOrderResponse]) -> Optional[Change]:
+        """Bring one order up to date; `order` is None or off the board when it left"""
+        current = self.orders.get(order_id)
+        if order is None or order.status not in BOARD_STATUSES:
+            if current is None:
+                return None
+            del self.orders[order_id]
+            return self._record("remove", {
+                "order_id": str(order_id), "status": order.status if order is not None else None
+            })
+
+        if current == order:
+            return None
+        self.orders[order_id] = order
+        return self._record("add" if current is None else "update", _order_json(order))
+
+    def replace(self, orders: Iterable[RestaurantOrderResponse]) -> List[Change]:
+        """Bring the whole board up to date from a fresh read"""
+        fresh = {order.id: order for order in orders}
+        changes = [self.apply(order_id, None) for order_id in list(self.orders) if order_id not in fresh]
+        changes += [self.apply(order_id, order) for order_id, order in fresh.items()]
+        return [change for change in changes if change is not None]
+
+    def snapshot(self) -> Change:
+        orders = sorted(self.orders.values(), key=lambda order: (order.placed_at, str(order.id)))
+        return Change(self.seq, "snapshot", {"orders": [_order_json(order) for order in orders]})
+
+    def since(self, event_id: Optional[str]) -> Optional[List[Change]]:
+        """Changes after `event_id`, or None when they cannot be replayed"""
+        epoch, _, seq = (event_id or "").rpartition("-")
+        if epoch != self.epoch or not seq.isdigit() or int(seq) > self.seq:
+            return None
+        seq = int(seq)
+        if seq < self.seq and (not self._log or self._log[0].seq > seq + 1):
+            return None
+        return [change for change in self._log if change.seq > seq]
+
+
+def _sse(board: KitchenBoard, change: Change) -> str:
+    return f"id: {board.event_id(change.seq)}\nevent: {change.kind}\ndata: {json.dumps(change.data)}\n\n"
+
+
+class KitchenFeed:
+    """Live kitchen boards for the restaurants whose tablets are connected.
+
+    A restaurant's board is read from the database when its first tablet
+    connects. After that, order events update it: each batch of events
+    costs one query for the orders it touched, however many tablets
+    watch. Tablets get the changes through an in-process Hub. Since the
+    event bus may drop events, every board is also re-read every
+    `resync_interval` seconds and any difference goes out as changes. A
+    board outlives its last tablet by `idle_ttl` seconds so a reconnect
+    can resume.
+    """
+
+    def __init__(
+        self,
+        keepalive: float = settings.stream_keepalive,
+        resync_interval: float = settings.kitchen_feed_resync_interval,
+        idle_ttl: float = settings.kitchen_feed_idle_ttl
+    ):
+        self.keepalive = keepalive
+        self.resync_interval = resync_interval
+        self.idle_ttl = idle_ttl
+        self.hub = Hub("kitchen")
+        self._boards: Dict[UUID, KitchenBoard] = {}
+        self._loading: Dict[UUID, asyncio.Task] = {}
+        self._tasks: List[asyncio.Task] = []
+
+    async def _read_orders(self, restaurant_id: Optional[UUID] = None, order_ids: Optional[Set[UUID]] = None):
+        stmt = select(Order).options(selectinload(Order.order_items))
+        if restaurant_id is not None:
+            stmt = stmt.where(Order.restaurant_id == restaurant_id, status_in(BOARD_STATUSES))
+        else:
+            stmt = stmt.where(Order.id.in_(order_ids))
+        async with AsyncSessionLocal() as db:
+            orders = (await db.execute(stmt)).scalars().all()
+            return [RestaurantOrderResponse.model_validate(order) for order in orders]
+
+    async def _load(self, restaurant_id: UUID) -> KitchenBoard:
+        board = KitchenBoard(restaurant_id)
+        board.replace(await self._read_orders(restaurant_id))
+        board_loads.inc(reason="open")
+        self._boards[restaurant_id] = board
+        boards_open.set(len(self._boards))
+        return board
+
+    async def board(self, restaurant_id: UUID) -> KitchenBoard:
+        board = self._boards.get(restaurant_id)
+        if board is not None:
+            return board
+        # Tablets connecting together share one read
+        loading = self._loading.get(restaurant_id)
+        if loading is None:
+            loading = self._loading[restaurant_id] = asyncio.ensure_future(self._load(restaurant_id))
+            loading.add_done_callback(lambda _: self._loading.pop(restaurant_id, None))
+        return await asyncio.shield(loading)
+
+    def _publish(self, board: KitchenBoard, changes: Iterable[Change]) -> None:
+        for change in changes:
+            self.hub.publish(board.restaurant_id, change.kind, change)
+
+    async def open(self, db: AsyncSession, restaurant_id: UUID, last_event_id: Optional[str] = None):
+        """Subscribe a tablet: (subscriber, board, changes to send first), or None for an unknown restaurant"""
+        if restaurant_id not in self._boards:
+            found = await db.execute(select(Restaurant.id).where(Restaurant.id == restaurant_id))
+            if found.scalar_one_or_none() is None:
+                return None
+        board = await self.board(restaurant_id)
+        # Nothing awaits between subscribing and reading the board, so the
+        # subscription picks up exactly where `initial` ends
+        subscriber = self.hub.subscribe(restaurant_id)
+        initial = board.since(last_event_id)
+        if initial is None:
+            initial = [board.snapshot()]
+        return subscriber, board, initial
+
+    def _release(self, subscriber: Subscriber) -> None:
+        subscriber.close()
+        if not self.hub.has_subscribers(subscriber.key):
+            asyncio.get_running_loop().call_later(self.idle_ttl, self._evict_if_idle, subscriber.key)
+
+    def _evict_if_idle(self, restaurant_id: UUID) -> None:
+        if not self.hub.has_subscribers(restaurant_id) and self._boards.pop(restaurant_id, None) is not None:
+            boards_open.set(len(self._boards))
+
+    async def stream(self, subscriber: Subscriber, board: KitchenBoard, initial: List[Change]) -> AsyncIterator[str]:
+        """Server-sent events for one tablet"""
+        try:
+            last_seq = initial[-1].seq if initial else board.seq
+            dropped = subscriber.dropped
+            for change in initial:
+                yield _sse(board, change)
+
+            while True:
+                message = await subscriber.get(timeout=self.keepalive)
+                if subscriber.dropped != dropped:
+                    # Fell behind and lost changes: start over from the board
+                    dropped = subscriber.dropped
+                    snapshot = board.snapshot()
+                    last_seq = snapshot.seq
+                    yield _sse(board, snapshot)
+                if message is None:
+                    if subscriber.closed:
+                        return
+                    yield ": keepalive\n\n"
+                    continue
+
+                change = message.data
+                if change.seq > last_seq:
+                    last_seq = change.seq
+                    yield _sse(board, change)
+        finally:
+            self._release(subscriber)
+
+    async def _refresh_orders(self, order_ids: Set[UUID]) -> None:
+        fetched = {order.id: order for order in await self._read_orders(order_ids=order_ids)}
+        for order_id in order_ids:
+            order = fetched.get(order_id)
+            if order is not None:
+                boards = [self._boards[order.restaurant_id]] if order.restaurant_id in self._boards else []
+            else:
+                boards = [board for board in self._boards.values() if order_id in board.orders]
+            for board in boards:
+                self._publish(board, filter(None, [board.apply(order_id, order)]))
+
+    async def _follow(self) -> None:
+        topics = (OrderPlaced.topic, OrderStatusChanged.topic, OrderAssigned.topic)
+        async with event_bus.subscribe(*topics, max_batch=200) as events:
+            async for batch in events:
+                order_ids = {
+                    event.order_id for event in batch
+                    # OrderAssigned only names the order, which is on a board if it matters
+                    if getattr(event, 'restaurant_id', None) in self._boards
+                    or any(event.order_id in board.orders for board in self._boards.values())
+                }
+                if not order_ids:
+                    continue
+                try:
+                    await self._refresh_orders(order_ids)
+                except Exception as e:
+                    logger.error(f"Error updating kitchen boards: {e}")
+
+    async def _resync(self) -> None:
+        while True:
+            await asyncio.sleep(self.resync_interval)
+            for restaurant_id, board in list(self._boards.items()):
+                try:
+                    orders = await self._read_orders(restaurant_id)
+                except Exception as e:
+                    logger.error(f"Error resyncing kitchen board of restaurant {restaurant_id}: {e}")
+                    continue
+                board_loads.inc(reason="resync")
+                changes = board.replace(orders)
+                if changes:
+                    logger.warning(f"Kitchen board of restaurant {restaurant_id} was {len(changes)} changes behind")
+                self._publish(board, changes)
+
+    async def start(self) -> None:
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._follow()), asyncio.create_task(self._resync())]
+
+    async def stop(self) -> None:
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self.hub.close()
+
+
+kitchen_feed = KitchenFeed()
@@ -6,6 +6,7 @@ import uuid
 
 from shared.models import MenuItem, Restaurant
 from restaurant_service.schemas import MenuItemCreate, MenuItemUpdate, MenuItemResponse
+from shared.events import MenuChanged, publish
 
 logger = logging.getLogger(__name__)
 
@@ -37,6 +38,7 @@ class MenuService:
             )
             
             self.db.add(menu_item)
+            await publish(self.db, MenuChanged(restaurant_id=restaurant_uuid, reason="menu_item_created"))
             await self.db.commit()
             await self.db.refresh(menu_item)
             
@@ -106,13 +108,14 @@ class MenuService:
             
             stmt = update(MenuItem).where(
                 MenuItem.id == menu_item_uuid
-            ).values(**update_dict)
+            ).values(**update_dict).returning(MenuItem.restaurant_id)
             
-            result = await self.db.execute(stmt)
+            restaurant_id = (await self.db.execute(stmt)).scalar_one_or_none()
             
-            if result.rowcount == 0:
+            if restaurant_id is None:
                 return None
             
+            await publish(self.db, MenuChanged(restaurant_id=restaurant_id, reason="menu_item_updated"))
             await self.db.commit()
             
             logger.info(f"Updated menu item {menu_item_id} with fields: {list(update_dict.keys())}")
@@ -133,13 +136,14 @@ class MenuService:
             
             stmt = update(MenuItem).where(
                 MenuItem.id == menu_item_uuid
-            ).values(is_available=is_available)
+            ).values(is_available=is_available).returning(MenuItem.restaurant_id)
             
-            result = await self.db.execute(stmt)
+            restaurant_id = (await self.db.execute(stmt)).scalar_one_or_none()
             
-            if result.rowcount == 0:
+            if restaurant_id is None:
                 return None
             
+            await publish(self.db, MenuChanged(restaurant_id=restaurant_id, reason="menu_item_availability_changed"))
             await self.db.commit()
             
             status = "available" if is_available else "unavailable"
@@ -160,12 +164,13 @@ class MenuService:
         try:
             menu_item_uuid = uuid.UUID(menu_item_id)
             
-            stmt = delete(MenuItem).where(MenuItem.id == menu_item_uuid)
-            result = await self.db.execute(stmt)
+            stmt = delete(MenuItem).where(MenuItem.id == menu_item_uuid).returning(MenuItem.restaurant_id)
+            restaurant_id = (await self.db.execute(stmt)).scalar_one_or_none()
             
-            if result.rowcount == 0:
+            if restaurant_id is None:
                 return False
             
+            await publish(self.db, MenuChanged(restaurant_id=restaurant_id, reason="menu_item_deleted"))
             await self.db.commit()
             logger.info(f"Deleted menu item {menu_item_id}")
             return True
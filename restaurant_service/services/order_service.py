@@ -1,53 +1,95 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update, func
+from sqlalchemy import func, select, update
 from sqlalchemy.orm import selectinload
 from typing import List, Optional
 import logging
 import uuid
-import httpx
 from datetime import datetime
 
-from shared.models import Order, OrderItem, DeliveryAgent
+from shared.models import DeliveryAgent, Order, OrderItem
 from shared.config import settings
+from shared.models.order import KITCHEN_ACTIVE_STATUSES, status_in
+from shared.pagination import Page, InvalidCursorError, keyset_paginate, count_rows
+from shared.events import (
+    AgentAvailabilityChanged, OrderAccepted, OrderAssigned, OrderStatusChanged, publish
+)
+from shared.order_state import FINAL_STATUSES
+from shared.order_timeline import RESTAURANT_STAGES, stage_stats
+from shared.order_transitions import InvalidTransitionError, transition
+from shared.outbox import enqueue, outbox_dispatcher
+from .dispatch_engine import DispatchEngine
 from restaurant_service.schemas import (
-    OrderUpdateRequest, OrderStatusUpdate, DeliveryAssignment, RestaurantOrderResponse
+    OrderUpdateRequest, OrderStatusUpdate, DeliveryAssignment, RestaurantOrderResponse, StageTimingResponse
 )
 
 logger = logging.getLogger(__name__)
 
+ACTIVE_STATUSES = KITCHEN_ACTIVE_STATUSES
+
 class OrderService:
     def __init__(self, db: AsyncSession):
         self.db = db
 
+    def _restaurant_orders_query(self, restaurant_id: str, status_filter: Optional[str] = None):
+        stmt = select(Order).where(Order.restaurant_id == uuid.UUID(restaurant_id))
+        
+        if status_filter == 'active':
+            stmt = stmt.where(status_in(ACTIVE_STATUSES))
+        elif status_filter:
+            stmt = stmt.where(Order.status == status_filter)
+        
+        return stmt
+
     async def get_restaurant_orders(
         self, 
         restaurant_id: str, 
-        status_filter: Optional[str] = None
-    ) -> List[RestaurantOrderResponse]:
-        """Get all orders for a restaurant, optionally filtered by status"""
+        status_filter: Optional[str] = None,
+        limit: int = 50,
+        after: Optional[str] = None
+    ) -> Page[RestaurantOrderResponse]:
+        """Get one page of a restaurant's orders, newest first, optionally filtered by status.
+
+        `status_filter` is an order status, or "active" for orders the
+        kitchen is still working on.
+        """
         try:
-            restaurant_uuid = uuid.UUID(restaurant_id)
-            
-            stmt = select(Order).options(
+            stmt = self._restaurant_orders_query(restaurant_id, status_filter).options(
                 selectinload(Order.order_items)
-            ).where(Order.restaurant_id == restaurant_uuid)
-            
-            if status_filter:
-                stmt = stmt.where(Order.status == status_filter)
-            
-            # Order by most recent first
-            stmt = stmt.order_by(Order.placed_at.desc())
-            
-            result = await self.db.execute(stmt)
-            orders = result.scalars().all()
+            )
+            page = await keyset_paginate(self.db, stmt, Order, limit, after)
+            return page.map(RestaurantOrderResponse.model_validate)
             
-            return [RestaurantOrderResponse.model_validate(order) for order in orders]
+        except InvalidCursorError:
+            raise
+        except ValueError as e:
+            logger.error(f"Invalid restaurant ID format: {restaurant_id}")
+            return Page()
+        except Exception as e:
+            logger.error(f"Error fetching orders for restaurant {restaurant_id}: {e}")
+            raise
+
+    async def count_restaurant_orders(self, restaurant_id: str, status_filter: Optional[str] = None) -> int:
+        """Count a restaurant's orders matching the same filter as get_restaurant_orders"""
+        try:
+            return await count_rows(self.db, self._restaurant_orders_query(restaurant_id, status_filter))
+        except ValueError:
+            return 0
+
+    async def get_stage_timings(self, restaurant_id: str, since: datetime, until: datetime) -> List[StageTimingResponse]:
+        """How long the restaurant's orders spent in each stage, over the orders finishing it in [since, until)"""
+        try:
+            restaurant_uuid = uuid.UUID(restaurant_id)
+            timings = []
+            for stage in RESTAURANT_STAGES:
+                stats = await stage_stats(self.db, stage, 'restaurant', since, until, restaurant_uuid)
+                timings.extend(StageTimingResponse(**row._asdict()) for row in stats)
+            return timings
             
         except ValueError as e:
             logger.error(f"Invalid restaurant ID format: {restaurant_id}")
             return []
         except Exception as e:
-            logger.error(f"Error fetching orders for restaurant {restaurant_id}: {e}")
+            logger.error(f"Error fetching stage timings for restaurant {restaurant_id}: {e}")
             raise
 
     async def get_order_by_id(self, order_id: str) -> Optional[RestaurantOrderResponse]:
@@ -73,6 +115,29 @@ class OrderService:
             logger.error(f"Error fetching order {order_id}: {e}")
             raise
 
+    async def receive_new_order(self, order_id: str, restaurant_id: uuid.UUID) -> bool:
+        """Acknowledge a new-order notification; False if no such order for the restaurant"""
+        try:
+            stmt = select(Order.status).where(
+                Order.id == uuid.UUID(order_id),
+                Order.restaurant_id == restaurant_id
+            )
+            order_status = (await self.db.execute(stmt)).scalar_one_or_none()
+            
+            if order_status is None:
+                logger.error(f"Notified of unknown order {order_id} for restaurant {restaurant_id}")
+                return False
+            
+            logger.info(f"Restaurant {restaurant_id} received new order {order_id} ({order_status})")
+            return True
+            
+        except ValueError:
+            logger.error(f"Invalid order ID format: {order_id}")
+            return False
+        except Exception as e:
+            logger.error(f"Error receiving new order {order_id}: {e}")
+            raise
+
     async def update_order_status(
         self, 
         order_id: str, 
@@ -84,42 +149,52 @@ class OrderService:
             order_uuid = uuid.UUID(order_id)
             restaurant_uuid = uuid.UUID(restaurant_id)
             
-            # Verify order belongs to this restaurant
-            order_stmt = select(Order).where(
-                Order.id == order_uuid,
-                Order.restaurant_id == restaurant_uuid
+            # Checks ownership and the current status in the same statement
+            order = await transition(
+                self.db, order_uuid, update_request.status,
+                restaurant_id=restaurant_uuid, expected_version=update_request.expected_version,
+                estimated_prep_time=update_request.estimated_prep_time
             )
-            order_result = await self.db.execute(order_stmt)
-            order = order_result.scalar_one_or_none()
             
             if not order:
                 logger.error(f"Order {order_id} not found for restaurant {restaurant_id}")
                 return None
             
-            update_data = {
-                'status': update_request.status,
-                'updated_at': func.now()
-            }
+            await publish(self.db, OrderStatusChanged(
+                order_id=order_uuid,
+                status=update_request.status,
+                restaurant_id=restaurant_uuid,
+                delivery_agent_id=order.delivery_agent_id
+            ))
+            
+            if update_request.status in FINAL_STATUSES and order.delivery_agent_id is not None:
+                await self._release_delivery_agent(order_uuid, order.delivery_agent_id, update_request.status)
             
             if update_request.status == 'accepted':
-                update_data['accepted_at'] = func.now()
+                await publish(self.db, OrderAccepted(order_id=order_uuid, restaurant_id=restaurant_uuid))
                 
-                # Auto-assign delivery agent when order is accepted
-                await self._auto_assign_delivery_agent(order_uuid)
+                # Auto-assign delivery agent when order is accepted; commits
+                # together with the status change. In batch mode the order
+                # waits for the next BatchDispatcher round instead.
+                if settings.dispatch_mode != 'batch':
+                    await self._auto_assign_delivery_agent(order_uuid, restaurant_uuid)
             
-            stmt = update(Order).where(Order.id == order_uuid).values(**update_data)
-            await self.db.execute(stmt)
             await self.db.commit()
+            outbox_dispatcher.wake()
             
             logger.info(f"Updated order {order_id} status to {update_request.status}")
             
             return OrderStatusUpdate(
                 order_id=order_uuid,
                 status=update_request.status,
-                updated_at=datetime.now(),
+                version=order.version,
+                updated_at=order.updated_at,
                 estimated_prep_time=update_request.estimated_prep_time
             )
             
+        except InvalidTransitionError:
+            await self.db.rollback()
+            raise
         except ValueError as e:
             logger.error(f"Invalid ID format: {e}")
             return None
@@ -128,103 +203,89 @@ class OrderService:
             logger.error(f"Error updating order status: {e}")
             raise
 
-    async def _auto_assign_delivery_agent(self, order_id: uuid.UUID) -> Optional[DeliveryAssignment]:
-        """Auto-assign an available delivery agent to an order"""
+    async def _auto_assign_delivery_agent(self, order_id: uuid.UUID, restaurant_id: uuid.UUID) -> Optional[DeliveryAssignment]:
+        """Assign the nearest free delivery agent to an order, in the caller's transaction.
+
+        Runs in a savepoint, so a failed assignment leaves the rest of the
+        caller's transaction intact.
+        """
         try:
-            # Find available delivery agent
-            agent_stmt = select(DeliveryAgent).where(
-                DeliveryAgent.is_available == True
-            ).limit(1)
-            
-            result = await self.db.execute(agent_stmt)
-            delivery_agent = result.scalar_one_or_none()
-            
-            if not delivery_agent:
-                logger.warning(f"No available delivery agents for order {order_id}")
-                return None
-            
-            # Assign agent to order
-            order_update = update(Order).where(Order.id == order_id).values(
-                delivery_agent_id=delivery_agent.id
-            )
-            await self.db.execute(order_update)
-            
-            # Mark agent as unavailable
-            agent_update = update(DeliveryAgent).where(
-                DeliveryAgent.id == delivery_agent.id
-            ).values(is_available=False)
-            await self.db.execute(agent_update)
-            
-            await self.db.commit()
-            
-            assignment = DeliveryAssignment(
-                order_id=order_id,
-                delivery_agent_id=delivery_agent.id,
-                assigned_at=datetime.now()
-            )
-            
-            logger.info(f"Assigned delivery agent {delivery_agent.id} to order {order_id}")
-            
-            # Notify delivery service about the assignment
-            await self._notify_delivery_service(assignment)
+            async with self.db.begin_nested():
+                # Claims the agent (marks it unavailable) atomically
+                chosen = await DispatchEngine(self.db).assign(order_id, restaurant_id)
+                if chosen is None:
+                    return None
+                
+                # Assign agent to order
+                order_update = update(Order).where(Order.id == order_id).values(
+                    delivery_agent_id=chosen.agent_id,
+                    version=Order.version + 1,
+                    updated_at=func.now()
+                )
+                await self.db.execute(order_update)
+                
+                assignment = DeliveryAssignment(
+                    order_id=order_id,
+                    delivery_agent_id=chosen.agent_id,
+                    assigned_at=datetime.now()
+                )
+                
+                # Delivered to the delivery service once the caller commits
+                await self._notify_delivery_service(assignment)
+                await publish(self.db, OrderAssigned(order_id=order_id, delivery_agent_id=chosen.agent_id))
+                await publish(self.db, AgentAvailabilityChanged(agent_id=chosen.agent_id, is_available=False))
             
+            logger.info(f"Assigned delivery agent {chosen.agent_id} to order {order_id}")
             return assignment
             
         except Exception as e:
-            await self.db.rollback()
             logger.error(f"Error auto-assigning delivery agent: {e}")
             return None
 
+    async def _release_delivery_agent(self, order_id: uuid.UUID, agent_id: uuid.UUID, status: str) -> None:
+        """Free the agent of an order the restaurant ended, in the caller's transaction.
+
+        The delivery service is told through the outbox, to close the trail.
+        """
+        await self.db.execute(
+            update(DeliveryAgent).where(DeliveryAgent.id == agent_id).values(is_available=True)
+        )
+        await publish(self.db, AgentAvailabilityChanged(agent_id=agent_id, is_available=True))
+        await enqueue(
+            self.db, "delivery", "/assignments/ended",
+            {"order_id": str(order_id), "delivery_agent_id": str(agent_id), "status": status},
+            aggregate_id=order_id
+        )
+
     async def _notify_delivery_service(self, assignment: DeliveryAssignment):
-        """Notify delivery service about order assignment"""
-        try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{settings.delivery_service_url}/assignments",
-                    json={
-                        "order_id": str(assignment.order_id),
-                        "delivery_agent_id": str(assignment.delivery_agent_id),
-                        "assigned_at": assignment.assigned_at.isoformat()
-                    },
-                    timeout=5.0
-                )
-                
-                if response.status_code == 200:
-                    logger.info(f"Successfully notified delivery service about assignment")
-                else:
-                    logger.warning(f"Failed to notify delivery service: {response.status_code}")
-                    
-        except Exception as e:
-            logger.error(f"Error notifying delivery service: {e}")
-            # Don't raise exception as this is a notification, not critical
+        """Queue the assignment notification for the delivery service in the outbox"""
+        await enqueue(
+            self.db, "delivery", "/assignments/",
+            {
+                "order_id": str(assignment.order_id),
+                "delivery_agent_id": str(assignment.delivery_agent_id),
+                "assigned_at": assignment.assigned_at.isoformat()
+            },
+            aggregate_id=assignment.order_id
+        )
 
-    async def get_pending_orders(self, restaurant_id: str) -> List[RestaurantOrderResponse]:
-        """Get all pending orders for a restaurant"""
-        return await self.get_restaurant_orders(restaurant_id, 'pending')
+    async def get_pending_orders(
+        self,
+        restaurant_id: str,
+        limit: int = 50,
+        after: Optional[str] = None
+    ) -> Page[RestaurantOrderResponse]:
+        """Get one page of pending orders for a restaurant"""
+        return await self.get_restaurant_orders(restaurant_id, 'pending', limit, after)
 
-    async def get_active_orders(self, restaurant_id: str) -> List[RestaurantOrderResponse]:
-        """Get all active orders (accepted, preparing, ready) for a restaurant"""
-        try:
-            restaurant_uuid = uuid.UUID(restaurant_id)
-            
-            stmt = select(Order).options(
-                selectinload(Order.order_items)
-            ).where(
-                Order.restaurant_id == restaurant_uuid,
-                Order.status.in_(['accepted', 'preparing', 'ready_for_pickup'])
-            ).order_by(Order.accepted_at.desc())
-            
-            result = await self.db.execute(stmt)
-            orders = result.scalars().all()
-            
-            return [RestaurantOrderResponse.model_validate(order) for order in orders]
-            
-        except ValueError as e:
-            logger.error(f"Invalid restaurant ID format: {restaurant_id}")
-            return []
-        except Exception as e:
-            logger.error(f"Error fetching active orders for restaurant {restaurant_id}: {e}")
-            raise
+    async def get_active_orders(
+        self,
+        restaurant_id: str,
+        limit: int = 50,
+        after: Optional[str] = None
+    ) -> Page[RestaurantOrderResponse]:
+        """Get one page of active orders (accepted until picked up) for a restaurant"""
+        return await self.get_restaurant_orders(restaurant_id, 'active', limit, after)
 
     async def reject_order(self, order_id: str, restaurant_id: str, reason: Optional[str] = None) -> Optional[OrderStatusUpdate]:
         """Reject an order"""
@@ -1,12 +1,14 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update
-from sqlalchemy.orm import selectinload
+from sqlalchemy import select, update, delete, insert, func
+from sqlalchemy.orm import selectinload, noload
 from typing import List, Optional
 import logging
 import uuid
 
-from shared.models import Restaurant, MenuItem
+from shared.models import Restaurant, MenuItem, RestaurantOpeningHours
+from shared.opening_hours import to_ranges, weekly_intervals
 from restaurant_service.schemas import RestaurantCreate, RestaurantUpdate, RestaurantResponse
+from shared.events import RestaurantChanged, publish
 
 logger = logging.getLogger(__name__)
 
@@ -16,12 +18,15 @@ class RestaurantService:
 
     async def create_restaurant(self, restaurant_data: RestaurantCreate) -> RestaurantResponse:
         """Create a new restaurant"""
+        # Convert operation_hours to dict if provided
+        operation_hours_dict = None
+        if restaurant_data.operation_hours:
+            operation_hours_dict = restaurant_data.operation_hours.dict()
+        
+        # Rejects malformed hours before anything is written
+        intervals = weekly_intervals(operation_hours_dict)
+        
         try:
-            # Convert operation_hours to dict if provided
-            operation_hours_dict = None
-            if restaurant_data.operation_hours:
-                operation_hours_dict = restaurant_data.operation_hours.dict()
-
             restaurant = Restaurant(
                 name=restaurant_data.name,
                 email=restaurant_data.email,
@@ -29,6 +34,7 @@ class RestaurantService:
                 address=restaurant_data.address,
                 cuisine_type=restaurant_data.cuisine_type,
                 operation_hours=operation_hours_dict,
+                opening_hours=[RestaurantOpeningHours(minutes=minutes) for minutes in to_ranges(intervals)],
                 is_online=False  # Default to offline when created
             )
             
@@ -80,16 +86,27 @@ class RestaurantService:
             logger.error(f"Error fetching restaurant {restaurant_id}: {e}")
             raise
 
-    async def get_restaurants(self, online_only: bool = False) -> List[RestaurantResponse]:
-        """Get all restaurants, optionally filtered by online status"""
+    async def get_restaurants(
+        self,
+        online_only: bool = False,
+        limit: Optional[int] = None,
+        offset: int = 0,
+        include_menu: bool = True
+    ) -> List[RestaurantResponse]:
+        """Get restaurants, optionally filtered by online status and paginated in SQL"""
         try:
             stmt = select(Restaurant).options(
-                selectinload(Restaurant.menu_items)
+                selectinload(Restaurant.menu_items) if include_menu else noload(Restaurant.menu_items)
             )
             
             if online_only:
                 stmt = stmt.where(Restaurant.is_online == True)
             
+            # Stable order so LIMIT/OFFSET pages don't overlap
+            stmt = stmt.order_by(Restaurant.created_at, Restaurant.id).offset(offset)
+            if limit is not None:
+                stmt = stmt.limit(limit)
+            
             result = await self.db.execute(stmt)
             restaurants = result.scalars().all()
             
@@ -99,18 +116,38 @@ class RestaurantService:
             logger.error(f"Error fetching restaurants: {e}")
             raise
 
+    async def count_restaurants(self, online_only: bool = False) -> int:
+        """Count restaurants without loading them"""
+        try:
+            stmt = select(func.count()).select_from(Restaurant)
+            
+            if online_only:
+                stmt = stmt.where(Restaurant.is_online == True)
+            
+            result = await self.db.execute(stmt)
+            return result.scalar_one()
+            
+        except Exception as e:
+            logger.error(f"Error counting restaurants: {e}")
+            raise
+
     async def update_restaurant(self, restaurant_id: str, update_data: RestaurantUpdate) -> Optional[RestaurantResponse]:
         """Update restaurant information"""
+        update_dict = {}
+        for field, value in update_data.dict(exclude_unset=True).items():
+            if field == 'operation_hours' and value:
+                update_dict[field] = value.dict() if hasattr(value, 'dict') else value
+            else:
+                update_dict[field] = value
+        
+        # Rejects malformed hours before anything is written
+        intervals = None
+        if 'operation_hours' in update_dict:
+            intervals = weekly_intervals(update_dict['operation_hours'])
+        
         try:
             restaurant_uuid = uuid.UUID(restaurant_id)
             
-            update_dict = {}
-            for field, value in update_data.dict(exclude_unset=True).items():
-                if field == 'operation_hours' and value:
-                    update_dict[field] = value.dict() if hasattr(value, 'dict') else value
-                else:
-                    update_dict[field] = value
-            
             if not update_dict:
                 # No fields to update
                 return await self.get_restaurant_by_id(restaurant_id)
@@ -119,7 +156,14 @@ class RestaurantService:
                 Restaurant.id == restaurant_uuid
             ).values(**update_dict)
             
-            await self.db.execute(stmt)
+            result = await self.db.execute(stmt)
+            
+            if result.rowcount == 0:
+                return None
+            
+            if intervals is not None:
+                await self._replace_opening_hours(restaurant_uuid, intervals)
+            await publish(self.db, RestaurantChanged(restaurant_id=restaurant_uuid, reason="restaurant_updated"))
             await self.db.commit()
             
             logger.info(f"Updated restaurant {restaurant_id} with fields: {list(update_dict.keys())}")
@@ -133,6 +177,17 @@ class RestaurantService:
             logger.error(f"Error updating restaurant {restaurant_id}: {e}")
             raise
 
+    async def _replace_opening_hours(self, restaurant_uuid: uuid.UUID, intervals) -> None:
+        """Rewrite the restaurant's minute-of-week ranges to match its new hours"""
+        await self.db.execute(
+            delete(RestaurantOpeningHours).where(RestaurantOpeningHours.restaurant_id == restaurant_uuid)
+        )
+        if intervals:
+            await self.db.execute(
+                insert(RestaurantOpeningHours),
+                [{'restaurant_id': restaurant_uuid, 'minutes': minutes} for minutes in to_ranges(intervals)]
+            )
+
     async def toggle_online_status(self, restaurant_id: str, is_online: bool) -> Optional[RestaurantResponse]:
         """Toggle restaurant online/offline status"""
         try:
@@ -147,6 +202,7 @@ class RestaurantService:
             if result.rowcount == 0:
                 return None
             
+            await publish(self.db, RestaurantChanged(restaurant_id=restaurant_uuid, reason="online_status_changed"))
             await self.db.commit()
             
             status = "online" if is_online else "offline"
@@ -176,6 +232,7 @@ class RestaurantService:
             if result.rowcount == 0:
                 return False
             
+            await publish(self.db, RestaurantChanged(restaurant_id=restaurant_uuid, reason="restaurant_deactivated"))
             await self.db.commit()
             logger.info(f"Deactivated restaurant {restaurant_id}")
             return True
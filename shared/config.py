@@ -18,6 +18,79 @@ class Settings(BaseSettings):
     restaurant_service_url: str = Field(default="http://localhost:8002", env="RESTAURANT_SERVICE_URL")
     delivery_service_url: str = Field(default="http://localhost:8003", env="DELIVERY_SERVICE_URL")
     
+    # Gateway downstream HTTP clients
+    gateway_max_connections: int = Field(default=100, env="GATEWAY_MAX_CONNECTIONS")
+    gateway_max_keepalive_connections: int = Field(default=20, env="GATEWAY_MAX_KEEPALIVE_CONNECTIONS")
+    gateway_keepalive_expiry: float = Field(default=30.0, env="GATEWAY_KEEPALIVE_EXPIRY")
+    gateway_request_timeout: float = Field(default=10.0, env="GATEWAY_REQUEST_TIMEOUT")
+    gateway_http2: bool = Field(default=False, env="GATEWAY_HTTP2")
+
+    # Gateway response cache (TTLs in seconds, 0 disables caching for that field)
+    gateway_cache_max_entries: int = Field(default=1000, env="GATEWAY_CACHE_MAX_ENTRIES")
+    gateway_catalog_cache_ttl: float = Field(default=30.0, env="GATEWAY_CATALOG_CACHE_TTL")
+    gateway_agent_cache_ttl: float = Field(default=5.0, env="GATEWAY_AGENT_CACHE_TTL")
+
+    # GraphQL document caches (persisted queries, parsed and validated documents)
+    persisted_query_cache_size: int = Field(default=1000, env="PERSISTED_QUERY_CACHE_SIZE")
+    graphql_document_cache_size: int = Field(default=500, env="GRAPHQL_DOCUMENT_CACHE_SIZE")
+
+    # GraphQL query cost budget (objects resolved, lists weighted by their page size)
+    graphql_max_query_cost: int = Field(default=5000, env="GRAPHQL_MAX_QUERY_COST")
+    graphql_default_list_size: int = Field(default=50, env="GRAPHQL_DEFAULT_LIST_SIZE")
+
+    # User service restaurant catalog snapshot
+    restaurant_catalog_ttl: float = Field(default=60.0, env="RESTAURANT_CATALOG_TTL")
+    restaurant_catalog_settle_delay: float = Field(default=0.25, env="RESTAURANT_CATALOG_SETTLE_DELAY")
+
+    # Idempotency-Key dedup for order creation
+    idempotency_key_ttl_hours: int = Field(default=24, env="IDEMPOTENCY_KEY_TTL_HOURS")
+    idempotency_cache_size: int = Field(default=10000, env="IDEMPOTENCY_CACHE_SIZE")
+
+    # Transactional outbox for inter-service notifications (intervals in seconds)
+    outbox_batch_size: int = Field(default=100, env="OUTBOX_BATCH_SIZE")
+    outbox_poll_interval: float = Field(default=1.0, env="OUTBOX_POLL_INTERVAL")
+    outbox_max_attempts: int = Field(default=10, env="OUTBOX_MAX_ATTEMPTS")
+    outbox_backoff_base: float = Field(default=1.0, env="OUTBOX_BACKOFF_BASE")
+    outbox_backoff_max: float = Field(default=300.0, env="OUTBOX_BACKOFF_MAX")
+    outbox_request_timeout: float = Field(default=5.0, env="OUTBOX_REQUEST_TIMEOUT")
+
+    # Domain events over LISTEN/NOTIFY (queue size per subscription, intervals in seconds)
+    event_bus_queue_size: int = Field(default=1000, env="EVENT_BUS_QUEUE_SIZE")
+    event_bus_reconnect_delay: float = Field(default=1.0, env="EVENT_BUS_RECONNECT_DELAY")
+    event_bus_keepalive: float = Field(default=30.0, env="EVENT_BUS_KEEPALIVE")
+
+    # In-process pub/sub for streaming endpoints (messages buffered per connection, keepalive in seconds)
+    pubsub_buffer_size: int = Field(default=32, env="PUBSUB_BUFFER_SIZE")
+    stream_keepalive: float = Field(default=15.0, env="STREAM_KEEPALIVE")
+
+    # Kitchen display feed (changes kept per restaurant for resuming, intervals in seconds)
+    kitchen_feed_replay_size: int = Field(default=500, env="KITCHEN_FEED_REPLAY_SIZE")
+    kitchen_feed_resync_interval: float = Field(default=60.0, env="KITCHEN_FEED_RESYNC_INTERVAL")
+    kitchen_feed_idle_ttl: float = Field(default=300.0, env="KITCHEN_FEED_IDLE_TTL")
+
+    # Delivery agent dispatch scoring (estimated minutes until an agent reaches the restaurant)
+    dispatch_max_pickup_km: float = Field(default=10.0, env="DISPATCH_MAX_PICKUP_KM")
+    dispatch_unknown_distance_minutes: float = Field(default=15.0, env="DISPATCH_UNKNOWN_DISTANCE_MINUTES")
+    dispatch_minutes_per_active_order: float = Field(default=10.0, env="DISPATCH_MINUTES_PER_ACTIVE_ORDER")
+    dispatch_claim_candidates: int = Field(default=5, env="DISPATCH_CLAIM_CANDIDATES")
+    # "greedy" assigns an agent when an order is accepted, "batch" matches
+    # all waiting orders against all free agents every window
+    dispatch_mode: str = Field(default="greedy", env="DISPATCH_MODE")
+    dispatch_batch_window: float = Field(default=3.0, env="DISPATCH_BATCH_WINDOW")
+    dispatch_batch_max_orders: int = Field(default=200, env="DISPATCH_BATCH_MAX_ORDERS")
+
+    # Write-behind buffer for agent location pings (interval in seconds, sizes in agents).
+    # Off by default: with it on, REST location updates answer LocationAccepted
+    # instead of the agent
+    location_write_behind: bool = Field(default=False, env="LOCATION_WRITE_BEHIND")
+    location_flush_interval: float = Field(default=2.0, env="LOCATION_FLUSH_INTERVAL")
+    location_flush_max_pending: int = Field(default=5000, env="LOCATION_FLUSH_MAX_PENDING")
+    location_flush_batch_size: int = Field(default=1000, env="LOCATION_FLUSH_BATCH_SIZE")
+    location_known_agents: int = Field(default=50000, env="LOCATION_KNOWN_AGENTS")
+
+    # Delivery route trails (points closer than this many metres to the simplified path are dropped)
+    trail_simplify_tolerance_m: float = Field(default=5.0, env="TRAIL_SIMPLIFY_TOLERANCE_M")
+
     class Config:
         env_file = "config.env"
 
@@ -1,5 +1,6 @@
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import DeclarativeBase
+from typing import Callable
 from shared.config import settings
 import logging
 logging.basicConfig(level=logging.INFO)
@@ -21,6 +22,23 @@ AsyncSessionLocal = async_sessionmaker(
 class Base(DeclarativeBase):
     pass
 
+# Session.info key of the callbacks waiting for an outer transaction to commit
+AFTER_COMMIT = "after_commit"
+
+def after_commit(session: AsyncSession, callback: Callable[[], None]) -> None:
+    """Run `callback` once the session's work is really committed.
+
+    Call it after session.commit(). For a session of its own that is now;
+    a session joined to an outer transaction (a GraphQL request, see
+    shared.gql.context) only commits with it, so the callback waits for
+    that and is dropped if the transaction rolls back instead.
+    """
+    pending = session.info.get(AFTER_COMMIT)
+    if pending is None:
+        callback()
+    else:
+        pending.append(callback)
+
 #get Db
 async def get_db() -> AsyncSession:
     async with AsyncSessionLocal() as session:
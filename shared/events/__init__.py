@@ -0,0 +1,33 @@
+from shared.events.bus import EventBus, Subscription, event_bus, publish, publish_many
+from shared.events.types import (
+    Event,
+    OrderPlaced,
+    OrderAccepted,
+    OrderAssigned,
+    OrderStatusChanged,
+    AgentAvailabilityChanged,
+    AgentLocation,
+    AgentLocationsChanged,
+    MenuChanged,
+    RestaurantChanged,
+    decode_event
+)
+
+__all__ = [
+    "EventBus",
+    "Subscription",
+    "event_bus",
+    "publish",
+    "publish_many",
+    "Event",
+    "OrderPlaced",
+    "OrderAccepted",
+    "OrderAssigned",
+    "OrderStatusChanged",
+    "AgentAvailabilityChanged",
+    "AgentLocation",
+    "AgentLocationsChanged",
+    "MenuChanged",
+    "RestaurantChanged",
+    "decode_event"
+]
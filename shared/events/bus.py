@@ -0,0 +1,281 @@
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Set
+import asyncio
+import logging
+
+import asyncpg
+from sqlalchemy import Text, bindparam, func, select
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from shared.config import settings
+from shared.events.types import EVENT_TYPES, Event, decode_event
+from shared.metrics import metrics
+
+# Domain events over Postgres LISTEN/NOTIFY.
+#
+# `publish()` issues pg_notify in the caller's transaction, so an event goes
+# out when, and only if, the change it describes commits. Each process holds
+# one dedicated asyncpg connection (outside the SQLAlchemy pool) that
+# LISTENs on every topic someone has subscribed to, one channel per topic,
+# and fans notifications out to per-subscription queues.
+#
+# Delivery is at most once: a subscriber that falls behind loses its oldest
+# events, and nothing sent while the listener is reconnecting is replayed.
+# Consumers use events to react quickly and keep a slower fallback (TTL,
+# polling) for correctness.
+
+logger = logging.getLogger(__name__)
+
+MAX_PAYLOAD_BYTES = 8000
+
+events_published = metrics.counter("events_published_total", "Domain events published by topic")
+events_received = metrics.counter("events_received_total", "Domain events received by topic")
+events_dropped = metrics.counter(
+    "events_dropped_total", "Domain events dropped because a subscriber fell behind, by topic"
+)
+event_lag_seconds = metrics.histogram(
+    "event_delivery_lag_seconds", "Time from publishing a domain event to receiving it",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+)
+
+
+async def publish(db: AsyncSession, event: Event) -> None:
+    """Publish `event` when the caller's transaction commits"""
+    payload = event.model_dump_json()
+    if len(payload.encode("utf-8")) > MAX_PAYLOAD_BYTES:
+        raise ValueError(f"{event.topic} event payload exceeds {MAX_PAYLOAD_BYTES} bytes")
+    await db.execute(select(func.pg_notify(event.topic, payload)))
+    events_published.inc(topic=event.topic)
+
+
+async def publish_many(db: AsyncSession, events: List[Event]) -> None:
+    """`publish()` several events with one statement, in order"""
+    if not events:
+        return
+    payloads = [event.model_dump_json() for event in events]
+    for event, payload in zip(events, payloads):
+        if len(payload.encode("utf-8")) > MAX_PAYLOAD_BYTES:
+            raise ValueError(f"{event.topic} event payload exceeds {MAX_PAYLOAD_BYTES} bytes")
+
+    notifications = select(
+        func.unnest(bindparam("topics", [event.topic for event in events], type_=ARRAY(Text))).label("topic"),
+        func.unnest(bindparam("payloads", payloads, type_=ARRAY(Text))).label("payload")
+    ).subquery()
+    await db.execute(select(func.pg_notify(notifications.c.topic, notifications.c.payload)))
+    for event in events:
+        events_published.inc(topic=event.topic)
+
+
+class Subscription:
+    """Events on some topics, read in batches with `async for batch in subscription`.
+
+    Each batch holds the events already waiting, up to `max_batch`; with
+    `max_wait` the first event of a batch waits that many seconds for
+    company. A subscriber that falls more than `queue_size` events behind
+    loses the oldest ones.
+    """
+
+    _CLOSED = object()
+
+    def __init__(self, bus: "EventBus", topics: Set[str], max_batch: int, max_wait: float, queue_size: int):
+        self.topics = topics
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._bus = bus
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self._unsubscribed = False
+        self._closed = False
+
+    def _offer(self, event: Event) -> None:
+        if self._queue.full():
+            dropped = self._queue.get_nowait()
+            if dropped is not self._CLOSED:
+                events_dropped.inc(topic=dropped.topic)
+        self._queue.put_nowait(event)
+
+    def __aiter__(self) -> "Subscription":
+        return self
+
+    async def __anext__(self) -> List[Event]:
+        if self._closed:
+            raise StopAsyncIteration
+        event = await self._queue.get()
+        if event is self._CLOSED:
+            self._closed = True
+            raise StopAsyncIteration
+
+        batch = [event]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.max_wait
+        while len(batch) < self.max_batch:
+            if self._queue.empty():
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    event = await asyncio.wait_for(self._queue.get(), timeout=remaining)
+                except asyncio.TimeoutError:
+                    break
+            else:
+                event = self._queue.get_nowait()
+
+            if event is self._CLOSED:
+                # Hand out what we have; the next call stops the iteration
+                self._closed = True
+                break
+            batch.append(event)
+        return batch
+
+    def close(self) -> None:
+        if self._unsubscribed:
+            return
+        self._unsubscribed = True
+        self._bus._unsubscribe(self)
+        while self._queue.full():
+            self._queue.get_nowait()
+        self._queue.put_nowait(self._CLOSED)
+
+    async def __aenter__(self) -> "Subscription":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        self.close()
+
+
+class EventBus:
+    """Per-process LISTEN connection fanning domain events out to subscriptions"""
+
+    def __init__(
+        self,
+        dsn: Optional[str] = None,
+        reconnect_delay: float = settings.event_bus_reconnect_delay,
+        keepalive: float = settings.event_bus_keepalive
+    ):
+        # asyncpg wants a plain postgresql:// URL, not the SQLAlchemy driver form
+        self.dsn = dsn or make_url(settings.database_url).set(drivername="postgresql").render_as_string(
+            hide_password=False
+        )
+        self.reconnect_delay = reconnect_delay
+        self.keepalive = keepalive
+        self._subscriptions: Dict[str, Set[Subscription]] = defaultdict(set)
+        self._connection: Optional[asyncpg.Connection] = None
+        self._topics_changed = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def subscribe(
+        self,
+        *topics: str,
+        max_batch: int = 100,
+        max_wait: float = 0.0,
+        queue_size: int = settings.event_bus_queue_size
+    ) -> Subscription:
+        unknown = set(topics) - set(EVENT_TYPES)
+        if unknown:
+            raise ValueError(f"Unknown event topics: {sorted(unknown)}")
+
+        subscription = Subscription(self, set(topics), max_batch, max_wait, queue_size)
+        for topic in topics:
+            self._subscriptions[topic].add(subscription)
+        self._topics_changed.set()
+        return subscription
+
+    def _unsubscribe(self, subscription: Subscription) -> None:
+        for topic in subscription.topics:
+            subscribers = self._subscriptions.get(topic)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscriptions[topic]
+        self._topics_changed.set()
+
+    def _dispatch(self, event: Event) -> None:
+        events_received.inc(topic=event.topic)
+        event_lag_seconds.observe(
+            max(0.0, (datetime.now(timezone.utc) - event.occurred_at).total_seconds())
+        )
+        for subscription in list(self._subscriptions.get(event.topic, ())):
+            subscription._offer(event)
+
+    def _on_notification(self, connection, pid: int, channel: str, payload: str) -> None:
+        try:
+            event = decode_event(channel, payload)
+        except Exception as e:
+            logger.error(f"Dropping undecodable event on {channel}: {e}")
+            return
+        self._dispatch(event)
+
+    async def _sync_listeners(self, connection: asyncpg.Connection, listening: Set[str]) -> None:
+        """LISTEN to exactly the topics that have subscribers"""
+        self._topics_changed.clear()
+        wanted = set(self._subscriptions)
+        for topic in wanted - listening:
+            await connection.add_listener(topic, self._on_notification)
+            listening.add(topic)
+        for topic in listening - wanted:
+            await connection.remove_listener(topic, self._on_notification)
+            listening.discard(topic)
+
+    async def _listen(self, connection: asyncpg.Connection) -> None:
+        """Follow subscription changes until the connection is lost"""
+        lost = asyncio.Event()
+        connection.add_termination_listener(lambda _: lost.set())
+        listening: Set[str] = set()
+        await self._sync_listeners(connection, listening)
+
+        while not lost.is_set():
+            changed = asyncio.ensure_future(self._topics_changed.wait())
+            terminated = asyncio.ensure_future(lost.wait())
+            try:
+                done, _ = await asyncio.wait(
+                    {changed, terminated}, timeout=self.keepalive, return_when=asyncio.FIRST_COMPLETED
+                )
+            finally:
+                changed.cancel()
+                terminated.cancel()
+
+            if lost.is_set():
+                break
+            if changed in done:
+                await self._sync_listeners(connection, listening)
+            else:
+                # Nothing arrives on a half-open socket, so probe it now and then
+                await connection.execute("SELECT 1", timeout=self.keepalive)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                self._connection = await asyncpg.connect(self.dsn)
+                logger.info("Event bus listener connected")
+                await self._listen(self._connection)
+                logger.warning("Event bus listener connection lost, reconnecting")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Event bus listener error: {e}")
+            finally:
+                connection, self._connection = self._connection, None
+                if connection is not None and not connection.is_closed():
+                    connection.terminate()
+            await asyncio.sleep(self.reconnect_delay)
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        for subscriptions in list(self._subscriptions.values()):
+            for subscription in list(subscriptions):
+                subscription.close()
+
+
+event_bus = EventBus()
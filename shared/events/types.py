@@ -0,0 +1,104 @@
+from datetime import datetime, timezone
+from typing import ClassVar, Dict, List, Optional, Type
+from uuid import UUID
+
+from pydantic import BaseModel, Field
+
+# Domain events carry identifiers and the bare facts of a change, never whole
+# rows: NOTIFY payloads are capped at 8000 bytes and subscribers that need
+# more read it from the database.
+
+
+class Event(BaseModel):
+    topic: ClassVar[str]
+
+    occurred_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+    class Config:
+        frozen = True
+
+
+class OrderPlaced(Event):
+    topic = "order.placed"
+
+    order_id: UUID
+    user_id: UUID
+    restaurant_id: UUID
+
+
+class OrderAccepted(Event):
+    topic = "order.accepted"
+
+    order_id: UUID
+    restaurant_id: UUID
+
+
+class OrderAssigned(Event):
+    topic = "order.assigned"
+
+    order_id: UUID
+    delivery_agent_id: UUID
+
+
+class OrderStatusChanged(Event):
+    topic = "order.status_changed"
+
+    order_id: UUID
+    status: str
+    restaurant_id: Optional[UUID] = None
+    delivery_agent_id: Optional[UUID] = None
+
+
+class AgentAvailabilityChanged(Event):
+    topic = "agent.availability_changed"
+
+    agent_id: UUID
+    is_available: bool
+
+
+class AgentLocation(BaseModel):
+    agent_id: UUID
+    latitude: float
+    longitude: float
+    recorded_at: datetime
+
+
+class AgentLocationsChanged(Event):
+    """Latest positions of agents that pinged, many per event to keep NOTIFYs few"""
+    topic = "agent.locations_changed"
+
+    # Up to about 160 bytes each, so 40 stay under the payload limit
+    MAX_LOCATIONS: ClassVar[int] = 40
+
+    locations: List[AgentLocation]
+
+
+class MenuChanged(Event):
+    topic = "menu.changed"
+
+    restaurant_id: UUID
+    reason: str
+
+
+class RestaurantChanged(Event):
+    topic = "restaurant.changed"
+
+    restaurant_id: UUID
+    reason: str
+
+
+EVENT_TYPES: Dict[str, Type[Event]] = {
+    event_type.topic: event_type
+    for event_type in (
+        OrderPlaced, OrderAccepted, OrderAssigned, OrderStatusChanged,
+        AgentAvailabilityChanged, AgentLocationsChanged, MenuChanged, RestaurantChanged
+    )
+}
+
+
+def decode_event(topic: str, payload: str) -> Event:
+    """Rebuild an event from its channel name and NOTIFY payload"""
+    event_type = EVENT_TYPES.get(topic)
+    if event_type is None:
+        raise ValueError(f"Unknown event topic {topic!r}")
+    return event_type.model_validate_json(payload)
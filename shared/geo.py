@@ -0,0 +1,33 @@
+from math import asin, cos, radians, sin, sqrt
+from typing import Optional, Tuple
+
+EARTH_RADIUS_KM = 6371.0088
+
+Coordinates = Tuple[float, float]
+
+
+def coordinates(location: Optional[dict]) -> Optional[Coordinates]:
+    """(latitude, longitude) from a location or address dict, if it has them.
+
+    Agents store {"latitude": ..., "longitude": ...}; restaurant addresses
+    are free-form and may use the short lat/lng (or lon) keys instead.
+    """
+    if not isinstance(location, dict):
+        return None
+    latitude = location.get("latitude", location.get("lat"))
+    longitude = location.get("longitude", location.get("lng", location.get("lon")))
+    try:
+        latitude, longitude = float(latitude), float(longitude)
+    except (TypeError, ValueError):
+        return None
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        return None
+    return latitude, longitude
+
+
+def haversine_km(a: Coordinates, b: Coordinates) -> float:
+    """Great-circle distance between two points in kilometres"""
+    lat1, lon1 = map(radians, a)
+    lat2, lon2 = map(radians, b)
+    h = sin((lat2 - lat1) / 2) ** 2 + cos(lat1) * cos(lat2) * sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * asin(sqrt(h))
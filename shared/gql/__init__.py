@@ -0,0 +1,18 @@
+from shared.gql.cost import QueryCostLimiter, estimate_cost
+from shared.gql.persisted_queries import (
+    PersistedQueryStore,
+    PersistedQueryRouter,
+    PERSISTED_QUERY_NOT_FOUND,
+    query_hash
+)
+from shared.gql.selection import selects
+
+__all__ = [
+    "QueryCostLimiter",
+    "estimate_cost",
+    "PersistedQueryStore",
+    "PersistedQueryRouter",
+    "PERSISTED_QUERY_NOT_FOUND",
+    "query_hash",
+    "selects"
+]
@@ -0,0 +1,122 @@
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, List, Optional
+import asyncio
+import logging
+import time
+
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession, AsyncTransaction
+from strawberry.extensions import SchemaExtension
+from strawberry.fastapi import BaseContext
+
+from shared.database import AFTER_COMMIT, engine
+from shared.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+pool_checkout_seconds = metrics.histogram(
+    "db_pool_checkout_seconds", "Time spent waiting for a pooled connection per GraphQL request"
+)
+connection_hold_seconds = metrics.histogram(
+    "db_connection_hold_seconds", "Time a GraphQL request held its pooled connection"
+)
+request_transactions = metrics.counter(
+    "graphql_request_transactions_total", "GraphQL request transactions by outcome"
+)
+
+
+class DatabaseContext(BaseContext):
+    """Per-request GraphQL context with one lazily opened database session.
+
+    The first resolver that needs the database checks a connection out of the
+    pool and begins a transaction; every other resolver in the request reuses
+    it. Resolvers may run concurrently, so access is serialized with a lock.
+    The session joins the request transaction in "rollback_only" mode: service
+    code can still call commit()/rollback(), but only `UnitOfWork` ends the
+    transaction, once, when the operation completes. Callbacks registered
+    with shared.database.after_commit run only if it commits.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._lock = asyncio.Lock()
+        self._connection: Optional[AsyncConnection] = None
+        self._transaction: Optional[AsyncTransaction] = None
+        self._session: Optional[AsyncSession] = None
+        self._checked_out_at: Optional[float] = None
+        self._after_commit: List[Callable[[], None]] = []
+
+    @asynccontextmanager
+    async def session(self) -> AsyncIterator[AsyncSession]:
+        async with self._lock:
+            if self._session is None:
+                await self._open()
+            yield self._session
+
+    async def _open(self) -> None:
+        started = time.perf_counter()
+        self._connection = await engine.connect()
+        self._checked_out_at = time.perf_counter()
+        pool_checkout_seconds.observe(self._checked_out_at - started)
+
+        self._transaction = await self._connection.begin()
+        self._session = AsyncSession(
+            bind=self._connection,
+            expire_on_commit=False,
+            join_transaction_mode="rollback_only",
+            info={AFTER_COMMIT: self._after_commit}
+        )
+
+    async def finish(self, commit: bool) -> None:
+        """Commit or roll back the request transaction and release the connection"""
+        if self._session is None:
+            return
+
+        committed = False
+        async with self._lock:
+            try:
+                if commit and self._transaction.is_active:
+                    await self._session.flush()
+                    await self._transaction.commit()
+                    committed = True
+                    request_transactions.inc(outcome="commit")
+                else:
+                    if self._transaction.is_active:
+                        await self._transaction.rollback()
+                    request_transactions.inc(outcome="rollback")
+            except Exception as e:
+                logger.error(f"Error finishing request transaction: {e}")
+                request_transactions.inc(outcome="error")
+                raise
+            finally:
+                await self._session.close()
+                await self._connection.close()
+                connection_hold_seconds.observe(time.perf_counter() - self._checked_out_at)
+                self._session = self._transaction = self._connection = None
+                callbacks, self._after_commit = self._after_commit, []
+
+        if committed:
+            for callback in callbacks:
+                try:
+                    callback()
+                except Exception as e:
+                    logger.error(f"Error in after-commit callback: {e}")
+
+
+async def get_context() -> DatabaseContext:
+    """Strawberry context_getter for the database-backed services"""
+    return DatabaseContext()
+
+
+class UnitOfWork(SchemaExtension):
+    """Commit the request transaction if the operation succeeded, else roll back"""
+
+    async def on_operation(self):
+        yield
+
+        context = self.execution_context.context
+        if not isinstance(context, DatabaseContext):
+            return
+
+        result = self.execution_context.result
+        succeeded = result is not None and not result.errors and not self.execution_context.errors
+        await context.finish(commit=succeeded)
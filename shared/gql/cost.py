@@ -0,0 +1,176 @@
+from typing import Any, Dict, Iterable, Optional
+import logging
+
+from graphql import (
+    DocumentNode, ExecutionResult, FieldNode, FragmentDefinitionNode,
+    FragmentSpreadNode, GraphQLError, GraphQLList, GraphQLNonNull,
+    GraphQLObjectType, GraphQLSchema, InlineFragmentNode,
+    OperationDefinitionNode, get_named_type, value_from_ast_untyped
+)
+from strawberry.extensions import SchemaExtension
+
+from shared.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Static query cost: every object resolved costs 1, scalars are free, and a
+# list multiplies the cost of its selection by the number of items it may
+# return. That size comes from the field's `pagination: {limit}` (or a
+# `limit`/`first` argument); unbounded lists count as `default_list_size`.
+# For connection fields (`userOrders(pagination) { items }`) the requested
+# limit applies to the list inside the connection.
+
+SIZE_ARGUMENTS = ("limit", "first")
+
+
+def _is_list(type_) -> bool:
+    if isinstance(type_, GraphQLNonNull):
+        type_ = type_.of_type
+    return isinstance(type_, GraphQLList)
+
+
+def _requested_size(node: FieldNode, variables: Dict[str, Any]) -> Optional[int]:
+    for argument in node.arguments or ():
+        value = value_from_ast_untyped(argument.value, variables)
+        if argument.name.value == "pagination" and isinstance(value, dict):
+            value = value.get("limit")
+        elif argument.name.value not in SIZE_ARGUMENTS:
+            continue
+        if isinstance(value, int):
+            return max(value, 0)
+    return None
+
+
+class _CostEstimator:
+    def __init__(
+        self,
+        schema: GraphQLSchema,
+        fragments: Dict[str, FragmentDefinitionNode],
+        variables: Dict[str, Any],
+        default_list_size: int
+    ):
+        self.schema = schema
+        self.fragments = fragments
+        self.variables = variables
+        self.default_list_size = default_list_size
+
+    def selection_cost(
+        self,
+        parent: GraphQLObjectType,
+        selections: Iterable[Any],
+        pending_size: Optional[int] = None,
+        visited: frozenset = frozenset()
+    ) -> int:
+        cost = 0
+        for selection in selections:
+            if isinstance(selection, FieldNode):
+                cost += self.field_cost(parent, selection, pending_size)
+            elif isinstance(selection, InlineFragmentNode):
+                fragment_type = parent
+                if selection.type_condition:
+                    fragment_type = self.schema.get_type(selection.type_condition.name.value) or parent
+                cost += self.selection_cost(
+                    fragment_type, selection.selection_set.selections, pending_size, visited
+                )
+            elif isinstance(selection, FragmentSpreadNode):
+                name = selection.name.value
+                fragment = self.fragments.get(name)
+                if fragment is None or name in visited:
+                    continue
+                fragment_type = self.schema.get_type(fragment.type_condition.name.value) or parent
+                cost += self.selection_cost(
+                    fragment_type, fragment.selection_set.selections, pending_size, visited | {name}
+                )
+        return cost
+
+    def field_cost(self, parent: GraphQLObjectType, node: FieldNode, pending_size: Optional[int]) -> int:
+        fields = getattr(parent, "fields", None) or {}
+        field_def = fields.get(node.name.value)
+        if field_def is None or node.selection_set is None:
+            # Scalars, enums and introspection fields are free
+            return 0
+
+        return_type = get_named_type(field_def.type)
+        requested = _requested_size(node, self.variables)
+
+        if _is_list(field_def.type):
+            size = requested if requested is not None else pending_size
+            if size is None:
+                size = self.default_list_size
+            return size * (1 + self.selection_cost(return_type, node.selection_set.selections))
+
+        # A sized connection passes its limit down to the list it wraps
+        return 1 + self.selection_cost(return_type, node.selection_set.selections, requested)
+
+
+def estimate_cost(
+    schema: GraphQLSchema,
+    document: DocumentNode,
+    operation_name: Optional[str] = None,
+    variables: Optional[Dict[str, Any]] = None,
+    default_list_size: int = settings.graphql_default_list_size
+) -> int:
+    """Estimate the worst-case number of objects an operation resolves"""
+    fragments = {
+        definition.name.value: definition
+        for definition in document.definitions
+        if isinstance(definition, FragmentDefinitionNode)
+    }
+    estimator = _CostEstimator(schema, fragments, variables or {}, default_list_size)
+
+    cost = 0
+    for definition in document.definitions:
+        if not isinstance(definition, OperationDefinitionNode):
+            continue
+        if operation_name and (definition.name is None or definition.name.value != operation_name):
+            continue
+        root = schema.get_root_type(definition.operation)
+        if root is not None:
+            cost += estimator.selection_cost(root, definition.selection_set.selections)
+    return cost
+
+
+class QueryCostLimiter(SchemaExtension):
+    """Reject operations whose estimated cost is above `max_cost`.
+
+    Runs before execution, so expensive operations are shed before any
+    resolver touches the database. The computed cost is reported under
+    `extensions.cost`. Subclass to give a schema its own budget.
+    """
+
+    max_cost: int = settings.graphql_max_query_cost
+    default_list_size: int = settings.graphql_default_list_size
+
+    def __init__(self, *, execution_context=None):
+        super().__init__(execution_context=execution_context)
+        self.cost: Optional[int] = None
+
+    def on_execute(self):
+        execution_context = self.execution_context
+        self.cost = estimate_cost(
+            execution_context.schema._schema,
+            execution_context.graphql_document,
+            execution_context.operation_name,
+            execution_context.variables,
+            self.default_list_size
+        )
+
+        if self.cost > self.max_cost and not execution_context.result:
+            logger.warning(f"Rejected operation with cost {self.cost} (budget {self.max_cost})")
+            # A preset result makes strawberry skip execution entirely
+            execution_context.result = ExecutionResult(
+                data=None,
+                errors=[
+                    GraphQLError(
+                        f"Query cost {self.cost} exceeds the maximum allowed cost of {self.max_cost}",
+                        extensions={"code": "QUERY_TOO_EXPENSIVE"}
+                    )
+                ]
+            )
+
+        yield
+
+    def get_results(self) -> Dict[str, Any]:
+        if self.cost is None:
+            return {}
+        return {"cost": {"requested": self.cost, "maximum": self.max_cost}}
@@ -0,0 +1,155 @@
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Dict, Optional
+import hashlib
+import json
+import logging
+
+from fastapi import Response
+from graphql import GraphQLError
+from strawberry import UNSET
+from strawberry.exceptions import MissingQueryError
+from strawberry.fastapi import GraphQLRouter
+from strawberry.http import GraphQLRequestData
+from strawberry.types import ExecutionResult
+
+from shared.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Automatic persisted queries (APQ), following the Apollo protocol: a client
+# first sends only `extensions.persistedQuery.sha256Hash`; if the server does
+# not know the hash it answers PersistedQueryNotFound and the client retries
+# with the full document, which is then stored under its hash.
+
+PERSISTED_QUERY_NOT_FOUND = "PersistedQueryNotFound"
+PERSISTED_QUERY_HASH_MISMATCH = "provided sha does not match query"
+
+
+@lru_cache(maxsize=1024)
+def query_hash(query: str) -> str:
+    """SHA-256 hex digest used as the persisted query ID"""
+    return hashlib.sha256(query.encode("utf-8")).hexdigest()
+
+
+class PersistedQueryStore:
+    """Bounded LRU mapping query hashes to documents"""
+
+    def __init__(self, maxsize: int = settings.persisted_query_cache_size):
+        self.maxsize = maxsize
+        self._queries: "OrderedDict[str, str]" = OrderedDict()
+
+    def get(self, sha256_hash: str) -> Optional[str]:
+        query = self._queries.get(sha256_hash)
+        if query is not None:
+            self._queries.move_to_end(sha256_hash)
+        return query
+
+    def put(self, sha256_hash: str, query: str) -> None:
+        self._queries[sha256_hash] = query
+        self._queries.move_to_end(sha256_hash)
+        while len(self._queries) > self.maxsize:
+            self._queries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._queries)
+
+
+class PersistedQueryError(Exception):
+    def __init__(self, message: str, code: str, status_code: int = 200):
+        super().__init__(message)
+        self.message = message
+        self.code = code
+        # PersistedQueryNotFound must stay a 200 for Apollo clients to retry
+        self.status_code = status_code
+
+
+class PersistedQueryRouter(GraphQLRouter):
+    """GraphQLRouter that resolves APQ hashes before executing.
+
+    Stored documents are returned as the same string object on every hit, so
+    the schema's ParserCache lookup doesn't even need to rehash the text.
+    """
+
+    def __init__(self, *args, store: Optional[PersistedQueryStore] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.persisted_queries = store if store is not None else PersistedQueryStore()
+
+    def should_render_graphql_ide(self, request) -> bool:
+        # A GET with only a hash is a persisted query, not a browser visit
+        return (
+            super().should_render_graphql_ide(request)
+            and "extensions" not in request.query_params
+        )
+
+    async def parse_http_body(self, request) -> GraphQLRequestData:
+        content_type = request.content_type or ""
+
+        if "application/json" in content_type:
+            data = self.parse_json(await request.get_body())
+        elif request.method == "GET" and not content_type.startswith("multipart/form-data"):
+            data = self.parse_query_params(request.query_params)
+        else:
+            return await super().parse_http_body(request)
+
+        return GraphQLRequestData(
+            query=self.resolve_query(data.get("query"), data.get("extensions")),
+            variables=data.get("variables"),
+            operation_name=data.get("operationName"),
+        )
+
+    def resolve_query(self, query: Optional[str], extensions: Any) -> Optional[str]:
+        if isinstance(extensions, str):
+            # GET requests carry extensions as a JSON-encoded query parameter
+            try:
+                extensions = json.loads(extensions)
+            except ValueError:
+                raise PersistedQueryError("extensions must be a JSON object", "BAD_REQUEST", 400)
+        if extensions is not None and not isinstance(extensions, dict):
+            raise PersistedQueryError("extensions must be a JSON object", "BAD_REQUEST", 400)
+
+        persisted = extensions.get("persistedQuery") if extensions else None
+        if not persisted:
+            return query
+
+        sha256_hash = persisted.get("sha256Hash")
+        if not sha256_hash:
+            return query
+
+        if query is None:
+            query = self.persisted_queries.get(sha256_hash)
+            if query is None:
+                raise PersistedQueryError(PERSISTED_QUERY_NOT_FOUND, "PERSISTED_QUERY_NOT_FOUND")
+            return query
+
+        if query_hash(query) != sha256_hash:
+            raise PersistedQueryError(PERSISTED_QUERY_HASH_MISMATCH, "BAD_USER_INPUT")
+
+        stored = self.persisted_queries.get(sha256_hash)
+        if stored is not None:
+            return stored
+
+        self.persisted_queries.put(sha256_hash, query)
+        return query
+
+    async def execute_operation(self, request, context, root_value) -> ExecutionResult:
+        try:
+            return await super().execute_operation(request, context, root_value)
+        except PersistedQueryError as e:
+            if e.status_code != 200:
+                raise
+            return ExecutionResult(
+                data=None,
+                errors=[GraphQLError(e.message, extensions={"code": e.code})]
+            )
+
+    async def run(self, request, context=UNSET, root_value=UNSET) -> Response:
+        try:
+            return await super().run(request, context, root_value)
+        except PersistedQueryError as e:
+            # A malformed request: answered as a GraphQL error, with its status
+            error = GraphQLError(e.message, extensions={"code": e.code})
+            return self.create_response(
+                response_data={"data": None, "errors": [error.formatted]},
+                sub_response=Response(status_code=e.status_code)
+            )
@@ -0,0 +1,33 @@
+from typing import Any, Optional
+
+import strawberry
+
+from shared.pagination import Page, page_size
+
+
+@strawberry.type
+class PageInfo:
+    has_next_page: bool
+    end_cursor: Optional[str]
+
+
+def page_arguments(first: Optional[int], pagination: Any) -> int:
+    """Page size from Relay `first`, falling back to the legacy pagination input.
+
+    Order lists are keyset paginated, so an offset can't be honoured; reject it
+    rather than silently returning the first page again.
+    """
+    if pagination is not None and pagination.offset:
+        raise ValueError("Offset pagination is not supported here, page with `after` cursors instead")
+    return page_size(first if first is not None else getattr(pagination, "limit", None))
+
+
+def build_connection(connection_cls, edge_cls, page: Page, total_count: int = 0):
+    """Relay-style connection for a page; `items`/`hasNextPage` are kept for older clients"""
+    return connection_cls(
+        edges=[edge_cls(cursor=cursor, node=node) for cursor, node in zip(page.cursors, page.items)],
+        page_info=PageInfo(has_next_page=page.has_next_page, end_cursor=page.end_cursor),
+        items=page.items,
+        total_count=total_count,
+        has_next_page=page.has_next_page
+    )
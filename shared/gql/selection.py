@@ -0,0 +1,27 @@
+from typing import Any, Iterable, Iterator
+
+from strawberry.types import Info
+from strawberry.types.nodes import FragmentSpread, InlineFragment, SelectedField
+
+
+def _fields(selections: Iterable[Any]) -> Iterator[SelectedField]:
+    for selection in selections:
+        if isinstance(selection, (FragmentSpread, InlineFragment)):
+            yield from _fields(selection.selections)
+        elif isinstance(selection, SelectedField):
+            yield selection
+
+
+def selects(info: Info, *path: str) -> bool:
+    """Whether the client selected `path` (camelCase names) below the current field.
+
+    Lets resolvers skip work, such as eager loads or count queries, for
+    fields that won't be returned. Fragments are looked through.
+    """
+    level = list(info.selected_fields)
+    for name in path:
+        selections = [selection for parent in level for selection in parent.selections]
+        level = [field for field in _fields(selections) if field.name == name]
+        if not level:
+            return False
+    return True
@@ -1,16 +1,23 @@
 from shared.models.base import BaseModel
 from shared.models.user import User
-from shared.models.restaurant import Restaurant, MenuItem
-from shared.models.order import Order, OrderItem, Rating  
-from shared.models.delivery import DeliveryAgent
+from shared.models.restaurant import Restaurant, MenuItem, RestaurantOpeningHours
+from shared.models.order import Order, OrderItem, Rating, OrderEvent
+from shared.models.delivery import DeliveryAgent, DeliveryTrail
+from shared.models.idempotency import IdempotencyKey
+from shared.models.outbox import OutboxMessage
 
 __all__=[
     "BaseModel",
     "User",
     "Restaurant",
     "MenuItem",
+    "RestaurantOpeningHours",
     "Order",
     "OrderItem",
     "Rating",
-    "DeliveryAgent"
+    "OrderEvent",
+    "DeliveryAgent",
+    "DeliveryTrail",
+    "IdempotencyKey",
+    "OutboxMessage"
 ]
\ No newline at end of file
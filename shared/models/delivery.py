@@ -1,19 +1,43 @@
-from sqlalchemy import Column, String, JSON, Boolean
+from sqlalchemy import Column, String, JSON, Boolean, DateTime, Index, Integer, LargeBinary, func, text
+from sqlalchemy.dialects.postgresql import UUID
+from shared.database import Base
 from shared.models.base import BaseModel
 
 class DeliveryAgent(BaseModel):
     __tablename__="delivery_agents"
-    __table_args__={'schema':'delivery'}
+    __table_args__=(
+        # Only available agents are ever searched for, in listing order
+        Index('ix_delivery_agents_available', 'created_at', 'id', postgresql_where=text('is_available')),
+        {'schema':'delivery'}
+    )
     
     
     
     name=Column(String(255),  nullable=False)
     email=Column(String(255), nullable=False, unique=True)
     phone=Column(String(20),  nullable=False, unique=True,)
-    is_available=Column(Boolean, default=True, index=True)
+    is_available=Column(Boolean, default=True)
     current_location=Column(JSON)
     vehicle_type= Column(String(50))
-    
-    
-    
-    
\ No newline at end of file
+
+
+class DeliveryTrail(Base):
+    """The route an agent took for one order, encoded by shared.trails.
+
+    Pings are appended as chunks while the delivery is active; on
+    completion the trail is simplified in place. One row per delivery.
+    """
+    __tablename__ = "delivery_trails"
+    __table_args__ = (
+        # Appending pings: open trails of the agents that pinged
+        Index('ix_delivery_trails_agent_open', 'delivery_agent_id', postgresql_where=text('completed_at IS NULL')),
+        {'schema': 'delivery'}
+    )
+
+    order_id = Column(UUID(as_uuid=True), primary_key=True)
+    delivery_agent_id = Column(UUID(as_uuid=True), nullable=False)
+    points = Column(LargeBinary, nullable=False, server_default=text("''::bytea"))
+    # Pings received; after simplification `points` holds fewer
+    point_count = Column(Integer, nullable=False, server_default=text('0'))
+    started_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    completed_at = Column(DateTime(timezone=True))
@@ -0,0 +1,18 @@
+from sqlalchemy import Column, String, JSON, DateTime, func
+from sqlalchemy.dialects.postgresql import UUID
+from shared.database import Base
+
+class IdempotencyKey(Base):
+    """A client-supplied Idempotency-Key and the response it produced.
+
+    Deliberately compact: keyed by (user_id, key), no surrogate id.
+    """
+    __tablename__ = "idempotency_keys"
+    __table_args__ = {'schema': 'orders'}
+    
+    user_id = Column(UUID(as_uuid=True), primary_key=True)
+    key = Column(String(255), primary_key=True)
+    request_hash = Column(String(64), nullable=False)
+    order_id = Column(UUID(as_uuid=True))
+    response = Column(JSON)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
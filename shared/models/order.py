@@ -1,18 +1,66 @@
-from sqlalchemy import Column, String, JSON, DECIMAL, Integer, DateTime, ForeignKey, func
+from sqlalchemy import (
+    Column, String, JSON, DECIMAL, Integer, SmallInteger, DateTime, ForeignKey, Index, func, literal_column, text
+)
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
+from shared.database import Base
 from shared.models.base import BaseModel
+
+# Statuses the kitchen and the delivery agent still have to act on. The
+# partial indexes below are only used when a query filters on exactly these.
+# An order is the kitchen's from acceptance until pickup; `assigned` is how
+# orders stored before assignment moved to delivery_agent_id say "cooking,
+# agent on the way". This is what "active" means in every restaurant view.
+KITCHEN_ACTIVE_STATUSES = ('accepted', 'preparing', 'ready_for_pickup', 'assigned')
+# An agent can be given the order any time after acceptance, and the
+# kitchen keeps moving it on after that: the order is the agent's until it
+# ends, whatever the status. Only meaningful for orders with an agent.
+DELIVERY_ACTIVE_STATUSES = KITCHEN_ACTIVE_STATUSES + ('picked_up', 'on_the_way')
+
+
+def _status_predicate(statuses, *conditions):
+    in_statuses = "status IN (" + ", ".join(f"'{status}'" for status in statuses) + ")"
+    return text(" AND ".join((in_statuses,) + conditions))
+
+
 class Order(BaseModel):
     
     
     __tablename__="orders"
-    __table_args__={'schema': 'orders'}
-    
-    
-    user_id = Column(UUID(as_uuid=True), nullable=False, index=True)
-    restaurant_id = Column(UUID(as_uuid=True), nullable=False, index=True)
-    delivery_agent_id = Column(UUID(as_uuid=True), nullable=True, index=True)
+    __table_args__=(
+        # Order lists page newest first on (created_at, id), see shared/pagination.py
+        Index('ix_orders_user_created', 'user_id', 'created_at', 'id'),
+        Index('ix_orders_restaurant_created', 'restaurant_id', 'created_at', 'id'),
+        Index('ix_orders_restaurant_status_created', 'restaurant_id', 'status', 'created_at', 'id'),
+        Index('ix_orders_agent_created', 'delivery_agent_id', 'created_at', 'id'),
+        # Small partial indexes for the live kitchen and delivery boards,
+        # covering status so per-status counts are index-only scans
+        Index(
+            'ix_orders_restaurant_active', 'restaurant_id', 'created_at', 'id',
+            postgresql_include=['status'],
+            postgresql_where=_status_predicate(KITCHEN_ACTIVE_STATUSES)
+        ),
+        Index(
+            'ix_orders_agent_active', 'delivery_agent_id', 'created_at', 'id',
+            postgresql_include=['status'],
+            postgresql_where=_status_predicate(DELIVERY_ACTIVE_STATUSES, "delivery_agent_id IS NOT NULL")
+        ),
+        # Orders in the kitchen still waiting for a delivery agent (batch
+        # dispatch); they keep waiting while the kitchen moves them on
+        Index(
+            'ix_orders_awaiting_agent', 'accepted_at', 'id',
+            postgresql_where=_status_predicate(KITCHEN_ACTIVE_STATUSES, "delivery_agent_id IS NULL")
+        ),
+        {'schema': 'orders'}
+    )
+    
+    
+    user_id = Column(UUID(as_uuid=True), nullable=False)
+    restaurant_id = Column(UUID(as_uuid=True), nullable=False)
+    delivery_agent_id = Column(UUID(as_uuid=True), nullable=True)
     status= Column(String(50), default='pending', index=True)
+    # Bumped by every change, for optimistic concurrency (see shared/order_transitions.py)
+    version = Column(Integer, nullable=False, default=1, server_default=text('1'))
     total_amount = Column(DECIMAL(10, 2), nullable=False)
     delivery_address=Column(JSON, nullable=False)
     special_instructions = Column(String)
@@ -25,12 +73,22 @@ class Order(BaseModel):
     #Relationship
     order_items= relationship("OrderItem", back_populates="order")
     rating = relationship("Rating", back_populates="order", uselist=False)
+def status_in(statuses):
+    """`Order.status IN (...)` with the statuses inlined rather than bound.
+
+    A partial index is only usable when the planner can prove the query
+    implies its predicate, which it cannot do for bind parameters once a
+    prepared statement switches to a generic plan.
+    """
+    return Order.status.in_([literal_column(f"'{status}'") for status in statuses])
+
+
 class OrderItem(BaseModel):
     __tablename__="order_items"
     __table_args__={'schema':'orders'}
     
     
-    order_id= Column(UUID(as_uuid=True), ForeignKey('orders.orders.id'),nullable=False)
+    order_id= Column(UUID(as_uuid=True), ForeignKey('orders.orders.id'),nullable=False, index=True)
     menu_item_id = Column(UUID(as_uuid=True), nullable=False)
     quantity = Column(Integer, nullable=False)
     unit_price = Column(DECIMAL(10, 2), nullable=False)
@@ -60,4 +118,29 @@ class Rating(BaseModel):
     
     
     
-    
\ No newline at end of file
+    
+
+
+class OrderEvent(Base):
+    """Append-only timeline of order status changes, one row per transition.
+
+    Kept narrow (status as a code from shared.order_state.STATUS_CODES,
+    no surrogate key) since every order writes several rows. Rows arrive
+    in time order, so a BRIN index on occurred_at serves time windows at a
+    tiny fraction of a btree's size. The owners are copied in so stage
+    timings per restaurant or agent need no join with orders.
+    """
+    __tablename__ = "order_events"
+    __table_args__ = (
+        Index('ix_order_events_occurred_at', 'occurred_at', postgresql_using='brin'),
+        {'schema': 'orders'}
+    )
+
+    # The primary key also serves an order's timeline, in order
+    order_id = Column(UUID(as_uuid=True), primary_key=True)
+    occurred_at = Column(DateTime(timezone=True), primary_key=True, server_default=func.now())
+    status = Column(SmallInteger, primary_key=True, autoincrement=False)
+    restaurant_id = Column(UUID(as_uuid=True), nullable=False)
+    delivery_agent_id = Column(UUID(as_uuid=True))
+    # Minutes, as estimated by the restaurant when it accepts or updates the order
+    estimated_prep_time = Column(SmallInteger)
@@ -0,0 +1,30 @@
+from sqlalchemy import BigInteger, Column, DateTime, Identity, Index, Integer, JSON, String, Text, func, text
+from sqlalchemy.dialects.postgresql import UUID
+from shared.database import Base
+
+class OutboxMessage(Base):
+    """A notification to another service, written in the same transaction
+    as the change it announces and delivered by shared.outbox.OutboxDispatcher.
+
+    Rows are deleted once delivered; `dead_at` marks the ones given up on.
+    """
+    __tablename__ = "outbox"
+    __table_args__ = (
+        # Dispatcher scan: pending messages in id order
+        Index('ix_outbox_pending', 'id', postgresql_where=text('dead_at IS NULL')),
+        # "Is an earlier message for this order still pending?"
+        Index('ix_outbox_aggregate_pending', 'aggregate_id', 'id', postgresql_where=text('dead_at IS NULL')),
+        {'schema': 'orders'}
+    )
+    
+    id = Column(BigInteger, Identity(), primary_key=True)
+    # Messages for the same aggregate (an order) are delivered in id order
+    aggregate_id = Column(UUID(as_uuid=True), nullable=False)
+    destination = Column(String(50), nullable=False)
+    path = Column(String(255), nullable=False)
+    payload = Column(JSON, nullable=False)
+    attempts = Column(Integer, nullable=False, server_default=text('0'))
+    last_error = Column(Text)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    available_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    dead_at = Column(DateTime(timezone=True))
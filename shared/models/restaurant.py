@@ -1,10 +1,14 @@
-from sqlalchemy import Column, String, JSON, Boolean, DECIMAL, ForeignKey
+from sqlalchemy import Column, String, JSON, Boolean, DECIMAL, ForeignKey, Index, text
 from sqlalchemy.orm import relationship
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.dialects.postgresql import UUID, INT4RANGE
+from shared.database import Base
 from shared.models.base import BaseModel
 class Restaurant(BaseModel):
     __tablename__ = "restaurants"
-    __table_args__ = {'schema': 'restaurants'}
+    __table_args__ = (
+        Index('ix_restaurants_online', 'created_at', 'id', postgresql_where=text('is_online')),
+        {'schema': 'restaurants'}
+    )
     
     name  = Column(String(255), nullable=False)
     email = Column(String(255), unique=True, nullable=False)
@@ -16,12 +20,22 @@ class Restaurant(BaseModel):
     
     #relationship to menu 
     menu_items = relationship("MenuItem", back_populates="restaurant")
+    # operation_hours normalized to minute-of-week ranges, see shared/opening_hours.py
+    opening_hours = relationship(
+        "RestaurantOpeningHours", cascade="all, delete-orphan",
+        order_by="RestaurantOpeningHours.minutes"
+    )
     
     
     
 class MenuItem(BaseModel):
     __tablename__= "menu_items"
-    __table_args__= {'schema': 'restaurants'}
+    __table_args__= (
+        # Serves menu loads by restaurant, the available-only menu and the
+        # per-category listing; also indexes the restaurant_id foreign key
+        Index('ix_menu_items_restaurant_available_category', 'restaurant_id', 'is_available', 'category'),
+        {'schema': 'restaurants'}
+    )
     
     
     restaurant_id = Column(UUID(as_uuid=True), ForeignKey('restaurants.restaurants.id'), nullable=False)
@@ -35,19 +49,16 @@ class MenuItem(BaseModel):
     
     #relationship 
     restaurant = relationship("Restaurant", back_populates="menu_items")
-    
-    
-    
-    
-    
-    
-    
-    
-    
-    
-    
-    
-       
-    
-  
-    
\ No newline at end of file
+
+
+class RestaurantOpeningHours(Base):
+    """One [start, end) minute-of-week range a restaurant is open"""
+    __tablename__ = "restaurant_opening_hours"
+    __table_args__ = (
+        # "Open at minute m" is `minutes @> m`, answered by this index
+        Index('ix_restaurant_opening_hours_minutes', 'minutes', postgresql_using='gist'),
+        {'schema': 'restaurants'}
+    )
+    
+    restaurant_id = Column(UUID(as_uuid=True), ForeignKey('restaurants.restaurants.id', ondelete='CASCADE'), primary_key=True)
+    minutes = Column(INT4RANGE, primary_key=True)
@@ -0,0 +1,127 @@
+from bisect import bisect_right
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy.dialects.postgresql import Range
+
+# Weekly opening hours as half-open minute-of-week intervals.
+#
+# Minute 0 is Monday 00:00 and the week has 10080 minutes. `operation_hours`
+# as stored on a restaurant ({"monday": {"open": "09:00", "close": "22:00"},
+# ...}) is normalized into sorted, non-overlapping [start, end) intervals:
+# a window closing after midnight runs into the next day, and one that runs
+# past Sunday midnight is split at the week boundary. These are what the
+# `restaurant_opening_hours` side table stores as int4range values.
+
+DAYS = ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
+MINUTES_PER_DAY = 24 * 60
+MINUTES_PER_WEEK = 7 * MINUTES_PER_DAY
+
+Interval = Tuple[int, int]
+
+# No hours at all means the restaurant never closes
+ALWAYS_OPEN: List[Interval] = [(0, MINUTES_PER_WEEK)]
+
+
+class InvalidOperatingHoursError(ValueError):
+    pass
+
+
+def _parse_minutes(value: str, day: str, field: str) -> int:
+    try:
+        hours, minutes = value.split(":")
+        hours, minutes = int(hours), int(minutes)
+    except (AttributeError, ValueError):
+        raise InvalidOperatingHoursError(f"{day} {field} time must be HH:MM, got {value!r}")
+    if not (0 <= hours <= 23 and 0 <= minutes <= 59):
+        raise InvalidOperatingHoursError(f"{day} {field} time must be HH:MM, got {value!r}")
+    return hours * 60 + minutes
+
+
+def _merge(intervals: List[Interval]) -> List[Interval]:
+    merged: List[Interval] = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def weekly_intervals(operation_hours: Optional[Dict[str, Optional[dict]]]) -> List[Interval]:
+    """Normalize `operation_hours` into minute-of-week intervals.
+
+    Raises InvalidOperatingHoursError for unknown days or malformed times
+    instead of guessing. Days that are missing or null are closed.
+    """
+    if not operation_hours:
+        return list(ALWAYS_OPEN)
+
+    intervals: List[Interval] = []
+    for day, day_hours in operation_hours.items():
+        if day not in DAYS:
+            raise InvalidOperatingHoursError(f"Unknown day {day!r} in operating hours")
+        if not day_hours:
+            continue
+        if not isinstance(day_hours, dict) or "open" not in day_hours or "close" not in day_hours:
+            raise InvalidOperatingHoursError(f"{day} hours need both 'open' and 'close'")
+
+        day_start = DAYS.index(day) * MINUTES_PER_DAY
+        start = day_start + _parse_minutes(day_hours["open"], day, "open")
+        end = day_start + _parse_minutes(day_hours["close"], day, "close")
+        if end <= start:
+            # Overnight, e.g. 22:00 to 02:00, closes the next day
+            end += MINUTES_PER_DAY
+
+        if end > MINUTES_PER_WEEK:
+            intervals.append((start, MINUTES_PER_WEEK))
+            intervals.append((0, end - MINUTES_PER_WEEK))
+        else:
+            intervals.append((start, end))
+
+    return _merge(intervals)
+
+
+def to_ranges(intervals: List[Interval]) -> List[Range]:
+    """Intervals as int4range values for the side table"""
+    return [Range(start, end, bounds="[)") for start, end in intervals]
+
+
+def from_ranges(ranges: List[Range]) -> List[Interval]:
+    return sorted((r.lower, r.upper) for r in ranges)
+
+
+def stored_intervals(ranges: List[Range], operation_hours: Optional[Dict[str, Optional[dict]]]) -> List[Interval]:
+    """A restaurant's intervals from its side table rows, or from `operation_hours` when it has none.
+
+    Every restaurant written through the restaurant service has rows unless it
+    is closed all week, in which case `operation_hours` also says so. Rows are
+    missing otherwise only for restaurants inserted around the service or not
+    yet backfilled, and those keep what their JSON says (invalid hours mean
+    always open, as in the backfill).
+    """
+    if ranges:
+        return from_ranges(ranges)
+    try:
+        return weekly_intervals(operation_hours)
+    except InvalidOperatingHoursError:
+        return list(ALWAYS_OPEN)
+
+
+def minute_of_week(moment: datetime) -> int:
+    return moment.weekday() * MINUTES_PER_DAY + moment.hour * 60 + moment.minute
+
+
+def is_open_at(intervals: List[Interval], minute: int) -> bool:
+    """Whether `minute` falls inside one of the sorted, merged `intervals`"""
+    index = bisect_right(intervals, (minute, MINUTES_PER_WEEK + 1)) - 1
+    return index >= 0 and intervals[index][0] <= minute < intervals[index][1]
+
+
+def upcoming_window(minute: int, within: int) -> List[Interval]:
+    """Minutes in (minute, minute + within] as intervals, split where they wrap past Sunday"""
+    start = (minute + 1) % MINUTES_PER_WEEK
+    end = start + min(within, MINUTES_PER_WEEK)
+    if end <= MINUTES_PER_WEEK:
+        return [(start, end)]
+    return [(start, MINUTES_PER_WEEK), (0, end - MINUTES_PER_WEEK)]
@@ -0,0 +1,87 @@
+from enum import Enum
+from typing import Dict, FrozenSet, Tuple
+
+
+class OrderStatus(str, Enum):
+    """Every status an order can have; the values are what orders.orders.status stores"""
+    PENDING = "pending"
+    ACCEPTED = "accepted"
+    REJECTED = "rejected"
+    PREPARING = "preparing"
+    READY_FOR_PICKUP = "ready_for_pickup"
+    ASSIGNED = "assigned"
+    PICKED_UP = "picked_up"
+    ON_THE_WAY = "on_the_way"
+    DELIVERED = "delivered"
+    CANCELLED = "cancelled"
+
+
+# The order lifecycle: the statuses each status may lead to. The status
+# column tracks kitchen and delivery progress only; the delivery assignment
+# lives in delivery_agent_id, so it can arrive at any point of preparation
+# without overwriting it. `assigned` is kept for orders stored before that
+# and only moves forward.
+TRANSITIONS: Dict[OrderStatus, Tuple[OrderStatus, ...]] = {
+    OrderStatus.PENDING: (OrderStatus.ACCEPTED, OrderStatus.REJECTED, OrderStatus.CANCELLED),
+    OrderStatus.ACCEPTED: (
+        OrderStatus.PREPARING, OrderStatus.READY_FOR_PICKUP, OrderStatus.PICKED_UP, OrderStatus.CANCELLED
+    ),
+    OrderStatus.PREPARING: (OrderStatus.READY_FOR_PICKUP, OrderStatus.PICKED_UP, OrderStatus.CANCELLED),
+    OrderStatus.READY_FOR_PICKUP: (OrderStatus.PICKED_UP, OrderStatus.CANCELLED),
+    OrderStatus.ASSIGNED: (OrderStatus.PICKED_UP, OrderStatus.CANCELLED),
+    OrderStatus.PICKED_UP: (OrderStatus.ON_THE_WAY, OrderStatus.DELIVERED),
+    OrderStatus.ON_THE_WAY: (OrderStatus.DELIVERED,),
+    OrderStatus.REJECTED: (),
+    OrderStatus.DELIVERED: (),
+    OrderStatus.CANCELLED: (),
+}
+
+# Statuses after which nothing more happens to an order
+FINAL_STATUSES: FrozenSet[OrderStatus] = frozenset(
+    status for status, targets in TRANSITIONS.items() if not targets
+)
+
+# Statuses each party may move an order into
+RESTAURANT_STATUSES: FrozenSet[OrderStatus] = frozenset({
+    OrderStatus.ACCEPTED, OrderStatus.REJECTED, OrderStatus.PREPARING,
+    OrderStatus.READY_FOR_PICKUP, OrderStatus.CANCELLED
+})
+DELIVERY_AGENT_STATUSES: FrozenSet[OrderStatus] = frozenset({
+    OrderStatus.PICKED_UP, OrderStatus.ON_THE_WAY, OrderStatus.DELIVERED, OrderStatus.CANCELLED
+})
+
+# Compact codes for the order_events timeline. Stored rows keep them
+# forever: never renumber, only add.
+STATUS_CODES: Dict[OrderStatus, int] = {
+    OrderStatus.PENDING: 1,
+    OrderStatus.ACCEPTED: 2,
+    OrderStatus.REJECTED: 3,
+    OrderStatus.PREPARING: 4,
+    OrderStatus.READY_FOR_PICKUP: 5,
+    OrderStatus.ASSIGNED: 6,
+    OrderStatus.PICKED_UP: 7,
+    OrderStatus.ON_THE_WAY: 8,
+    OrderStatus.DELIVERED: 9,
+    OrderStatus.CANCELLED: 10,
+}
+STATUSES_BY_CODE: Dict[int, OrderStatus] = {code: status for status, code in STATUS_CODES.items()}
+
+# Timestamps set when an order reaches a status
+STATUS_TIMESTAMPS: Dict[OrderStatus, str] = {
+    OrderStatus.ACCEPTED: 'accepted_at',
+    OrderStatus.DELIVERED: 'delivered_at',
+}
+
+
+def can_transition(current: str, target: str) -> bool:
+    try:
+        return OrderStatus(target) in TRANSITIONS[OrderStatus(current)]
+    except ValueError:
+        return False
+
+
+def previous_statuses(target: str) -> Tuple[str, ...]:
+    """Statuses an order may be in when it moves to `target`, as stored values"""
+    return tuple(
+        status.value for status, targets in TRANSITIONS.items() if target in targets
+    )
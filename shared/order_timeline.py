@@ -0,0 +1,144 @@
+from datetime import datetime, timedelta, timezone
+from typing import List, NamedTuple, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import exists, extract, func, select, true
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from shared.models import OrderEvent
+from shared.order_state import STATUS_CODES, OrderStatus
+
+# Stage timings from the order_events timeline.
+#
+# A stage runs from the first time an order reaches one status to the
+# first time it reaches a later one. Stats cover the orders that finished
+# the stage within [since, until), so the time window is applied to the
+# end event and served by the BRIN index on occurred_at; the start event
+# is found through the (order_id, occurred_at, status) primary key.
+
+STAGES = {
+    # The restaurant's reaction time
+    'acceptance': (OrderStatus.PENDING, OrderStatus.ACCEPTED),
+    'preparation': (OrderStatus.ACCEPTED, OrderStatus.READY_FOR_PICKUP),
+    # Food ready until the agent has it
+    'pickup': (OrderStatus.READY_FOR_PICKUP, OrderStatus.PICKED_UP),
+    'delivery': (OrderStatus.PICKED_UP, OrderStatus.DELIVERED),
+    'total': (OrderStatus.PENDING, OrderStatus.DELIVERED),
+}
+RESTAURANT_STAGES = ('acceptance', 'preparation', 'pickup', 'total')
+DELIVERY_AGENT_STAGES = ('pickup', 'delivery', 'total')
+
+OWNERS = {
+    'restaurant': lambda event: event.restaurant_id,
+    'agent': lambda event: event.delivery_agent_id,
+}
+
+
+def stage_window(
+    since: Optional[datetime], until: Optional[datetime], days: int = 7
+) -> Tuple[datetime, datetime]:
+    """[since, until) with the defaults filled in (the last `days` days); naive times are UTC"""
+    until = until or datetime.now(timezone.utc)
+    since = since or until - timedelta(days=days)
+    since, until = (t if t.tzinfo else t.replace(tzinfo=timezone.utc) for t in (since, until))
+    if since >= until:
+        raise ValueError("since must be before until")
+    return since, until
+
+
+class StageStats(NamedTuple):
+    stage: str
+    owner_id: UUID
+    orders: int
+    avg_seconds: float
+    p50_seconds: float
+    p90_seconds: float
+    max_seconds: float
+    # From the restaurant's estimated_prep_time at the start of the stage, where given
+    avg_estimated_seconds: Optional[float]
+
+
+def stage_stats_query(stage: str, by: str, since: datetime, until: datetime, owner_id: Optional[UUID] = None):
+    if stage not in STAGES:
+        raise ValueError(f"Unknown order stage {stage!r}")
+    if by not in OWNERS:
+        raise ValueError(f"Cannot group order stages by {by!r}")
+    start_code, end_code = (STATUS_CODES[status] for status in STAGES[stage])
+
+    ended = aliased(OrderEvent, name='ended')
+    earlier = aliased(OrderEvent, name='earlier')
+    started = aliased(OrderEvent, name='started')
+    owner = OWNERS[by](ended)
+
+    first_start = (
+        select(started.occurred_at, started.estimated_prep_time)
+        .where(started.order_id == ended.order_id, started.status == start_code)
+        .order_by(started.occurred_at)
+        .limit(1)
+        .lateral('first_start')
+    )
+    durations = (
+        select(
+            owner.label('owner_id'),
+            extract('epoch', ended.occurred_at - first_start.c.occurred_at).label('seconds'),
+            (first_start.c.estimated_prep_time * 60).label('estimated_seconds')
+        )
+        .select_from(ended)
+        .join(first_start, true())
+        .where(
+            ended.status == end_code,
+            ended.occurred_at >= since,
+            ended.occurred_at < until,
+            owner.is_not(None),
+            # Only the first time the order reached the end status
+            ~exists().where(
+                earlier.order_id == ended.order_id,
+                earlier.status == end_code,
+                earlier.occurred_at < ended.occurred_at
+            )
+        )
+    )
+    if owner_id is not None:
+        durations = durations.where(owner == owner_id)
+    durations = durations.subquery('durations')
+
+    seconds = durations.c.seconds
+    return (
+        select(
+            durations.c.owner_id,
+            func.count().label('orders'),
+            func.avg(seconds).label('avg_seconds'),
+            func.percentile_cont(0.5).within_group(seconds).label('p50_seconds'),
+            func.percentile_cont(0.9).within_group(seconds).label('p90_seconds'),
+            func.max(seconds).label('max_seconds'),
+            func.avg(durations.c.estimated_seconds).label('avg_estimated_seconds')
+        )
+        .group_by(durations.c.owner_id)
+        .order_by(durations.c.owner_id)
+    )
+
+
+async def stage_stats(
+    db: AsyncSession,
+    stage: str,
+    by: str,
+    since: datetime,
+    until: datetime,
+    owner_id: Optional[UUID] = None
+) -> List[StageStats]:
+    """Duration stats of one stage per restaurant or per agent (`by`), optionally for one of them"""
+    result = await db.execute(stage_stats_query(stage, by, since, until, owner_id))
+    return [
+        StageStats(
+            stage=stage,
+            owner_id=row.owner_id,
+            orders=row.orders,
+            avg_seconds=float(row.avg_seconds),
+            p50_seconds=float(row.p50_seconds),
+            p90_seconds=float(row.p90_seconds),
+            max_seconds=float(row.max_seconds),
+            avg_estimated_seconds=float(row.avg_estimated_seconds) if row.avg_estimated_seconds is not None else None
+        )
+        for row in result
+    ]
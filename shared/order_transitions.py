@@ -0,0 +1,146 @@
+from typing import Optional
+from uuid import UUID
+
+from sqlalchemy import SmallInteger, func, insert, literal, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from shared.metrics import metrics
+from shared.models import Order, OrderEvent
+from shared.models.order import status_in
+from shared.order_state import STATUS_CODES, STATUS_TIMESTAMPS, OrderStatus, previous_statuses
+
+# Order status changes as one conditional UPDATE.
+#
+# `transition()` checks that the order belongs to the caller, is in a
+# status that may lead to the new one (see shared.order_state) and, if
+# the caller says which version it saw, is still at that version, all in
+# the UPDATE's WHERE clause. It gets the updated row back with RETURNING,
+# and the same statement appends the change to the order_events timeline:
+# one round trip instead of SELECT, UPDATE and SELECT again, and no window
+# between the check and the write. Of two conflicting writers the second
+# matches nothing once the first commits and fails at once, without
+# either holding a lock across requests. Only when nothing matched is the
+# order read again, to tell "not yours" from "not now".
+
+transitions_total = metrics.counter("order_transitions_total", "Order status changes by new status")
+transition_conflicts = metrics.counter(
+    "order_transition_conflicts_total",
+    "Order status changes refused, by new status and reason (status, version)"
+)
+
+
+class InvalidTransitionError(ValueError):
+    """The order cannot move to the requested status, or there is no such status"""
+
+    def __init__(self, order_id: UUID, current: Optional[str], target: str):
+        if current is None:
+            super().__init__(f"Unknown order status {target!r}")
+        else:
+            super().__init__(f"Order {order_id} cannot change from {current!r} to {target!r}")
+        self.order_id = order_id
+        self.current = current
+        self.target = target
+
+
+class StaleOrderError(InvalidTransitionError):
+    """The order changed since the version the caller saw"""
+
+    def __init__(self, order_id: UUID, current: str, target: str, version: int, expected_version: int):
+        ValueError.__init__(
+            self, f"Order {order_id} is at version {version}, not {expected_version}; reload it and retry"
+        )
+        self.order_id = order_id
+        self.current = current
+        self.target = target
+        self.version = version
+        self.expected_version = expected_version
+
+
+def _owned(stmt, restaurant_id: Optional[UUID], delivery_agent_id: Optional[UUID]):
+    if restaurant_id is not None:
+        stmt = stmt.where(Order.restaurant_id == restaurant_id)
+    if delivery_agent_id is not None:
+        stmt = stmt.where(Order.delivery_agent_id == delivery_agent_id)
+    return stmt
+
+
+def transition_statement(
+    order_id: UUID,
+    status: str,
+    restaurant_id: Optional[UUID] = None,
+    delivery_agent_id: Optional[UUID] = None,
+    expected_version: Optional[int] = None,
+    estimated_prep_time: Optional[int] = None
+):
+    """UPDATE ... RETURNING moving one order to `status`, if allowed and owned, and logging it"""
+    previous = previous_statuses(status)
+    if not previous:
+        raise InvalidTransitionError(order_id, None, status)
+
+    values = {'status': status, 'version': Order.version + 1, 'updated_at': func.now()}
+    timestamp = STATUS_TIMESTAMPS.get(OrderStatus(status))
+    if timestamp is not None:
+        values[timestamp] = func.now()
+
+    stmt = update(Order).where(Order.id == order_id, status_in(previous))
+    if expected_version is not None:
+        stmt = stmt.where(Order.version == expected_version)
+    moved = (
+        _owned(stmt, restaurant_id, delivery_agent_id)
+        .values(**values)
+        .returning(*Order.__table__.c)
+        .cte('moved')
+    )
+
+    # The timeline row is written by the same statement, only if the order moved
+    logged = insert(OrderEvent).from_select(
+        ['order_id', 'occurred_at', 'status', 'restaurant_id', 'delivery_agent_id', 'estimated_prep_time'],
+        select(
+            moved.c.id, moved.c.updated_at, literal(STATUS_CODES[OrderStatus(status)], SmallInteger),
+            moved.c.restaurant_id, moved.c.delivery_agent_id, literal(estimated_prep_time, SmallInteger)
+        )
+    ).cte('logged')
+
+    return (
+        select(Order)
+        .from_statement(select(moved).add_cte(logged))
+        .execution_options(populate_existing=True)
+    )
+
+
+async def transition(
+    db: AsyncSession,
+    order_id: UUID,
+    status: str,
+    restaurant_id: Optional[UUID] = None,
+    delivery_agent_id: Optional[UUID] = None,
+    expected_version: Optional[int] = None,
+    estimated_prep_time: Optional[int] = None
+) -> Optional[Order]:
+    """Move an order to `status` in the caller's transaction.
+
+    Pass `restaurant_id` or `delivery_agent_id` to require that the order
+    belongs to them, and `expected_version` to require that nobody changed
+    it since. The change is appended to the order's timeline (OrderEvent)
+    with `estimated_prep_time`, if given. Returns the updated order, or
+    None when there is no such order for that owner; raises
+    StaleOrderError when the version moved on and InvalidTransitionError
+    when the current status does not allow the change.
+    """
+    stmt = transition_statement(
+        order_id, status, restaurant_id, delivery_agent_id, expected_version, estimated_prep_time
+    )
+    order = (await db.execute(stmt)).scalar_one_or_none()
+    if order is not None:
+        transitions_total.inc(status=status)
+        return order
+
+    owned = _owned(select(Order.status, Order.version).where(Order.id == order_id), restaurant_id, delivery_agent_id)
+    current = (await db.execute(owned)).one_or_none()
+    if current is None:
+        return None
+    if expected_version is not None and current.version != expected_version:
+        transition_conflicts.inc(status=status, reason="version")
+        raise StaleOrderError(order_id, current.status, status, current.version, expected_version)
+    transition_conflicts.inc(status=status, reason="status")
+    raise InvalidTransitionError(order_id, current.status, status)
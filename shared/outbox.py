@@ -0,0 +1,238 @@
+from datetime import datetime, timedelta, timezone
+from typing import Callable, List, NamedTuple, Optional, Tuple
+from uuid import UUID
+import asyncio
+import logging
+import random
+
+import httpx
+from sqlalchemy import delete, exists, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from shared.config import settings
+from shared.database import AsyncSessionLocal
+from shared.metrics import metrics
+from shared.models.outbox import OutboxMessage
+
+# Transactional outbox for service-to-service notifications.
+#
+# A service that needs to tell another one about a change calls `enqueue()`
+# in the transaction that makes the change, so the notification exists if
+# and only if the change committed. `OutboxDispatcher` runs in the
+# background of each writing service and delivers pending messages in
+# batches, retrying failures with exponential backoff. Messages sharing an
+# aggregate_id (an order) are delivered one at a time, in the order they
+# were written.
+
+logger = logging.getLogger(__name__)
+
+DESTINATIONS = {
+    "user": lambda: settings.user_service_url,
+    "restaurant": lambda: settings.restaurant_service_url,
+    "delivery": lambda: settings.delivery_service_url,
+}
+
+# Client errors that may succeed on a later attempt; any other 4xx will not
+RETRYABLE_STATUS_CODES = {408, 425, 429}
+
+deliveries = metrics.counter(
+    "outbox_deliveries_total", "Outbox delivery attempts by destination and outcome"
+)
+delivery_lag_seconds = metrics.histogram(
+    "outbox_delivery_lag_seconds", "Time from enqueueing a message to delivering it",
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+)
+
+
+async def enqueue(
+    db: AsyncSession,
+    destination: str,
+    path: str,
+    payload: dict,
+    aggregate_id: UUID
+) -> None:
+    """Queue a POST of `payload` to `path` on another service.
+
+    Runs in the caller's transaction: nothing is sent unless it commits.
+    """
+    if destination not in DESTINATIONS:
+        raise ValueError(f"Unknown outbox destination {destination!r}")
+    await db.execute(
+        insert(OutboxMessage).values(
+            aggregate_id=aggregate_id,
+            destination=destination,
+            path=path,
+            payload=payload
+        )
+    )
+
+
+async def enqueue_many(db: AsyncSession, destination: str, messages: List[Tuple[str, dict, UUID]]) -> None:
+    """`enqueue()` for several (path, payload, aggregate_id) messages in one statement"""
+    if destination not in DESTINATIONS:
+        raise ValueError(f"Unknown outbox destination {destination!r}")
+    if not messages:
+        return
+    await db.execute(
+        insert(OutboxMessage),
+        [
+            {'aggregate_id': aggregate_id, 'destination': destination, 'path': path, 'payload': payload}
+            for path, payload, aggregate_id in messages
+        ]
+    )
+
+
+def backoff_delay(attempts: int, jitter: Callable[[], float] = random.random) -> float:
+    """Seconds to wait before retrying a message that has failed `attempts` times"""
+    delay = min(settings.outbox_backoff_max, settings.outbox_backoff_base * 2 ** (attempts - 1))
+    # Spread retries between half and the full delay so failures don't retry in lockstep
+    return delay * (0.5 + jitter() / 2)
+
+
+class DeliveryFailure(NamedTuple):
+    error: str
+    retryable: bool
+
+
+class OutboxDispatcher:
+    """Background task draining the outbox table"""
+
+    def __init__(
+        self,
+        batch_size: int = settings.outbox_batch_size,
+        poll_interval: float = settings.outbox_poll_interval,
+        max_attempts: int = settings.outbox_max_attempts,
+        request_timeout: float = settings.outbox_request_timeout
+    ):
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.request_timeout = request_timeout
+        self._client: Optional[httpx.AsyncClient] = None
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def wake(self) -> None:
+        """Dispatch now rather than at the next poll, e.g. right after a commit"""
+        self._wakeup.set()
+
+    def _claim_query(self):
+        earlier = aliased(OutboxMessage)
+        # Only the oldest pending message of each aggregate is eligible, so a
+        # message waiting out its backoff holds back the ones behind it.
+        # SKIP LOCKED lets several dispatchers share the table.
+        return (
+            select(OutboxMessage)
+            .where(
+                OutboxMessage.dead_at.is_(None),
+                OutboxMessage.available_at <= func.now(),
+                ~exists().where(
+                    earlier.aggregate_id == OutboxMessage.aggregate_id,
+                    earlier.id < OutboxMessage.id,
+                    earlier.dead_at.is_(None)
+                )
+            )
+            .order_by(OutboxMessage.id)
+            .limit(self.batch_size)
+            .with_for_update(skip_locked=True)
+        )
+
+    async def _deliver(self, message: OutboxMessage) -> Optional[DeliveryFailure]:
+        """POST one message; None on success"""
+        base_url = DESTINATIONS.get(message.destination)
+        if base_url is None:
+            return DeliveryFailure(f"unknown destination {message.destination!r}", retryable=False)
+
+        try:
+            response = await self._client.post(
+                f"{base_url()}{message.path}", json=message.payload, timeout=self.request_timeout
+            )
+        except httpx.HTTPError as e:
+            return DeliveryFailure(f"{type(e).__name__}: {e}", retryable=True)
+
+        if response.is_success:
+            return None
+        retryable = response.status_code >= 500 or response.status_code in RETRYABLE_STATUS_CODES
+        return DeliveryFailure(f"HTTP {response.status_code}: {response.text[:500]}", retryable)
+
+    def _record_failure(self, message: OutboxMessage, failure: DeliveryFailure, now: datetime) -> None:
+        message.attempts += 1
+        message.last_error = failure.error
+
+        if not failure.retryable or message.attempts >= self.max_attempts:
+            message.dead_at = now
+            deliveries.inc(destination=message.destination, outcome="dead")
+            logger.error(
+                f"Giving up on outbox message {message.id} to {message.destination}{message.path} "
+                f"after {message.attempts} attempts: {failure.error}"
+            )
+        else:
+            message.available_at = now + timedelta(seconds=backoff_delay(message.attempts))
+            deliveries.inc(destination=message.destination, outcome="retry")
+            logger.warning(
+                f"Outbox message {message.id} to {message.destination}{message.path} failed "
+                f"(attempt {message.attempts}), retrying: {failure.error}"
+            )
+
+    async def dispatch_once(self) -> int:
+        """Deliver one batch of pending messages; returns how many were claimed"""
+        async with AsyncSessionLocal() as db:
+            messages: List[OutboxMessage] = (await db.execute(self._claim_query())).scalars().all()
+            if not messages:
+                return 0
+
+            failures = await asyncio.gather(*(self._deliver(message) for message in messages))
+            now = datetime.now(timezone.utc)
+
+            delivered = []
+            for message, failure in zip(messages, failures):
+                if failure is None:
+                    delivered.append(message.id)
+                    deliveries.inc(destination=message.destination, outcome="delivered")
+                    delivery_lag_seconds.observe((now - message.created_at).total_seconds())
+                else:
+                    self._record_failure(message, failure, now)
+
+            if delivered:
+                await db.execute(delete(OutboxMessage).where(OutboxMessage.id.in_(delivered)))
+            await db.commit()
+            return len(messages)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                claimed = await self.dispatch_once()
+            except Exception as e:
+                logger.error(f"Error dispatching outbox messages: {e}")
+                claimed = 0
+
+            if claimed >= self.batch_size:
+                # Probably more waiting
+                continue
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    async def start(self) -> None:
+        if self._task is not None:
+            return
+        self._client = httpx.AsyncClient()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+outbox_dispatcher = OutboxDispatcher()
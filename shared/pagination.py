@@ -0,0 +1,95 @@
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, Generic, List, Optional, Tuple, TypeVar
+from uuid import UUID
+import base64
+
+from sqlalchemy import Select, func, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# Keyset (cursor) pagination over (created_at, id), newest first.
+#
+# A cursor is the opaque, URL-safe encoding of the last row's sort key, and
+# the next page is `WHERE (created_at, id) < (:created_at, :id)`, which an
+# index on (..., created_at, id) answers in O(page size) however deep the
+# client pages, unlike OFFSET.
+
+T = TypeVar("T")
+U = TypeVar("U")
+
+MAX_PAGE_SIZE = 100
+
+
+class InvalidCursorError(ValueError):
+    pass
+
+
+def encode_cursor(created_at: datetime, row_id: UUID) -> str:
+    raw = f"{created_at.isoformat()}|{row_id}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, UUID]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = base64.urlsafe_b64decode(padded).decode("utf-8").split("|")
+        return datetime.fromisoformat(created_at), UUID(row_id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise InvalidCursorError(f"Invalid cursor: {cursor}") from e
+
+
+@dataclass
+class Page(Generic[T]):
+    items: List[T] = field(default_factory=list)
+    cursors: List[str] = field(default_factory=list)
+    has_next_page: bool = False
+
+    @property
+    def end_cursor(self) -> Optional[str]:
+        return self.cursors[-1] if self.cursors else None
+
+    def map(self, convert: Callable[[T], U]) -> "Page[U]":
+        return Page([convert(item) for item in self.items], self.cursors, self.has_next_page)
+
+
+def page_size(limit: Optional[int], default: int = 50) -> int:
+    if limit is None:
+        return default
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+
+def keyset_query(stmt: Select, model, limit: int, after: Optional[str] = None) -> Select:
+    """Restrict `stmt` to the `limit` rows after the `after` cursor, newest first"""
+    if after:
+        created_at, row_id = decode_cursor(after)
+        stmt = stmt.where(tuple_(model.created_at, model.id) < tuple_(created_at, row_id))
+    return stmt.order_by(model.created_at.desc(), model.id.desc()).limit(limit)
+
+
+async def keyset_paginate(
+    db: AsyncSession,
+    stmt: Select,
+    model,
+    limit: int,
+    after: Optional[str] = None
+) -> Page:
+    """Run `stmt` (a select of `model`) for one page after the `after` cursor"""
+    # One extra row tells us whether there is a next page
+    result = await db.execute(keyset_query(stmt, model, limit + 1, after))
+    rows = list(result.scalars().all())
+
+    has_next_page = len(rows) > limit
+    rows = rows[:limit]
+    return Page(
+        items=rows,
+        cursors=[encode_cursor(row.created_at, row.id) for row in rows],
+        has_next_page=has_next_page
+    )
+
+
+async def count_rows(db: AsyncSession, stmt: Select) -> int:
+    """COUNT(*) over the rows a select would return, ignoring its ordering"""
+    result = await db.execute(
+        select(func.count()).select_from(stmt.order_by(None).subquery())
+    )
+    return result.scalar_one()
@@ -0,0 +1,151 @@
+from collections import deque
+from typing import Any, Deque, Dict, Hashable, List, NamedTuple, Optional, Set
+import asyncio
+
+from shared.config import settings
+from shared.metrics import metrics
+
+# In-process pub/sub with one channel per key (an order, a restaurant).
+#
+# Built for many long-lived, mostly idle subscribers, such as streaming
+# HTTP connections: a subscriber is a small bounded deque plus a future
+# that exists only while it waits, and publishing to a key touches only
+# that key's subscribers. A subscriber that falls `buffer_size` messages
+# behind loses the oldest. Messages published with `coalesce=True` (e.g.
+# positions) replace an earlier undelivered message of the same kind
+# instead of queueing behind it.
+
+hub_subscribers = metrics.gauge("pubsub_subscribers", "Open pub/sub subscriptions by hub")
+hub_published = metrics.counter("pubsub_messages_published_total", "Messages published by hub")
+hub_dropped = metrics.counter(
+    "pubsub_messages_dropped_total", "Messages dropped because a subscriber fell behind, by hub"
+)
+
+
+class Message(NamedTuple):
+    kind: str
+    data: Any
+    coalesce: bool = False
+
+
+class Subscriber:
+    """One consumer of a channel; read with `await get()` or `async for`.
+
+    `dropped` counts messages lost to overflow, for consumers that must
+    resynchronize when they miss one.
+    """
+
+    __slots__ = ("key", "dropped", "_hub", "_messages", "_waiter", "_closed")
+
+    def __init__(self, hub: "Hub", key: Hashable, buffer_size: int):
+        self.key = key
+        self.dropped = 0
+        self._hub = hub
+        self._messages: Deque[Message] = deque(maxlen=buffer_size)
+        self._waiter: Optional[asyncio.Future] = None
+        self._closed = False
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def _put(self, message: Message) -> None:
+        if message.coalesce:
+            for index, pending in enumerate(self._messages):
+                if pending.kind == message.kind:
+                    del self._messages[index]
+                    break
+        if len(self._messages) == self._messages.maxlen:
+            self.dropped += 1
+            hub_dropped.inc(hub=self._hub.name)
+        self._messages.append(message)
+        self._wake()
+
+    def _wake(self) -> None:
+        if self._waiter is not None and not self._waiter.done():
+            self._waiter.set_result(None)
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[Message]:
+        """Next message; None after `timeout` seconds without one or once closed"""
+        if not self._messages and not self._closed:
+            self._waiter = asyncio.get_running_loop().create_future()
+            try:
+                await asyncio.wait_for(self._waiter, timeout)
+            except asyncio.TimeoutError:
+                return None
+            finally:
+                self._waiter = None
+        return self._messages.popleft() if self._messages else None
+
+    def __aiter__(self) -> "Subscriber":
+        return self
+
+    async def __anext__(self) -> Message:
+        message = await self.get()
+        if message is None:
+            raise StopAsyncIteration
+        return message
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        self._hub._unsubscribe(self)
+        self._wake()
+
+    async def __aenter__(self) -> "Subscriber":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        self.close()
+
+
+class Hub:
+    """Channels of subscribers keyed by what they follow"""
+
+    def __init__(self, name: str, buffer_size: int = settings.pubsub_buffer_size):
+        self.name = name
+        self.buffer_size = buffer_size
+        self._channels: Dict[Hashable, Set[Subscriber]] = {}
+        self._count = 0
+
+    def subscribe(self, key: Hashable) -> Subscriber:
+        subscriber = Subscriber(self, key, self.buffer_size)
+        self._channels.setdefault(key, set()).add(subscriber)
+        self._count += 1
+        hub_subscribers.set(self._count, hub=self.name)
+        return subscriber
+
+    def _unsubscribe(self, subscriber: Subscriber) -> None:
+        channel = self._channels.get(subscriber.key)
+        if channel is None or subscriber not in channel:
+            return
+        channel.discard(subscriber)
+        if not channel:
+            del self._channels[subscriber.key]
+        self._count -= 1
+        hub_subscribers.set(self._count, hub=self.name)
+
+    def has_subscribers(self, key: Hashable) -> bool:
+        return key in self._channels
+
+    def keys(self) -> List[Hashable]:
+        """Keys that currently have subscribers"""
+        return list(self._channels)
+
+    def publish(self, key: Hashable, kind: str, data: Any, coalesce: bool = False) -> int:
+        """Hand a message to every subscriber of `key`; returns how many there were"""
+        channel = self._channels.get(key)
+        if not channel:
+            return 0
+        message = Message(kind, data, coalesce)
+        for subscriber in channel:
+            subscriber._put(message)
+        hub_published.inc(hub=self.name)
+        return len(channel)
+
+    def close(self) -> None:
+        """End every subscription, e.g. on shutdown"""
+        for channel in list(self._channels.values()):
+            for subscriber in list(channel):
+                subscriber.close()
@@ -0,0 +1,144 @@
+from datetime import datetime, timezone
+from typing import List, NamedTuple, Sequence, Tuple
+import struct
+
+import numpy as np
+
+# Compact encoding of delivery route trails.
+#
+# A trail is stored as a bytea of one or more chunks, so new pings can be
+# appended with `points || chunk` without reading what is already there.
+# Each chunk is little-endian:
+#
+#   uint32 count
+#   int32 latitude, int32 longitude (microdegrees), int64 time (epoch ms)
+#   int32[count - 1] latitude deltas
+#   int32[count - 1] longitude deltas
+#   int32[count - 1] time deltas (ms)
+#
+# i.e. 12 bytes per point after the first. Chunks written by different
+# instances may interleave, so decoding sorts points by time.
+
+MICRODEGREES = 1_000_000
+
+_HEADER = struct.Struct("<Iiiq")
+_INT32_MAX = np.iinfo(np.int32).max
+
+# Metres per degree of latitude, and of longitude at the equator
+_METRES_PER_DEGREE = 111_320.0
+
+
+class TrailPoint(NamedTuple):
+    latitude: float
+    longitude: float
+    recorded_at: datetime
+
+
+class InvalidTrailError(ValueError):
+    pass
+
+
+def _to_arrays(points: Sequence[TrailPoint]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    latitudes = np.round(np.array([p.latitude for p in points], dtype=float) * MICRODEGREES).astype(np.int32)
+    longitudes = np.round(np.array([p.longitude for p in points], dtype=float) * MICRODEGREES).astype(np.int32)
+    times = np.array([round(p.recorded_at.timestamp() * 1000) for p in points], dtype=np.int64)
+    return latitudes, longitudes, times
+
+
+def _from_arrays(latitudes: np.ndarray, longitudes: np.ndarray, times: np.ndarray) -> List[TrailPoint]:
+    return [
+        TrailPoint(lat / MICRODEGREES, lon / MICRODEGREES, datetime.fromtimestamp(t / 1000, tz=timezone.utc))
+        for lat, lon, t in zip(latitudes.tolist(), longitudes.tolist(), times.tolist())
+    ]
+
+
+def _encode_chunk(latitudes: np.ndarray, longitudes: np.ndarray, times: np.ndarray) -> bytes:
+    header = _HEADER.pack(len(latitudes), int(latitudes[0]), int(longitudes[0]), int(times[0]))
+    deltas = [np.diff(values).astype("<i4").tobytes() for values in (latitudes, longitudes, times)]
+    return header + b"".join(deltas)
+
+
+def encode(points: Sequence[TrailPoint]) -> bytes:
+    """Points as trail chunks, in the order given"""
+    if not points:
+        return b""
+    latitudes, longitudes, times = _to_arrays(points)
+
+    # A time gap too long for an int32 delta (~24 days) starts a new chunk
+    splits = (np.flatnonzero(np.abs(np.diff(times)) > _INT32_MAX) + 1).tolist()
+    bounds = [0] + splits + [len(points)]
+    return b"".join(
+        _encode_chunk(latitudes[start:end], longitudes[start:end], times[start:end])
+        for start, end in zip(bounds, bounds[1:])
+    )
+
+
+def decode(data: bytes) -> List[TrailPoint]:
+    """All points of a trail, oldest first"""
+    latitudes, longitudes, times = [], [], []
+    offset = 0
+    while offset < len(data):
+        if len(data) - offset < _HEADER.size:
+            raise InvalidTrailError("truncated trail chunk header")
+        count, latitude, longitude, time = _HEADER.unpack_from(data, offset)
+        offset += _HEADER.size
+
+        size = 4 * (count - 1)
+        if count == 0 or len(data) - offset < 3 * size:
+            raise InvalidTrailError("truncated trail chunk")
+        for values, start, delta_offset in (
+            (latitudes, latitude, offset), (longitudes, longitude, offset + size), (times, time, offset + 2 * size)
+        ):
+            deltas = np.frombuffer(data, dtype="<i4", count=count - 1, offset=delta_offset).astype(np.int64)
+            values.append(start + np.concatenate(([0], np.cumsum(deltas))))
+        offset += 3 * size
+
+    if not times:
+        return []
+    latitudes, longitudes, times = (np.concatenate(values) for values in (latitudes, longitudes, times))
+    order = np.argsort(times, kind="stable")
+    return _from_arrays(latitudes[order], longitudes[order], times[order])
+
+
+def simplify(points: Sequence[TrailPoint], tolerance_m: float) -> List[TrailPoint]:
+    """Douglas-Peucker: the fewest points keeping the path within `tolerance_m` metres.
+
+    Distances are measured on a local equirectangular projection, which is
+    accurate to well under a metre at city scale. The first and last points
+    are always kept.
+    """
+    if len(points) <= 2 or tolerance_m <= 0:
+        return list(points)
+
+    latitudes = np.array([p.latitude for p in points])
+    longitudes = np.array([p.longitude for p in points])
+    y = latitudes * _METRES_PER_DEGREE
+    x = longitudes * _METRES_PER_DEGREE * np.cos(np.radians(latitudes.mean()))
+
+    keep = np.zeros(len(points), dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(points) - 1)]
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+
+        # Distance of each inner point to the segment first-last
+        ax, ay = x[first], y[first]
+        dx, dy = x[last] - ax, y[last] - ay
+        px, py = x[first + 1:last] - ax, y[first + 1:last] - ay
+        length_sq = dx * dx + dy * dy
+        if length_sq == 0:
+            distances = np.hypot(px, py)
+        else:
+            t = np.clip((px * dx + py * dy) / length_sq, 0, 1)
+            distances = np.hypot(px - t * dx, py - t * dy)
+
+        farthest = int(np.argmax(distances))
+        if distances[farthest] > tolerance_m:
+            split = first + 1 + farthest
+            keep[split] = True
+            stack.append((first, split))
+            stack.append((split, last))
+
+    return [point for point, kept in zip(points, keep) if kept]
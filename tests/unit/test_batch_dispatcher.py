@@ -0,0 +1,99 @@
+from itertools import permutations
+from uuid import uuid4
+
+import numpy as np
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from shared.geo import coordinates
+from shared.models import Order
+from restaurant_service.services.batch_dispatcher import (
+    FORBIDDEN, BatchDispatcher, cost_matrix, solve_assignment
+)
+from restaurant_service.services.dispatch_engine import Candidate, rank_candidates, score_candidate
+
+TIMES_SQUARE = {"latitude": 40.7580, "longitude": -73.9855}
+EMPIRE_STATE = {"latitude": 40.7484, "longitude": -73.9857}
+UNION_SQUARE = {"latitude": 40.7359, "longitude": -73.9911}
+NEWARK = {"latitude": 40.7357, "longitude": -74.1724}
+
+
+def candidate(location, vehicle_type="car", active_orders=0):
+    return Candidate(agent_id=uuid4(), location=location, vehicle_type=vehicle_type, active_orders=active_orders)
+
+
+def brute_force(cost):
+    rows, columns = cost.shape
+    if rows <= columns:
+        return min(sum(cost[i, j] for i, j in enumerate(p)) for p in permutations(range(columns), rows))
+    return min(sum(cost[i, j] for j, i in enumerate(p)) for p in permutations(range(rows), columns))
+
+
+@pytest.mark.parametrize("shape", [(1, 1), (3, 3), (4, 6), (6, 4), (5, 5)])
+def test_assignment_is_optimal(shape):
+    rng = np.random.default_rng(sum(shape))
+    for _ in range(20):
+        cost = rng.integers(0, 50, size=shape).astype(float)
+
+        pairs = solve_assignment(cost)
+
+        assert len(pairs) == min(shape)
+        assert len({i for i, _ in pairs}) == len({j for _, j in pairs}) == len(pairs)
+        assert sum(cost[i, j] for i, j in pairs) == pytest.approx(brute_force(cost))
+
+
+def test_assignment_of_nothing():
+    assert solve_assignment(np.zeros((0, 3))) == []
+
+
+def test_cost_matrix_matches_score_candidate():
+    pickups = [TIMES_SQUARE, UNION_SQUARE, {"street": "no coordinates"}]
+    candidates = [
+        candidate(EMPIRE_STATE, "bicycle"),
+        candidate(UNION_SQUARE, "motorcycle", active_orders=2),
+        candidate(None),
+        candidate(NEWARK)
+    ]
+
+    cost = cost_matrix(pickups, candidates)
+
+    for i, pickup in enumerate(pickups):
+        for j, c in enumerate(candidates):
+            scored = score_candidate(c, coordinates(pickup))
+            if scored is None:
+                assert cost[i, j] == FORBIDDEN
+            else:
+                assert cost[i, j] == pytest.approx(scored.minutes)
+
+
+def test_batch_leaves_each_order_an_agent_greedy_would_take():
+    # The first order's best agent is the only one near the second order;
+    # greedy sends it, batch sends the other one
+    pickups = [EMPIRE_STATE, UNION_SQUARE]
+    near_both = candidate({"latitude": 40.7420, "longitude": -73.9880})
+    near_first = candidate(TIMES_SQUARE)
+    candidates = [near_both, near_first]
+
+    cost = cost_matrix(pickups, candidates)
+    pairs = solve_assignment(cost)
+
+    assert rank_candidates(candidates, coordinates(EMPIRE_STATE))[0].agent_id == near_both.agent_id
+    assert pairs == [(0, 1), (1, 0)]
+    greedy_total = cost[0, 0] + cost[1, 1]
+    assert sum(cost[i, j] for i, j in pairs) < greedy_total
+
+
+def test_orders_moved_on_by_the_kitchen_still_wait_for_an_agent():
+    # No agent was free when the order was accepted; the kitchen has since
+    # started preparing it, and the next round must still pick it up
+    query = BatchDispatcher()._waiting_orders_query()
+    sql = str(query.compile(dialect=postgresql.dialect()))
+    index = next(index for index in Order.__table__.indexes if index.name == 'ix_orders_awaiting_agent')
+    predicate = str(index.dialect_options['postgresql']['where'])
+
+    for status in ('accepted', 'preparing', 'ready_for_pickup'):
+        assert f"'{status}'" in sql
+        assert f"'{status}'" in predicate
+    assert "orders.orders.delivery_agent_id IS NULL" in sql
+    assert predicate.endswith("AND delivery_agent_id IS NULL")
+    assert sql.endswith("FOR UPDATE OF orders SKIP LOCKED")
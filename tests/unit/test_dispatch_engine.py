@@ -0,0 +1,64 @@
+from uuid import uuid4
+
+import pytest
+
+from shared.config import settings
+from shared.geo import coordinates, haversine_km
+from restaurant_service.services.dispatch_engine import Candidate, rank_candidates, score_candidate
+
+TIMES_SQUARE = (40.7580, -73.9855)
+EMPIRE_STATE = {"latitude": 40.7484, "longitude": -73.9857}
+BROOKLYN = {"latitude": 40.6782, "longitude": -73.9442}
+NEWARK = {"latitude": 40.7357, "longitude": -74.1724}
+
+
+def candidate(location, vehicle_type="car", active_orders=0):
+    return Candidate(agent_id=uuid4(), location=location, vehicle_type=vehicle_type, active_orders=active_orders)
+
+
+def test_coordinates_accept_both_key_styles():
+    assert coordinates({"lat": "40.7", "lng": -74.0, "street": "1 Main St"}) == (40.7, -74.0)
+    assert coordinates(EMPIRE_STATE) == (40.7484, -73.9857)
+    assert coordinates({"street": "123 Pizza St"}) is None
+    assert coordinates({"latitude": 123, "longitude": 0}) is None
+    assert coordinates(None) is None
+
+
+def test_haversine_distance():
+    assert haversine_km(TIMES_SQUARE, TIMES_SQUARE) == 0
+    assert haversine_km(TIMES_SQUARE, coordinates(EMPIRE_STATE)) == pytest.approx(1.07, abs=0.02)
+
+
+def test_nearest_agent_ranks_first():
+    near, far = candidate(EMPIRE_STATE), candidate(BROOKLYN)
+
+    ranked = rank_candidates([far, near], TIMES_SQUARE)
+
+    assert [s.agent_id for s in ranked] == [near.agent_id, far.agent_id]
+    assert ranked[0].distance_km == pytest.approx(1.07, abs=0.02)
+
+
+def test_vehicle_speed_and_load_count():
+    bicycle, motorcycle = candidate(BROOKLYN, "bicycle"), candidate(BROOKLYN, "motorcycle")
+    busy = candidate(EMPIRE_STATE, active_orders=2)
+    idle = candidate(EMPIRE_STATE)
+
+    assert score_candidate(motorcycle, TIMES_SQUARE).minutes < score_candidate(bicycle, TIMES_SQUARE).minutes
+    assert score_candidate(busy, TIMES_SQUARE).minutes == pytest.approx(
+        score_candidate(idle, TIMES_SQUARE).minutes + 2 * settings.dispatch_minutes_per_active_order
+    )
+
+
+def test_unknown_positions_fall_back_to_a_flat_estimate():
+    unknown = candidate(None)
+    nearby = candidate(EMPIRE_STATE)
+
+    assert score_candidate(unknown, TIMES_SQUARE).minutes == settings.dispatch_unknown_distance_minutes
+    assert score_candidate(nearby, None).distance_km is None
+    assert rank_candidates([unknown, nearby], TIMES_SQUARE)[0].agent_id == nearby.agent_id
+
+
+def test_agents_out_of_range_are_skipped():
+    assert haversine_km(TIMES_SQUARE, coordinates(NEWARK)) > 10
+    assert score_candidate(candidate(NEWARK), TIMES_SQUARE) is None
+    assert rank_candidates([candidate(NEWARK)], TIMES_SQUARE) == []
@@ -0,0 +1,83 @@
+import asyncio
+from uuid import uuid4
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from shared.events import (
+    EventBus, MenuChanged, OrderPlaced, OrderStatusChanged, decode_event, publish
+)
+
+
+def notify(bus, event):
+    bus._on_notification(None, 1, event.topic, event.model_dump_json())
+
+
+def test_events_round_trip_through_the_payload():
+    event = OrderPlaced(order_id=uuid4(), user_id=uuid4(), restaurant_id=uuid4())
+
+    assert decode_event("order.placed", event.model_dump_json()) == event
+    with pytest.raises(ValueError):
+        decode_event("order.teleported", "{}")
+
+
+def test_publish_notifies_in_the_callers_transaction():
+    statements = []
+
+    class FakeSession:
+        async def execute(self, stmt):
+            statements.append(stmt)
+
+    event = MenuChanged(restaurant_id=uuid4(), reason="menu_item_created")
+    asyncio.run(publish(FakeSession(), event))
+
+    compiled = statements[0].compile(dialect=postgresql.dialect())
+    assert "pg_notify" in str(compiled)
+    assert list(compiled.params.values()) == ["menu.changed", event.model_dump_json()]
+
+
+def test_subscribers_get_their_topics_in_batches():
+    async def scenario():
+        bus = EventBus(dsn="postgresql://unused")
+        orders = bus.subscribe("order.status_changed", max_batch=2)
+        menus = bus.subscribe("menu.changed")
+
+        order_id = uuid4()
+        for status in ("accepted", "preparing", "ready_for_pickup"):
+            notify(bus, OrderStatusChanged(order_id=order_id, status=status))
+        notify(bus, MenuChanged(restaurant_id=uuid4(), reason="menu_item_updated"))
+
+        first = await orders.__anext__()
+        second = await orders.__anext__()
+        menu_batch = await menus.__anext__()
+        return first, second, menu_batch
+
+    first, second, menu_batch = asyncio.run(scenario())
+
+    assert [event.status for event in first] == ["accepted", "preparing"]
+    assert [event.status for event in second] == ["ready_for_pickup"]
+    assert [event.topic for event in menu_batch] == ["menu.changed"]
+
+
+def test_slow_subscribers_lose_the_oldest_events():
+    async def scenario():
+        bus = EventBus(dsn="postgresql://unused")
+        subscription = bus.subscribe("order.status_changed", queue_size=2)
+        for status in ("accepted", "preparing", "ready_for_pickup"):
+            notify(bus, OrderStatusChanged(order_id=uuid4(), status=status))
+        batch = await subscription.__anext__()
+
+        subscription.close()
+        remaining = [batch async for batch in subscription]
+        return batch, remaining, bus._subscriptions
+
+    batch, remaining, subscriptions = asyncio.run(scenario())
+
+    assert [event.status for event in batch] == ["preparing", "ready_for_pickup"]
+    assert remaining == []
+    assert not subscriptions
+
+
+def test_unknown_topics_are_rejected():
+    with pytest.raises(ValueError):
+        EventBus(dsn="postgresql://unused").subscribe("order.teleported")
@@ -0,0 +1,153 @@
+import asyncio
+from typing import List
+
+import pytest
+import strawberry
+from graphql import ExecutionResult, GraphQLError, parse
+
+from graphql_gateway import cache as module
+from graphql_gateway.cache import CachePolicy, ResponseCache, cache_key, cache_policy
+
+POLICY = CachePolicy(max_age=30, tags=frozenset({"Restaurant"}))
+
+
+@strawberry.type
+class Restaurant:
+    id: int
+
+
+@strawberry.type
+class Order:
+    id: int
+    restaurant: Restaurant
+
+
+@strawberry.type
+class Query:
+    restaurants: List[Restaurant]
+    orders: List[Order]
+    me: str
+
+
+schema = strawberry.Schema(query=Query)._schema
+HINTS = {"Query.restaurants": 60, "Query.orders": 60, "Order": 0}
+
+
+def result(value="ok"):
+    return ExecutionResult(data={"value": value})
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(module.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_policy_takes_the_smallest_hint_and_tags_the_types():
+    policy = cache_policy(schema, parse("{ restaurants { id } }"), None, HINTS)
+    assert (policy.max_age, policy.tags) == (60, frozenset({"Restaurant"}))
+
+    # Root fields without a hint, and order types, are never cached
+    assert cache_policy(schema, parse("{ restaurants { id } me }"), None, HINTS).max_age == 0
+    assert cache_policy(schema, parse("{ orders { id } }"), None, HINTS).max_age == 0
+
+
+def test_key_ignores_formatting_but_not_variables():
+    compact = cache_key(parse("{restaurants{id}}"), {"a": 1}, None)
+
+    assert compact == cache_key(parse("# list\n{ restaurants {\n id } }"), {"a": 1}, None)
+    assert compact != cache_key(parse("{restaurants{id}}"), {"a": 2}, None)
+
+
+def test_entries_expire_after_their_max_age(clock):
+    cache = ResponseCache(max_entries=10)
+    cache.set("q", result(), max_age=30, tags=POLICY.tags)
+
+    clock[0] += 29
+    assert cache.get("q") is not None
+    clock[0] += 1
+    assert cache.get("q") is None
+
+
+def test_invalidation_drops_tagged_entries_and_racing_fills():
+    cache = ResponseCache(max_entries=10)
+    cache.set("restaurants", result(), 30, frozenset({"Restaurant"}))
+    cache.set("agents", result(), 30, frozenset({"DeliveryAgent"}))
+
+    assert cache.invalidate("Restaurant") == 1
+    assert cache.get("restaurants") is None
+    assert cache.get("agents") is not None
+
+    # A fill started before a mutation invalidated the cache is not stored
+    async def fill_across_a_mutation():
+        _, leader = await cache.lookup("restaurants")
+        generation = cache.generation
+        cache.invalidate("Restaurant")
+        cache.fill("restaurants", result("stale"), POLICY, generation)
+        return leader
+
+    assert asyncio.run(fill_across_a_mutation())
+    assert cache.get("restaurants") is None
+
+
+def test_concurrent_misses_wait_for_one_leader():
+    cache = ResponseCache(max_entries=10)
+    executions = []
+
+    async def execute(value):
+        cached, leader = await cache.lookup("q")
+        if not leader:
+            return cached
+        generation = cache.generation
+        executions.append(value)
+        await asyncio.sleep(0.01)
+        fresh = result(value)
+        cache.fill("q", fresh, POLICY, generation)
+        return fresh
+
+    async def scenario():
+        return await asyncio.gather(*(execute(i) for i in range(5)))
+
+    results = asyncio.run(scenario())
+
+    assert executions == [0]
+    assert all(r is results[0] for r in results)
+    assert cache.get("q") is results[0]
+
+
+def test_failed_leader_releases_waiters_uncached():
+    cache = ResponseCache(max_entries=10)
+
+    async def scenario():
+        _, leader = await cache.lookup("q")
+        waiter = asyncio.create_task(cache.lookup("q"))
+        await asyncio.sleep(0)
+        failed = ExecutionResult(data=None, errors=[GraphQLError("downstream timeout")])
+        cache.fill("q", failed, POLICY, cache.generation)
+        return leader, await waiter
+
+    leader, (cached, waiter_leads) = asyncio.run(scenario())
+
+    assert leader and cached is None and not waiter_leads
+    assert cache.get("q") is None
+
+
+def test_accepting_an_order_drops_cached_agent_lists(monkeypatch):
+    from graphql_gateway import schema as gateway
+
+    cache = ResponseCache(max_entries=10)
+    cache.set("agents", result(), 30, frozenset({"DeliveryAgent"}))
+    monkeypatch.setattr(gateway, "response_cache", cache)
+
+    async def execute(service, query, variables):
+        return {"acceptOrder": None}
+
+    monkeypatch.setattr(gateway.service_clients, "execute", execute)
+    outcome = asyncio.run(gateway.schema.execute(
+        "mutation($o: UUID!, $r: UUID!) { acceptOrder(orderId: $o, restaurantId: $r) { id } }",
+        variable_values={"o": "00000000-0000-0000-0000-000000000001", "r": "00000000-0000-0000-0000-000000000002"},
+    ))
+
+    assert outcome.errors is None
+    assert cache.get("agents") is None
@@ -0,0 +1,89 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from graphql_gateway import clients as module
+from graphql_gateway.clients import ServiceClients
+from shared.gql import PERSISTED_QUERY_NOT_FOUND, query_hash
+
+QUERY = "query Orders { orders { id } }"
+DATA = {"orders": [{"id": "1"}]}
+
+
+@pytest.fixture
+def transport(monkeypatch):
+    """Routes every gateway client through a mock transport; returns the requests it saw"""
+    requests = []
+    known = set()
+
+    def handler(request):
+        body = json.loads(request.content)
+        requests.append((request, body))
+        sha256_hash = body["extensions"]["persistedQuery"]["sha256Hash"]
+        if "query" in body:
+            known.add(sha256_hash)
+        if sha256_hash not in known:
+            return httpx.Response(200, json={"errors": [{"message": PERSISTED_QUERY_NOT_FOUND}]})
+        return httpx.Response(200, json={"data": DATA})
+
+    client_class = httpx.AsyncClient
+    monkeypatch.setattr(
+        module.httpx, "AsyncClient",
+        lambda **kwargs: client_class(transport=httpx.MockTransport(handler), **kwargs)
+    )
+    return requests, known
+
+
+def run(clients, *calls):
+    async def go():
+        await clients.start()
+        try:
+            return [await clients.execute(service, query) for service, query in calls]
+        finally:
+            await clients.close()
+
+    return asyncio.run(go())
+
+
+def test_known_query_is_sent_as_its_hash_only(transport):
+    requests, known = transport
+    known.add(query_hash(QUERY))
+
+    assert run(ServiceClients(), ("user", QUERY)) == [DATA]
+
+    [(request, body)] = requests
+    assert request.url.path == "/graphql"
+    assert "query" not in body
+    assert body["extensions"]["persistedQuery"]["sha256Hash"] == query_hash(QUERY)
+
+
+def test_unknown_query_is_registered_with_the_full_document(transport):
+    requests, _ = transport
+
+    assert run(ServiceClients(), ("restaurant", QUERY), ("restaurant", QUERY)) == [DATA, DATA]
+
+    # Not found, then the full document once; the second call is a hash hit
+    assert ["query" in body for _, body in requests] == [False, True, False]
+
+
+def test_clients_are_created_once_and_reused(transport):
+    requests, _ = transport
+    clients = ServiceClients()
+
+    async def go():
+        await clients.start()
+        user = clients.get("user")
+        await clients.start()
+        assert clients.get("user") is user
+        await clients.execute("user", QUERY)
+        await clients.execute("user", QUERY)
+        assert clients.get("user") is user
+        await clients.close()
+
+    asyncio.run(go())
+
+    assert {request.url.host for request, _ in requests} == {httpx.URL(clients.base_urls["user"]).host}
+    with pytest.raises(RuntimeError):
+        clients.get("user")
@@ -0,0 +1,84 @@
+import asyncio
+from uuid import uuid4
+
+from graphql import parse
+
+from graphql_gateway.loaders import GatewayLoaders, build_batch_query
+
+
+class FakeClients:
+    """Answers each aliased lookup from `restaurants`, recording every call"""
+
+    def __init__(self, restaurants):
+        self.restaurants = restaurants
+        self.calls = []
+
+    async def execute(self, service, query, variables=None, headers=None):
+        self.calls.append((service, query, variables))
+        return {alias: self.restaurants.get(key) for alias, key in variables.items()}
+
+
+def test_batch_query_aliases_every_key_with_its_own_selection():
+    first, second = uuid4(), uuid4()
+
+    query, variables = build_batch_query(
+        "BatchRestaurants", "restaurant", "restaurantId", "UUID!",
+        [(first, "id name"), (second, "id menuItems { price }")]
+    )
+
+    assert query == (
+        "query BatchRestaurants($k0: UUID!, $k1: UUID!) {\n"
+        "k0: restaurant(restaurantId: $k0) { id name }\n"
+        "k1: restaurant(restaurantId: $k1) { id menuItems { price } }\n"
+        "}"
+    )
+    assert variables == {"k0": str(first), "k1": str(second)}
+    parse(query)
+
+
+def test_lookups_in_one_tick_share_one_call():
+    first, second, missing = uuid4(), uuid4(), uuid4()
+    clients = FakeClients({
+        str(first): {"id": str(first), "name": "Pizzeria"},
+        str(second): {"id": str(second), "name": "Noodle Bar"},
+    })
+
+    async def resolve():
+        # DataLoaders belong to the running loop, like per-request ones do
+        load = GatewayLoaders(clients).restaurant_by_id.load
+        return await asyncio.gather(
+            load((first, "id name")),
+            load((second, "id name")),
+            load((first, "id name")),
+            # Same restaurant, other fields: its own alias in the same batch
+            load((first, "id")),
+            load((missing, "id name")),
+        )
+
+    first_named, second_named, duplicate, first_id_only, absent = asyncio.run(resolve())
+
+    assert len(clients.calls) == 1
+    service, query, variables = clients.calls[0]
+    assert service == "user"
+    # The duplicate key is asked for once
+    assert list(variables.values()) == [str(first), str(second), str(first), str(missing)]
+    assert "k2: restaurant(restaurantId: $k2) { id }" in query
+    assert (first_named.id, first_named.name) == (first, "Pizzeria")
+    assert second_named.name == "Noodle Bar"
+    assert duplicate is first_named
+    assert first_id_only.id == first
+    assert absent is None
+
+
+def test_agent_lookups_go_to_the_delivery_service():
+    agent = uuid4()
+    clients = FakeClients({str(agent): {"id": str(agent), "name": "Sam", "vehicleType": "bicycle"}})
+
+    async def resolve():
+        return await GatewayLoaders(clients).agent_by_id.load((agent, "id name vehicleType"))
+
+    found = asyncio.run(resolve())
+
+    assert clients.calls[0][0] == "delivery"
+    assert "k0: deliveryAgent(agentId: $k0)" in clients.calls[0][1]
+    assert (found.id, found.vehicle_type) == (agent, "bicycle")
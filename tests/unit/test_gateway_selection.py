@@ -0,0 +1,95 @@
+import asyncio
+from typing import List, Optional
+
+import strawberry
+from strawberry.types import Info
+
+from graphql_gateway.queries import USER_ORDER_SPEC, selection_for
+
+
+# A stand-in for the gateway's order type, so the test runs the selection
+# through strawberry's own parsing, fragment and directive handling
+@strawberry.type
+class Item:
+    id: str
+    quantity: int
+    unit_price: float
+
+
+@strawberry.type
+class Order:
+    id: str
+    status: str
+    restaurant_id: str
+    delivery_agent_id: Optional[str]
+    special_instructions: Optional[str]
+    order_items: List[Item]
+    restaurant: Optional[str]
+
+
+forwarded: List[str] = []
+
+
+@strawberry.type
+class Query:
+    @strawberry.field
+    def order(self, info: Info) -> Optional[Order]:
+        forwarded.append(selection_for(info, USER_ORDER_SPEC))
+        return None
+
+
+schema = strawberry.Schema(query=Query)
+
+
+def downstream_selection(query: str, variables: Optional[dict] = None) -> str:
+    forwarded.clear()
+    result = asyncio.run(schema.execute(query, variable_values=variables))
+    assert result.errors is None
+    return forwarded[-1]
+
+
+def test_only_selected_fields_are_forwarded():
+    assert downstream_selection("{ order { id status } }") == "id status"
+
+
+def test_fragments_are_flattened_and_merged():
+    selection = downstream_selection("""
+        query {
+            order {
+                ...Summary
+                ... on Order { status orderItems { quantity } }
+                orderItems { id }
+            }
+        }
+        fragment Summary on Order { id status orderItems { id unitPrice } }
+    """)
+
+    assert selection == "id status orderItems { id unitPrice quantity }"
+
+
+def test_skip_and_include_are_honoured():
+    selection = downstream_selection(
+        """
+        query ($details: Boolean!, $brief: Boolean!) {
+            order {
+                id
+                specialInstructions @include(if: $details)
+                orderItems @skip(if: $brief) { id }
+                ... on Order @include(if: $brief) { status }
+            }
+        }
+        """,
+        {"details": False, "brief": True}
+    )
+
+    assert selection == "id status"
+
+
+def test_gateway_fields_forward_the_keys_they_need():
+    selection = downstream_selection("{ order { restaurant __typename } }")
+
+    assert selection == "restaurantId"
+
+
+def test_selection_is_never_empty():
+    assert downstream_selection("{ order { __typename } }") == "id"
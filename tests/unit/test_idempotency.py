@@ -0,0 +1,170 @@
+import asyncio
+from decimal import Decimal
+from datetime import datetime, timedelta, timezone
+from functools import partial
+from uuid import uuid4
+
+import pytest
+
+from shared.database import AFTER_COMMIT, after_commit
+from shared.gql.context import DatabaseContext
+from user_service.schemas import OrderCreate, OrderResponse
+from user_service.services.idempotency_service import (
+    IdempotencyKeyMismatchError, IdempotencyService, ResponseCache, request_fingerprint, response_cache
+)
+
+NOW = datetime.now(timezone.utc)
+
+
+def make_order_data(quantity=1):
+    return OrderCreate(
+        restaurant_id=uuid4(),
+        delivery_address={"street": "1 Main St", "city": "Springfield"},
+        items=[{"menu_item_id": uuid4(), "quantity": quantity}]
+    )
+
+
+def make_order_response():
+    return OrderResponse(
+        id=uuid4(), user_id=uuid4(), restaurant_id=uuid4(), delivery_agent_id=None,
+        status="pending", total_amount=Decimal("12.50"), delivery_address={"city": "Springfield"},
+        special_instructions=None, placed_at=datetime.now(timezone.utc),
+        accepted_at=None, delivered_at=None, order_items=[]
+    )
+
+
+def test_fingerprint_ignores_key_order():
+    order_data = make_order_data()
+    reordered = OrderCreate(
+        restaurant_id=order_data.restaurant_id,
+        delivery_address={"city": "Springfield", "street": "1 Main St"},
+        items=order_data.items
+    )
+
+    assert request_fingerprint(order_data) == request_fingerprint(reordered)
+    assert request_fingerprint(order_data) != request_fingerprint(make_order_data(quantity=2))
+
+
+def test_response_cache_evicts_least_recently_used():
+    cache = ResponseCache(maxsize=2)
+    user_id = uuid4()
+    cache.put(user_id, "a", "h", {}, NOW)
+    cache.put(user_id, "b", "h", {}, NOW)
+    cache.get(user_id, "a")
+    cache.put(user_id, "c", "h", {}, NOW)
+
+    assert cache.get(user_id, "a") is not None
+    assert cache.get(user_id, "b") is None
+
+
+def test_response_cache_misses_expired_keys():
+    cache = ResponseCache()
+    user_id = uuid4()
+    cache.put(user_id, "old", "h", {}, NOW - timedelta(hours=25))
+    cache.put(user_id, "new", "h", {}, NOW)
+    cutoff = NOW - timedelta(hours=24)
+
+    assert cache.get(user_id, "old", cutoff) is None
+    assert cache.get(user_id, "old") is None
+    assert cache.get(user_id, "new", cutoff) == ("h", {})
+
+
+def test_replay_from_cache_skips_database():
+    service = IdempotencyService(db=None)
+    user_id = uuid4()
+    order = make_order_response()
+    service.remember(user_id, "retry-1", "hash", order)
+
+    replay = asyncio.run(service.get_response(user_id, "retry-1", "hash"))
+
+    assert replay == order
+    response_cache.clear()
+
+
+def test_key_reused_for_another_request_is_rejected():
+    service = IdempotencyService(db=None)
+    user_id = uuid4()
+    service.remember(user_id, "retry-2", "hash", make_order_response())
+
+    with pytest.raises(IdempotencyKeyMismatchError):
+        asyncio.run(service.get_response(user_id, "retry-2", "other-hash"))
+    response_cache.clear()
+
+
+class FakeTransaction:
+    is_active = True
+
+    async def commit(self):
+        pass
+
+    async def rollback(self):
+        self.is_active = False
+
+
+class FakeConnection:
+    async def close(self):
+        pass
+
+
+class FakeSession:
+    def __init__(self, info=None):
+        self.info = info if info is not None else {}
+
+    async def flush(self):
+        pass
+
+    async def close(self):
+        pass
+
+
+def request_context():
+    """A DatabaseContext as if a resolver had opened its session"""
+    context = DatabaseContext()
+    context._session = FakeSession({AFTER_COMMIT: context._after_commit})
+    context._transaction = FakeTransaction()
+    context._connection = FakeConnection()
+    context._checked_out_at = 0.0
+    return context
+
+
+def test_standalone_session_caches_at_once():
+    service = IdempotencyService(db=FakeSession())
+    user_id, order = uuid4(), make_order_response()
+
+    after_commit(service.db, partial(service.remember, user_id, "retry-3", "hash", order))
+
+    assert response_cache.get(user_id, "retry-3") is not None
+    response_cache.clear()
+
+
+@pytest.mark.parametrize("commit", [True, False])
+def test_request_transaction_caches_only_once_committed(commit):
+    context = request_context()
+    service = IdempotencyService(db=context._session)
+    user_id, order = uuid4(), make_order_response()
+
+    after_commit(service.db, partial(service.remember, user_id, "retry-4", "hash", order))
+    assert response_cache.get(user_id, "retry-4") is None
+
+    asyncio.run(context.finish(commit=commit))
+
+    assert (response_cache.get(user_id, "retry-4") is not None) == commit
+    response_cache.clear()
+
+
+class EmptyDatabase:
+    async def execute(self, stmt):
+        class Result:
+            def one_or_none(self):
+                return None
+        return Result()
+
+
+def test_expired_cached_response_is_not_replayed():
+    service = IdempotencyService(db=EmptyDatabase())
+    user_id = uuid4()
+    order = make_order_response().model_copy(update={"placed_at": NOW - timedelta(days=2)})
+    service.remember(user_id, "retry-5", "hash", order)
+
+    assert asyncio.run(service.get_response(user_id, "retry-5", "hash")) is None
+    response_cache.clear()
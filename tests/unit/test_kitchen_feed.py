@@ -0,0 +1,149 @@
+import asyncio
+import json
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+from sqlalchemy.dialects import postgresql
+
+from restaurant_service.schemas import RestaurantOrderResponse
+from restaurant_service.services.kitchen_feed import BOARD_STATUSES, KitchenBoard, KitchenFeed
+from restaurant_service.services.order_service import OrderService
+
+NOW = datetime(2024, 1, 1, 12, 0, tzinfo=timezone.utc)
+RESTAURANT = uuid4()
+
+
+def order(status="pending", order_id=None, minutes=0):
+    return RestaurantOrderResponse(
+        id=order_id or uuid4(), user_id=uuid4(), restaurant_id=RESTAURANT, delivery_agent_id=None,
+        status=status, version=1, total_amount=20.0, delivery_address={}, special_instructions=None,
+        placed_at=NOW + timedelta(minutes=minutes), accepted_at=None, delivered_at=None
+    )
+
+
+def parse(chunks):
+    events = []
+    for chunk in chunks:
+        if chunk.startswith("id: "):
+            event_id, kind, data = chunk.strip().split("\n")
+            events.append((event_id[len("id: "):], kind[len("event: "):], json.loads(data[len("data: "):])))
+    return events
+
+
+def test_board_numbers_changes_and_skips_no_ops():
+    board = KitchenBoard(RESTAURANT)
+    placed = order()
+
+    assert board.apply(placed.id, placed).kind == "add"
+    assert board.apply(placed.id, placed) is None
+    accepted = placed.model_copy(update={"status": "accepted"})
+    assert board.apply(placed.id, accepted).kind == "update"
+    removed = board.apply(placed.id, placed.model_copy(update={"status": "picked_up"}))
+
+    assert (removed.seq, removed.kind, removed.data["status"]) == (3, "remove", "picked_up")
+    assert board.orders == {}
+
+
+def test_assigned_orders_stay_until_picked_up():
+    board = KitchenBoard(RESTAURANT)
+    accepted = order("accepted")
+    board.apply(accepted.id, accepted)
+
+    assigned = board.apply(accepted.id, accepted.model_copy(update={"status": "assigned"}))
+    assert (assigned.kind, assigned.data["status"]) == ("update", "assigned")
+    ready = board.apply(accepted.id, accepted.model_copy(update={"status": "ready_for_pickup"}))
+    assert ready.kind == "update"
+    assert board.apply(accepted.id, accepted.model_copy(update={"status": "picked_up"})).kind == "remove"
+
+
+def test_active_list_and_board_agree_on_assigned_orders():
+    # REST /active and GraphQL statusFilter "active" both go through this query
+    query = OrderService(None)._restaurant_orders_query(str(RESTAURANT), "active")
+    sql = str(query.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+
+    assert "'assigned'" in sql
+    assert all(f"'{status}'" in sql for status in BOARD_STATUSES if status != "pending")
+    assert "'pending'" not in sql
+
+
+def test_replace_sends_only_the_difference():
+    board = KitchenBoard(RESTAURANT)
+    kept, gone = order(), order()
+    board.replace([kept, gone])
+
+    new = order("accepted")
+    changes = board.replace([kept, new])
+
+    assert [(c.kind, c.data.get("id") or c.data.get("order_id")) for c in changes] == [
+        ("remove", str(gone.id)), ("add", str(new.id))
+    ]
+
+
+def test_resume_replays_missed_changes_or_falls_back_to_snapshot():
+    board = KitchenBoard(RESTAURANT, replay_size=3)
+    for _ in range(2):
+        board.apply(uuid4(), order())
+    seen = board.event_id(board.seq)
+    for _ in range(2):
+        board.apply(uuid4(), order())
+
+    assert [c.seq for c in board.since(seen)] == [3, 4]
+    assert board.since(board.event_id(board.seq)) == []
+    # Older than the log, another board's numbering, or garbage
+    assert board.since(board.event_id(0)) is None
+    assert board.since(f"other-{board.seq}") is None
+    assert board.since("nonsense") is None
+    assert board.since(None) is None
+
+
+def test_stream_sends_snapshot_then_changes_without_duplicates():
+    feed = KitchenFeed(keepalive=0.01)
+    board = KitchenBoard(RESTAURANT)
+    first, second = order(minutes=1), order(minutes=0)
+    board.replace([first, second])
+    feed._boards[RESTAURANT] = board
+
+    async def scenario():
+        subscriber = feed.hub.subscribe(RESTAURANT)
+        stream = feed.stream(subscriber, board, [board.snapshot()])
+        chunks = [await stream.__anext__()]
+        # A change already covered by the snapshot is not sent again
+        feed._publish(board, [board._log[-1]])
+        feed._publish(board, [board.apply(first.id, first.model_copy(update={"status": "accepted"}))])
+        chunks.append(await stream.__anext__())
+        chunks.append(await stream.__anext__())
+        subscriber.close()
+        chunks += [chunk async for chunk in stream]
+        return chunks
+
+    chunks = asyncio.run(scenario())
+    events = parse(chunks)
+
+    assert [kind for _, kind, _ in events] == ["snapshot", "update"]
+    assert [o["id"] for o in events[0][2]["orders"]] == [str(second.id), str(first.id)]
+    assert events[1][0] == board.event_id(3)
+    assert ": keepalive\n\n" in chunks
+    assert not feed.hub.has_subscribers(RESTAURANT)
+
+
+def test_stream_resends_snapshot_after_falling_behind():
+    feed = KitchenFeed(keepalive=0.01)
+    feed.hub.buffer_size = 2
+    board = KitchenBoard(RESTAURANT)
+
+    async def scenario():
+        subscriber = feed.hub.subscribe(RESTAURANT)
+        stream = feed.stream(subscriber, board, [board.snapshot()])
+        chunks = [await stream.__anext__()]
+        for _ in range(3):
+            placed = order()
+            feed._publish(board, [board.apply(placed.id, placed)])
+        chunks.append(await stream.__anext__())
+        subscriber.close()
+        chunks += [chunk async for chunk in stream]
+        return chunks
+
+    events = parse(asyncio.run(scenario()))
+
+    assert [kind for _, kind, _ in events] == ["snapshot", "snapshot"]
+    assert len(events[1][2]["orders"]) == 3
@@ -0,0 +1,105 @@
+import asyncio
+from uuid import uuid4
+
+import pytest
+
+from delivery_service.services import location_buffer as module
+from delivery_service.services.location_buffer import LocationBuffer
+
+
+class FakeSession:
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.statements = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    async def execute(self, stmt):
+        if self.fail:
+            raise ConnectionError("database unavailable")
+        self.statements.append(stmt)
+
+    async def commit(self):
+        pass
+
+
+def test_pings_are_coalesced_per_agent():
+    buffer = LocationBuffer()
+    agent = uuid4()
+
+    buffer.record(agent, {"latitude": 40.0, "longitude": -74.0})
+    buffer.record(agent, {"latitude": 40.1, "longitude": -74.1})
+
+    assert len(buffer._pending) == 1
+    assert buffer.latest(agent)["latitude"] == 40.1
+    assert "recorded_at" in buffer.latest(agent)
+
+    buffer.discard(agent)
+    assert buffer.latest(agent) is None
+
+
+def test_flush_writes_in_batches(monkeypatch):
+    session = FakeSession()
+    monkeypatch.setattr(module, "AsyncSessionLocal", lambda: session)
+    buffer = LocationBuffer(batch_size=2)
+    for _ in range(5):
+        buffer.record(uuid4(), {"latitude": 40.0, "longitude": -74.0})
+
+    assert asyncio.run(buffer.flush()) == 5
+
+    # Three location updates, one NOTIFY of the positions, three trail appends
+    assert len(session.statements) == 7
+    assert buffer._pending == {}
+    assert asyncio.run(buffer.flush()) == 0
+
+
+def test_failed_flush_keeps_newer_pings(monkeypatch):
+    buffer = LocationBuffer()
+    agent, other = uuid4(), uuid4()
+    buffer.record(agent, {"latitude": 40.0, "longitude": -74.0})
+    buffer.record(other, {"latitude": 41.0, "longitude": -73.0})
+
+    session = FakeSession(fail=True)
+
+    async def execute(stmt):
+        # A newer ping arrives while the failing flush is in flight
+        buffer.record(agent, {"latitude": 40.5, "longitude": -74.5})
+        raise ConnectionError("database unavailable")
+
+    session.execute = execute
+    monkeypatch.setattr(module, "AsyncSessionLocal", lambda: session)
+
+    with pytest.raises(ConnectionError):
+        asyncio.run(buffer.flush())
+
+    assert buffer.latest(agent)["latitude"] == 40.5
+    assert buffer.latest(other)["latitude"] == 41.0
+    # Every ping is still due for the trail, oldest first
+    assert [p.latitude for p in buffer._trail_points[agent]] == [40.0, 40.5]
+
+
+def test_reaching_max_pending_wakes_the_flusher():
+    buffer = LocationBuffer(max_pending=2)
+
+    buffer.record(uuid4(), {"latitude": 40.0, "longitude": -74.0})
+    assert not buffer._wakeup.is_set()
+    buffer.record(uuid4(), {"latitude": 40.0, "longitude": -74.0})
+    assert buffer._wakeup.is_set()
+
+
+def test_known_agents_are_bounded_to_the_most_recent():
+    buffer = LocationBuffer(max_known=2)
+    first, second, third = uuid4(), uuid4(), uuid4()
+
+    buffer.mark_known(first)
+    buffer.mark_known(second)
+    assert buffer.is_known(first)
+    buffer.mark_known(third)
+
+    # `second` was the least recently seen, so it needs a lookup again
+    assert buffer.is_known(first) and buffer.is_known(third)
+    assert not buffer.is_known(second)
@@ -0,0 +1,102 @@
+import asyncio
+from datetime import datetime
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+
+from restaurant_service.schemas import RestaurantUpdate
+from restaurant_service.services.restaurant_service import RestaurantService
+from shared.opening_hours import (
+    ALWAYS_OPEN, MINUTES_PER_WEEK, InvalidOperatingHoursError,
+    is_open_at, minute_of_week, stored_intervals, to_ranges, upcoming_window, weekly_intervals
+)
+
+MONDAY = 0
+TUESDAY = 24 * 60
+SUNDAY = 6 * 24 * 60
+
+
+def test_weekly_intervals_normalizes_days():
+    intervals = weekly_intervals({
+        "tuesday": {"open": "09:00", "close": "17:30"},
+        "monday": {"open": "09:00", "close": "17:30"},
+        "wednesday": None,
+    })
+
+    assert intervals == [(MONDAY + 540, MONDAY + 1050), (TUESDAY + 540, TUESDAY + 1050)]
+    assert weekly_intervals(None) == ALWAYS_OPEN
+    assert weekly_intervals({}) == ALWAYS_OPEN
+
+
+def test_overnight_hours_run_into_the_next_day():
+    intervals = weekly_intervals({"monday": {"open": "22:00", "close": "02:00"}})
+
+    assert intervals == [(MONDAY + 22 * 60, TUESDAY + 2 * 60)]
+    assert is_open_at(intervals, minute_of_week(datetime(2024, 1, 2, 1, 0)))
+    assert not is_open_at(intervals, minute_of_week(datetime(2024, 1, 1, 1, 0)))
+
+
+def test_sunday_night_wraps_to_monday_morning():
+    intervals = weekly_intervals({
+        "sunday": {"open": "20:00", "close": "03:00"},
+        "monday": {"open": "03:00", "close": "04:00"},
+    })
+
+    # Split at the week boundary, then merged with Monday's adjoining shift
+    assert intervals == [(MONDAY, MONDAY + 4 * 60), (SUNDAY + 20 * 60, MINUTES_PER_WEEK)]
+    assert is_open_at(intervals, MONDAY + 60)
+    assert is_open_at(intervals, MINUTES_PER_WEEK - 1)
+    assert not is_open_at(intervals, MONDAY + 4 * 60)
+
+
+@pytest.mark.parametrize("operation_hours", [
+    {"mondays": {"open": "09:00", "close": "17:00"}},
+    {"monday": {"open": "9am", "close": "17:00"}},
+    {"monday": {"open": "09:00", "close": "24:00"}},
+    {"monday": {"open": "09:00"}},
+    {"monday": "09:00-17:00"},
+])
+def test_invalid_hours_are_rejected(operation_hours):
+    with pytest.raises(InvalidOperatingHoursError):
+        weekly_intervals(operation_hours)
+
+
+def test_upcoming_window_wraps_past_sunday():
+    assert upcoming_window(MONDAY + 600, 30) == [(MONDAY + 601, MONDAY + 631)]
+    assert upcoming_window(MINUTES_PER_WEEK - 10, 30) == [(MINUTES_PER_WEEK - 9, MINUTES_PER_WEEK), (0, 21)]
+
+
+def test_restaurants_without_rows_fall_back_to_operation_hours():
+    lunch = {"monday": {"open": "11:00", "close": "15:00"}}
+    late = weekly_intervals({"monday": {"open": "22:00", "close": "03:00"}})
+
+    assert stored_intervals(to_ranges(late), lunch) == late
+    assert stored_intervals([], lunch) == weekly_intervals(lunch)
+    assert stored_intervals([], {"monday": "9-5"}) == ALWAYS_OPEN
+    # Closed all week has no rows and says so in its JSON too
+    assert stored_intervals([], {"monday": None}) == []
+
+
+class FakeSession:
+    def __init__(self):
+        self.statements = []
+
+    async def execute(self, stmt, *args):
+        self.statements.append(stmt)
+        return SimpleNamespace(rowcount=0)
+
+    async def commit(self):
+        raise AssertionError("nothing should be committed")
+
+    async def rollback(self):
+        pass
+
+
+def test_updating_hours_of_a_missing_restaurant_is_not_found():
+    db = FakeSession()
+    update = RestaurantUpdate(operation_hours={"monday": {"open": "09:00", "close": "17:00"}})
+
+    assert asyncio.run(RestaurantService(db).update_restaurant(str(uuid4()), update)) is None
+    # Stopped before writing opening hours rows for a restaurant that isn't there
+    assert len(db.statements) == 1
@@ -0,0 +1,195 @@
+import asyncio
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from shared.events import AgentAvailabilityChanged
+from delivery_service.schemas import AssignmentRequest, DeliveryStatusUpdate
+from delivery_service.services import order_service as delivery_module
+from restaurant_service.schemas import OrderUpdateRequest
+from restaurant_service.services import order_service as restaurant_module
+
+NOW = datetime(2024, 1, 1, 12, 0, tzinfo=timezone.utc)
+
+
+class FakeResult:
+    def __init__(self, value=None):
+        self.value = value
+
+    def scalar_one_or_none(self):
+        return self.value
+
+
+class FakeSession:
+    def __init__(self, order_status=None):
+        self.order_status = order_status
+        self.statements = []
+        self.committed = False
+
+    async def execute(self, stmt):
+        sql = str(stmt.compile(dialect=postgresql.dialect()))
+        self.statements.append(sql)
+        return FakeResult(self.order_status if sql.startswith("SELECT orders.orders.status") else None)
+
+    def begin_nested(self):
+        return FakeSavepoint()
+
+    async def commit(self):
+        self.committed = True
+
+    async def rollback(self):
+        pass
+
+
+class FakeSavepoint:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+
+class Recorder:
+    def __init__(self):
+        self.calls = []
+
+    async def __call__(self, db, *args, **kwargs):
+        self.calls.append(args)
+
+
+def moved_order(agent_id, status):
+    return SimpleNamespace(
+        id=uuid4(), user_id=uuid4(), restaurant_id=uuid4(), delivery_agent_id=agent_id, status=status,
+        version=3, total_amount=10, delivery_address={}, special_instructions=None,
+        placed_at=NOW, accepted_at=NOW, delivered_at=None, updated_at=NOW
+    )
+
+
+def agent_released(db, published, agent_id):
+    return (
+        any(sql.startswith("UPDATE delivery.delivery_agents SET is_available") for sql in db.statements)
+        and any(
+            isinstance(event, AgentAvailabilityChanged) and event.agent_id == agent_id and event.is_available
+            for event, in published.calls
+        )
+    )
+
+
+@pytest.fixture
+def recorded(monkeypatch):
+    published, enqueued = Recorder(), Recorder()
+    for module in (restaurant_module, delivery_module):
+        monkeypatch.setattr(module, "publish", published)
+    monkeypatch.setattr(restaurant_module, "enqueue", enqueued)
+    return published, enqueued
+
+
+def patch_transition(monkeypatch, module, order):
+    async def transition(db, order_id, status, **kwargs):
+        return order
+    monkeypatch.setattr(module, "transition", transition)
+
+
+@pytest.mark.parametrize("status", ["delivered", "cancelled"])
+def test_agent_is_freed_when_it_ends_the_order(monkeypatch, recorded, status):
+    published, _ = recorded
+    agent_id = uuid4()
+    patch_transition(monkeypatch, delivery_module, moved_order(agent_id, status))
+    db = FakeSession()
+
+    service = delivery_module.OrderService(db)
+    response = asyncio.run(service.update_delivery_status(
+        str(uuid4()), str(agent_id), DeliveryStatusUpdate(status=status)
+    ))
+
+    assert response.status == status
+    assert agent_released(db, published, agent_id)
+    assert db.committed
+
+
+def test_restaurant_cancel_frees_the_agent_and_tells_the_delivery_service(monkeypatch, recorded):
+    published, enqueued = recorded
+    agent_id, order_id = uuid4(), uuid4()
+    patch_transition(monkeypatch, restaurant_module, moved_order(agent_id, "cancelled"))
+    db = FakeSession()
+
+    service = restaurant_module.OrderService(db)
+    asyncio.run(service.update_order_status(str(order_id), str(uuid4()), OrderUpdateRequest(status="cancelled")))
+
+    assert agent_released(db, published, agent_id)
+    assert enqueued.calls == [(
+        "delivery", "/assignments/ended",
+        {"order_id": str(order_id), "delivery_agent_id": str(agent_id), "status": "cancelled"}
+    )]
+    assert db.committed
+
+
+def test_restaurant_cancel_without_an_agent_frees_nobody(monkeypatch, recorded):
+    published, enqueued = recorded
+    patch_transition(monkeypatch, restaurant_module, moved_order(None, "cancelled"))
+    db = FakeSession()
+
+    service = restaurant_module.OrderService(db)
+    asyncio.run(service.update_order_status(str(uuid4()), str(uuid4()), OrderUpdateRequest(status="cancelled")))
+
+    assert db.statements == []
+    assert enqueued.calls == []
+    assert not any(isinstance(event, AgentAvailabilityChanged) for event, in published.calls)
+
+
+@pytest.mark.parametrize("status", ["accepted", "preparing", "ready_for_pickup"])
+def test_redelivered_assignment_leaves_kitchen_progress_alone(recorded, status):
+    published, _ = recorded
+    assignment = AssignmentRequest(order_id=uuid4(), delivery_agent_id=uuid4(), assigned_at=NOW)
+    db = FakeSession(order_status=status)
+
+    service = delivery_module.OrderService(db)
+    # The outbox delivers at least once
+    assert asyncio.run(service.receive_assignment(assignment))
+    assert asyncio.run(service.receive_assignment(assignment))
+
+    assert not any(sql.startswith("UPDATE orders.orders") for sql in db.statements)
+    assert sum(sql.startswith("INSERT INTO delivery.delivery_trails") for sql in db.statements) == 2
+    assert published.calls == []
+
+
+def test_assignment_of_an_ended_order_starts_no_trail(recorded):
+    db = FakeSession(order_status="cancelled")
+
+    service = delivery_module.OrderService(db)
+    assignment = AssignmentRequest(order_id=uuid4(), delivery_agent_id=uuid4(), assigned_at=NOW)
+
+    assert asyncio.run(service.receive_assignment(assignment))
+    assert len(db.statements) == 1
+
+
+def test_assignment_for_another_agent_is_refused(recorded):
+    service = delivery_module.OrderService(FakeSession(order_status=None))
+    assignment = AssignmentRequest(order_id=uuid4(), delivery_agent_id=uuid4(), assigned_at=NOW)
+
+    assert not asyncio.run(service.receive_assignment(assignment))
+
+
+def test_auto_assignment_bumps_the_order_like_the_batch(monkeypatch, recorded):
+    agent_id = uuid4()
+
+    class Engine:
+        def __init__(self, db):
+            pass
+
+        async def assign(self, order_id, restaurant_id):
+            return SimpleNamespace(agent_id=agent_id)
+
+    monkeypatch.setattr(restaurant_module, "DispatchEngine", Engine)
+    db = FakeSession()
+
+    service = restaurant_module.OrderService(db)
+    assignment = asyncio.run(service._auto_assign_delivery_agent(uuid4(), uuid4()))
+
+    assert assignment.delivery_agent_id == agent_id
+    [claim] = [sql for sql in db.statements if sql.startswith("UPDATE orders.orders")]
+    assert "version=(orders.orders.version + " in claim
+    assert "updated_at=now()" in claim
@@ -0,0 +1,62 @@
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from shared.order_state import STATUS_CODES, STATUSES_BY_CODE, OrderStatus
+from shared.order_timeline import (
+    DELIVERY_AGENT_STAGES, RESTAURANT_STAGES, STAGES, stage_stats_query, stage_window
+)
+
+UNTIL = datetime(2024, 1, 8, tzinfo=timezone.utc)
+SINCE = UNTIL - timedelta(days=7)
+
+
+def compile(stmt):
+    return str(stmt.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+
+
+def test_status_codes_are_stable_and_cover_every_status():
+    assert set(STATUS_CODES) == set(OrderStatus)
+    assert STATUS_CODES[OrderStatus.PENDING] == 1
+    assert STATUS_CODES[OrderStatus.DELIVERED] == 9
+    assert all(STATUSES_BY_CODE[code] is status for status, code in STATUS_CODES.items())
+
+
+def test_stage_query_windows_the_end_event_and_uses_the_first_start():
+    sql = compile(stage_stats_query('preparation', 'restaurant', SINCE, UNTIL, uuid4()))
+
+    assert "ended.status = 5" in sql
+    assert "ended.occurred_at >= '2024-01-01" in sql
+    assert "ended.occurred_at < '2024-01-08" in sql
+    assert "JOIN LATERAL (SELECT started.occurred_at" in sql
+    assert "started.status = 2 ORDER BY started.occurred_at \n LIMIT 1" in sql
+    assert "NOT (EXISTS (SELECT *" in sql
+    assert "percentile_cont(0.9) WITHIN GROUP (ORDER BY durations.seconds)" in sql
+    assert "ended.restaurant_id = '" in sql
+    assert "GROUP BY durations.owner_id" in sql
+
+
+def test_stage_query_groups_by_agent():
+    sql = compile(stage_stats_query('delivery', 'agent', SINCE, UNTIL))
+
+    assert "ended.delivery_agent_id AS owner_id" in sql
+    assert "ended.delivery_agent_id IS NOT NULL" in sql
+
+
+def test_stages_known_to_each_party():
+    assert set(RESTAURANT_STAGES) <= set(STAGES)
+    assert set(DELIVERY_AGENT_STAGES) <= set(STAGES)
+    with pytest.raises(ValueError):
+        stage_stats_query('cooling', 'restaurant', SINCE, UNTIL)
+    with pytest.raises(ValueError):
+        stage_stats_query('total', 'city', SINCE, UNTIL)
+
+
+def test_stage_window_defaults_to_the_last_week_in_utc():
+    since, until = stage_window(None, datetime(2024, 1, 8))
+    assert (since, until) == (SINCE, UNTIL)
+
+    with pytest.raises(ValueError):
+        stage_window(UNTIL, SINCE)
@@ -0,0 +1,75 @@
+import asyncio
+import json
+from datetime import datetime, timezone
+from uuid import uuid4
+
+from shared.events import AgentLocation, AgentLocationsChanged, OrderAssigned, OrderStatusChanged
+from user_service.services.order_tracking import OrderTracker
+
+NOW = datetime(2024, 1, 1, 12, 0, tzinfo=timezone.utc)
+
+
+def parse(chunks):
+    events = []
+    for chunk in chunks:
+        if chunk.startswith("event: "):
+            kind, data = chunk.strip().split("\n")
+            events.append((kind[len("event: "):], json.loads(data[len("data: "):])))
+    return events
+
+
+def snapshot(order_id, status="accepted", agent_id=None):
+    return {
+        "order_id": order_id, "user_id": uuid4(), "status": status,
+        "delivery_agent_id": agent_id, "updated_at": NOW, "location": None
+    }
+
+
+def location(agent_id, latitude):
+    return AgentLocationsChanged(locations=[
+        AgentLocation(agent_id=agent_id, latitude=latitude, longitude=-74.0, recorded_at=NOW)
+    ])
+
+
+def test_stream_follows_assignment_location_and_ends_when_delivered():
+    tracker = OrderTracker(keepalive=0.01)
+    order_id, agent_id, other_agent = uuid4(), uuid4(), uuid4()
+
+    async def scenario():
+        subscriber = tracker.watch(order_id)
+        stream = tracker.stream(subscriber, snapshot(order_id))
+        chunks = [await stream.__anext__()]
+
+        tracker._handle(OrderAssigned(order_id=order_id, delivery_agent_id=agent_id))
+        tracker._handle(location(other_agent, 41.0))
+        tracker._handle(location(agent_id, 40.1))
+        tracker._handle(location(agent_id, 40.2))
+        tracker._handle(OrderStatusChanged(order_id=order_id, status="delivered", delivery_agent_id=agent_id))
+        chunks += [chunk async for chunk in stream]
+        return chunks
+
+    events = parse(asyncio.run(scenario()))
+
+    assert [kind for kind, _ in events] == ["snapshot", "agent", "location", "status"]
+    # Only the latest position of the agent is sent
+    assert events[2][1]["latitude"] == 40.2
+    assert events[3][1]["status"] == "delivered"
+    # Closing the stream forgets the order
+    assert not tracker.hub.has_subscribers(order_id)
+    assert tracker._orders_of == {} and tracker._agent_of == {}
+
+
+def test_idle_stream_sends_keepalives():
+    tracker = OrderTracker(keepalive=0.01)
+    order_id = uuid4()
+
+    async def scenario():
+        stream = tracker.stream(tracker.watch(order_id), snapshot(order_id, "preparing", uuid4()))
+        chunks = [await stream.__anext__() for _ in range(3)]
+        await stream.aclose()
+        return chunks
+
+    chunks = asyncio.run(scenario())
+
+    assert chunks[1:] == [": keepalive\n\n", ": keepalive\n\n"]
+    assert not tracker.hub.has_subscribers(order_id)
@@ -0,0 +1,137 @@
+import asyncio
+from typing import NamedTuple
+from uuid import uuid4
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from shared.models.order import DELIVERY_ACTIVE_STATUSES
+from shared.order_state import FINAL_STATUSES, OrderStatus, TRANSITIONS, can_transition
+from shared.order_transitions import (
+    InvalidTransitionError, StaleOrderError, transition, transition_statement
+)
+
+
+class FakeResult:
+    def __init__(self, value):
+        self.value = value
+
+    def scalar_one_or_none(self):
+        return self.value
+
+    def one_or_none(self):
+        return self.value
+
+
+class Row(NamedTuple):
+    status: str
+    version: int
+
+
+class FakeSession:
+    """Answers each execute() with the next of `results`"""
+
+    def __init__(self, *results):
+        self.results = list(results)
+        self.statements = []
+
+    async def execute(self, stmt):
+        self.statements.append(stmt)
+        return FakeResult(self.results.pop(0))
+
+
+def test_statement_checks_owner_and_previous_status_and_returns_the_row():
+    restaurant_id = uuid4()
+    sql = str(transition_statement(uuid4(), 'accepted', restaurant_id=restaurant_id).compile(
+        dialect=postgresql.dialect()
+    ))
+
+    assert sql.startswith("WITH moved AS \n(UPDATE orders.orders SET status=")
+    assert "version=(orders.orders.version + " in sql
+    assert "accepted_at=now()" in sql
+    assert "orders.orders.status IN ('pending')" in sql
+    assert "orders.orders.restaurant_id = " in sql
+    assert "delivery_agent_id =" not in sql
+    assert "RETURNING orders.orders.user_id" in sql
+
+
+def test_statement_appends_to_the_timeline_only_when_the_order_moved():
+    sql = str(transition_statement(uuid4(), 'ready_for_pickup', estimated_prep_time=15).compile(
+        dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}
+    ))
+
+    assert "logged AS \n(INSERT INTO orders.order_events" in sql
+    assert "SELECT moved.id AS id, moved.updated_at AS updated_at, 5 AS anon_1" in sql
+    assert "15 AS anon_2 \nFROM moved)" in sql
+
+
+def test_transition_is_one_statement_when_allowed():
+    order = object()
+    db = FakeSession(order)
+
+    assert asyncio.run(transition(db, uuid4(), 'picked_up', delivery_agent_id=uuid4())) is order
+    assert len(db.statements) == 1
+
+
+def test_transition_tells_missing_orders_from_disallowed_changes():
+    assert asyncio.run(transition(FakeSession(None, None), uuid4(), 'on_the_way')) is None
+
+    with pytest.raises(InvalidTransitionError) as raised:
+        asyncio.run(transition(FakeSession(None, Row('rejected', 2)), uuid4(), 'accepted'))
+    assert (raised.value.current, raised.value.target) == ('rejected', 'accepted')
+
+
+def test_writers_with_an_old_version_fail():
+    sql = str(transition_statement(uuid4(), 'preparing', expected_version=3).compile(
+        dialect=postgresql.dialect()
+    ))
+    assert "orders.orders.version = " in sql
+
+    # Another writer moved the order on: still an allowed change, but not from what this caller saw
+    with pytest.raises(StaleOrderError) as raised:
+        asyncio.run(transition(FakeSession(None, Row('accepted', 4)), uuid4(), 'preparing', expected_version=3))
+    assert (raised.value.version, raised.value.expected_version) == (4, 3)
+
+
+def test_lifecycle_table():
+    assert set(TRANSITIONS) == set(OrderStatus)
+    assert all(target in OrderStatus for targets in TRANSITIONS.values() for target in targets)
+    assert FINAL_STATUSES == {'rejected', 'delivered', 'cancelled'}
+    assert can_transition('pending', 'accepted')
+    assert not can_transition('rejected', 'accepted')
+    assert not can_transition('delivered', 'nonsense')
+
+
+def test_orders_never_return_to_an_earlier_status():
+    # Redelivered or late notifications then can't undo progress
+    def reachable(status):
+        seen, frontier = set(), list(TRANSITIONS[status])
+        while frontier:
+            target = frontier.pop()
+            if target not in seen:
+                seen.add(target)
+                frontier.extend(TRANSITIONS[target])
+        return seen
+
+    assert all(status not in reachable(status) for status in OrderStatus)
+    assert not any(OrderStatus.ASSIGNED in targets for targets in TRANSITIONS.values())
+
+
+def test_orders_stay_the_agents_until_they_end():
+    # An agent can be given the order once it is accepted; every status it
+    # can reach from there, short of the end, keeps it in the agent's active
+    # orders, load and trail
+    reachable, frontier = set(), [OrderStatus.ACCEPTED]
+    while frontier:
+        for target in TRANSITIONS[frontier.pop()]:
+            if target not in reachable:
+                reachable.add(target)
+                frontier.append(target)
+
+    assert reachable - FINAL_STATUSES <= set(DELIVERY_ACTIVE_STATUSES)
+    assert not set(DELIVERY_ACTIVE_STATUSES) & (FINAL_STATUSES | {OrderStatus.PENDING})
+
+
+def test_unknown_statuses_are_rejected():
+    with pytest.raises(InvalidTransitionError):
+        transition_statement(uuid4(), 'teleported')
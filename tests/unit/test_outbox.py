@@ -0,0 +1,70 @@
+import asyncio
+from datetime import datetime, timezone
+from uuid import uuid4
+
+import httpx
+
+from shared.config import settings
+from shared.models.outbox import OutboxMessage
+from shared.outbox import DeliveryFailure, OutboxDispatcher, backoff_delay
+
+NOW = datetime(2024, 1, 1, 12, 0, tzinfo=timezone.utc)
+
+
+def make_message(destination="delivery", attempts=0):
+    return OutboxMessage(
+        id=1, aggregate_id=uuid4(), destination=destination, path="/assignments/",
+        payload={"order_id": "x"}, attempts=attempts, created_at=NOW, available_at=NOW
+    )
+
+
+def deliver(message, handler):
+    dispatcher = OutboxDispatcher()
+    dispatcher._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return asyncio.run(dispatcher._deliver(message))
+
+
+def test_backoff_grows_exponentially_up_to_the_cap():
+    no_jitter = lambda: 1.0
+
+    assert backoff_delay(1, no_jitter) == settings.outbox_backoff_base
+    assert backoff_delay(3, no_jitter) == settings.outbox_backoff_base * 4
+    assert backoff_delay(50, no_jitter) == settings.outbox_backoff_max
+    assert backoff_delay(3, lambda: 0.0) == settings.outbox_backoff_base * 2
+
+
+def test_delivery_outcomes():
+    requests = []
+
+    def ok(request):
+        requests.append(request)
+        return httpx.Response(200, json={})
+
+    assert deliver(make_message(), ok) is None
+    assert requests[0].url == f"{settings.delivery_service_url}/assignments/"
+
+    assert deliver(make_message(), lambda r: httpx.Response(503)).retryable
+    assert deliver(make_message(), lambda r: httpx.Response(429)).retryable
+    assert not deliver(make_message(), lambda r: httpx.Response(400)).retryable
+    assert not deliver(make_message(destination="nowhere"), ok).retryable
+
+    def unreachable(request):
+        raise httpx.ConnectError("connection refused", request=request)
+
+    assert deliver(make_message(), unreachable).retryable
+
+
+def test_failures_back_off_then_give_up():
+    dispatcher = OutboxDispatcher(max_attempts=3)
+    message = make_message()
+
+    dispatcher._record_failure(message, DeliveryFailure("HTTP 503", retryable=True), NOW)
+    assert message.attempts == 1 and message.dead_at is None and message.available_at > NOW
+
+    dispatcher._record_failure(message, DeliveryFailure("HTTP 503", retryable=True), NOW)
+    dispatcher._record_failure(message, DeliveryFailure("HTTP 503", retryable=True), NOW)
+    assert message.attempts == 3 and message.dead_at == NOW
+
+    rejected = make_message()
+    dispatcher._record_failure(rejected, DeliveryFailure("HTTP 400", retryable=False), NOW)
+    assert rejected.attempts == 1 and rejected.dead_at == NOW
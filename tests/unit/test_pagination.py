@@ -0,0 +1,54 @@
+from datetime import datetime, timezone
+from uuid import uuid4
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from shared.database import get_db
+from shared.pagination import InvalidCursorError, Page, decode_cursor, encode_cursor, page_size
+from user_service.routers import orders
+
+
+def test_cursor_round_trip():
+    created_at = datetime(2024, 5, 1, 12, 30, 15, 123456, tzinfo=timezone.utc)
+    row_id = uuid4()
+
+    cursor = encode_cursor(created_at, row_id)
+
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == (created_at, row_id)
+
+
+@pytest.mark.parametrize("cursor", ["", "not-a-cursor", encode_cursor(datetime.now(), uuid4())[:-4]])
+def test_invalid_cursor_is_rejected(cursor):
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(cursor)
+
+
+def test_page_size_is_capped():
+    assert page_size(None) == 50
+    assert page_size(0) == 1
+    assert page_size(1000) == 100
+
+
+def test_page_map_keeps_cursors():
+    page = Page(items=[1, 2], cursors=["a", "b"], has_next_page=True)
+
+    mapped = page.map(str)
+
+    assert mapped.items == ["1", "2"]
+    assert mapped.end_cursor == "b"
+    assert mapped.has_next_page
+
+
+def test_rest_order_list_rejects_offset():
+    app = FastAPI()
+    app.include_router(orders.router)
+    app.dependency_overrides[get_db] = lambda: None
+    client = TestClient(app)
+
+    response = client.get("/orders/", params={"offset": 20}, headers={"X-User-Id": str(uuid4())})
+
+    assert response.status_code == 400
+    assert "cursor" in response.json()["detail"]
@@ -0,0 +1,88 @@
+import json
+
+import pytest
+import strawberry
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from shared.gql import PERSISTED_QUERY_NOT_FOUND, PersistedQueryRouter, PersistedQueryStore, query_hash
+
+QUERY = "query Hello($name: String!) { hello(name: $name) }"
+
+
+@strawberry.type
+class Query:
+    @strawberry.field
+    def hello(self, name: str) -> str:
+        return f"Hello {name}"
+
+
+def make_client(store=None):
+    app = FastAPI()
+    app.include_router(PersistedQueryRouter(strawberry.Schema(query=Query), store=store), prefix="/graphql")
+    return TestClient(app)
+
+
+def persisted(sha256_hash, query=None):
+    body = {
+        "variables": {"name": "Ada"},
+        "extensions": {"persistedQuery": {"version": 1, "sha256Hash": sha256_hash}},
+    }
+    if query is not None:
+        body["query"] = query
+    return body
+
+
+def test_unknown_hash_is_registered_on_retry_then_served_by_hash():
+    store = PersistedQueryStore()
+    client = make_client(store)
+    sha256_hash = query_hash(QUERY)
+
+    missed = client.post("/graphql", json=persisted(sha256_hash)).json()
+    assert missed["data"] is None
+    assert missed["errors"][0]["message"] == PERSISTED_QUERY_NOT_FOUND
+    assert missed["errors"][0]["extensions"]["code"] == "PERSISTED_QUERY_NOT_FOUND"
+
+    registered = client.post("/graphql", json=persisted(sha256_hash, QUERY)).json()
+    assert registered == {"data": {"hello": "Hello Ada"}}
+    assert store.get(sha256_hash) == QUERY
+
+    by_hash = client.post("/graphql", json=persisted(sha256_hash)).json()
+    assert by_hash == {"data": {"hello": "Hello Ada"}}
+
+    # GET carries extensions and variables as JSON-encoded parameters
+    got = client.get("/graphql", params={
+        "extensions": json.dumps(persisted(sha256_hash)["extensions"]),
+        "variables": json.dumps({"name": "Grace"}),
+    }).json()
+    assert got == {"data": {"hello": "Hello Grace"}}
+
+
+def test_query_not_matching_its_hash_is_rejected_and_not_stored():
+    store = PersistedQueryStore()
+    client = make_client(store)
+    wrong_hash = query_hash("{ __typename }")
+
+    response = client.post("/graphql", json=persisted(wrong_hash, QUERY)).json()
+
+    assert response["errors"][0]["extensions"]["code"] == "BAD_USER_INPUT"
+    assert len(store) == 0
+
+
+def test_store_evicts_least_recently_used():
+    store = PersistedQueryStore(maxsize=2)
+    store.put("a", "{ a }")
+    store.put("b", "{ b }")
+    store.get("a")
+    store.put("c", "{ c }")
+
+    assert store.get("a") == "{ a }"
+    assert store.get("b") is None
+
+
+@pytest.mark.parametrize("extensions", ["{not json", "[1, 2]", "1"])
+def test_malformed_get_extensions_are_a_bad_request(extensions):
+    response = make_client().get("/graphql", params={"query": QUERY, "extensions": extensions})
+
+    assert response.status_code == 400
+    assert response.json()["errors"][0]["extensions"]["code"] == "BAD_REQUEST"
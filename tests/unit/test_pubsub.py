@@ -0,0 +1,57 @@
+import asyncio
+
+from shared.pubsub import Hub
+
+
+def test_messages_reach_only_their_channel():
+    hub = Hub("test")
+    first, other = hub.subscribe("a"), hub.subscribe("b")
+
+    assert hub.publish("a", "status", {"status": "preparing"}) == 1
+    assert hub.publish("nobody", "status", {}) == 0
+
+    message = asyncio.run(first.get(timeout=0.01))
+    assert (message.kind, message.data) == ("status", {"status": "preparing"})
+    assert asyncio.run(other.get(timeout=0.01)) is None
+
+
+def test_slow_subscriber_loses_the_oldest_messages():
+    hub = Hub("test", buffer_size=3)
+    subscriber = hub.subscribe("a")
+
+    for i in range(5):
+        hub.publish("a", "status", i)
+
+    assert [m.data for m in subscriber._messages] == [2, 3, 4]
+
+
+def test_coalesced_messages_replace_the_pending_one():
+    hub = Hub("test")
+    subscriber = hub.subscribe("a")
+
+    hub.publish("a", "location", 1, coalesce=True)
+    hub.publish("a", "status", "picked_up")
+    hub.publish("a", "location", 2, coalesce=True)
+
+    assert [(m.kind, m.data) for m in subscriber._messages] == [("status", "picked_up"), ("location", 2)]
+
+
+def test_waiting_subscriber_is_woken_and_closing_ends_iteration():
+    hub = Hub("test")
+    subscriber = hub.subscribe("a")
+
+    async def scenario():
+        async def produce():
+            await asyncio.sleep(0.01)
+            hub.publish("a", "status", "ready")
+            await asyncio.sleep(0.01)
+            subscriber.close()
+
+        producer = asyncio.create_task(produce())
+        received = [message.data async for message in subscriber]
+        await producer
+        return received
+
+    assert asyncio.run(scenario()) == ["ready"]
+    assert not hub.has_subscribers("a")
+    assert hub.keys() == []
@@ -0,0 +1,98 @@
+"""
+Unit tests for the static GraphQL query cost estimator
+"""
+
+from typing import List, Optional
+
+import pytest
+import strawberry
+from graphql import parse
+
+from shared.gql import QueryCostLimiter, estimate_cost
+
+
+@strawberry.type
+class Item:
+    id: int
+
+
+@strawberry.type
+class Restaurant:
+    id: int
+
+    @strawberry.field
+    def menu_items(self) -> List[Item]:
+        return [Item(id=1)]
+
+
+@strawberry.input
+class PaginationInput:
+    limit: int = 50
+    offset: int = 0
+
+
+@strawberry.type
+class RestaurantConnection:
+    items: List[Restaurant]
+    total_count: int
+
+
+@strawberry.type
+class Query:
+    @strawberry.field
+    def restaurants(self, pagination: Optional[PaginationInput] = None) -> RestaurantConnection:
+        return RestaurantConnection(items=[Restaurant(id=1)], total_count=1)
+
+    @strawberry.field
+    def restaurant(self) -> Restaurant:
+        return Restaurant(id=1)
+
+
+class TightBudget(QueryCostLimiter):
+    max_cost = 100
+    default_list_size = 10
+
+
+schema = strawberry.Schema(query=Query, extensions=[TightBudget])
+
+
+def cost(query, variables=None):
+    return estimate_cost(schema._schema, parse(query), None, variables, default_list_size=10)
+
+
+def test_scalars_are_free():
+    assert cost("{ restaurant { id } }") == 1
+
+
+def test_unbounded_lists_use_default_size():
+    assert cost("{ restaurant { menuItems { id } } }") == 1 + 10
+
+
+def test_connection_limit_applies_to_items():
+    query = "query($p: PaginationInput) { restaurants(pagination: $p) { totalCount items { menuItems { id } } } }"
+    assert cost(query, {"p": {"limit": 5}}) == 1 + 5 * (1 + 10)
+
+
+def test_fragments_are_counted():
+    query = """
+        { restaurants(pagination: {limit: 2}) { items { ...R } } }
+        fragment R on Restaurant { id menuItems { id } }
+    """
+    assert cost(query) == 1 + 2 * (1 + 10)
+
+
+@pytest.mark.asyncio
+async def test_expensive_query_is_rejected_before_execution():
+    result = await schema.execute("{ restaurants(pagination: {limit: 50}) { items { menuItems { id } } } }")
+
+    assert result.data is None
+    assert result.errors[0].extensions["code"] == "QUERY_TOO_EXPENSIVE"
+    assert result.extensions["cost"] == {"requested": 551, "maximum": 100}
+
+
+@pytest.mark.asyncio
+async def test_cost_is_reported_for_accepted_queries():
+    result = await schema.execute("{ restaurant { id } }")
+
+    assert result.errors is None
+    assert result.extensions["cost"] == {"requested": 1, "maximum": 100}
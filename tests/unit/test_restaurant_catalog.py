@@ -0,0 +1,42 @@
+import asyncio
+import json
+from datetime import datetime
+from uuid import uuid4
+
+from shared.opening_hours import weekly_intervals
+from user_service.schemas import RestaurantResponse
+from user_service.services.catalog import CatalogEntry, RestaurantCatalog
+
+MONDAY_NOON = datetime(2024, 1, 1, 12, 0)
+MONDAY_1AM = datetime(2024, 1, 1, 1, 0)
+TUESDAY_1AM = datetime(2024, 1, 2, 1, 0)
+
+
+def make_entry(name, operation_hours):
+    restaurant = RestaurantResponse(
+        id=uuid4(), name=name, cuisine_type="thai", address={"city": "Springfield"},
+        is_online=True, operation_hours=operation_hours, menu_items=[]
+    )
+    return CatalogEntry(
+        restaurant=restaurant,
+        intervals=weekly_intervals(operation_hours),
+        json=restaurant.model_dump_json().encode("utf-8")
+    )
+
+
+def test_listing_is_served_from_the_snapshot():
+    catalog = RestaurantCatalog()
+    catalog._entries = [
+        make_entry("Lunch", {"monday": {"open": "11:00", "close": "15:00"}}),
+        make_entry("Late night", {"monday": {"open": "22:00", "close": "03:00"}}),
+        make_entry("Always", None),
+    ]
+
+    at_noon = json.loads(asyncio.run(catalog.open_restaurants_json(MONDAY_NOON)))
+    at_monday_1am = json.loads(asyncio.run(catalog.open_restaurants_json(MONDAY_1AM)))
+    at_tuesday_1am = json.loads(asyncio.run(catalog.open_restaurants_json(TUESDAY_1AM)))
+
+    assert [r["name"] for r in at_noon] == ["Lunch", "Always"]
+    # Monday's late shift runs into Tuesday morning, not Monday morning
+    assert [r["name"] for r in at_monday_1am] == ["Always"]
+    assert [r["name"] for r in at_tuesday_1am] == ["Late night", "Always"]
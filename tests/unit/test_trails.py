@@ -0,0 +1,65 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from shared.trails import InvalidTrailError, TrailPoint, decode, encode, simplify
+
+START = datetime(2024, 1, 1, 12, 0, tzinfo=timezone.utc)
+
+
+def point(latitude, longitude, seconds):
+    return TrailPoint(latitude, longitude, START + timedelta(seconds=seconds))
+
+
+def test_round_trip_to_the_microdegree():
+    points = [point(40.758012, -73.985512, 0), point(40.758123, -73.985001, 4.5), point(40.759, -73.984, 9)]
+
+    data = encode(points)
+
+    assert len(data) == 20 + 12 * 2
+    assert decode(data) == points
+
+
+def test_appended_chunks_decode_in_time_order():
+    first = [point(40.0, -74.0, 0), point(40.001, -74.001, 4)]
+    second = [point(40.002, -74.002, 8)]
+    late = [point(40.0015, -74.0015, 6)]
+
+    decoded = decode(encode(first) + encode(second) + encode(late))
+
+    assert [p.recorded_at for p in decoded] == sorted(p.recorded_at for p in first + second + late)
+
+
+def test_long_gaps_start_a_new_chunk():
+    points = [point(40.0, -74.0, 0), point(40.0, -74.0, 60 * 24 * 3600)]
+
+    data = encode(points)
+
+    assert len(data) == 2 * 20
+    assert decode(data) == points
+
+
+def test_truncated_trail_is_rejected():
+    with pytest.raises(InvalidTrailError):
+        decode(encode([point(40.0, -74.0, 0), point(40.1, -74.1, 5)])[:-3])
+    assert decode(b"") == []
+
+
+def test_simplify_drops_points_on_a_straight_line():
+    points = [point(40.0 + i * 0.0001, -74.0, i) for i in range(50)]
+
+    assert simplify(points, tolerance_m=1.0) == [points[0], points[-1]]
+
+
+def test_simplify_keeps_corners():
+    east = [point(40.0, -74.0 + i * 0.0001, i) for i in range(20)]
+    north = [point(40.0 + i * 0.0001, east[-1].longitude, 20 + i) for i in range(1, 20)]
+
+    simplified = simplify(east + north, tolerance_m=2.0)
+
+    assert simplified == [east[0], east[-1], north[-1]]
+    # A jitter within tolerance is dropped, one beyond it is kept
+    wobble = east[:10] + [point(40.00001, east[10].longitude, 10)] + east[11:]
+    assert len(simplify(wobble, tolerance_m=2.0)) == 2
+    detour = east[:10] + [point(40.0005, east[10].longitude, 10)] + east[11:]
+    assert detour[10] in simplify(detour, tolerance_m=2.0)
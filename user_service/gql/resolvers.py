@@ -4,11 +4,12 @@ from uuid import UUID
 from fastapi import HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from shared.database import AsyncSessionLocal
-from user_service.services import OrderService, RestaurantService
+from shared.gql import selects
+from shared.gql.relay import build_connection, page_arguments
+from user_service.services import OrderService, RestaurantService, restaurant_catalog
 from user_service.schemas import OrderCreate
 from .types import (
-    Order, Restaurant, OrderConnection,
+    Order, Restaurant, OrderConnection, OrderEdge,
     OrderInput, PaginationInput
 )
 def convert_order_to_graphql(order_data):
@@ -62,23 +63,22 @@ def convert_restaurant_to_graphql(restaurant_data):
 class Query:
     @strawberry.field
     async def restaurants(self, info) -> List[Restaurant]:
-        """Get all available restaurants"""
-        async with AsyncSessionLocal() as db:
-            try:
-                service = RestaurantService(db)
-                restaurants = await service.get_online_restaurants()
-                return [convert_restaurant_to_graphql(r) for r in restaurants]
-            except Exception as e:
-                await db.rollback()
-                raise Exception(str(e))
+        """Get all available restaurants, from the in-memory catalog"""
+        try:
+            entries = await restaurant_catalog.open_restaurants()
+            return [convert_restaurant_to_graphql(entry.restaurant) for entry in entries]
+        except Exception as e:
+            raise Exception(str(e))
 
     @strawberry.field
     async def restaurant(self, info, restaurant_id: UUID) -> Optional[Restaurant]:
         """Get restaurant by ID with menu"""
-        async with AsyncSessionLocal() as db:
+        async with info.context.session() as db:
             try:
                 service = RestaurantService(db)
-                restaurant = await service.get_restaurant_with_menu(restaurant_id)
+                restaurant = await service.get_restaurant_by_id(
+                    restaurant_id, include_menu=selects(info, "menuItems")
+                )
                 return convert_restaurant_to_graphql(restaurant) if restaurant else None
             except Exception as e:
                 await db.rollback()
@@ -87,7 +87,7 @@ class Query:
     @strawberry.field
     async def order(self, info, order_id: UUID, user_id: UUID) -> Optional[Order]:
         """Get order by ID"""
-        async with AsyncSessionLocal() as db:
+        async with info.context.session() as db:
             try:
                 service = OrderService(db)
                 order = await service.get_order_by_id(order_id)
@@ -105,27 +105,25 @@ class Query:
         self, 
         info, 
         user_id: UUID, 
+        first: Optional[int] = None,
+        after: Optional[str] = None,
         pagination: Optional[PaginationInput] = None
     ) -> OrderConnection:
-        """Get user orders with pagination"""
-        async with AsyncSessionLocal() as db:
+        """Get user orders, newest first, with cursor pagination"""
+        async with info.context.session() as db:
             try:
                 service = OrderService(db)
                 
-                limit = pagination.limit if pagination else 50
-                offset = pagination.offset if pagination else 0
-                limit = min(limit, 100)  # Cap at 100
-                
-                orders = await service.get_user_orders(user_id, limit + 1, offset)
+                limit = page_arguments(first, pagination)
+                page = await service.get_user_orders(user_id, limit, after)
                 
-                has_next_page = len(orders) > limit
-                if has_next_page:
-                    orders = orders[:limit]
+                total_count = 0
+                if selects(info, "totalCount"):
+                    total_count = await service.count_user_orders(user_id)
                 
-                return OrderConnection(
-                    items=[convert_order_to_graphql(order) for order in orders],
-                    total_count=len(orders),
-                    has_next_page=has_next_page
+                return build_connection(
+                    OrderConnection, OrderEdge,
+                    page.map(convert_order_to_graphql), total_count
                 )
             except Exception as e:
                 await db.rollback()
@@ -140,7 +138,7 @@ class Mutation:
         order_input: OrderInput
     ) -> Order:
         """Create a new order"""
-        async with AsyncSessionLocal() as db:
+        async with info.context.session() as db:
             try:
                 service = OrderService(db)
                 
@@ -158,7 +156,8 @@ class Mutation:
                     special_instructions=order_input.special_instructions
                 )
                 
-                order = await service.create_order(user_id, order_data)
+                idempotency_key = info.context.request.headers.get("Idempotency-Key")
+                order = await service.create_order(user_id, order_data, idempotency_key)
                 return convert_order_to_graphql(order)
             except ValueError as e:
                 await db.rollback()
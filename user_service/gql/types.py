@@ -3,17 +3,10 @@ from typing import List, Optional
 from datetime import datetime
 from decimal import Decimal
 from uuid import UUID
-from enum import Enum
-@strawberry.enum
-class OrderStatus(Enum):
-    PENDING = "pending"
-    ACCEPTED = "accepted"
-    REJECTED = "rejected"
-    PREPARING = "preparing"
-    READY = "ready"
-    PICKED_UP = "picked_up"
-    DELIVERED = "delivered"
-    CANCELLED = "cancelled"
+
+from shared import order_state
+from shared.gql.relay import PageInfo
+OrderStatus = strawberry.enum(order_state.OrderStatus)
 @strawberry.type
 class OrderItem:
     id: UUID
@@ -64,7 +57,13 @@ class OrderInput:
     items: List[OrderItemInput]
     special_instructions: Optional[str] = None
 @strawberry.type
+class OrderEdge:
+    cursor: str
+    node: Order
+@strawberry.type
 class OrderConnection:
+    edges: List[OrderEdge]
+    page_info: PageInfo
     items: List[Order]
     total_count: int
     has_next_page: bool
@@ -1,5 +1,6 @@
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from contextlib import asynccontextmanager
 import logging
 import sys
@@ -10,9 +11,14 @@ sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
 from shared.database import engine, Base
 from shared.config import settings
+from shared.metrics import metrics
+from shared.outbox import outbox_dispatcher
+from shared.events import event_bus
 from user_service.routers import restaurants_router, orders_router, ratings_router
+from user_service.services import restaurant_catalog, order_tracker
 
-from strawberry.fastapi import GraphQLRouter
+from shared.gql import PersistedQueryRouter
+from shared.gql.context import get_context
 from user_service.gql import schema
 
 # Configure logging
@@ -30,11 +36,20 @@ async def lifespan(app: FastAPI):
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
     
+    await event_bus.start()
+    await restaurant_catalog.start()
+    await order_tracker.start()
+    await outbox_dispatcher.start()
+    
     logger.info("User Service startup complete")
     
     yield
     
     logger.info("User Service shutting down...")
+    await outbox_dispatcher.stop()
+    await order_tracker.stop()
+    await restaurant_catalog.stop()
+    await event_bus.stop()
     await engine.dispose()
     logger.info("User Service shutdown complete")
 
@@ -58,7 +73,7 @@ app.include_router(restaurants_router)
 app.include_router(orders_router)
 app.include_router(ratings_router)
 
-graphql_app = GraphQLRouter(schema)
+graphql_app = PersistedQueryRouter(schema, context_getter=get_context)
 app.include_router(graphql_app, prefix="/graphql")
 
 @app.get("/health")
@@ -70,6 +85,11 @@ async def health_check():
         "version": "1.0.0"
     }
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics_endpoint():
+    """Prometheus metrics endpoint"""
+    return metrics.render()
+
 @app.get("/")
 async def root():
     """Root endpoint"""
@@ -83,6 +103,7 @@ async def root():
             "ratings": "/ratings - Leave ratings for restaurants and delivery",
             "graphql": "/graphql - GraphQL API endpoint",
             "health": "/health - Service health check",
+            "metrics": "/metrics - Prometheus metrics",
             "docs": "/docs - API documentation"
         }
     }
@@ -1,11 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException, Header
+from fastapi import APIRouter, Depends, HTTPException, Header, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from uuid import UUID
 import logging
 
 from shared.database import get_db
-from user_service.services import OrderService
+from shared.pagination import InvalidCursorError, page_size
+from user_service.services import OrderService, IdempotencyKeyMismatchError, order_tracker
 from user_service.schemas import OrderCreate, OrderResponse
 
 logger = logging.getLogger(__name__)
@@ -23,17 +25,22 @@ async def get_current_user_id(x_user_id: str = Header(...)) -> UUID:
 async def create_order(
     order_data: OrderCreate,
     user_id: UUID = Depends(get_current_user_id),
+    idempotency_key: Optional[str] = Header(None),
     db: AsyncSession = Depends(get_db)
 ) -> OrderResponse:
     """
     Create a new order.
     
-    Requires X-User-Id header for authentication.
+    Requires X-User-Id header for authentication. Send an Idempotency-Key
+    header to make retries safe: repeating a request with the same key
+    returns the original order instead of creating another one.
     """
     try:
         service = OrderService(db)
-        order = await service.create_order(user_id, order_data)
+        order = await service.create_order(user_id, order_data, idempotency_key)
         return order
+    except IdempotencyKeyMismatchError as e:
+        raise HTTPException(status_code=422, detail=str(e))
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
@@ -65,21 +72,76 @@ async def get_order(
         logger.error(f"Error in get_order: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
+@router.get("/{order_id}/stream")
+async def stream_order(
+    order_id: UUID,
+    user_id: UUID = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_db)
+) -> StreamingResponse:
+    """
+    Follow an order live as server-sent events.
+    
+    Sends a `snapshot` event with the current status (and the agent's
+    position while out for delivery), then `status`, `agent` and
+    `location` events as they happen. The stream ends once the order is
+    delivered or cancelled.
+    """
+    # Subscribe before reading the snapshot so no change falls in between
+    subscriber = order_tracker.watch(order_id)
+    try:
+        snapshot = await order_tracker.snapshot(db, order_id)
+        
+        if not snapshot:
+            raise HTTPException(status_code=404, detail="Order not found")
+        
+        # Verify order belongs to user
+        if snapshot["user_id"] != user_id:
+            raise HTTPException(status_code=403, detail="Access denied")
+    except HTTPException:
+        subscriber.close()
+        raise
+    except Exception as e:
+        subscriber.close()
+        logger.error(f"Error in stream_order: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+    
+    return StreamingResponse(
+        order_tracker.stream(subscriber, snapshot),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @router.get("/", response_model=List[OrderResponse])
 async def get_user_orders(
+    response: Response,
     user_id: UUID = Depends(get_current_user_id),
     limit: int = 50,
-    offset: int = 0,
+    cursor: Optional[str] = None,
+    offset: Optional[int] = None,
     db: AsyncSession = Depends(get_db)
 ) -> List[OrderResponse]:
-    """Get all orders for the current user"""
+    """
+    Get the current user's orders, newest first.
+    
+    Pass the X-Next-Cursor response header back as `cursor` to fetch the next page.
+    `offset` is no longer supported; it is rejected rather than ignored so old
+    clients don't silently get the first page again.
+    """
+    if offset:
+        raise HTTPException(
+            status_code=400,
+            detail="Offset pagination is not supported here, page with `cursor` instead"
+        )
+    
     try:
-        if limit > 100:
-            limit = 100  # Prevent excessive data retrieval
-        
         service = OrderService(db)
-        orders = await service.get_user_orders(user_id, limit, offset)
-        return orders
+        page = await service.get_user_orders(user_id, page_size(limit), cursor)
+        
+        if page.has_next_page:
+            response.headers["X-Next-Cursor"] = page.end_cursor
+        return page.items
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error in get_user_orders: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
\ No newline at end of file
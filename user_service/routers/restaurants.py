@@ -1,32 +1,50 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
+from typing import Any, Dict, List, Optional
 import logging
 
 from shared.database import get_db
-from user_service.services import RestaurantService
-from user_service.schemas import RestaurantResponse
+from user_service.services import RestaurantService, restaurant_catalog
+from user_service.schemas import RestaurantResponse, RestaurantOpeningSoonResponse
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/restaurants", tags=["restaurants"])
 
 @router.get("/", response_model=List[RestaurantResponse])
-async def get_online_restaurants(
-    db: AsyncSession = Depends(get_db)
-) -> List[RestaurantResponse]:
+async def get_online_restaurants() -> Response:
     """
     Get all restaurants that are currently online and open.
     
-    Returns restaurants with their available menu items.
+    Returns restaurants with their available menu items, served from the
+    in-memory catalog snapshot.
     """
     try:
-        service = RestaurantService(db)
-        restaurants = await service.get_online_restaurants()
-        return restaurants
+        content = await restaurant_catalog.open_restaurants_json()
+        return Response(content=content, media_type="application/json")
     except Exception as e:
         logger.error(f"Error in get_online_restaurants: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
+@router.post("/catalog/invalidate", status_code=202)
+async def invalidate_catalog(event: Optional[Dict[str, Any]] = None):
+    """Force a catalog reload; restaurant and menu changes normally arrive as events"""
+    restaurant_catalog.invalidate()
+    logger.info(f"Restaurant catalog invalidated: {event or {}}")
+    return {"status": "refresh scheduled"}
+
+@router.get("/opening-soon", response_model=List[RestaurantOpeningSoonResponse])
+async def get_restaurants_opening_soon(
+    within_minutes: int = Query(30, ge=1, le=24 * 60),
+    db: AsyncSession = Depends(get_db)
+) -> List[RestaurantOpeningSoonResponse]:
+    """Get online restaurants that are closed now but open within the next `within_minutes`"""
+    try:
+        service = RestaurantService(db)
+        return await service.get_restaurants_opening_soon(within_minutes)
+    except Exception as e:
+        logger.error(f"Error in get_restaurants_opening_soon: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
 @router.get("/{restaurant_id}", response_model=RestaurantResponse)
 async def get_restaurant(
     restaurant_id: str,
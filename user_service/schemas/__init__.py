@@ -2,12 +2,12 @@ from .user import UserCreate, UserResponse
 from .order import (
     OrderCreate, OrderResponse, OrderItemCreate, OrderItemResponse,
     RatingCreate, RatingResponse, RestaurantResponse, MenuItemResponse,
-    OrderStatus
+    RestaurantOpeningSoonResponse, OrderStatus
 )
 
 __all__ = [
     "UserCreate", "UserResponse",
     "OrderCreate", "OrderResponse", "OrderItemCreate", "OrderItemResponse",
     "RatingCreate", "RatingResponse", "RestaurantResponse", "MenuItemResponse",
-    "OrderStatus"
+    "RestaurantOpeningSoonResponse", "OrderStatus"
 ]
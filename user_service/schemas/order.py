@@ -3,17 +3,9 @@ from typing import List, Optional, Dict, Any
 from uuid import UUID
 from datetime import datetime
 from decimal import Decimal
-from enum import Enum
-class OrderStatus(str, Enum):
-    PENDING = "pending"
-    ACCEPTED = "accepted"
-    REJECTED = "rejected"
-    PREPARING = "preparing"
-    READY = "ready"
-    PICKED_UP = "picked_up"
-    DELIVERED = "delivered"
-    CANCELLED = "cancelled"
-    
+
+from shared.order_state import OrderStatus
+
 class OrderItemCreate(BaseModel):
     menu_item_id: UUID
     quantity:   int
@@ -52,6 +44,8 @@ class OrderResponse(BaseModel):
     restaurant_id: UUID
     delivery_agent_id: Optional[UUID]
     status: OrderStatus
+    # Defaulted for responses stored before orders had a version (idempotent replays)
+    version: int = 1
     total_amount: Decimal
     delivery_address: Dict[str, Any]
     special_instructions: Optional[str]
@@ -112,3 +106,6 @@ class RestaurantResponse(BaseModel):
     
     class Config:
         from_attributes = True
+
+class RestaurantOpeningSoonResponse(RestaurantResponse):
+    opens_in_minutes: int
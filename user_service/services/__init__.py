@@ -1,4 +1,7 @@
 from .restaurant_service import RestaurantService
+from .catalog import RestaurantCatalog, restaurant_catalog
 from .order_service import OrderService
+from .idempotency_service import IdempotencyService, IdempotencyKeyMismatchError
+from .order_tracking import OrderTracker, order_tracker
 
-__all__ = ["RestaurantService", "OrderService"]
\ No newline at end of file
+__all__ = ["RestaurantService", "RestaurantCatalog", "restaurant_catalog", "OrderService", "IdempotencyService", "IdempotencyKeyMismatchError", "OrderTracker", "order_tracker"]
\ No newline at end of file
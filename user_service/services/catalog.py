@@ -0,0 +1,167 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import List, Optional
+import asyncio
+import logging
+
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload
+
+from shared.config import settings
+from shared.database import AsyncSessionLocal
+from shared.events import MenuChanged, RestaurantChanged, event_bus
+from shared.metrics import metrics
+from shared.models.restaurant import Restaurant, MenuItem
+from shared.opening_hours import Interval, is_open_at, minute_of_week, stored_intervals
+from ..schemas import RestaurantResponse
+
+logger = logging.getLogger(__name__)
+
+refresh_seconds = metrics.histogram(
+    "restaurant_catalog_refresh_seconds", "Time to reload the online restaurant catalog"
+)
+catalog_size = metrics.gauge(
+    "restaurant_catalog_restaurants", "Online restaurants in the catalog snapshot"
+)
+catalog_refreshes = metrics.counter(
+    "restaurant_catalog_refreshes_total", "Catalog reloads by trigger and outcome"
+)
+
+
+@dataclass(frozen=True)
+class CatalogEntry:
+    restaurant: RestaurantResponse
+    intervals: List[Interval]
+    json: bytes
+
+
+class RestaurantCatalog:
+    """In-memory snapshot of online restaurants and their available menus.
+
+    Listing restaurants is answered from the snapshot without touching
+    Postgres: each restaurant carries its minute-of-week opening ranges and
+    is serialized to JSON when the snapshot is built, so a request only
+    checks the clock.
+    A background task reloads the snapshot every `ttl` seconds, and sooner
+    after `invalidate()`, which restaurant and menu change events trigger;
+    invalidations arriving within `settle_delay` of each other are folded
+    into a single reload.
+    """
+
+    def __init__(
+        self,
+        ttl: float = settings.restaurant_catalog_ttl,
+        settle_delay: float = settings.restaurant_catalog_settle_delay
+    ):
+        self.ttl = ttl
+        self.settle_delay = settle_delay
+        self._entries: Optional[List[CatalogEntry]] = None
+        self._loaded_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+        self._invalidated = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._listener: Optional[asyncio.Task] = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._entries is not None
+
+    async def refresh(self, trigger: str = "manual") -> None:
+        """Reload the snapshot from the database and swap it in"""
+        async with self._lock:
+            started = asyncio.get_running_loop().time()
+            try:
+                async with AsyncSessionLocal() as db:
+                    stmt = (
+                        select(Restaurant)
+                        .options(
+                            selectinload(Restaurant.menu_items.and_(MenuItem.is_available == True)),
+                            selectinload(Restaurant.opening_hours)
+                        )
+                        .where(Restaurant.is_online == True)
+                        .order_by(Restaurant.created_at, Restaurant.id)
+                    )
+                    restaurants = (await db.execute(stmt)).scalars().all()
+                    entries = [self._build_entry(restaurant) for restaurant in restaurants]
+            except Exception as e:
+                catalog_refreshes.inc(trigger=trigger, outcome="error")
+                logger.error(f"Error refreshing restaurant catalog: {e}")
+                raise
+
+            self._entries = entries
+            self._loaded_at = asyncio.get_running_loop().time()
+            refresh_seconds.observe(self._loaded_at - started)
+            catalog_size.set(len(entries))
+            catalog_refreshes.inc(trigger=trigger, outcome="ok")
+            logger.info(f"Restaurant catalog refreshed ({trigger}): {len(entries)} online restaurants")
+
+    def _build_entry(self, restaurant: Restaurant) -> CatalogEntry:
+        response = RestaurantResponse.model_validate(restaurant)
+        return CatalogEntry(
+            restaurant=response,
+            intervals=stored_intervals([row.minutes for row in restaurant.opening_hours], restaurant.operation_hours),
+            json=response.model_dump_json().encode("utf-8")
+        )
+
+    async def open_restaurants(self, now: Optional[datetime] = None) -> List[CatalogEntry]:
+        """Online restaurants open at `now` (default: the current local time)"""
+        if self._entries is None:
+            # Only until the first load; after that a stale snapshot is served
+            await self.refresh(trigger="cold")
+
+        minute = minute_of_week(now or datetime.now())
+        return [entry for entry in self._entries if is_open_at(entry.intervals, minute)]
+
+    async def open_restaurants_json(self, now: Optional[datetime] = None) -> bytes:
+        """The open restaurants as a JSON array, stitched from pre-serialized entries"""
+        entries = await self.open_restaurants(now)
+        return b"[" + b",".join(entry.json for entry in entries) + b"]"
+
+    def invalidate(self) -> None:
+        """Schedule a reload, e.g. after a restaurant or menu changed"""
+        self._invalidated.set()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._invalidated.wait(), timeout=self.ttl)
+                trigger = "invalidated"
+                await asyncio.sleep(self.settle_delay)
+            except asyncio.TimeoutError:
+                trigger = "ttl"
+            self._invalidated.clear()
+
+            try:
+                await self.refresh(trigger=trigger)
+            except Exception:
+                # Keep serving the previous snapshot and retry on the next tick
+                pass
+
+    async def _follow_changes(self) -> None:
+        async with event_bus.subscribe(MenuChanged.topic, RestaurantChanged.topic) as changes:
+            async for _ in changes:
+                self.invalidate()
+
+    async def start(self) -> None:
+        """Load the first snapshot and start the background refresher"""
+        if self._task is not None:
+            return
+        self._listener = asyncio.create_task(self._follow_changes())
+        try:
+            await self.refresh(trigger="startup")
+        except Exception:
+            logger.warning("Restaurant catalog will be loaded on first use")
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        tasks = [task for task in (self._task, self._listener) if task is not None]
+        self._task = self._listener = None
+        for task in tasks:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+
+restaurant_catalog = RestaurantCatalog()
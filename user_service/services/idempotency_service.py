@@ -0,0 +1,139 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import null, select, update
+from sqlalchemy.dialects.postgresql import insert
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Tuple
+from uuid import UUID
+import hashlib
+import json
+import logging
+
+from shared.config import settings
+from shared.models.idempotency import IdempotencyKey
+from ..schemas import OrderCreate, OrderResponse
+
+logger = logging.getLogger(__name__)
+
+MAX_KEY_LENGTH = 255
+
+
+class IdempotencyKeyMismatchError(ValueError):
+    """The key was already used for a different request body"""
+
+
+def request_fingerprint(order_data: OrderCreate) -> str:
+    """Stable hash of an order request, to catch a key reused for another order"""
+    body = json.dumps(order_data.model_dump(mode="json"), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(body.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """In-process LRU in front of the idempotency table.
+
+    Entries are only added once their transaction has committed, so a hit
+    is always a response the database also has. Each entry keeps the key's
+    created_at, and one created before `cutoff` is a miss, as it is for
+    the database once the key has expired.
+    """
+
+    def __init__(self, maxsize: int = settings.idempotency_cache_size):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[Tuple[UUID, str], Tuple[str, dict, datetime]]" = OrderedDict()
+
+    def get(self, user_id: UUID, key: str, cutoff: Optional[datetime] = None) -> Optional[Tuple[str, dict]]:
+        entry = self._entries.get((user_id, key))
+        if entry is None:
+            return None
+        request_hash, response, created_at = entry
+        if cutoff is not None and created_at < cutoff:
+            del self._entries[(user_id, key)]
+            return None
+        self._entries.move_to_end((user_id, key))
+        return request_hash, response
+
+    def put(self, user_id: UUID, key: str, request_hash: str, response: dict, created_at: datetime) -> None:
+        self._entries[(user_id, key)] = (request_hash, response, created_at)
+        self._entries.move_to_end((user_id, key))
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+response_cache = ResponseCache()
+
+
+class IdempotencyService:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    def _cutoff(self) -> datetime:
+        return datetime.now(timezone.utc) - timedelta(hours=settings.idempotency_key_ttl_hours)
+
+    async def get_response(self, user_id: UUID, key: str, request_hash: str) -> Optional[OrderResponse]:
+        """The stored response for a key, or None if the key is new or expired"""
+        cutoff = self._cutoff()
+        cached = response_cache.get(user_id, key, cutoff)
+        if cached is None:
+            stmt = select(IdempotencyKey.request_hash, IdempotencyKey.response, IdempotencyKey.created_at).where(
+                IdempotencyKey.user_id == user_id,
+                IdempotencyKey.key == key,
+                IdempotencyKey.created_at >= cutoff,
+                IdempotencyKey.response.isnot(None)
+            )
+            row = (await self.db.execute(stmt)).one_or_none()
+            if row is None:
+                return None
+            cached = (row.request_hash, row.response)
+            response_cache.put(user_id, key, row.request_hash, row.response, row.created_at)
+
+        stored_hash, response = cached
+        if stored_hash != request_hash:
+            raise IdempotencyKeyMismatchError(
+                f"Idempotency-Key {key} was already used for a different request"
+            )
+        logger.info(f"Replaying stored response for Idempotency-Key {key}")
+        return OrderResponse.model_validate(response)
+
+    async def claim(self, user_id: UUID, key: str, request_hash: str) -> bool:
+        """Reserve a key in the current transaction; False if another request holds it.
+
+        The insert waits on a concurrent transaction holding the same key
+        and only returns once it has committed or rolled back. Expired keys
+        are reclaimed in place.
+        """
+        if len(key) > MAX_KEY_LENGTH:
+            raise ValueError(f"Idempotency-Key must be at most {MAX_KEY_LENGTH} characters")
+
+        stmt = insert(IdempotencyKey).values(user_id=user_id, key=key, request_hash=request_hash)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[IdempotencyKey.user_id, IdempotencyKey.key],
+            set_={
+                'request_hash': stmt.excluded.request_hash,
+                'order_id': null(),
+                'response': null(),
+                'created_at': stmt.excluded.created_at
+            },
+            where=IdempotencyKey.created_at < self._cutoff()
+        ).returning(IdempotencyKey.key)
+
+        result = await self.db.execute(stmt)
+        return result.scalar_one_or_none() is not None
+
+    async def complete(self, user_id: UUID, key: str, response: OrderResponse) -> None:
+        """Store the response for a claimed key, in the same transaction as the order"""
+        await self.db.execute(
+            update(IdempotencyKey)
+            .where(IdempotencyKey.user_id == user_id, IdempotencyKey.key == key)
+            .values(order_id=response.id, response=response.model_dump(mode="json"))
+        )
+
+    def remember(self, user_id: UUID, key: str, request_hash: str, response: OrderResponse) -> None:
+        """Cache a response after its transaction has committed.
+
+        The key was claimed in the order's transaction, so its created_at is
+        the transaction time the order was placed at.
+        """
+        response_cache.put(user_id, key, request_hash, response.model_dump(mode="json"), response.placed_at)
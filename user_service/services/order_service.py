@@ -1,87 +1,200 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import DECIMAL, Integer, SmallInteger, any_, bindparam, func, insert, literal, select, true
+from sqlalchemy.dialects.postgresql import ARRAY, UUID as PG_UUID
 from sqlalchemy.orm import selectinload
 from typing import List, Optional
+from datetime import datetime
 from decimal import Decimal
-import httpx
+from functools import partial
 import logging
+import uuid
 from uuid import UUID
 
-from shared.models.order import Order, OrderItem, Rating
+from shared.database import after_commit
+from shared.models.order import Order, OrderEvent, OrderItem, Rating
 from shared.models.restaurant import MenuItem
+from shared.events import OrderPlaced, publish
+from shared.order_state import STATUS_CODES, OrderStatus
+from shared.outbox import enqueue, outbox_dispatcher
+from shared.pagination import Page, keyset_paginate, count_rows
+from .idempotency_service import IdempotencyService, request_fingerprint
 from ..schemas import (
-    OrderCreate, OrderResponse, RatingCreate, RatingResponse
+    OrderCreate, OrderResponse, OrderItemResponse, RatingCreate, RatingResponse
 )
 
 logger = logging.getLogger(__name__)
 
+
+def _array(rows: List[dict], key: str, item_type):
+    """One column of `rows` as a typed array parameter, for unnest()"""
+    return bindparam(None, [row[key] for row in rows], type_=ARRAY(item_type))
+
 class OrderService:
     def __init__(self, db: AsyncSession):
         self.db = db
     
-    async def create_order(self, user_id: UUID, order_data: OrderCreate) -> OrderResponse:
-        """Create a new order"""
+    async def create_order(
+        self,
+        user_id: UUID,
+        order_data: OrderCreate,
+        idempotency_key: Optional[str] = None
+    ) -> OrderResponse:
+        """Create a new order.
+
+        Checkout costs three round trips whatever the cart size: one query
+        prices every item, one statement inserts the order with its items,
+        one queues the restaurant notification in the outbox. Nothing waits
+        on the restaurant service.
+        With an `idempotency_key`, retrying a request that already succeeded
+        returns the stored response instead of placing the order again.
+        """
+        idempotency = IdempotencyService(self.db)
+        request_hash = None
+        
+        if idempotency_key:
+            request_hash = request_fingerprint(order_data)
+            replay = await idempotency.get_response(user_id, idempotency_key, request_hash)
+            if replay is not None:
+                return replay
+        
         try:
-            # Validate menu items and calculate total
-            total_amount = Decimal('0.00')
-            order_items_data = []
-            
-            for item in order_data.items:
-                # Fetch menu item details
-                stmt = select(MenuItem).where(
-                    MenuItem.id == item.menu_item_id,
-                    MenuItem.is_available == True
-                )
-                result = await self.db.execute(stmt)
-                menu_item = result.scalar_one_or_none()
-                
-                if not menu_item:
-                    raise ValueError(f"Menu item {item.menu_item_id} not found or unavailable")
-                
-                # Verify the menu item belongs to the specified restaurant
-                if menu_item.restaurant_id != order_data.restaurant_id:
-                    raise ValueError(f"Menu item {item.menu_item_id} does not belong to restaurant {order_data.restaurant_id}")
-                
-                item_total = menu_item.price * item.quantity
-                total_amount += item_total
-                
-                order_items_data.append({
-                    'menu_item_id': item.menu_item_id,
-                    'quantity': item.quantity,
-                    'unit_price': menu_item.price,
-                    'total_price': item_total
-                })
-            
-            # Create the order
-            db_order = Order(
-                user_id=user_id,
-                restaurant_id=order_data.restaurant_id,
-                total_amount=total_amount,
-                delivery_address=order_data.delivery_address,
-                special_instructions=order_data.special_instructions,
-                status='pending'
-            )
+            if idempotency_key and not await idempotency.claim(user_id, idempotency_key, request_hash):
+                # A concurrent retry with the same key committed first
+                replay = await idempotency.get_response(user_id, idempotency_key, request_hash)
+                if replay is None:
+                    raise ValueError(f"Idempotency-Key {idempotency_key} is already in use")
+                return replay
             
-            self.db.add(db_order)
-            await self.db.flush()
-
-            for item_data in order_items_data:
-                order_item = OrderItem(
-                    order_id=db_order.id,
-                    **item_data
-                )
-                self.db.add(order_item)
+            order = await self._place_order(user_id, order_data)
+            await self._notify_restaurant_service(order.id, order_data.restaurant_id)
+            await publish(self.db, OrderPlaced(order_id=order.id, user_id=user_id, restaurant_id=order.restaurant_id))
             
+            if idempotency_key:
+                await idempotency.complete(user_id, idempotency_key, order)
             await self.db.commit()
             
-            await self._notify_restaurant_service(db_order.id, order_data.restaurant_id)
-            
-            return await self.get_order_by_id(db_order.id)
-            
         except Exception as e:
             await self.db.rollback()
             logger.error(f"Error creating order: {e}")
             raise
+        
+        if idempotency_key:
+            # Within a GraphQL request the order is only committed with the
+            # request, so the cache must not hear of it before then
+            after_commit(self.db, partial(idempotency.remember, user_id, idempotency_key, request_hash, order))
+        outbox_dispatcher.wake()
+        
+        return order
+    
+    async def _place_order(self, user_id: UUID, order_data: OrderCreate) -> OrderResponse:
+        """Validate, price and insert an order without committing"""
+        order_items_data = await self._price_order_items(order_data)
+        total_amount = sum((item['total_price'] for item in order_items_data), Decimal('0.00'))
+        
+        order_values = {
+            'id': uuid.uuid4(),
+            'user_id': user_id,
+            'restaurant_id': order_data.restaurant_id,
+            'total_amount': total_amount,
+            'delivery_address': order_data.delivery_address,
+            'special_instructions': order_data.special_instructions,
+            'status': 'pending',
+            'version': 1
+        }
+        for item_data in order_items_data:
+            item_data['id'] = uuid.uuid4()
+        
+        placed_at = await self._insert_order(order_values, order_items_data)
+        
+        # Everything in the response is already known, no need to read it back
+        return OrderResponse(
+            **order_values,
+            delivery_agent_id=None,
+            placed_at=placed_at,
+            accepted_at=None,
+            delivered_at=None,
+            order_items=[OrderItemResponse(**item_data) for item_data in order_items_data]
+        )
+    
+    async def _price_order_items(self, order_data: OrderCreate) -> List[dict]:
+        """Validate every cart item against the menu with a single query"""
+        menu_item_ids = list({item.menu_item_id for item in order_data.items})
+        
+        # One array parameter, so the statement is the same for any cart size
+        stmt = select(MenuItem.id, MenuItem.restaurant_id, MenuItem.price).where(
+            MenuItem.id == any_(bindparam('menu_item_ids', menu_item_ids, type_=ARRAY(PG_UUID(as_uuid=True)))),
+            MenuItem.is_available == True
+        )
+        result = await self.db.execute(stmt)
+        menu_items = {row.id: row for row in result}
+        
+        order_items_data = []
+        for item in order_data.items:
+            menu_item = menu_items.get(item.menu_item_id)
+            
+            if not menu_item:
+                raise ValueError(f"Menu item {item.menu_item_id} not found or unavailable")
+            
+            # Verify the menu item belongs to the specified restaurant
+            if menu_item.restaurant_id != order_data.restaurant_id:
+                raise ValueError(f"Menu item {item.menu_item_id} does not belong to restaurant {order_data.restaurant_id}")
+            
+            order_items_data.append({
+                'menu_item_id': item.menu_item_id,
+                'quantity': item.quantity,
+                'unit_price': menu_item.price,
+                'total_price': menu_item.price * item.quantity
+            })
+        
+        return order_items_data
+    
+    async def _insert_order(self, order_values: dict, order_items_data: List[dict]) -> datetime:
+        """Insert an order, all of its items and its first timeline event in one statement, returning placed_at.
+
+        The order insert is a CTE and the items are unnested from array
+        parameters, so this is a single round trip with a fixed shape.
+        """
+        new_order = (
+            insert(Order)
+            .values(**order_values)
+            .returning(Order.id, Order.restaurant_id, Order.placed_at)
+            .cte('new_order')
+        )
+        
+        items = func.unnest(
+            _array(order_items_data, 'id', PG_UUID(as_uuid=True)),
+            _array(order_items_data, 'menu_item_id', PG_UUID(as_uuid=True)),
+            _array(order_items_data, 'quantity', Integer()),
+            _array(order_items_data, 'unit_price', DECIMAL(10, 2)),
+            _array(order_items_data, 'total_price', DECIMAL(10, 2))
+        ).table_valued('id', 'menu_item_id', 'quantity', 'unit_price', 'total_price').render_derived(name='item')
+        
+        new_items = (
+            insert(OrderItem)
+            .from_select(
+                ['id', 'order_id', 'menu_item_id', 'quantity', 'unit_price', 'total_price'],
+                select(
+                    items.c.id, new_order.c.id, items.c.menu_item_id,
+                    items.c.quantity, items.c.unit_price, items.c.total_price
+                ).select_from(new_order).join(items, true())
+            )
+            .cte('new_items')
+        )
+        
+        placed_event = (
+            insert(OrderEvent)
+            .from_select(
+                ['order_id', 'occurred_at', 'status', 'restaurant_id'],
+                select(
+                    new_order.c.id, new_order.c.placed_at,
+                    literal(STATUS_CODES[OrderStatus.PENDING], SmallInteger), new_order.c.restaurant_id
+                )
+            )
+            .cte('placed_event')
+        )
+        
+        result = await self.db.execute(select(new_order.c.placed_at).add_cte(new_items, placed_event))
+        return result.scalar_one()
     
     async def get_order_by_id(self, order_id: UUID) -> Optional[OrderResponse]:
         """Get order by ID with all details"""
@@ -104,26 +217,28 @@ class OrderService:
             logger.error(f"Error fetching order {order_id}: {e}")
             raise
     
-    async def get_user_orders(self, user_id: UUID, limit: int = 50, offset: int = 0) -> List[OrderResponse]:
-        """Get all orders for a user"""
+    def _user_orders_query(self, user_id: UUID):
+        return select(Order).where(Order.user_id == user_id)
+
+    async def get_user_orders(
+        self,
+        user_id: UUID,
+        limit: int = 50,
+        after: Optional[str] = None
+    ) -> Page[OrderResponse]:
+        """Get one page of a user's orders, newest first"""
         try:
-            stmt = (
-                select(Order)
-                .options(selectinload(Order.order_items))
-                .where(Order.user_id == user_id)
-                .order_by(Order.created_at.desc())
-                .limit(limit)
-                .offset(offset)
-            )
-            
-            result = await self.db.execute(stmt)
-            orders = result.scalars().all()
-            
-            return [OrderResponse.from_orm(order) for order in orders]
+            stmt = self._user_orders_query(user_id).options(selectinload(Order.order_items))
+            page = await keyset_paginate(self.db, stmt, Order, limit, after)
+            return page.map(OrderResponse.from_orm)
             
         except Exception as e:
             logger.error(f"Error fetching user orders for {user_id}: {e}")
             raise
+
+    async def count_user_orders(self, user_id: UUID) -> int:
+        """Count all orders for a user"""
+        return await count_rows(self.db, self._user_orders_query(user_id))
     
     async def create_rating(self, user_id: UUID, order_id: UUID, rating_data: RatingCreate) -> RatingResponse:
         """Create a rating for an order"""
@@ -169,16 +284,8 @@ class OrderService:
             raise
     
     async def _notify_restaurant_service(self, order_id: UUID, restaurant_id: UUID):
-        """Notify restaurant service about new order"""
-        try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"http://restaurant-service:8000/orders/{order_id}/notify",
-                    json={"restaurant_id": str(restaurant_id)},
-                    timeout=5.0
-                )
-                if response.status_code != 200:
-                    logger.warning(f"Failed to notify restaurant service: {response.status_code}")
-        except Exception as e:
-            logger.warning(f"Error notifying restaurant service: {e}")
-            pass
\ No newline at end of file
+        """Queue the new-order notification for the restaurant service in the order's transaction"""
+        await enqueue(
+            self.db, "restaurant", f"/orders/{order_id}/notify",
+            {"restaurant_id": str(restaurant_id)}, aggregate_id=order_id
+        )
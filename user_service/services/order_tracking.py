@@ -0,0 +1,177 @@
+from datetime import datetime
+from typing import AsyncIterator, Dict, Optional, Set
+from uuid import UUID
+import asyncio
+import json
+import logging
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from shared.config import settings
+from shared.events import AgentLocationsChanged, Event, OrderAssigned, OrderStatusChanged, event_bus
+from shared.geo import coordinates
+from shared.models import DeliveryAgent, Order
+from shared.models.order import DELIVERY_ACTIVE_STATUSES
+from shared.order_state import FINAL_STATUSES
+from shared.pubsub import Hub, Subscriber
+
+logger = logging.getLogger(__name__)
+
+
+def _json_default(value):
+    return value.isoformat() if isinstance(value, datetime) else str(value)
+
+
+def _sse(kind: str, data: dict) -> str:
+    return f"event: {kind}\ndata: {json.dumps(data, default=_json_default)}\n\n"
+
+
+def _location(location: Optional[dict]) -> Optional[dict]:
+    point = coordinates(location)
+    if point is None:
+        return None
+    return {"latitude": point[0], "longitude": point[1], "recorded_at": location.get("recorded_at")}
+
+
+class OrderTracker:
+    """Pushes an order's status changes and its agent's position to the customer.
+
+    Each open stream subscribes to the order's channel on an in-process
+    Hub. One event bus subscription per process feeds the hub: status and
+    assignment events go to the order's channel, and agent positions go to
+    the channels of the watched orders that agent is delivering. Positions
+    are coalesced, so a slow client only ever gets the latest one.
+    Customers no longer need to poll GET /orders/{order_id}.
+    """
+
+    def __init__(self, keepalive: float = settings.stream_keepalive):
+        self.keepalive = keepalive
+        self.hub = Hub("order_tracking")
+        # Agent of each watched order, and the watched orders of each agent
+        self._agent_of: Dict[UUID, UUID] = {}
+        self._orders_of: Dict[UUID, Set[UUID]] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    async def snapshot(self, db: AsyncSession, order_id: UUID) -> Optional[dict]:
+        """Current state of an order and, while it is out for delivery, where its agent is"""
+        stmt = (
+            select(
+                Order.user_id, Order.status, Order.delivery_agent_id, Order.updated_at,
+                DeliveryAgent.current_location
+            )
+            .outerjoin(DeliveryAgent, DeliveryAgent.id == Order.delivery_agent_id)
+            .where(Order.id == order_id)
+        )
+        row = (await db.execute(stmt)).one_or_none()
+        if row is None:
+            return None
+        return {
+            "order_id": order_id,
+            "user_id": row.user_id,
+            "status": row.status,
+            "delivery_agent_id": row.delivery_agent_id,
+            "updated_at": row.updated_at,
+            "location": _location(row.current_location) if row.status in DELIVERY_ACTIVE_STATUSES else None
+        }
+
+    def watch(self, order_id: UUID) -> Subscriber:
+        return self.hub.subscribe(order_id)
+
+    def _track_agent(self, order_id: UUID, agent_id: Optional[UUID]) -> None:
+        previous = self._agent_of.pop(order_id, None)
+        if previous is not None:
+            orders = self._orders_of.get(previous)
+            if orders is not None:
+                orders.discard(order_id)
+                if not orders:
+                    del self._orders_of[previous]
+        if agent_id is not None and self.hub.has_subscribers(order_id):
+            self._agent_of[order_id] = agent_id
+            self._orders_of.setdefault(agent_id, set()).add(order_id)
+
+    def _unwatch(self, subscriber: Subscriber) -> None:
+        subscriber.close()
+        if not self.hub.has_subscribers(subscriber.key):
+            self._track_agent(subscriber.key, None)
+
+    async def stream(self, subscriber: Subscriber, snapshot: dict) -> AsyncIterator[str]:
+        """Server-sent events for one watcher: the snapshot, then changes until the order is done"""
+        order_id = snapshot["order_id"]
+        try:
+            if snapshot["delivery_agent_id"] is not None and order_id not in self._agent_of:
+                self._track_agent(order_id, snapshot["delivery_agent_id"])
+
+            yield _sse("snapshot", {key: value for key, value in snapshot.items() if key != "user_id"})
+            if snapshot["status"] in FINAL_STATUSES:
+                return
+
+            while True:
+                message = await subscriber.get(timeout=self.keepalive)
+                if message is None:
+                    if subscriber.closed:
+                        return
+                    # Keeps proxies from timing out an idle stream
+                    yield ": keepalive\n\n"
+                    continue
+
+                yield _sse(message.kind, message.data)
+                if message.kind == "status" and message.data["status"] in FINAL_STATUSES:
+                    return
+        finally:
+            self._unwatch(subscriber)
+
+    def _handle(self, event: Event) -> None:
+        if isinstance(event, OrderStatusChanged):
+            if not self.hub.has_subscribers(event.order_id):
+                return
+            if event.delivery_agent_id is not None:
+                self._track_agent(event.order_id, event.delivery_agent_id)
+            self.hub.publish(event.order_id, "status", {
+                "status": event.status,
+                "delivery_agent_id": event.delivery_agent_id,
+                "occurred_at": event.occurred_at
+            })
+        elif isinstance(event, OrderAssigned):
+            if not self.hub.has_subscribers(event.order_id):
+                return
+            self._track_agent(event.order_id, event.delivery_agent_id)
+            self.hub.publish(event.order_id, "agent", {
+                "delivery_agent_id": event.delivery_agent_id,
+                "occurred_at": event.occurred_at
+            })
+        elif isinstance(event, AgentLocationsChanged):
+            for location in event.locations:
+                for order_id in self._orders_of.get(location.agent_id, ()):
+                    self.hub.publish(order_id, "location", {
+                        "latitude": location.latitude,
+                        "longitude": location.longitude,
+                        "recorded_at": location.recorded_at
+                    }, coalesce=True)
+
+    async def _follow(self) -> None:
+        topics = (OrderStatusChanged.topic, OrderAssigned.topic, AgentLocationsChanged.topic)
+        async with event_bus.subscribe(*topics, max_batch=500) as events:
+            async for batch in events:
+                for event in batch:
+                    try:
+                        self._handle(event)
+                    except Exception as e:
+                        logger.error(f"Error pushing {event.topic} event to order streams: {e}")
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._follow())
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self.hub.close()
+
+
+order_tracker = OrderTracker()
@@ -1,62 +1,38 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from sqlalchemy.orm import selectinload
+from sqlalchemy import and_, func, or_, select
+from sqlalchemy.orm import selectinload, noload
 from typing import List, Optional
-from datetime import datetime, time
-import httpx
+from datetime import datetime
 import logging
 
-from shared.models.restaurant import Restaurant, MenuItem
-from ..schemas import RestaurantResponse
+from shared.models.restaurant import Restaurant, MenuItem, RestaurantOpeningHours
+from shared.opening_hours import MINUTES_PER_WEEK, minute_of_week, upcoming_window
+from ..schemas import RestaurantResponse, RestaurantOpeningSoonResponse
 
 logger = logging.getLogger(__name__)
 
+MAX_OPENING_SOON_MINUTES = 24 * 60
+
+def _menu_loader(include_menu: bool):
+    """Eager-load menu items, or leave them empty when the caller doesn't need them"""
+    return selectinload(Restaurant.menu_items) if include_menu else noload(Restaurant.menu_items)
+
+def _open_at(minute: int):
+    """IDs of restaurants open at a minute of the week (GiST index on minutes)"""
+    return select(RestaurantOpeningHours.restaurant_id).where(
+        RestaurantOpeningHours.minutes.contains(minute)
+    )
+
 class RestaurantService:
     def __init__(self, db: AsyncSession):
         self.db = db
     
-    async def get_online_restaurants(self) -> List[RestaurantResponse]:
-        """Get all restaurants that are currently online and within operating hours"""
-        try:
-            # Query for online restaurants with their menu items
-            stmt = (
-                select(Restaurant)
-                .options(selectinload(Restaurant.menu_items))
-                .where(Restaurant.is_online == True)
-            )
-            
-            result = await self.db.execute(stmt)
-            restaurants = result.scalars().all()
-            
-            # Filter by operating hours
-            current_time = datetime.now().time()
-            current_day = datetime.now().strftime('%A').lower()
-            
-            online_restaurants = []
-            for restaurant in restaurants:
-                if self._is_restaurant_open(restaurant, current_day, current_time):
-                    # Filter available menu items
-                    available_items = [
-                        item for item in restaurant.menu_items 
-                        if item.is_available
-                    ]
-                    
-                    restaurant_data = RestaurantResponse.from_orm(restaurant)
-                    restaurant_data.menu_items = available_items
-                    online_restaurants.append(restaurant_data)
-            
-            return online_restaurants
-            
-        except Exception as e:
-            logger.error(f"Error fetching online restaurants: {e}")
-            raise
-    
-    async def get_restaurant_by_id(self, restaurant_id: str) -> Optional[RestaurantResponse]:
+    async def get_restaurant_by_id(self, restaurant_id: str, include_menu: bool = True) -> Optional[RestaurantResponse]:
         """Get a specific restaurant by ID"""
         try:
             stmt = (
                 select(Restaurant)
-                .options(selectinload(Restaurant.menu_items))
+                .options(_menu_loader(include_menu))
                 .where(Restaurant.id == restaurant_id)
             )
             
@@ -72,25 +48,60 @@ class RestaurantService:
             logger.error(f"Error fetching restaurant {restaurant_id}: {e}")
             raise
     
-    def _is_restaurant_open(self, restaurant: Restaurant, current_day: str, current_time: time) -> bool:
-        """Check if restaurant is open based on operating hours"""
-        if not restaurant.operation_hours:
-            return True  # Assume open if no hours specified
-        
-        day_hours = restaurant.operation_hours.get(current_day)
-        if not day_hours:
-            return False  # Closed if no hours for current day
-        
+    async def get_restaurants_opening_soon(
+        self,
+        within_minutes: int,
+        at: Optional[datetime] = None
+    ) -> List[RestaurantOpeningSoonResponse]:
+        """Online restaurants that are closed now but open within `within_minutes`, soonest first.
+
+        This reads only `restaurant_opening_hours`, so restaurants whose rows
+        were never backfilled (see migration 5b3e9d1c4a7f) are left out.
+        """
         try:
-            open_time = datetime.strptime(day_hours['open'], '%H:%M').time()
-            close_time = datetime.strptime(day_hours['close'], '%H:%M').time()
+            minute = minute_of_week(at or datetime.now())
+            within_minutes = max(1, min(within_minutes, MAX_OPENING_SOON_MINUTES))
+            starts = func.lower(RestaurantOpeningHours.minutes)
             
-            # Handle overnight hours (e.g., 22:00 to 02:00)
-            if close_time < open_time:
-                return current_time >= open_time or current_time <= close_time
-            else:
-                return open_time <= current_time <= close_time
-                
-        except (KeyError, ValueError):
-            logger.warning(f"Invalid operating hours format for restaurant {restaurant.id}")
-            return True  # Default to open if format is invalid
+            # Ranges starting inside the window; the overlap test uses the GiST index
+            starts_in_window = or_(*[
+                and_(
+                    RestaurantOpeningHours.minutes.overlaps(func.int4range(start, end)),
+                    starts >= start,
+                    starts < end
+                )
+                for start, end in upcoming_window(minute, within_minutes)
+            ])
+            upcoming = (
+                select(
+                    RestaurantOpeningHours.restaurant_id,
+                    func.min((starts - minute + MINUTES_PER_WEEK) % MINUTES_PER_WEEK).label("opens_in")
+                )
+                .where(starts_in_window)
+                .group_by(RestaurantOpeningHours.restaurant_id)
+                .subquery()
+            )
+            
+            stmt = (
+                select(Restaurant, upcoming.c.opens_in)
+                .join(upcoming, upcoming.c.restaurant_id == Restaurant.id)
+                .options(selectinload(Restaurant.menu_items.and_(MenuItem.is_available == True)))
+                .where(
+                    Restaurant.is_online == True,
+                    Restaurant.id.not_in(_open_at(minute))
+                )
+                .order_by(upcoming.c.opens_in, Restaurant.id)
+            )
+            
+            result = await self.db.execute(stmt)
+            return [
+                RestaurantOpeningSoonResponse(
+                    **RestaurantResponse.model_validate(restaurant).model_dump(),
+                    opens_in_minutes=opens_in
+                )
+                for restaurant, opens_in in result.all()
+            ]
+            
+        except Exception as e:
+            logger.error(f"Error fetching restaurants opening soon: {e}")
+            raise
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Verify that each hot query is answered by the index meant for it.
+
+Runs EXPLAIN on the exact statements the services build and fails unless the
+plan scans the expected index. Sequential scans are disabled for the check,
+since on a small development database the planner would rightly prefer them;
+what we assert is that the index matches the query shape, including that
+ordered queries need no Sort step.
+
+Usage: python verify_indexes.py   (after `alembic upgrade head`)
+"""
+import asyncio
+import sys
+import uuid
+
+from sqlalchemy import select, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from shared.config import settings
+from shared.models import DeliveryAgent, MenuItem, Order, OrderItem, Restaurant
+from shared.pagination import keyset_query
+from user_service.services.order_service import OrderService as UserOrderService
+from user_service.services.restaurant_service import _open_at
+from restaurant_service.services.batch_dispatcher import BatchDispatcher
+from restaurant_service.services.order_service import OrderService as RestaurantOrderService
+from delivery_service.services.order_service import OrderService as DeliveryOrderService
+
+INDEX_SCANS = {"Index Scan", "Index Only Scan", "Bitmap Index Scan"}
+
+SOME_ID = uuid.uuid4()
+SOME_IDS = [uuid.uuid4() for _ in range(20)]
+
+
+def hot_queries():
+    """(description, statement, expected index, whether the index must provide the order)"""
+    user_orders = UserOrderService(None)
+    restaurant_orders = RestaurantOrderService(None)
+    delivery_orders = DeliveryOrderService(None)
+
+    return [
+        ("user order history",
+         keyset_query(user_orders._user_orders_query(SOME_ID), Order, 51),
+         "ix_orders_user_created", True),
+        ("restaurant orders",
+         keyset_query(restaurant_orders._restaurant_orders_query(str(SOME_ID)), Order, 51),
+         "ix_orders_restaurant_created", True),
+        ("restaurant orders by status",
+         keyset_query(restaurant_orders._restaurant_orders_query(str(SOME_ID), "pending"), Order, 51),
+         "ix_orders_restaurant_status_created", True),
+        ("restaurant active orders",
+         keyset_query(restaurant_orders._restaurant_orders_query(str(SOME_ID), "active"), Order, 51),
+         "ix_orders_restaurant_active", True),
+        ("agent orders",
+         keyset_query(delivery_orders._agent_orders_query(str(SOME_ID), active_only=False), Order, 51),
+         "ix_orders_agent_created", True),
+        ("agent active orders",
+         keyset_query(delivery_orders._agent_orders_query(str(SOME_ID), active_only=True), Order, 51),
+         "ix_orders_agent_active", True),
+        ("order items for a page of orders",
+         select(OrderItem).where(OrderItem.order_id.in_(SOME_IDS)),
+         "ix_orders_order_items_order_id", False),
+        ("restaurant menu",
+         select(MenuItem).where(MenuItem.restaurant_id == SOME_ID),
+         "ix_menu_items_restaurant_available_category", False),
+        ("available menu by category",
+         select(MenuItem).where(
+             MenuItem.restaurant_id == SOME_ID,
+             MenuItem.category == "mains",
+             MenuItem.is_available == True
+         ),
+         "ix_menu_items_restaurant_available_category", False),
+        ("online restaurants",
+         select(Restaurant).where(Restaurant.is_online == True)
+         .order_by(Restaurant.created_at, Restaurant.id).limit(50),
+         "ix_restaurants_online", True),
+        ("restaurants open at a minute of the week",
+         _open_at(600),
+         "ix_restaurant_opening_hours_minutes", False),
+        ("orders waiting for a delivery agent",
+         BatchDispatcher(max_orders=200)._waiting_orders_query(),
+         "ix_orders_awaiting_agent", True),
+        ("available delivery agents",
+         select(DeliveryAgent).where(DeliveryAgent.is_available == True)
+         .order_by(DeliveryAgent.created_at, DeliveryAgent.id).limit(50),
+         "ix_delivery_agents_available", True),
+    ]
+
+
+def plan_nodes(node):
+    yield node
+    for child in node.get("Plans", []):
+        yield from plan_nodes(child)
+
+
+async def explain(conn, stmt) -> dict:
+    sql = str(stmt.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+    result = await conn.execute(text(f"EXPLAIN (FORMAT JSON) {sql}"))
+    return result.scalar_one()[0]["Plan"]
+
+
+async def verify_indexes() -> bool:
+    engine = create_async_engine(settings.database_url)
+    all_ok = True
+
+    try:
+        async with engine.connect() as conn:
+            await conn.execute(text("SET enable_seqscan = off"))
+
+            for description, stmt, index_name, ordered in hot_queries():
+                nodes = list(plan_nodes(await explain(conn, stmt)))
+                used = {node.get("Index Name") for node in nodes if node["Node Type"] in INDEX_SCANS}
+                sorted_ = any(node["Node Type"] in ("Sort", "Incremental Sort") for node in nodes)
+
+                if index_name not in used:
+                    print(f"✗ {description}: expected {index_name}, plan used {sorted(filter(None, used)) or 'no index'}")
+                    all_ok = False
+                elif ordered and sorted_:
+                    print(f"✗ {description}: {index_name} is scanned but the rows are sorted afterwards")
+                    all_ok = False
+                else:
+                    print(f"✓ {description}: {index_name}")
+    finally:
+        await engine.dispose()
+
+    return all_ok
+
+
+if __name__ == "__main__":
+    success = asyncio.run(verify_indexes())
+    print("\nAll hot queries use their indexes" if success else "\nSome hot queries are not using their indexes")
+    sys.exit(0 if success else 1)